@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark the memory a generator keeps per parsed spec.
+
+Parses the same spec many times, keeping every result alive, and reports the
+memory traced per spec (tracemalloc) for:
+    - models: TestFileParameters with its validated models, IR, parameter cases
+      and condition index, which is what a generator used to keep
+    - render spec: the RenderSpec a generator keeps, the IR plus the sources of
+      the cases, with the models dropped
+
+    python benchmarks/spec_memory_benchmark.py --spec example_templates/api_test.json --specs 500
+"""
+from __future__ import annotations
+
+
+import argparse
+import gc
+from pathlib import Path
+import sys
+import tracemalloc
+from typing import Any, Callable
+
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from generator import TestFileParameters
+
+
+def resident_bytes(build: Callable[[], Any], specs: int) -> float:
+    """
+    Measure the memory held per object when many built objects are kept alive.
+
+    Args:
+        build: Builds one object
+        specs: Number of objects to build and keep
+
+    Returns:
+        float: Traced bytes per object
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [build() for _ in range(specs)]
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return (after - before) / specs
+
+
+def with_models(data: bytes) -> TestFileParameters:
+    """Parse a spec and build everything rendering reads, keeping the models."""
+    params = TestFileParameters.from_json(data)
+    # Builds the IR, the parameter cases and the condition index, which the parameters cache
+    params.compile()
+    return params
+
+
+def main() -> int:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description="Benchmark the memory kept per parsed spec")
+    parser.add_argument("--spec", nargs="+", default=sorted(str(path) for path in Path("example_templates").glob("*.json")),
+                        help="Spec files to measure (default: example_templates/*.json)")
+    parser.add_argument("--specs", type=int, default=500, help="Copies of each spec kept alive (default: 500)")
+    args = parser.parse_args()
+
+    print(f"{'spec':<36} {'models (B)':>11} {'render spec (B)':>16} {'saved':>7}")
+    for spec_path in args.spec:
+        data = Path(spec_path).read_bytes()
+        models = resident_bytes(lambda: with_models(data), args.specs)
+        render_spec = resident_bytes(lambda: TestFileParameters.from_json(data).compile(), args.specs)
+        print(f"{Path(spec_path).name:<36} {models:>11.0f} {render_spec:>16.0f} {1 - render_spec / models:>6.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark single-pass spec validation against the dictionary path.
+
+Builds a large spec with many control variables, materials and imports and
+times, for the same bytes:
+    - dictionary path: json.loads() then TestFileParameters(dict), which
+      validates item by item in Python loops
+    - single pass: TestFileParameters.from_json(bytes), which parses and
+      validates in one call into pydantic-core
+
+It then times specs whose independent variable is a continuous values column
+of ints and floats, e.g. [1, 1.5, 2, ...], through both paths, and the same
+values validated item by item as ValueItem, the path for lists not stored as
+columns.
+
+    python benchmarks/spec_validation_benchmark.py --items 5000 --values 1000000 --repeat 5
+"""
+from __future__ import annotations
+
+
+import argparse
+import json
+import logging
+from pathlib import Path
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+
+from pydantic import TypeAdapter
+
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from generator import TestFileParameters
+from schemas.variable import ValueItem
+
+
+def build_spec(items: int, invalid_every: int = 0) -> Dict[str, Any]:
+    """
+    Build a spec with the given number of control variables, materials and imports.
+
+    Args:
+        items: Number of items in each list
+        invalid_every: Make every n-th item invalid (0 for none)
+
+    Returns:
+        Dict[str, Any]: The spec
+    """
+    def invalid(index: int) -> bool:
+        return bool(invalid_every) and index % invalid_every == 0
+
+    return {
+        "test_file_parameters": {
+            "test_title": "Large Spec",
+            "background": {"orientation": "o", "purpose": "p", "hypothesis": "h"},
+            "independent_variable": {
+                "name": "Input", "description": "Input value", "statistical_type": "DISCRETE",
+                "unit": "units", "values": list(range(items))
+            },
+            "dependent_variable": {
+                "name": "Output", "description": "Output value", "statistical_type": "continuous",
+                "unit": "units", "expected_value": {"value": 1.0}
+            },
+            "control_variables": [
+                {"name": f"Control {index}", "statistical_type": "NOMINAL", "unit": "none"}
+                if invalid(index) else
+                {"name": f"Control {index}", "description": f"Control variable {index}",
+                 "statistical_type": "NOMINAL", "unit": "none", "value": str(index)}
+                for index in range(items)
+            ],
+            "test_materials": [
+                {"name": f"material_{index}", "description": f"Material {index}"}
+                if invalid(index) else
+                {"name": f"material_{index}", "description": f"Material {index}", "type": "library",
+                 "configuration": {"index": index}}
+                for index in range(items)
+            ],
+            "test_procedure": {
+                "steps": [f"Step {index}" for index in range(items)],
+                "data_collection": "Collected",
+                "analysis_technique": "Compared"
+            },
+            "imports": [
+                {"import_funcs": ["x"]} if invalid(index) else {"name": f"module_{index}", "import_funcs": ["x", "y"]}
+                for index in range(items)
+            ]
+        }
+    }
+
+
+def build_values_spec(count: int) -> Dict[str, Any]:
+    """
+    Build a spec whose independent variable is a continuous values column of ints and floats.
+
+    Args:
+        count: Number of values
+
+    Returns:
+        Dict[str, Any]: The spec
+    """
+    spec = build_spec(1)
+    spec["test_file_parameters"]["independent_variable"] = {
+        "name": "Load", "description": "Applied load", "statistical_type": "continuous",
+        "unit": "kg", "values": [index if index % 2 else index + 0.5 for index in range(count)]
+    }
+    return spec
+
+
+def time_call(function: Callable[[], Any], repeat: int) -> List[float]:
+    """Time a call several times, returning seconds per call."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> int:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description="Benchmark single-pass spec validation")
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="Items per list in the generated specs (default: 100 1000 10000)")
+    parser.add_argument("--values", type=int, nargs="*", default=[1_000_000],
+                        help="Values in the continuous values column specs (default: 1000000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per measurement (default: 5)")
+    parser.add_argument("--invalid-every", type=int, default=0,
+                        help="Make every n-th list item invalid, to time the skip path (default: 0, none)")
+    args = parser.parse_args()
+
+    # The skip path logs a warning per invalid item (dictionary path) or list (single pass)
+    logging.disable(logging.WARNING)
+
+    print(f"{'items':>8} {'bytes':>12} {'dict path (ms)':>15} {'single pass (ms)':>17} {'speedup':>8}")
+    for items in args.items:
+        data = json.dumps(build_spec(items, args.invalid_every)).encode("utf-8")
+
+        dict_path = time_call(lambda: TestFileParameters(json.loads(data)), args.repeat)
+        single_pass = time_call(lambda: TestFileParameters.from_json(data), args.repeat)
+
+        dict_ms = statistics.median(dict_path) * 1000
+        single_ms = statistics.median(single_pass) * 1000
+        print(f"{items:>8} {len(data):>12} {dict_ms:>15.2f} {single_ms:>17.2f} {dict_ms / single_ms:>7.1f}x")
+
+    item_by_item = TypeAdapter(List[ValueItem])
+    print()
+    print(f"{'values':>8} {'bytes':>12} {'dict path (ms)':>15} {'single pass (ms)':>17} {'item by item (ms)':>18}")
+    for count in args.values:
+        spec = build_values_spec(count)
+        data = json.dumps(spec).encode("utf-8")
+        values = json.dumps(spec["test_file_parameters"]["independent_variable"]["values"]).encode("utf-8")
+
+        dict_ms = statistics.median(time_call(lambda: TestFileParameters(json.loads(data)), args.repeat)) * 1000
+        single_ms = statistics.median(time_call(lambda: TestFileParameters.from_json(data), args.repeat)) * 1000
+        items_ms = statistics.median(time_call(lambda: item_by_item.validate_json(values), args.repeat)) * 1000
+        print(f"{count:>8} {len(data):>12} {dict_ms:>15.2f} {single_ms:>17.2f} {items_ms:>18.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,610 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Bulk generation of many test files in a single process.
+"""
+from __future__ import annotations
+
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+import cProfile
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+
+from jinja2 import Environment
+from pydantic import BaseModel, Field
+
+
+from configs import Configs
+from expansion import CaseCount
+from fragments import FragmentResolver
+from generator import TestGenerator, create_spec_cache, create_template_engine
+from profiling import start_worker_profile
+from spec_bundle import bundle_specs, is_bundle
+from stage_timing import StageTimings
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.bulk")
+
+
+# Keys from the CLI arguments that select the specs for bulk mode
+BULK_SOURCE_KEYS = ("spec_dir", "spec_glob", "manifest", "jsonl")
+
+# Keys from the CLI arguments that only control bulk mode and never reach Configs
+BULK_ONLY_KEYS = BULK_SOURCE_KEYS + (
+    "jobs", "pipeline", "queue_size", "incremental", "cache_manifest", "prevalidate", "prevalidation_report"
+)
+
+# Harnesses whose templates are compiled up front by every bulk generator
+HARNESSES = ("unittest", "pytest")
+
+
+class BulkJob(BaseModel):
+    """
+    A single spec to generate as part of a bulk run.
+
+    Any field left as None falls back to the defaults given on the command line.
+
+    Attributes:
+        test_parameter_json: The file path to the test parameters JSON file, or to an entry of a spec bundle.
+            None when the spec is passed in directly, e.g. from a JSONL stream.
+        name: Name of the test. Defaults to the stem of the spec file.
+        description: A short description of the test
+        harness: Which python testing harness to use
+        output_dir: Path to output directory for the test
+        has_fixtures: Whether a test needs fixtures in order to run
+        parametrized: Whether to generate parametrized tests
+        test_params: Parameters for conditional test generation
+    """
+    test_parameter_json: Optional[Path] = Field(default=None, description="The file path to the test parameters JSON file")
+    name: Optional[str] = Field(default=None, description="Name of the test")
+    description: Optional[str] = Field(default=None, description="A short description of the test")
+    harness: Optional[str] = Field(default=None, description="Which python testing harness to use")
+    output_dir: Optional[Path] = Field(default=None, description="Path to output directory for the test")
+    has_fixtures: Optional[bool] = Field(default=None, description="Whether a test needs fixtures in order to run")
+    parametrized: Optional[bool] = Field(default=None, description="Whether to generate parametrized tests")
+    test_params: Optional[Dict[str, Any]] = Field(default=None, description="Parameters for conditional test generation")
+
+    @property
+    def display_name(self) -> str:
+        """The test name, or the spec file stem if no name was given."""
+        if self.name:
+            return self.name
+        return self.test_parameter_json.stem if self.test_parameter_json else "spec"
+
+
+class BulkResult(BaseModel):
+    """
+    Outcome of generating a single spec in a bulk run.
+
+    Attributes:
+        name: Name of the test
+        spec_path: The spec file (or stream) the test was generated from
+        line_number: Line of the spec within a JSONL stream, if it came from one
+        output_path: Path of the written test file, if generation succeeded
+        error: Error message, if generation failed
+        elapsed: Seconds spent generating this spec
+        skipped: Whether generation was skipped because the output was already up to date
+        timings: Seconds spent in each stage of generation, if the run was timed
+    """
+    name: str
+    spec_path: Optional[Path] = None
+    line_number: Optional[int] = None
+    output_path: Optional[Path] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    skipped: bool = False
+    timings: Dict[str, float] = Field(default_factory=dict)
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the test file was generated without errors."""
+        return self.error is None
+
+    @property
+    def source(self) -> str:
+        """Where the spec came from, as 'path' or 'path:line'."""
+        if self.line_number is not None:
+            return f"{self.spec_path}:{self.line_number}"
+        return str(self.spec_path)
+
+
+class BulkSummary(BaseModel):
+    """
+    Per-run summary of a bulk generation.
+
+    Attributes:
+        results: Result for every job, in job order
+        elapsed: Wall-clock seconds for the whole run
+    """
+    results: List[BulkResult] = Field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def succeeded(self) -> List[BulkResult]:
+        """Results of jobs that generated successfully."""
+        return [result for result in self.results if result.succeeded]
+
+    @property
+    def failed(self) -> List[BulkResult]:
+        """Results of jobs that failed."""
+        return [result for result in self.results if not result.succeeded]
+
+    def log(self) -> None:
+        """Log the summary, listing every failed spec."""
+        for result in self.failed:
+            logger.error(f"FAILED {result.name} ({result.source}): {result.error}")
+        unchanged = sum(1 for result in self.results if result.skipped)
+        logger.info(
+            f"Bulk generation complete: {len(self.succeeded)} succeeded ({unchanged} unchanged), "
+            f"{len(self.failed)} failed, {len(self.results)} total in {self.elapsed:.2f}s"
+        )
+
+
+def _load_manifest(manifest: Path) -> List[BulkJob]:
+    """
+    Load jobs from a manifest file.
+
+    The manifest is a JSON list of job objects, or an object with a "jobs" list.
+    Relative spec paths are resolved against the manifest's directory.
+
+    Args:
+        manifest: Path to the manifest file
+
+    Returns:
+        List[BulkJob]: Jobs listed in the manifest
+    """
+    with open(manifest, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+
+    if isinstance(data, dict):
+        data = data.get("jobs", [])
+    if not isinstance(data, list):
+        raise ValueError(f"Manifest {manifest} must contain a list of jobs")
+
+    jobs = []
+    for job_data in data:
+        job = BulkJob.model_validate(job_data)
+        if job.test_parameter_json is None:
+            raise ValueError(f"Every job in manifest {manifest} needs a test_parameter_json")
+        if not job.test_parameter_json.is_absolute():
+            job.test_parameter_json = manifest.parent / job.test_parameter_json
+        jobs.append(job)
+    return jobs
+
+
+def discover_jobs(
+    spec_dir: Optional[str] = None,
+    spec_glob: Optional[str] = None,
+    manifest: Optional[str] = None
+) -> List[BulkJob]:
+    """
+    Collect the jobs for a bulk run from a spec directory, a glob, or a manifest.
+
+    A spec bundle stands in for a directory of specs: given as the spec directory
+    or matched by the glob, it contributes a job for each of its entries.
+
+    Args:
+        spec_dir: Directory whose *.json files are all specs, or a spec bundle
+        spec_glob: Glob pattern matching spec files or spec bundles (recursive ** is supported)
+        manifest: JSON file listing jobs with their name, description and harness
+
+    Returns:
+        List[BulkJob]: Jobs in a deterministic order
+    """
+    jobs: List[BulkJob] = []
+
+    if spec_dir:
+        directory = Path(spec_dir)
+        if is_bundle(directory):
+            jobs.extend(BulkJob(test_parameter_json=path) for path in bundle_specs(directory))
+        elif not directory.is_dir():
+            raise ValueError(f"Spec directory does not exist: {directory}")
+        else:
+            jobs.extend(BulkJob(test_parameter_json=path) for path in sorted(directory.glob("*.json")))
+
+    if spec_glob:
+        paths = sorted(Path(path) for path in glob.glob(spec_glob, recursive=True))
+        for path in paths:
+            if is_bundle(path):
+                jobs.extend(BulkJob(test_parameter_json=spec_path) for spec_path in bundle_specs(path))
+            elif path.is_file():
+                jobs.append(BulkJob(test_parameter_json=path))
+
+    if manifest:
+        jobs.extend(_load_manifest(Path(manifest)))
+
+    return jobs
+
+
+class BulkGenerator:
+    """
+    Generate test files for many specs in one process.
+
+    The Jinja2 environment, and therefore every compiled template, is built once
+    and shared by all the jobs in the run, as are the fragments specs refer to
+    and the validated spec cache.
+    """
+
+    def __init__(
+        self,
+        defaults: Dict[str, Any],
+        template_engine: Optional[Environment] = None,
+        timed: bool = False,
+        profile_dir: Optional[Path] = None
+    ):
+        """
+        Initialize the bulk generator.
+
+        Args:
+            defaults: Configuration values shared by every job (usually the CLI arguments)
+            template_engine: Pre-built Jinja2 environment. If None, one is created.
+            timed: Whether to time the stages of every job, into BulkResult.timings
+            profile_dir: Worker directory of the RunProfile of the run, which the worker
+                processes of run_parallel dump their profiles into. If None, they are not profiled.
+        """
+        self.defaults = {
+            key: value for key, value in defaults.items()
+            if key in Configs.model_fields and value is not None
+        }
+        self.template_engine = template_engine if template_engine is not None else create_template_engine()
+        self.fragment_resolver = FragmentResolver()
+        self.spec_cache = create_spec_cache(
+            self.defaults.get("spec_cache_dir"),
+            self.defaults.get("spec_cache_size", Configs.model_fields["spec_cache_size"].default)
+        )
+        self.timed = timed
+        self.profile_dir = profile_dir
+
+    def preload_templates(self) -> None:
+        """Compile the template for every harness so no job pays for it."""
+        if self.template_engine is None:
+            return
+        for harness in HARNESSES:
+            try:
+                self.template_engine.get_template(f"{harness}_test.py.j2")
+            except Exception as e:
+                logger.warning(f"Error preloading template for {harness}: {e}")
+
+    def build_config(self, job: BulkJob) -> Configs:
+        """
+        Build the configuration for a single job.
+
+        Args:
+            job: The job to configure
+
+        Returns:
+            Configs: Validated configuration for the job
+        """
+        config_data = dict(self.defaults)
+        config_data.update(job.model_dump(exclude_none=True, exclude={"test_parameter_json"}))
+        config_data["name"] = job.display_name
+        if job.test_parameter_json is not None:
+            config_data["json_file_path"] = job.test_parameter_json
+        if not config_data.get("description"):
+            config_data["description"] = f"Tests for {job.display_name}"
+
+        output_dir = Path(config_data.get("output_dir", "tests"))
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        return Configs.model_validate(config_data)
+
+    def render_job(
+        self,
+        job: BulkJob,
+        json_data: Optional[Union[Dict[str, Any], bytes]] = None,
+        timings: Optional[StageTimings] = None
+    ) -> tuple[Path, str]:
+        """
+        Validate and render a single job without writing it.
+
+        Args:
+            job: The job to render
+            json_data: Already-loaded test parameters, as a dictionary or raw JSON bytes.
+                If None, they are read from the spec file.
+            timings: Timings to record the stages of the job into. If None, they are not timed.
+
+        Returns:
+            tuple[Path, str]: Output path and rendered test file content
+        """
+        config = self.build_config(job)
+        generator = TestGenerator(
+            config, template_engine=self.template_engine, fragment_resolver=self.fragment_resolver,
+            timings=timings, spec_cache=self.spec_cache
+        )
+        content = generator.generate_test_file(json_data)
+        return generator.output_path, content
+
+    def write_job(
+        self,
+        job: BulkJob,
+        json_data: Optional[Dict[str, Any]] = None,
+        timings: Optional[StageTimings] = None
+    ) -> Path:
+        """
+        Validate and render a single job, streaming the output straight to disk.
+
+        Args:
+            job: The job to render
+            json_data: Already-loaded test parameters. If None, they are read from the spec file.
+            timings: Timings to record the stages of the job into. If None, they are not timed.
+
+        Returns:
+            Path: Path of the written test file
+        """
+        config = self.build_config(job)
+        generator = TestGenerator(
+            config, template_engine=self.template_engine, fragment_resolver=self.fragment_resolver,
+            timings=timings, spec_cache=self.spec_cache
+        )
+        return generator.generate_to_file(json_data)
+
+    def job_timings(self) -> Optional[StageTimings]:
+        """Fresh timings for a job if the run is timed, otherwise None."""
+        return StageTimings() if self.timed else None
+
+    def count_job(self, job: BulkJob) -> CaseCount:
+        """
+        Count the cases a single job expands to, without rendering it.
+
+        Args:
+            job: The job to count
+
+        Returns:
+            CaseCount: Number of cases in the configured mode and in the full cartesian product
+        """
+        config = self.build_config(job)
+        return TestGenerator(
+            config, template_engine=self.template_engine, fragment_resolver=self.fragment_resolver, spec_cache=self.spec_cache
+        ).count_cases()
+
+    def run_job(self, job: BulkJob) -> BulkResult:
+        """
+        Generate and write the test file for a single job.
+
+        Errors are captured in the result rather than raised, so one bad spec
+        does not stop the rest of the run.
+
+        Args:
+            job: The job to run
+
+        Returns:
+            BulkResult: Outcome of the job
+        """
+        start = time.perf_counter()
+        timings = self.job_timings()
+        try:
+            output_path = self.write_job(job, timings=timings)
+            return BulkResult(
+                name=job.display_name,
+                spec_path=job.test_parameter_json,
+                output_path=output_path,
+                elapsed=time.perf_counter() - start,
+                timings=timings.seconds if timings is not None else {}
+            )
+        except Exception as e:
+            logger.debug(f"Error generating {job.test_parameter_json}", exc_info=True)
+            return BulkResult(
+                name=job.display_name,
+                spec_path=job.test_parameter_json,
+                error=f"{type(e).__name__}: {e}",
+                elapsed=time.perf_counter() - start,
+                timings=timings.seconds if timings is not None else {}
+            )
+
+    def run(self, jobs: Iterable[BulkJob]) -> BulkSummary:
+        """
+        Run every job in order.
+
+        Args:
+            jobs: Jobs to run
+
+        Returns:
+            BulkSummary: Results of the run
+        """
+        start = time.perf_counter()
+        results = [self.run_job(job) for job in jobs]
+        return BulkSummary(results=results, elapsed=time.perf_counter() - start)
+
+    def run_parallel(self, jobs: Iterable[BulkJob], workers: int) -> BulkSummary:
+        """
+        Run every job across a pool of worker processes.
+
+        Each worker builds its own bulk generator (template environment and
+        pydantic models) once and reuses it for all the jobs it receives.
+        Results come back in job order regardless of completion order.
+
+        A spec that crashes its worker does not stop the run: jobs that never
+        started are retried in a fresh pool, and jobs that were running when the
+        pool broke are retried one at a time so only the culprit is reported.
+        If a pool and its retry both break before starting any job, e.g. because
+        the workers fail to start, the jobs left are reported as failed. Every
+        job gets a result, in job order.
+
+        Args:
+            jobs: Jobs to run
+            workers: Number of worker processes
+
+        Returns:
+            BulkSummary: Results of the run
+        """
+        start = time.perf_counter()
+        job_list = list(jobs)
+        results: List[Optional[BulkResult]] = [None] * len(job_list)
+
+        pending = list(range(len(job_list)))
+        suspects: List[int] = []
+        stalled = False
+        while pending:
+            not_started, crashed = self._run_in_pool(job_list, pending, results, workers)
+            suspects.extend(crashed)
+            if len(not_started) == len(pending):
+                # No job started: workers die before taking any, so give up after one retry
+                if stalled:
+                    break
+                stalled = True
+            else:
+                stalled = False
+            pending = not_started
+
+        # Run each job that was in flight during a crash alone, so the culprit is isolated
+        for index in suspects:
+            _, crashed = self._run_in_pool(job_list, [index], results, 1)
+            if crashed:
+                results[index] = self._failed_result(job_list[index], "Worker process crashed while generating this spec")
+
+        # Jobs whose worker processes never started them still get a result, so results line up with jobs
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = self._failed_result(job_list[index], "Worker process exited before starting this spec")
+
+        return BulkSummary(results=results, elapsed=time.perf_counter() - start)
+
+    @staticmethod
+    def _failed_result(job: BulkJob, error: str) -> BulkResult:
+        """A result for a job that failed outside the generator."""
+        return BulkResult(name=job.display_name, spec_path=job.test_parameter_json, error=error)
+
+    def _run_in_pool(
+        self,
+        jobs: List[BulkJob],
+        indices: List[int],
+        results: List[Optional[BulkResult]],
+        workers: int
+    ) -> tuple[List[int], List[int]]:
+        """
+        Run the given jobs in a fresh process pool, storing results in place.
+
+        Args:
+            jobs: All jobs in the run
+            indices: Indices of the jobs to run
+            results: Result slots, indexed like jobs
+            workers: Number of worker processes
+
+        Returns:
+            tuple[List[int], List[int]]: Indices that never started, and indices
+                that were running when a worker crashed
+        """
+        started = multiprocessing.Array("b", len(jobs), lock=False)
+        unfinished: List[int] = []
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.defaults, started, self.timed, self.profile_dir)
+        ) as executor:
+            futures = []
+            for position, index in enumerate(indices):
+                try:
+                    futures.append((index, executor.submit(_run_worker_job, index, jobs[index])))
+                except BrokenProcessPool:
+                    # The pool broke while jobs were still being submitted
+                    unfinished.extend(indices[position:])
+                    break
+            for index, future in futures:
+                try:
+                    results[index] = future.result()
+                except BrokenProcessPool:
+                    unfinished.append(index)
+
+        not_started = [index for index in unfinished if not started[index]]
+        crashed = [index for index in unfinished if started[index]]
+        if crashed:
+            logger.warning(f"A worker process crashed; retrying {len(crashed)} in-flight specs in isolation")
+        return not_started, crashed
+
+
+def resolve_worker_count(jobs: int) -> int:
+    """
+    Turn the --jobs value into a number of worker processes.
+
+    Args:
+        jobs: Requested number of workers. Zero or less means one per CPU core.
+
+    Returns:
+        int: Number of worker processes to start
+    """
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+# Per-process state of a pool worker, set once by _init_worker
+_worker_generator: Optional[BulkGenerator] = None
+_worker_started: Any = None
+_worker_profiler: Optional[cProfile.Profile] = None
+
+
+def _init_worker(
+    defaults: Dict[str, Any],
+    started: Any = None,
+    timed: bool = False,
+    profile_dir: Optional[Path] = None
+) -> None:
+    """
+    Build the bulk generator a worker process reuses for all its jobs, with its
+    own validated spec cache.
+
+    Args:
+        defaults: Configuration values shared by every job
+        started: Shared flags a worker sets when it begins a job, if tracked
+        timed: Whether to time the stages of every job
+        profile_dir: Directory to dump the profile of the worker's jobs into when it exits, if profiled
+    """
+    global _worker_generator, _worker_started, _worker_profiler
+    _worker_generator = BulkGenerator(defaults, timed=timed)
+    _worker_generator.preload_templates()
+    _worker_started = started
+    _worker_profiler = start_worker_profile(profile_dir) if profile_dir is not None else None
+
+
+def _worker_profile() -> Any:
+    """Context manager profiling a job of the worker, if the run is profiled."""
+    return _worker_profiler if _worker_profiler is not None else nullcontext()
+
+
+def _run_worker_job(index: int, job: BulkJob) -> BulkResult:
+    """
+    Run a single job inside a worker process.
+
+    Args:
+        index: Position of the job in the run
+        job: The job to run
+
+    Returns:
+        BulkResult: Outcome of the job
+    """
+    if _worker_generator is None:
+        raise RuntimeError("Worker process was not initialized")
+    _worker_started[index] = 1
+    with _worker_profile():
+        return _worker_generator.run_job(job)
+
+
+def _render_worker_job(job: BulkJob, data: bytes) -> tuple[Path, str, Dict[str, float]]:
+    """
+    Parse, validate and render a single job inside a worker process.
+
+    Args:
+        job: The job to render
+        data: Raw bytes of the spec file
+
+    Returns:
+        tuple[Path, str, Dict[str, float]]: Output path, rendered test file content,
+            and the seconds spent in each stage if the run is timed
+    """
+    if _worker_generator is None:
+        raise RuntimeError("Worker process was not initialized")
+    timings = _worker_generator.job_timings()
+    with _worker_profile():
+        output_path, content = _worker_generator.render_job(job, data, timings)
+    return output_path, content, timings.seconds if timings is not None else {}
@@ -7,18 +7,35 @@ from __future__ import annotations
 
 
 import argparse
+from contextlib import nullcontext
+from functools import partial
+import json
 import logging
 import sys
+import time
 from pathlib import Path
 from typing import Dict, Any, Optional
 
 
+from jinja2 import Environment
 from pydantic import ValidationError
 
 
 from __version__ import __version__
+from bulk import (
+    BULK_ONLY_KEYS, BULK_SOURCE_KEYS, BulkGenerator, BulkJob, BulkSummary, discover_jobs, resolve_worker_count
+)
 from configs import Configs
 from generator import TestGenerator
+from jsonl_stream import generate_from_jsonl
+from pipeline import GenerationPipeline
+from profiling import RunProfile
+from render_cache import MANIFEST_FILE_NAME, RenderCache
+from spec_bundle import is_bundle, spec_file
+from spec_schema import merge_prevalidated, prevalidate_jobs
+from stage_timing import DEFAULT_TOP, StageTimings, TimingReport
+from variants import expand_test_params_matrix
+from watch import WatchSession, glob_root
 
 
 # Set up logging
@@ -37,12 +54,28 @@ class CLI:
     Handles command-line arguments, configuration loading, and pipeline orchestration.
     """
 
-    def __init__(self) -> None:
-        """Initialize the CLI with an argument parser."""
+    def __init__(self, template_engine: Optional[Environment] = None) -> None:
+        """
+        Initialize the CLI with an argument parser.
+
+        Args:
+            template_engine: Pre-built Jinja2 environment to share across runs. If None,
+                each generator creates its own.
+        """
+        self.template_engine = template_engine
         self.parser = self._create_parser()
         self.args: Optional[argparse.Namespace] = None
         self.configs: Optional[Configs] = None
         self.generator: Optional[TestGenerator] = None
+        self.bulk_jobs: Optional[list[BulkJob]] = None
+        self.bulk_defaults: Dict[str, Any] = {}
+        self.bulk_args: Dict[str, Any] = {}
+        self.watch = False
+        self.dry_run = False
+        self.test_params_variants: Optional[list[Dict[str, Any]]] = None
+        self.timing_report: Optional[TimingReport] = None
+        self.profile_path: Optional[Path] = None
+        self.run_profile: Optional[RunProfile] = None
 
     def _create_parser(self) -> argparse.ArgumentParser:
         """
@@ -53,13 +86,67 @@ class CLI:
         """
         parser = argparse.ArgumentParser(description="Generate test files based on JSON input.")
         parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
-        parser.add_argument("--name", type=str, required=True, help="Test name")
+        parser.add_argument("--name", type=str, help="Test name (required unless running in bulk mode)")
         parser.add_argument("--description", type=str, help="A short description of the test")
         parser.add_argument(
-            "--test_parameter_json", type=str, required=True,
-            help="The file path to the test parameters JSON file"
+            "--test_parameter_json", type=str,
+            help="The file path to the test parameters JSON file, or to a spec bundle entry such as "
+            "'specs.specbundle/login.json' (required unless running in bulk mode)"
         )
 
+        bulk_group = parser.add_argument_group("bulk mode", "Generate many test files in one process")
+        bulk_group.add_argument(
+            "--spec-dir", type=str, default=None,
+            help="Directory of test parameter JSON files, or a spec bundle, to generate in bulk"
+        )
+        bulk_group.add_argument(
+            "--spec-glob", type=str, default=None,
+            help="Glob pattern matching test parameter JSON files or spec bundles to generate in bulk (e.g. 'specs/**/*.json')"
+        )
+        bulk_group.add_argument(
+            "--manifest", type=str, default=None,
+            help="JSON file listing bulk jobs with their test_parameter_json, name, description and harness"
+        )
+        bulk_group.add_argument(
+            "--jsonl", type=str, default=None,
+            help="JSONL stream of specs, one test_file_parameters object per line; '-' reads stdin"
+        )
+        bulk_group.add_argument(
+            "--jobs", type=int, default=1,
+            help="Number of worker processes for bulk mode; 0 uses every CPU core (default: 1)"
+        )
+        bulk_group.add_argument(
+            "--pipeline", action="store_true", default=False,
+            help="Run bulk mode as a staged pipeline: I/O threads for reading and writing, "
+                 "--jobs worker processes for validation and rendering (default: false)"
+        )
+        bulk_group.add_argument(
+            "--queue-size", type=int, default=64,
+            help="Maximum number of specs held between pipeline stages (default: 64)"
+        )
+        bulk_group.add_argument(
+            "--incremental", action="store_true", default=False,
+            help="Skip specs whose content, template and settings are unchanged since the last run (default: false)"
+        )
+        bulk_group.add_argument(
+            "--cache-manifest", type=str, default=None,
+            help=f"Render cache manifest for --incremental (default: <output_dir>/{MANIFEST_FILE_NAME})"
+        )
+        bulk_group.add_argument(
+            "--prevalidate", action="store_true", default=False,
+            help="Check every spec against the spec JSON Schema first and reject invalid specs "
+                 "before any model is built (default: false)"
+        )
+        bulk_group.add_argument(
+            "--prevalidation-report", type=str, default=None,
+            help="Write the errors of every spec rejected by --prevalidate to this JSON file (implies --prevalidate)"
+        )
+
+        parser.add_argument(
+            "--watch", action="store_true", default=False,
+            help="After generating, keep watching the specs and templates and regenerate "
+                 "the affected outputs whenever they change (default: false)"
+        )
         parser.add_argument(
             "--output_dir", type=str, default="./tests",
             help="Path to output directory for tests (default: ./tests)"
@@ -80,13 +167,69 @@ class CLI:
             "--parametrized", action="store_true", default=False,
             help="Whether to generate parametrized tests (default: false)"
         )
+        parser.add_argument(
+            "--parameter-table", type=str, default="inline", choices=["inline", "jsonl", "npy"],
+            help="Where the cases of a parametrized test go: inline in the test file, or a sidecar "
+                 "table next to it that the test loads when collected. npy is used for numeric "
+                 "continuous/discrete variables when NumPy is installed, jsonl otherwise (default: inline)"
+        )
+        parser.add_argument(
+            "--expand", dest="expansion", type=str, default="none", choices=["none", "cartesian", "covering"],
+            help="Combine parametrized cases with the control variables that have values: every combination "
+                 "(cartesian) or a covering array that hits every combination of --strength values (default: none)"
+        )
+        parser.add_argument(
+            "--strength", dest="expansion_strength", type=int, default=2,
+            help="Strength t of the covering array for --expand covering; 2 is pairwise (default: 2)"
+        )
+        parser.add_argument(
+            "--max-cases", type=int, default=None,
+            help="Fail any test that expands to more cases than this"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", default=False,
+            help="Only report how many cases each test expands to, without generating anything"
+        )
+        parser.add_argument(
+            "--timings", action="store_true", default=False,
+            help="Time the load, parse, template, render and write stages of every spec, and print the slowest "
+                 "specs and the percentiles of each stage at the end of the run (default: false)"
+        )
+        parser.add_argument(
+            "--timings-file", type=str, default=None,
+            help="Export the stage timings of every spec to this file, as CSV if it ends in .csv "
+                 "and as JSON otherwise (implies --timings)"
+        )
+        parser.add_argument(
+            "--timings-top", type=int, default=DEFAULT_TOP,
+            help=f"Number of specs in the slowest specs table of --timings (default: {DEFAULT_TOP})"
+        )
+        parser.add_argument(
+            "--profile", type=str, default=None,
+            help="Profile the generation run with cProfile, merging the profiles of worker processes, and write "
+                 "it to this .pstats file, with flame graph input (collapsed stacks) next to it in a .collapsed file"
+        )
         parser.add_argument(
             "--debug", action="store_true", default=False,
             help="Enable debug mode with enhanced output (default: false)"
         )
         parser.add_argument(
             "--test-params", type=str, default=None,
-            help="JSON string of parameters for conditional test generation (e.g. '{\"input_type\": \"string\"}')"
+            help="JSON string of parameters for conditional test generation (e.g. '{\"input_type\": \"string\"}'), "
+                 "or a JSON list of them to generate one variant per set"
+        )
+        parser.add_argument(
+            "--test-params-matrix", type=str, default=None,
+            help="JSON object of test parameters mapped to lists of values; one variant is generated per combination "
+                 "(e.g. '{\"response_type\": [\"json\", \"xml\"]}')"
+        )
+        parser.add_argument(
+            "--spec-cache", dest="spec_cache_dir", type=str, default=None,
+            help="Directory of an on-disk cache of validated specs, so unchanged specs skip validation on reruns"
+        )
+        parser.add_argument(
+            "--spec-cache-size", type=int, default=256,
+            help="Size cap of the validated spec cache in MB; least recently used entries are evicted (default: 256)"
         )
         parser.add_argument(
             "--docstring-style", type=str, default="google",
@@ -107,9 +250,23 @@ class CLI:
         """
         self.args = self.parser.parse_args(args)
 
+        # Single-file mode needs a name and a spec; bulk mode takes them from each job
+        if not self._is_bulk_mode(vars(self.args)):
+            missing = [
+                flag for flag, value in (("--name", self.args.name), ("--test_parameter_json", self.args.test_parameter_json))
+                if not value
+            ]
+            if missing:
+                self.parser.error(f"the following arguments are required: {', '.join(missing)}")
+
         # Convert Namespace to dict for Pydantic
         return vars(self.args)
 
+    @staticmethod
+    def _is_bulk_mode(args_dict: Dict[str, Any]) -> bool:
+        """Whether the arguments select bulk generation."""
+        return any(args_dict.get(key) for key in BULK_SOURCE_KEYS)
+
     def validate_config(self, args_dict: Dict[str, Any]) -> bool:
         """
         Validate configuration using Pydantic models.
@@ -128,12 +285,39 @@ class CLI:
             # Parse JSON test parameters if provided
             if "test_params" in args_dict and args_dict["test_params"]:
                 try:
-                    import json
                     args_dict["test_params"] = json.loads(args_dict["test_params"])
                 except json.JSONDecodeError as e:
                     logger.error(f"Invalid JSON in test-params: {e}")
                     return False
 
+            # A list or matrix of test parameters generates one variant per set
+            if args_dict.get("test_params_matrix"):
+                if isinstance(args_dict.get("test_params"), list):
+                    logger.error("--test-params cannot be a list together with --test-params-matrix")
+                    return False
+                try:
+                    matrix = json.loads(args_dict.pop("test_params_matrix"))
+                except json.JSONDecodeError as e:
+                    logger.error(f"Invalid JSON in test-params-matrix: {e}")
+                    return False
+                if not isinstance(matrix, dict):
+                    logger.error("--test-params-matrix must be a JSON object")
+                    return False
+                # Parameters given with --test-params are the same in every variant
+                self.test_params_variants = expand_test_params_matrix({**(args_dict.get("test_params") or {}), **matrix})
+                args_dict["test_params"] = None
+            elif isinstance(args_dict.get("test_params"), list):
+                self.test_params_variants = args_dict["test_params"]
+                args_dict["test_params"] = None
+            args_dict.pop("test_params_matrix", None)
+            if self.test_params_variants is not None:
+                if not all(isinstance(test_params, dict) for test_params in self.test_params_variants):
+                    logger.error("Every set of test parameters must be a JSON object")
+                    return False
+                if self._is_bulk_mode(args_dict) or args_dict.get("watch"):
+                    logger.error("Test parameter variants cannot be used in bulk mode or with --watch")
+                    return False
+
             # If output_dir is provided, ensure it exists before validation
             if 'output_dir' in args_dict and args_dict['output_dir']:
                 output_dir = Path(args_dict['output_dir'])
@@ -146,16 +330,144 @@ class CLI:
                 logger.setLevel(logging.DEBUG)
                 logger.debug("Debug mode enabled with enhanced logging")
 
+            self.watch = bool(args_dict.get("watch"))
+            if self.watch and args_dict.get("jsonl"):
+                logger.error("--watch cannot be used with --jsonl")
+                return False
+            if args_dict.get("prevalidation_report"):
+                args_dict["prevalidate"] = True
+            if args_dict.get("prevalidate") and (self.watch or args_dict.get("jsonl") or not self._is_bulk_mode(args_dict)):
+                logger.error("--prevalidate needs --spec-dir, --spec-glob or --manifest, and cannot be used with --watch")
+                return False
+            self.dry_run = bool(args_dict.get("dry_run"))
+            if self.dry_run and (self.watch or args_dict.get("jsonl")):
+                logger.error("--dry-run cannot be used with --watch or --jsonl")
+                return False
+            if args_dict.get("timings_file"):
+                args_dict["timings"] = True
+            if args_dict.get("timings") and not self.dry_run:
+                self.timing_report = TimingReport(
+                    top=args_dict.get("timings_top", DEFAULT_TOP),
+                    export_path=args_dict.get("timings_file")
+                )
+            if args_dict.get("profile") and not self.dry_run:
+                self.profile_path = Path(args_dict["profile"])
+
+            if self._is_bulk_mode(args_dict):
+                self.bulk_jobs = discover_jobs(
+                    spec_dir=args_dict.get("spec_dir"),
+                    spec_glob=args_dict.get("spec_glob"),
+                    manifest=args_dict.get("manifest")
+                )
+                self.bulk_defaults = {
+                    key: value for key, value in args_dict.items()
+                    if key not in BULK_ONLY_KEYS
+                }
+                self.bulk_args = {
+                    key: value for key, value in args_dict.items()
+                    if key in BULK_ONLY_KEYS
+                }
+                if not args_dict.get("jsonl"):
+                    logger.info(f"Found {len(self.bulk_jobs)} specs for bulk generation")
+                return True
+
             self.configs = Configs.model_validate(args_dict)
             return True
         except ValidationError as e:
             logger.error(f"Configuration validation error: {e}")
             return False
+        except (OSError, ValueError) as e:
+            logger.error(f"Error collecting bulk jobs: {e}")
+            return False
 
     def run(self) -> int:
         """
         Run the test generator pipeline.
 
+        Returns:
+            int: Exit code (0 for success, non-zero for errors)
+        """
+        if self.dry_run:
+            return self._dry_run()
+        if self.profile_path is not None:
+            self.run_profile = RunProfile(self.profile_path)
+        with self.run_profile if self.run_profile is not None else nullcontext():
+            exit_code = self._run_bulk() if self.bulk_jobs is not None else self._run_single()
+        if self.run_profile is not None:
+            self._write_profile()
+        if self.timing_report is not None:
+            self._report_timings()
+        if self.watch:
+            return self._watch()
+        return exit_code
+
+    def _dry_run(self) -> int:
+        """
+        Report how many cases each test expands to, without generating anything.
+
+        Returns:
+            int: Exit code (non-zero if a spec failed or a test exceeds --max-cases)
+        """
+        counts = []
+        failed = 0
+        if self.bulk_jobs is not None:
+            bulk_generator = BulkGenerator(self.bulk_defaults, self.template_engine)
+            for job in self.bulk_jobs:
+                try:
+                    counts.append(bulk_generator.count_job(job))
+                except (OSError, ValueError) as e:
+                    logger.error(f"Error counting cases of {job.display_name}: {e}")
+                    failed += 1
+        elif self.configs is not None:
+            try:
+                counts.append(TestGenerator(self.configs, template_engine=self.template_engine).count_cases())
+            except (OSError, ValueError) as e:
+                logger.error(f"Error counting cases: {e}")
+                failed += 1
+
+        lines = [count.describe() for count in counts]
+        lines.append(f"Total: {sum(count.cases for count in counts)} cases in {len(counts)} tests")
+        self._write_report("\n".join(lines))
+
+        over_cap = [count.name for count in counts if count.over_cap]
+        if over_cap:
+            logger.error(f"{len(over_cap)} tests exceed --max-cases: {', '.join(over_cap)}")
+        return 1 if failed or over_cap else 0
+
+    def _report_timings(self) -> None:
+        """Print the stage timings of the run, and finish their export."""
+        if self.bulk_jobs is None and self.generator is not None:
+            self.timing_report.add(self.configs.name, str(self.configs.json_file_path), self.generator.timings.seconds)
+        self.timing_report.close()
+        self._write_report(self.timing_report.format())
+
+    @staticmethod
+    def _write_report(report: str) -> None:
+        """
+        Write a report of the run to standard output, without the log format.
+
+        sys.stdout is looked up on every call, so a daemon request that redirects it
+        captures the report together with the log output of the run.
+
+        Args:
+            report: The report, one or more lines
+        """
+        sys.stdout.write(f"{report}\n")
+        sys.stdout.flush()
+
+    def _write_profile(self) -> None:
+        """Write the profile of the run, merged with those of its workers."""
+        try:
+            pstats_path, collapsed_path = self.run_profile.write()
+        except OSError as e:
+            logger.error(f"Error writing the profile: {e}")
+            return
+        self._write_report(f"Profile written to {pstats_path}, and its collapsed stacks to {collapsed_path}")
+
+    def _run_single(self) -> int:
+        """
+        Generate a single test file from the validated configuration.
+
         Returns:
             int: Exit code (0 for success, non-zero for errors)
         """
@@ -170,29 +482,38 @@ class CLI:
 
             # Initialize generator
             if self.configs is not None:
-                self.generator = TestGenerator(self.configs)
+                self.generator = TestGenerator(
+                    self.configs,
+                    template_engine=self.template_engine,
+                    timings=StageTimings() if self.timing_report is not None else None
+                )
             else:
                 logger.error("Configuration is not available")
                 return 1
 
             # Generate and save test file
             logger.debug("Starting test file generation")
-            if self.generator is not None:
-                test_file = self.generator.generate_test_file()
-            else:
+            if self.generator is None:
                 logger.error("Generator was not initialized properly")
                 return 1
 
-            # Log detailed information in debug mode
-            if self.configs and self.configs.debug:
+            if self.test_params_variants is not None:
+                # Every variant is generated from one parse of the spec
+                output_paths = self.generator.generate_variants(self.test_params_variants)
+                logger.info(f"{len(output_paths)} test variants generated successfully in {self.configs.output_dir}")
+                return 0
+
+            if self.configs.debug:
+                test_file = self.generator.generate_test_file()
+
+                # Log detailed information in debug mode
                 lines = test_file.count('\n')
                 logger.debug(f"Generated test file with {lines} lines")
 
-            if self.generator is not None:
                 output_path = self.generator.write_test_file(test_file)
             else:
-                logger.error("Generator was not initialized properly")
-                return 1
+                # Stream the render straight to disk so large outputs are never held in memory
+                output_path = self.generator.generate_to_file()
 
             # Log additional details in debug mode
             if self.configs and self.configs.debug:
@@ -212,16 +533,133 @@ class CLI:
                 traceback.print_exc()
             return 1
 
+    def _run_bulk(self) -> int:
+        """
+        Run the test generator over every bulk job, sharing one template environment.
+
+        Returns:
+            int: Exit code (0 if every spec succeeded, non-zero otherwise)
+        """
+        if self.bulk_defaults.get("debug"):
+            logger.setLevel(logging.DEBUG)
+
+        if self.bulk_args.get("jsonl"):
+            stream_summary = generate_from_jsonl(
+                self.bulk_args["jsonl"],
+                BulkGenerator(self.bulk_defaults, self.template_engine, timed=self.timing_report is not None),
+                self.timing_report
+            )
+            stream_summary.log()
+            return 0 if not stream_summary.failed else 1
+
+        start = time.perf_counter()
+        jobs = self.bulk_jobs or []
+        slots = None
+        if self.bulk_args.get("prevalidate"):
+            jobs, slots, report = prevalidate_jobs(jobs)
+            report.log()
+            if self.bulk_args.get("prevalidation_report"):
+                report.write(Path(self.bulk_args["prevalidation_report"]))
+
+        if not self.bulk_args.get("incremental"):
+            summary = self._run_bulk_jobs(jobs)
+        else:
+            bulk_generator = BulkGenerator(self.bulk_defaults, self.template_engine)
+            manifest_path = self.bulk_args.get("cache_manifest") or (
+                Path(self.bulk_defaults.get("output_dir") or "tests") / MANIFEST_FILE_NAME
+            )
+            render_cache = RenderCache(Path(manifest_path), bulk_generator.template_engine, bulk_generator.fragment_resolver)
+            to_run, cached_slots, pending_keys = render_cache.partition(jobs, bulk_generator.build_config)
+            logger.info(f"{len(jobs) - len(to_run)} of {len(jobs)} specs are unchanged and will be skipped")
+
+            summary = render_cache.merge(cached_slots, self._run_bulk_jobs(to_run), pending_keys)
+            summary.elapsed = time.perf_counter() - start
+            render_cache.save()
+
+        if slots is not None:
+            summary = merge_prevalidated(slots, summary)
+            summary.elapsed = time.perf_counter() - start
+        if self.timing_report is not None:
+            self.timing_report.add_results(summary.results)
+        summary.log()
+        return 0 if not summary.failed else 1
+
+    def _run_bulk_jobs(self, jobs: list[BulkJob]) -> BulkSummary:
+        """
+        Run bulk jobs sequentially, in a process pool, or through the staged pipeline.
+
+        Args:
+            jobs: Jobs to run
+
+        Returns:
+            BulkSummary: Results of the run
+        """
+        workers = resolve_worker_count(self.bulk_args.get("jobs", 1))
+        timed = self.timing_report is not None
+        profile_dir = self.run_profile.worker_dir if self.run_profile is not None else None
+        if self.bulk_args.get("pipeline"):
+            logger.info(f"Generating through the staged pipeline with {workers} worker processes")
+            pipeline = GenerationPipeline(
+                self.bulk_defaults, workers, queue_size=self.bulk_args.get("queue_size", 64), timed=timed,
+                profile_dir=profile_dir
+            )
+            return pipeline.run(jobs)
+        if workers > 1:
+            logger.info(f"Generating in parallel with {workers} worker processes")
+            bulk_generator = BulkGenerator(self.bulk_defaults, self.template_engine, timed=timed, profile_dir=profile_dir)
+            return bulk_generator.run_parallel(jobs, workers)
+        return BulkGenerator(self.bulk_defaults, self.template_engine, timed=timed).run(jobs)
+
+    def _watch(self) -> int:
+        """
+        Regenerate the affected outputs whenever a spec or template changes, until interrupted.
+
+        Returns:
+            int: Exit code
+        """
+        if self.bulk_jobs is not None:
+            bulk_generator = BulkGenerator(self.bulk_defaults, self.template_engine)
+            spec_dir = self.bulk_args.get("spec_dir")
+            spec_glob = self.bulk_args.get("spec_glob")
+            manifest = self.bulk_args.get("manifest")
+            load_jobs = partial(discover_jobs, spec_dir=spec_dir, spec_glob=spec_glob, manifest=manifest)
+            spec_roots = []
+            if spec_dir:
+                # A spec bundle is watched through the directory holding it
+                spec_roots.append((Path(spec_dir).parent if is_bundle(Path(spec_dir)) else Path(spec_dir), False))
+            if spec_glob:
+                spec_roots.append(glob_root(spec_glob))
+            if manifest:
+                spec_roots.append((Path(manifest).parent, False))
+        elif self.configs is not None and self.configs.json_file_path is not None:
+            bulk_generator = BulkGenerator(self.configs.model_dump(), self.template_engine)
+            job = BulkJob(
+                test_parameter_json=self.configs.json_file_path,
+                name=self.configs.name,
+                description=self.configs.description
+            )
+            load_jobs = partial(list, [job])
+            spec_roots = [(spec_file(self.configs.json_file_path).parent, False)]
+        else:
+            logger.error("Configuration is not available")
+            return 1
+
+        WatchSession(bulk_generator, load_jobs, spec_roots).run()
+        return 0
+
 
-def main() -> int:
+def main(args: Optional[list[str]] = None) -> int:
     """
     Main entry point for the CLI.
 
+    Args:
+        args: Command-line arguments (uses sys.argv if None)
+
     Returns:
         int: Exit code
     """
     cli = CLI()
-    args_dict = cli.parse_args()
+    args_dict = cli.parse_args(args)
 
     if not cli.validate_config(args_dict):
         return 1
@@ -0,0 +1,266 @@
+from jinja2.runtime import LoopContext, Macro, Markup, Namespace, TemplateNotFound, TemplateReference, TemplateRuntimeError, Undefined, escape, identity, internalcode, markup_join, missing, str_join
+name = 'unittest_test.py.j2'
+
+def root(context, missing=missing):
+    resolve = context.resolve_or_missing
+    undefined = environment.undefined
+    concat = environment.concat
+    cond_expr_undefined = Undefined
+    if 0: yield None
+    l_0_config = resolve('config')
+    l_0_timestamp = resolve('timestamp')
+    l_0_imports = resolve('imports')
+    l_0_parameter_table = resolve('parameter_table')
+    l_0_swept_controls = resolve('swept_controls')
+    l_0_test_func_name = resolve('test_func_name')
+    l_0_test_class_name = resolve('test_class_name')
+    l_0_test_title = resolve('test_title')
+    l_0_background = resolve('background')
+    l_0_independent_variable = resolve('independent_variable')
+    l_0_dependent_variable = resolve('dependent_variable')
+    l_0_control_variables = resolve('control_variables')
+    l_0_validation_procedures = resolve('validation_procedures')
+    l_0_parameter_cases = resolve('parameter_cases')
+    l_0_independent_var_name = resolve('independent_var_name')
+    l_0_dependent_var_name = resolve('dependent_var_name')
+    l_0_test_procedure = resolve('test_procedure')
+    l_0_expected_value = resolve('expected_value')
+    l_0_is_exception_test = resolve('is_exception_test')
+    try:
+        t_1 = environment.filters['join']
+    except KeyError:
+        @internalcode
+        def t_1(*unused):
+            raise TemplateRuntimeError("No filter named 'join' found.")
+    try:
+        t_2 = environment.filters['tojson']
+    except KeyError:
+        @internalcode
+        def t_2(*unused):
+            raise TemplateRuntimeError("No filter named 'tojson' found.")
+    pass
+    yield '#!/usr/bin/env python\n# -*- coding: utf-8 -*-\n"""\n'
+    yield str(environment.getattr((undefined(name='config') if l_0_config is missing else l_0_config), 'description'))
+    yield '\n\nGenerated on: '
+    yield str((undefined(name='timestamp') if l_0_timestamp is missing else l_0_timestamp))
+    yield '\n"""\nimport unittest\nimport json\nimport datetime\n'
+    for l_1_imp in (undefined(name='imports') if l_0_imports is missing else l_0_imports):
+        _loop_vars = {}
+        pass
+        yield str(environment.getattr(l_1_imp, 'import_string'))
+        yield '\n'
+    l_1_imp = missing
+    if (undefined(name='parameter_table') if l_0_parameter_table is missing else l_0_parameter_table):
+        pass
+        yield 'from pathlib import Path\n\n\n# Cases of the parametrized test, loaded from a sidecar table when the test runs\nPARAMETER_TABLE = Path(__file__).with_name("'
+        yield str(environment.getattr((undefined(name='parameter_table') if l_0_parameter_table is missing else l_0_parameter_table), 'file'))
+        yield '")\n\n\ndef load_parameter_cases() -> list:\n    """Load the (id, value, expected'
+        if (undefined(name='swept_controls') if l_0_swept_controls is missing else l_0_swept_controls):
+            pass
+            yield ', *controls'
+        yield ') cases of test_'
+        yield str((undefined(name='test_func_name') if l_0_test_func_name is missing else l_0_test_func_name))
+        yield ' from its parameter table."""\n'
+        if (environment.getattr((undefined(name='parameter_table') if l_0_parameter_table is missing else l_0_parameter_table), 'format') == 'npy'):
+            pass
+            yield '    import numpy\n    table = numpy.load(PARAMETER_TABLE)\n    return list(zip(table["id"].tolist(), table["input"].tolist(), table["expected"].tolist()))\n'
+        else:
+            pass
+            yield '    with open(PARAMETER_TABLE, encoding="utf-8") as f:\n        cases = [json.loads(line) for line in f]\n    return [(case["id"], case["input"], case["expected"]'
+            if (undefined(name='swept_controls') if l_0_swept_controls is missing else l_0_swept_controls):
+                pass
+                yield ', *case["controls"]'
+            yield ') for case in cases]\n'
+        yield '\n'
+    yield '\nclass Test'
+    yield str((undefined(name='test_class_name') if l_0_test_class_name is missing else l_0_test_class_name))
+    yield '(unittest.TestCase):\n    """Test case for '
+    yield str((undefined(name='test_title') if l_0_test_title is missing else l_0_test_title))
+    yield '."""\n    \n    def setUp(self):\n        """Set up test fixtures."""\n        pass\n    \n    def tearDown(self):\n        """Tear down test fixtures."""\n        pass\n    \n    def test_'
+    yield str((undefined(name='test_func_name') if l_0_test_func_name is missing else l_0_test_func_name))
+    yield '(self):\n        """\n        Background: '
+    yield str(environment.getattr((undefined(name='background') if l_0_background is missing else l_0_background), 'orientation'))
+    yield '\n        Test Purpose: '
+    yield str(environment.getattr((undefined(name='background') if l_0_background is missing else l_0_background), 'purpose'))
+    yield '\n        Hypothesis: '
+    yield str(environment.getattr((undefined(name='background') if l_0_background is missing else l_0_background), 'hypothesis'))
+    yield '\n        \n        Args:\n            Independent Variable: \n                '
+    yield str(environment.getattr((undefined(name='independent_variable') if l_0_independent_variable is missing else l_0_independent_variable), 'name'))
+    yield ': '
+    yield str(environment.getattr((undefined(name='independent_variable') if l_0_independent_variable is missing else l_0_independent_variable), 'description'))
+    yield '\n            Dependent Variable:\n                '
+    yield str(environment.getattr((undefined(name='dependent_variable') if l_0_dependent_variable is missing else l_0_dependent_variable), 'name'))
+    yield ': '
+    yield str(environment.getattr((undefined(name='dependent_variable') if l_0_dependent_variable is missing else l_0_dependent_variable), 'description'))
+    yield '\n            Control Variables:\n'
+    for l_1_var in (undefined(name='control_variables') if l_0_control_variables is missing else l_0_control_variables):
+        _loop_vars = {}
+        pass
+        yield '                '
+        yield str(environment.getattr(l_1_var, 'name'))
+        yield ': '
+        yield str(environment.getattr(l_1_var, 'description'))
+        yield '\n'
+    l_1_var = missing
+    if (undefined(name='validation_procedures') if l_0_validation_procedures is missing else l_0_validation_procedures):
+        pass
+        yield '            Validation Procedures:\n'
+        for l_1_procedure in (undefined(name='validation_procedures') if l_0_validation_procedures is missing else l_0_validation_procedures):
+            _loop_vars = {}
+            pass
+            yield '                '
+            yield str(environment.getattr(l_1_procedure, 'name'))
+            yield ': '
+            yield str(environment.getattr(l_1_procedure, 'description'))
+            yield '\n'
+        l_1_procedure = missing
+    yield '        """\n'
+    if (undefined(name='parameter_cases') if l_0_parameter_cases is missing else l_0_parameter_cases):
+        pass
+        yield '        # Define control variable(s)\n'
+        def t_3(fiter):
+            for l_1_var in fiter:
+                if (l_1_var not in (undefined(name='swept_controls') if l_0_swept_controls is missing else l_0_swept_controls)):
+                    yield l_1_var
+        for l_1_var in t_3((undefined(name='control_variables') if l_0_control_variables is missing else l_0_control_variables)):
+            _loop_vars = {}
+            pass
+            yield '        '
+            yield str(environment.getattr(l_1_var, 'name_in_python'))
+            yield ' = '
+            yield str(environment.getattr(l_1_var, 'value'))
+            yield '\n'
+        l_1_var = missing
+        yield '\n        # Cases as (id, independent variable, dependent variable'
+        if (undefined(name='swept_controls') if l_0_swept_controls is missing else l_0_swept_controls):
+            pass
+            yield ', swept control variables'
+        yield ')\n'
+        if (undefined(name='parameter_table') if l_0_parameter_table is missing else l_0_parameter_table):
+            pass
+            yield '        test_cases = load_parameter_cases()\n'
+        else:
+            pass
+            yield '        test_cases = [\n'
+            for l_1_case in (undefined(name='parameter_cases') if l_0_parameter_cases is missing else l_0_parameter_cases):
+                _loop_vars = {}
+                pass
+                yield '            ('
+                yield str(t_2(context.eval_ctx, environment.getattr(l_1_case, 'id')))
+                yield ', '
+                yield str(t_1(context.eval_ctx, environment.getattr(l_1_case, 'sources'), ', '))
+                yield '),\n'
+            l_1_case = missing
+            yield '        ]\n'
+        yield '\n        for case_id, '
+        yield str((undefined(name='independent_var_name') if l_0_independent_var_name is missing else l_0_independent_var_name))
+        yield ', '
+        yield str((undefined(name='dependent_var_name') if l_0_dependent_var_name is missing else l_0_dependent_var_name))
+        for l_1_var in (undefined(name='swept_controls') if l_0_swept_controls is missing else l_0_swept_controls):
+            _loop_vars = {}
+            pass
+            yield ', '
+            yield str(environment.getattr(l_1_var, 'name_in_python'))
+        l_1_var = missing
+        yield ' in test_cases:\n            with self.subTest(case_id, '
+        yield str((undefined(name='independent_var_name') if l_0_independent_var_name is missing else l_0_independent_var_name))
+        yield '='
+        yield str((undefined(name='independent_var_name') if l_0_independent_var_name is missing else l_0_independent_var_name))
+        yield ', '
+        yield str((undefined(name='dependent_var_name') if l_0_dependent_var_name is missing else l_0_dependent_var_name))
+        yield '='
+        yield str((undefined(name='dependent_var_name') if l_0_dependent_var_name is missing else l_0_dependent_var_name))
+        for l_1_var in (undefined(name='swept_controls') if l_0_swept_controls is missing else l_0_swept_controls):
+            _loop_vars = {}
+            pass
+            yield ', '
+            yield str(environment.getattr(l_1_var, 'name_in_python'))
+            yield '='
+            yield str(environment.getattr(l_1_var, 'name_in_python'))
+        l_1_var = missing
+        yield '):\n                # Test steps\n'
+        for l_1_step in environment.getattr((undefined(name='test_procedure') if l_0_test_procedure is missing else l_0_test_procedure), 'steps'):
+            _loop_vars = {}
+            pass
+            yield '                # '
+            yield str(l_1_step)
+            yield '\n'
+        l_1_step = missing
+        yield '\n                # TODO: Implement code that does the above steps\n                raise NotImplementedError(f"Implementation for test \'test_'
+        yield str((undefined(name='test_func_name') if l_0_test_func_name is missing else l_0_test_func_name))
+        yield '\' cannnot be created programmatically. Follow the steps in the docstring and function body to build a working test.")\n'
+    else:
+        pass
+        yield '        # Define independent variable\n        '
+        yield str((undefined(name='independent_var_name') if l_0_independent_var_name is missing else l_0_independent_var_name))
+        yield ' = '
+        yield str(environment.getattr((undefined(name='independent_variable') if l_0_independent_variable is missing else l_0_independent_variable), 'value'))
+        yield '\n\n        # Define dependent variable\n        '
+        yield str(environment.getattr((undefined(name='dependent_variable') if l_0_dependent_variable is missing else l_0_dependent_variable), 'name_in_python'))
+        yield ' = '
+        yield str((undefined(name='expected_value') if l_0_expected_value is missing else l_0_expected_value))
+        yield '\n\n        # Define control variable(s)\n'
+        for l_1_var in (undefined(name='control_variables') if l_0_control_variables is missing else l_0_control_variables):
+            _loop_vars = {}
+            pass
+            yield '        '
+            yield str(environment.getattr(l_1_var, 'name_in_python'))
+            yield ' = '
+            yield str(environment.getattr(l_1_var, 'value'))
+            yield '\n'
+        l_1_var = missing
+        yield '\n'
+        if (undefined(name='is_exception_test') if l_0_is_exception_test is missing else l_0_is_exception_test):
+            pass
+            yield '        # This is an exception test that expects '
+            yield str((undefined(name='expected_value') if l_0_expected_value is missing else l_0_expected_value))
+            yield '\n'
+            for l_1_step in environment.getattr((undefined(name='test_procedure') if l_0_test_procedure is missing else l_0_test_procedure), 'steps'):
+                _loop_vars = {}
+                pass
+                yield '        # '
+                yield str(l_1_step)
+                yield '\n'
+            l_1_step = missing
+            yield '        # TODO: Implement code that does the above steps\n        raise NotImplementedError(f"Implementation for test \'test_'
+            yield str((undefined(name='test_func_name') if l_0_test_func_name is missing else l_0_test_func_name))
+            yield '\' cannnot be created programmatically. Follow the steps in the docstring and function body to build a working test.")\n'
+        else:
+            pass
+            yield '        # Test steps\n'
+            for l_1_step in environment.getattr((undefined(name='test_procedure') if l_0_test_procedure is missing else l_0_test_procedure), 'steps'):
+                _loop_vars = {}
+                pass
+                yield '        # '
+                yield str(l_1_step)
+                yield '\n'
+            l_1_step = missing
+            yield '        \n        # TODO: Implement code that does the above steps\n        raise NotImplementedError(f"Implementation for test \'test_'
+            yield str((undefined(name='test_func_name') if l_0_test_func_name is missing else l_0_test_func_name))
+            yield '\' cannnot be created programmatically. Follow the steps in the docstring and function body to build a working test.")\n'
+    yield '    \n    def dump_test_to_json(self):\n        """Dump test information to JSON file for record keeping."""\n        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")\n        test_data = {\n            "test_title": "'
+    yield str((undefined(name='test_title') if l_0_test_title is missing else l_0_test_title))
+    yield '",\n            "test_class": "'
+    yield str((undefined(name='test_class_name') if l_0_test_class_name is missing else l_0_test_class_name))
+    yield '",\n            "test_function": "test_'
+    yield str((undefined(name='test_func_name') if l_0_test_func_name is missing else l_0_test_func_name))
+    yield '",\n            "hypothesis": "'
+    yield str(environment.getattr((undefined(name='background') if l_0_background is missing else l_0_background), 'hypothesis'))
+    yield '",\n            "independent_variable": {\n                "name": "'
+    yield str(environment.getattr((undefined(name='independent_variable') if l_0_independent_variable is missing else l_0_independent_variable), 'name'))
+    yield '",\n                "value": "'
+    yield str(environment.getattr((undefined(name='independent_variable') if l_0_independent_variable is missing else l_0_independent_variable), 'value'))
+    yield '"\n            },\n            "dependent_variable": {\n                "name": "'
+    yield str(environment.getattr((undefined(name='dependent_variable') if l_0_dependent_variable is missing else l_0_dependent_variable), 'name'))
+    yield '",\n                "expected": "'
+    yield str(environment.getattr(environment.getattr((undefined(name='dependent_variable') if l_0_dependent_variable is missing else l_0_dependent_variable), 'expected_value'), 'value'))
+    yield '",\n                "actual": "N/A" # TODO This needs to be updated with the actual result at runtime.\n            },\n            "timestamp": timestamp,\n            "generated_on": timestamp\n        }\n        \n        filename = f"test_'
+    yield str((undefined(name='test_func_name') if l_0_test_func_name is missing else l_0_test_func_name))
+    yield '_results_{timestamp}.json"\n        with open(filename, "w") as f:\n            json.dump(test_data, f, indent=2)\n        return filename\n\n\nif __name__ == "__main__":\n    # Initialize the test suite\n    test_suite = unittest.TestSuite()\n    \n    # Add the test to the suite\n    test_case = Test'
+    yield str((undefined(name='test_class_name') if l_0_test_class_name is missing else l_0_test_class_name))
+    yield '("test_'
+    yield str((undefined(name='test_func_name') if l_0_test_func_name is missing else l_0_test_func_name))
+    yield '")\n    test_suite.addTest(test_case)\n    \n    # Create test runner\n    runner = unittest.TextTestRunner()\n    \n    # Run the test and dump results\n    result = runner.run(test_suite)\n    \n    # Save test results to JSON\n    filename = test_case.dump_test_to_json()\n    print(f"Test results saved to {filename}")'
+
+blocks = {}
+debug_info = '4=43&6=45&11=47&12=50&14=53&19=56&23=58&24=64&31=70&36=76&37=78&47=80&49=82&50=84&51=86&55=88&57=92&59=96&60=100&62=105&64=108&65=112&69=118&71=121&72=129&75=135&76=139&80=145&81=149&86=156&87=166&89=182&90=186&94=190&97=195&100=199&103=203&104=207&107=213&108=216&109=218&110=222&113=226&116=231&117=235&121=239&129=242&130=244&131=246&132=248&134=250&135=252&138=254&139=256&146=258&157=260'
\ No newline at end of file
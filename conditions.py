@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compiled conditions of validation procedures.
+
+A ValidationProcedure.condition is a Python expression over the test
+parameters (Configs.test_params), e.g. "input_type == 'string'" or "value > 10".
+Each distinct condition string is parsed and checked once, then cached as a
+predicate. Only literals, names, comparisons, boolean and arithmetic operators
+are allowed: no attribute access, subscripts or calls, so a condition cannot
+reach anything but the values of the test parameters. A string, bytes, list or
+tuple literal cannot be added to or multiplied, so a condition such as
+"'a' * 10**9 == value" cannot build a huge value.
+
+ConditionIndex indexes procedures by the names their conditions reference, so
+a condition whose inputs are not all among the test parameters is skipped
+without being evaluated, and selects procedures for many sets of test
+parameters in one call.
+"""
+from __future__ import annotations
+
+
+import ast
+from collections import Counter
+from functools import lru_cache
+import logging
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+
+from schemas.validation_procedure import ValidationProcedure
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.conditions")
+
+
+# Syntax a condition may use
+ALLOWED_NODES = (
+    ast.Expression, ast.Name, ast.Load, ast.Constant, ast.List, ast.Tuple, ast.Set,
+    ast.BoolOp, ast.And, ast.Or,
+    ast.UnaryOp, ast.Not, ast.UAdd, ast.USub,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot,
+)
+
+# Arithmetic operators that repeat or join a sequence operand
+SEQUENCE_OPERATORS = (ast.Add, ast.Mult)
+
+# Globals of an evaluated condition: no builtins
+_GLOBALS: Dict[str, Any] = {"__builtins__": {}}
+
+
+class Condition:
+    """
+    A condition compiled to a predicate over test parameters.
+
+    Attributes:
+        expression: Source of the condition
+        names: Names of the test parameters the condition references
+    """
+    __slots__ = ("expression", "names", "_code")
+
+    def __init__(self, expression: str, names: FrozenSet[str], code: Any):
+        self.expression = expression
+        self.names = names
+        self._code = code
+
+    def __call__(self, test_params: Mapping[str, Any]) -> bool:
+        """
+        Evaluate the condition.
+
+        A condition that fails to evaluate, e.g. comparing a string with a
+        number, does not hold.
+
+        Args:
+            test_params: Test parameters, including every name the condition references
+
+        Returns:
+            bool: Whether the condition holds
+        """
+        try:
+            return bool(eval(self._code, _GLOBALS, test_params))
+        except Exception as e:
+            logger.warning(f"Condition {self.expression!r} could not be evaluated: {e}")
+            return False
+
+    def __repr__(self) -> str:
+        return f"Condition({self.expression!r})"
+
+
+def _is_sequence_literal(node: ast.AST) -> bool:
+    """Whether a node is a str, bytes, list or tuple literal."""
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return True
+    return isinstance(node, ast.Constant) and isinstance(node.value, (str, bytes))
+
+
+@lru_cache(maxsize=1024)
+def compile_condition(expression: str) -> Condition:
+    """
+    Compile a condition, once per distinct expression.
+
+    Args:
+        expression: A Python expression over test parameters, e.g. "value > 10"
+
+    Returns:
+        Condition: The compiled predicate
+
+    Raises:
+        ValueError: If the expression is not valid Python, uses syntax a condition may not use,
+            or adds or multiplies a sequence literal
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid condition {expression!r}: {e.msg}") from e
+
+    names = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"Invalid condition {expression!r}: {type(node).__name__} is not allowed")
+        if isinstance(node, ast.Name):
+            names.add(node.id)
+        if (isinstance(node, ast.BinOp) and isinstance(node.op, SEQUENCE_OPERATORS)
+                and (_is_sequence_literal(node.left) or _is_sequence_literal(node.right))):
+            raise ValueError(
+                f"Invalid condition {expression!r}: {type(node.op).__name__} of a str, bytes, list or tuple is not allowed"
+            )
+
+    return Condition(expression, frozenset(names), compile(tree, "<condition>", "eval"))
+
+
+class ConditionIndex:
+    """
+    Validation procedures indexed by the test parameters their conditions reference.
+
+    Procedures without a condition always apply. A conditional procedure applies
+    when every name its condition references is a test parameter and the
+    condition holds; when a name is missing, the condition is not evaluated.
+    """
+
+    def __init__(self, procedures: Iterable[ValidationProcedure]):
+        """
+        Compile the conditions of the procedures and index them.
+
+        Args:
+            procedures: Validation procedures, in the order they are selected in
+
+        Raises:
+            ValueError: If a condition is invalid
+        """
+        self.procedures = list(procedures)
+        self._always: List[int] = []
+        self._conditions: Dict[int, Condition] = {}
+        self._by_name: Dict[str, List[int]] = {}
+
+        for index, procedure in enumerate(self.procedures):
+            if not procedure.condition:
+                self._always.append(index)
+                continue
+            condition = compile_condition(procedure.condition)
+            if not condition.names:
+                # A condition over literals only is decided here, once
+                if condition({}):
+                    self._always.append(index)
+                continue
+            self._conditions[index] = condition
+            for name in condition.names:
+                self._by_name.setdefault(name, []).append(index)
+
+    def _candidates(self, test_params: Mapping[str, Any]) -> List[int]:
+        """The conditional procedures whose referenced names are all test parameters."""
+        hits = Counter(index for name in test_params if name in self._by_name for index in self._by_name[name])
+        return [index for index, count in hits.items() if count == len(self._conditions[index].names)]
+
+    def select(self, test_params: Optional[Mapping[str, Any]]) -> List[ValidationProcedure]:
+        """
+        Select the procedures that apply to one set of test parameters.
+
+        Args:
+            test_params: Test parameters, or None for none
+
+        Returns:
+            List[ValidationProcedure]: Applicable procedures, in their original order
+        """
+        return self.select_batch([test_params])[0]
+
+    def select_batch(self, param_sets: Iterable[Optional[Mapping[str, Any]]]) -> List[List[ValidationProcedure]]:
+        """
+        Select the procedures that apply to each of many sets of test parameters.
+
+        Within a batch a condition is evaluated once per distinct combination of
+        the values it references, however many sets share that combination.
+
+        Args:
+            param_sets: Sets of test parameters; None stands for no parameters
+
+        Returns:
+            List[List[ValidationProcedure]]: Applicable procedures for each set, in order
+        """
+        results: Dict[Tuple[str, Tuple[Hashable, ...]], bool] = {}
+        selections = []
+        for test_params in param_sets:
+            test_params = test_params or {}
+            applicable = list(self._always)
+            for index in self._candidates(test_params):
+                condition = self._conditions[index]
+                key = (condition.expression, tuple(test_params[name] for name in sorted(condition.names)))
+                try:
+                    holds = results.get(key)
+                except TypeError:
+                    # Unhashable parameter values are evaluated every time
+                    holds = condition(test_params)
+                else:
+                    if holds is None:
+                        holds = results[key] = condition(test_params)
+                if holds:
+                    applicable.append(index)
+            selections.append([self.procedures[index] for index in sorted(applicable)])
+        return selections
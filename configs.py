@@ -5,10 +5,11 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 
 
-from pydantic import BaseModel, DirectoryPath, Field, FilePath, field_validator
+from pydantic import BaseModel, DirectoryPath, Field, field_validator
 
 
 from __version__ import __version__
+from spec_bundle import spec_exists
 
 
 ROOT_DIR = Path(__file__).parent
@@ -23,28 +24,50 @@ class Configs(BaseModel):
         version: Version of the test generator.
         name: Name of the test
         description: A short description of the test
-        json_file_path: The file path to the test parameters JSON file
+        json_file_path: The file path to the test parameters JSON file, or to an entry of a spec bundle.
+            None when the test parameters are passed in directly (e.g. from a JSONL stream).
         output_dir: Path to output directory for tests
         verbose: Enable verbose output
         harness: Which python testing harness to use (unittest or pytest)
         has_fixtures: Whether a test needs fixtures in order to run
         parametrized: Whether to generate parametrized tests
+        parameter_table: Where the cases of a parametrized test go: inline in the test file,
+            or a "jsonl" or "npy" sidecar file next to it
+        expansion: How parametrized cases are combined with control variables that have values:
+            "none", "cartesian" (every combination) or "covering" (a t-wise covering array)
+        expansion_strength: Strength t of the covering array; 2 covers every pair of values
+        max_cases: Hard cap on the number of cases a test may expand to
         debug: Enable debug mode with enhanced output
         docstring_style: Docstring style to parse
         test_params: Parameters for conditional test generation
+        spec_cache_dir: Directory of the on-disk cache of validated specs. None disables the cache.
+        spec_cache_size: Size cap of the validated spec cache in MB
     """
     version: str = Field(default=__version__, description="Version of the test generator")
     name: str = Field(..., description="Name of the test")
     description: str = Field(..., description="A short description of the test")
-    json_file_path: FilePath = Field(..., description="The file path to the test parameters JSON file")
+    json_file_path: Optional[Path] = Field(default=None, description="The file path to the test parameters JSON file")
     output_dir: DirectoryPath = Field(default=Path("tests"), description="Path to output directory for tests")
     verbose: bool = Field(default=True, description="Enable verbose output")
     harness: str = Field(default="unittest", description="Which python testing harness to use")
     has_fixtures: bool = Field(default=False, description="Whether a test needs fixtures in order to run")
     parametrized: bool = Field(default=False, description="Whether to generate parametrized tests")
+    parameter_table: str = Field(default="inline", description="Where the cases of a parametrized test go")
+    expansion: str = Field(default="none", description="How cases are combined with swept control variables")
+    expansion_strength: int = Field(default=2, ge=1, description="Strength of the covering array")
+    max_cases: Optional[int] = Field(default=None, ge=1, description="Hard cap on the number of cases")
     debug: bool = Field(default=False, description="Enable debug mode with enhanced output")
     docstring_style: str = Field(default="google", description="Docstring style to parse")
     test_params: Optional[Dict[str, Any]] = Field(default=None, description="Parameters for conditional test generation")
+    spec_cache_dir: Optional[Path] = Field(default=None, description="Directory of the validated spec cache")
+    spec_cache_size: int = Field(default=256, ge=1, description="Size cap of the validated spec cache in MB")
+
+    @field_validator("json_file_path")
+    def validate_json_file_path(cls, v: Optional[Path]) -> Optional[Path]:
+        """Validate that the spec file, or the bundle entry, exists."""
+        if v is not None and not spec_exists(v):
+            raise ValueError("Path does not point to a file")
+        return v
 
     @field_validator("harness")
     def validate_harness(cls, v: str) -> str:
@@ -53,3 +76,19 @@ class Configs(BaseModel):
         if v.lower() not in valid_harnesses:
             raise ValueError(f"Harness must be one of: {', '.join(valid_harnesses)}")
         return v.lower()
+
+    @field_validator("parameter_table")
+    def validate_parameter_table(cls, v: str) -> str:
+        """Validate parameter table format."""
+        valid_formats = ["inline", "jsonl", "npy"]
+        if v.lower() not in valid_formats:
+            raise ValueError(f"Parameter table must be one of: {', '.join(valid_formats)}")
+        return v.lower()
+
+    @field_validator("expansion")
+    def validate_expansion(cls, v: str) -> str:
+        """Validate expansion mode."""
+        valid_modes = ["none", "cartesian", "covering"]
+        if v.lower() not in valid_modes:
+            raise ValueError(f"Expansion must be one of: {', '.join(valid_modes)}")
+        return v.lower()
@@ -0,0 +1,416 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Long-lived generator daemon with a local Unix socket API.
+
+The daemon imports pydantic and Jinja2 once, builds one template environment,
+and then serves generation requests over a Unix domain socket. The client in
+this module only imports the standard library, so a call through a running
+daemon skips the interpreter's cold start of the heavy dependencies. When no
+daemon is running the client falls back to generating in-process.
+
+    python daemon.py serve                     # start the daemon
+    python daemon.py generate --name ... --test_parameter_json ...
+    python daemon.py status
+    python daemon.py stop
+
+Each request is one JSON object per line:
+
+    {"command": "generate", "argv": [...], "cwd": "/path"}
+
+and is answered with one JSON object per line:
+
+    {"exit_code": 0, "output": "..."}
+"""
+from __future__ import annotations
+
+
+import argparse
+import contextlib
+import getpass
+import io
+import json
+import logging
+import os
+from pathlib import Path
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.daemon")
+
+
+# Environment variable that overrides the default socket path
+SOCKET_ENV_VAR = "TEST_GENERATOR_SOCKET"
+
+# Seconds the client waits for the daemon to answer a request
+DEFAULT_TIMEOUT = 60.0
+
+# Format of the log lines returned to the client, matching the CLI's own
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Largest request or response line accepted, in bytes
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+def default_socket_path() -> Path:
+    """
+    Get the socket path used when none is given.
+
+    Returns:
+        Path: $TEST_GENERATOR_SOCKET, or a per-user socket in the temp directory
+    """
+    if os.environ.get(SOCKET_ENV_VAR):
+        return Path(os.environ[SOCKET_ENV_VAR])
+    user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+    return Path(tempfile.gettempdir()) / f"test_generator-{user}.sock"
+
+
+def unix_sockets_supported() -> bool:
+    """Whether this platform has Unix domain sockets."""
+    return hasattr(socket, "AF_UNIX")
+
+
+def _send_message(sock: socket.socket, message: Dict[str, Any]) -> None:
+    """Send one JSON message terminated by a newline."""
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def _read_message(stream: Any) -> Optional[Dict[str, Any]]:
+    """
+    Read one newline-terminated JSON message.
+
+    Args:
+        stream: Binary file-like object to read from
+
+    Returns:
+        Optional[Dict[str, Any]]: The message, or None if the peer closed the connection
+
+    Raises:
+        ValueError: If the message is too large or not a JSON object
+    """
+    line = stream.readline(MAX_MESSAGE_SIZE + 1)
+    if not line:
+        return None
+    if len(line) > MAX_MESSAGE_SIZE:
+        raise ValueError("Message is too large")
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError("Message must be a JSON object")
+    return message
+
+
+class GeneratorDaemon:
+    """
+    Warm generator process serving requests over a Unix domain socket.
+
+    The template environment is built once and shared by every request.
+    Requests run one at a time: each one changes into the client's working
+    directory and captures the generator's log output for the client, both
+    of which are process-wide.
+    """
+
+    def __init__(self, socket_path: Optional[Path] = None):
+        """
+        Initialize the daemon.
+
+        Args:
+            socket_path: Path of the Unix socket. Defaults to default_socket_path().
+        """
+        # Deferred so the client side of this module stays cheap to import
+        from bulk import BulkGenerator
+
+        self.socket_path = Path(socket_path) if socket_path is not None else default_socket_path()
+        bulk_generator = BulkGenerator({})
+        bulk_generator.preload_templates()
+        self.template_engine = bulk_generator.template_engine
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._server: Optional[socketserver.BaseServer] = None
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer a single request.
+
+        Args:
+            request: The decoded request
+
+        Returns:
+            Dict[str, Any]: The response to send back
+        """
+        command = request.get("command", "generate")
+        if command == "ping":
+            return {"status": "ok", "pid": os.getpid(), "requests_served": self.requests_served}
+        if command == "shutdown":
+            # The server stops once this answer has been sent
+            return {"status": "stopping"}
+        if command == "generate":
+            argv = request.get("argv", [])
+            if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+                return {"error": "argv must be a list of strings"}
+            return self.generate(argv, request.get("cwd"))
+        return {"error": f"Unknown command: {command}"}
+
+    def generate(self, argv: list[str], cwd: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run the CLI in this process with the shared template environment.
+
+        Args:
+            argv: Command-line arguments, as they would be passed to the CLI
+            cwd: Directory relative paths in argv are resolved against
+
+        Returns:
+            Dict[str, Any]: The exit code and everything the run printed or logged
+        """
+        from cli import CLI
+        from spec_bundle import close_bundles
+
+        output = io.StringIO()
+        handler = logging.StreamHandler(output)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        generator_logger = logging.getLogger("test_generator")
+
+        with self._lock:
+            previous_cwd = os.getcwd()
+            previous_level = generator_logger.level
+            generator_logger.addHandler(handler)
+            try:
+                if cwd:
+                    os.chdir(cwd)
+                with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                    cli = CLI(template_engine=self.template_engine)
+                    try:
+                        exit_code = 1
+                        if cli.validate_config(cli.parse_args(argv)):
+                            exit_code = cli.run()
+                    except SystemExit as e:
+                        # argparse exits on --help, --version and usage errors
+                        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception as e:
+                logger.error(f"Error handling request: {e}")
+                output.write(f"Error handling request: {type(e).__name__}: {e}\n")
+                exit_code = 1
+            finally:
+                # Spec bundles may be rewritten before the next request
+                close_bundles()
+                generator_logger.removeHandler(handler)
+                generator_logger.setLevel(previous_level)
+                os.chdir(previous_cwd)
+                self.requests_served += 1
+
+        return {"exit_code": exit_code, "output": output.getvalue()}
+
+    def serve_forever(self) -> None:
+        """
+        Listen on the socket until a shutdown request arrives.
+
+        Raises:
+            RuntimeError: If Unix sockets are unsupported or another daemon owns the socket
+        """
+        if not unix_sockets_supported():
+            raise RuntimeError("Unix domain sockets are not supported on this platform")
+        if self.socket_path.exists():
+            if ping(self.socket_path) is not None:
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+            # Left behind by a daemon that did not shut down cleanly
+            self.socket_path.unlink()
+
+        daemon = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            """Decode one request per line and answer it."""
+
+            def handle(self) -> None:
+                while True:
+                    try:
+                        request = _read_message(self.rfile)
+                    except ValueError as e:
+                        _send_message(self.connection, {"error": f"Invalid request: {e}"})
+                        return
+                    if request is None:
+                        return
+                    _send_message(self.connection, daemon.handle(request))
+                    if request.get("command") == "shutdown":
+                        # shutdown() blocks until serve_forever() returns, so it cannot run on this thread
+                        threading.Thread(target=daemon.shutdown, daemon=True).start()
+                        return
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        with socketserver.ThreadingUnixStreamServer(str(self.socket_path), RequestHandler) as server:
+            server.daemon_threads = True
+            # Only the owner may send requests
+            os.chmod(self.socket_path, 0o600)
+            self._server = server
+            logger.info(f"Generator daemon listening on {self.socket_path} (pid {os.getpid()})")
+            try:
+                server.serve_forever()
+            finally:
+                self._server = None
+                with contextlib.suppress(FileNotFoundError):
+                    self.socket_path.unlink()
+                logger.info("Generator daemon stopped")
+
+    def shutdown(self) -> None:
+        """Stop a daemon running serve_forever() on another thread."""
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def send_request(
+    request: Dict[str, Any],
+    socket_path: Optional[Path] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    wait: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Send a request to a running daemon.
+
+    Args:
+        request: The request to send
+        socket_path: Path of the daemon's socket. Defaults to default_socket_path().
+        timeout: Seconds to wait for the connection, and for the answer unless wait is set
+        wait: Whether to wait for the answer however long it takes, e.g. for a
+            generation that may run for minutes or queue behind another one
+
+    Returns:
+        Optional[Dict[str, Any]]: The daemon's response, or None if no daemon is running
+
+    Raises:
+        OSError: If the daemon was reached but the request failed or timed out
+    """
+    if not unix_sockets_supported():
+        return None
+    socket_path = Path(socket_path) if socket_path is not None else default_socket_path()
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(socket_path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        if wait:
+            sock.settimeout(None)
+        _send_message(sock, request)
+        with sock.makefile("rb") as stream:
+            response = _read_message(stream)
+
+    if response is None:
+        raise ConnectionError(f"Daemon at {socket_path} closed the connection without answering")
+    return response
+
+
+def ping(socket_path: Optional[Path] = None, timeout: float = 2.0) -> Optional[Dict[str, Any]]:
+    """
+    Check whether a daemon is running.
+
+    Args:
+        socket_path: Path of the daemon's socket
+        timeout: Seconds to wait for the answer
+
+    Returns:
+        Optional[Dict[str, Any]]: The daemon's status, or None if none is running
+    """
+    try:
+        return send_request({"command": "ping"}, socket_path, timeout)
+    except (OSError, ValueError):
+        return None
+
+
+def generate(argv: list[str], socket_path: Optional[Path] = None, timeout: float = DEFAULT_TIMEOUT) -> int:
+    """
+    Generate through a running daemon, or in this process if there is none.
+
+    Only a daemon that cannot be reached, or that rejects the request, falls
+    back to generating in-process. Once the daemon has taken the request it may
+    be writing the outputs, so a failure after that is reported instead of
+    generating the same files a second time alongside it.
+
+    Args:
+        argv: Command-line arguments, as they would be passed to the CLI
+        socket_path: Path of the daemon's socket
+        timeout: Seconds to wait for the connection to the daemon; its answer is
+            waited for however long the generation takes
+
+    Returns:
+        int: Exit code of the generation
+    """
+    request = {"command": "generate", "argv": argv, "cwd": os.getcwd()}
+    try:
+        response = send_request(request, socket_path, timeout, wait=True)
+    except (OSError, ValueError) as e:
+        logger.error(f"Daemon request failed: {e}")
+        return 1
+
+    if response is None or "exit_code" not in response:
+        if response is not None:
+            logger.warning(f"Daemon rejected the request, generating in-process: {response.get('error')}")
+        from cli import main
+        return main(argv)
+
+    sys.stdout.write(response.get("output", ""))
+    sys.stdout.flush()
+    return int(response["exit_code"])
+
+
+def main(args: Optional[list[str]] = None) -> int:
+    """
+    Entry point for the daemon and its client.
+
+    Args:
+        args: Command-line arguments (uses sys.argv if None)
+
+    Returns:
+        int: Exit code
+    """
+    parser = argparse.ArgumentParser(description="Run or talk to a long-lived test generator daemon")
+    parser.add_argument(
+        "--socket", type=Path, default=None,
+        help=f"Path of the Unix socket (default: ${SOCKET_ENV_VAR} or a per-user socket in the temp directory)"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("serve", help="Start the daemon in the foreground")
+    subparsers.add_parser("status", help="Report whether a daemon is running")
+    subparsers.add_parser("stop", help="Stop a running daemon")
+    subparsers.add_parser(
+        "generate", help="Generate through the daemon, or in-process if none is running. "
+        "Every further argument is passed on to the test generator CLI."
+    )
+
+    # The CLI's own arguments follow "generate" and are not parsed here
+    parsed, cli_args = parser.parse_known_args(args)
+
+    if parsed.command == "generate":
+        return generate(cli_args, parsed.socket)
+    if cli_args:
+        parser.error(f"unrecognized arguments: {' '.join(cli_args)}")
+
+    if parsed.command == "serve":
+        logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, handlers=[logging.StreamHandler(sys.stdout)])
+        try:
+            GeneratorDaemon(parsed.socket).serve_forever()
+        except KeyboardInterrupt:
+            pass
+        except RuntimeError as e:
+            logger.error(str(e))
+            return 1
+        return 0
+
+    status = ping(parsed.socket)
+    if status is None:
+        print("No daemon is running")
+        return 1 if parsed.command == "status" else 0
+    if parsed.command == "stop":
+        send_request({"command": "shutdown"}, parsed.socket)
+        print(f"Stopped daemon (pid {status['pid']})")
+    else:
+        print(f"Daemon running (pid {status['pid']}, {status['requests_served']} requests served)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Combinatorial expansion of parametrized cases over swept control variables.
+
+A control variable with a values list or a range is swept: every case of the
+test is run with each of its values. Two modes combine the independent variable's cases
+with the swept control variables:
+
+    - cartesian: every combination. Cases are produced lazily from
+        itertools.product and never held in memory as a whole.
+    - covering: a covering array of strength t (pairwise for t=2) that contains
+        every combination of values of any t variables at least once. It is
+        built with the greedy IPOG algorithm and is usually orders of magnitude
+        smaller than the cartesian product.
+"""
+from __future__ import annotations
+
+
+from dataclasses import dataclass
+import itertools
+import logging
+import math
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+
+from pydantic import BaseModel, Field
+
+
+from parameter_table import ParameterCase, StreamedCases
+from schemas.variable import ParameterValue, ValueColumns, Variable
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.expansion")
+
+
+# Choices for Configs.expansion
+EXPANSION_MODES = ("none", "cartesian", "covering")
+
+
+class CaseCount(BaseModel):
+    """
+    Number of cases a spec expands to, as reported by a dry run.
+
+    Attributes:
+        name: Name of the test
+        mode: Expansion mode
+        cases: Number of cases in that mode
+        cartesian: Number of cases in the full cartesian product
+        max_cases: Hard cap on the number of cases, if any
+    """
+    name: str = Field(..., description="Name of the test")
+    mode: str = Field(..., description="Expansion mode")
+    cases: int = Field(..., description="Number of cases in that mode")
+    cartesian: int = Field(..., description="Number of cases in the full cartesian product")
+    max_cases: Optional[int] = Field(default=None, description="Hard cap on the number of cases")
+
+    @property
+    def over_cap(self) -> bool:
+        """Whether the cases exceed the cap."""
+        return self.max_cases is not None and self.cases > self.max_cases
+
+    def describe(self) -> str:
+        """One line summary for the dry-run report."""
+        summary = f"{self.name}: {self.cases} cases ({self.mode})"
+        if self.cartesian != self.cases:
+            summary += f", {self.cartesian} in the full cartesian product"
+        if self.over_cap:
+            summary += f" - exceeds the cap of {self.max_cases}"
+        return summary
+
+
+def covering_array(sizes: Sequence[int], strength: int = 2) -> List[Tuple[int, ...]]:
+    """
+    Build a covering array with the IPOG (In-Parameter-Order-General) algorithm.
+
+    Parameters are added one at a time, largest domain first. Each new parameter
+    is first added to the existing rows, choosing for every row the value that
+    covers the most t-way combinations not covered yet (horizontal growth). The
+    combinations still uncovered are then covered by filling don't-care cells of
+    existing rows or by adding rows (vertical growth).
+
+    Args:
+        sizes: Number of values of each parameter
+        strength: t, the number of parameters whose value combinations must all appear
+
+    Returns:
+        List[Tuple[int, ...]]: Rows of value indices, one column per parameter in the given order
+    """
+    if not sizes or any(size == 0 for size in sizes):
+        return []
+    if strength >= len(sizes):
+        return list(itertools.product(*(range(size) for size in sizes)))
+
+    order = sorted(range(len(sizes)), key=lambda index: -sizes[index])
+    ordered = [sizes[index] for index in order]
+    rows: List[List[Optional[int]]] = [
+        list(row) for row in itertools.product(*(range(size) for size in ordered[:strength]))
+    ]
+
+    for column in range(strength, len(ordered)):
+        combos = list(itertools.combinations(range(column), strength - 1))
+        uncovered = {
+            (combo, values, value)
+            for combo in combos
+            for values in itertools.product(*(range(ordered[c]) for c in combo))
+            for value in range(ordered[column])
+        }
+
+        # Horizontal growth
+        for row in rows:
+            keys = [(combo, tuple(row[c] for c in combo)) for combo in combos]
+            best_value, best_gain = 0, -1
+            for value in range(ordered[column]):
+                gain = sum((combo, values, value) in uncovered for combo, values in keys)
+                if gain > best_gain:
+                    best_value, best_gain = value, gain
+            row.append(best_value)
+            for combo, values in keys:
+                uncovered.discard((combo, values, best_value))
+
+        # Vertical growth
+        for combo, values, value in sorted(uncovered):
+            for row in rows:
+                if row[column] not in (None, value):
+                    continue
+                if all(row[c] in (None, v) for c, v in zip(combo, values)):
+                    break
+            else:
+                row = [None] * (column + 1)
+                rows.append(row)
+            row[column] = value
+            for c, v in zip(combo, values):
+                row[c] = v
+
+    position = {index: column for column, index in enumerate(order)}
+    return [
+        tuple(row[position[index]] or 0 for index in range(len(sizes)))
+        for row in rows
+    ]
+
+
+@dataclass(frozen=True, slots=True)
+class ControlSweep:
+    """
+    A swept control variable with the values it takes.
+
+    Attributes:
+        variable: The control variable, or its IR once the spec is compiled for rendering
+        ids: Id of each value, or None if the values are their own ids, as for a range
+        values: The values
+    """
+    variable: Any
+    ids: Optional[List[str]]
+    values: Sequence[Any]
+
+
+def control_sweeps(control_variables: Sequence[Variable], labels: Optional[Sequence[Any]] = None) -> List[ControlSweep]:
+    """
+    Get the values of the control variables that have values to sweep.
+
+    A control variable with a non-empty values list or a range is swept. The
+    values of a range are not listed; they are their own ids.
+
+    Args:
+        control_variables: All control variables of a test
+        labels: What each sweep holds as its variable, e.g. the IR of each
+            control variable, in the same order. Defaults to the variables.
+
+    Returns:
+        List[ControlSweep]: The swept control variables, in order
+    """
+    sweeps = []
+    for variable, label in zip(control_variables, labels if labels is not None else control_variables):
+        if variable.range is not None:
+            sweeps.append(ControlSweep(label, None, variable.sweep_values()))
+        elif not variable.values:
+            continue
+        elif isinstance(variable.values, ValueColumns):
+            sweeps.append(ControlSweep(label, variable.values.case_ids(), variable.values.values))
+        else:
+            ids = [
+                value.id or str(index) if isinstance(value, ParameterValue) else str(index)
+                for index, value in enumerate(variable.values)
+            ]
+            values = [value.value if isinstance(value, ParameterValue) else value for value in variable.values]
+            sweeps.append(ControlSweep(label, ids, values))
+    return sweeps
+
+
+class CaseExpansion:
+    """
+    The cases of a test combined with its swept control variables.
+
+    Iterating yields ParameterCase objects whose controls hold the value of each
+    swept control variable, in order. Cases are built on the fly, so iterating
+    over a huge cartesian product never holds it in memory; the expansion can be
+    iterated more than once, e.g. to render the test and to write its table.
+    """
+
+    def __init__(
+        self,
+        cases: Sequence[ParameterCase],
+        controls: List[ControlSweep],
+        mode: str = "cartesian",
+        strength: int = 2
+    ):
+        """
+        Initialize the expansion.
+
+        Args:
+            cases: Cases of the independent variable
+            controls: Swept control variables with their values
+            mode: "cartesian" or "covering"
+            strength: Strength t of the covering array
+        """
+        if mode not in ("cartesian", "covering"):
+            raise ValueError(f"Unknown expansion mode: {mode}")
+        self.cases = cases
+        self.controls = controls
+        self.mode = mode
+        self.strength = strength
+        self._rows: Optional[List[Tuple[int, ...]]] = None
+
+    @property
+    def sizes(self) -> List[int]:
+        """Number of values of each dimension: the cases, then each swept control variable."""
+        return [len(self.cases)] + [len(control.values) for control in self.controls]
+
+    @property
+    def cartesian_count(self) -> int:
+        """Number of cases in the full cartesian product."""
+        return math.prod(self.sizes)
+
+    @property
+    def rows(self) -> List[Tuple[int, ...]]:
+        """Rows of the covering array, built once on first use."""
+        if self._rows is None:
+            self._rows = covering_array(self.sizes, self.strength)
+            logger.debug(f"Covering array of strength {self.strength}: {len(self._rows)} of {self.cartesian_count} cases")
+        return self._rows
+
+    def __len__(self) -> int:
+        return self.cartesian_count if self.mode == "cartesian" else len(self.rows)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def _case(self, indices: Sequence[int]) -> ParameterCase:
+        """The case for one combination of value indices."""
+        case = self.cases[indices[0]]
+        ids = [case.id]
+        controls = []
+        for control, index in zip(self.controls, indices[1:]):
+            value = control.values[index]
+            ids.append(control.ids[index] if control.ids is not None else str(value))
+            controls.append(value)
+        return ParameterCase(id="-".join(ids), input=case.input, expected=case.expected, controls=tuple(controls))
+
+    def __iter__(self) -> Iterator[ParameterCase]:
+        if self.mode == "cartesian":
+            combinations = itertools.product(*(range(size) for size in self.sizes))
+        else:
+            combinations = iter(self.rows)
+        return map(self._case, combinations)
+
+
+def expand_cases(
+    cases: Sequence[ParameterCase],
+    independent_variable: Any,
+    dependent_variable: Any,
+    controls: List[ControlSweep],
+    mode: str,
+    strength: int = 2
+) -> Sequence[ParameterCase]:
+    """
+    Combine the cases of a test with its swept control variables.
+
+    A test whose independent variable has no values is swept with its single
+    value and expected value.
+
+    Args:
+        cases: Cases of the independent variable
+        independent_variable: Variable whose values parametrize the test, or its IR
+        dependent_variable: Variable whose expected values the cases check, or its IR
+        controls: Swept control variables, from control_sweeps()
+        mode: "none", "cartesian" or "covering"
+        strength: Strength t of the covering array
+
+    Returns:
+        Sequence[ParameterCase]: The cases unchanged if the mode is "none" or no
+            control variable is swept, otherwise a CaseExpansion
+    """
+    if mode == "none" or not controls:
+        return cases
+    if mode == "covering" and isinstance(cases, StreamedCases):
+        # A covering array picks cases out of order, which a streamed table cannot do cheaply
+        logger.info(f"Loading {len(cases)} streamed cases to build a covering array")
+        cases = list(cases)
+    if not cases:
+        expected_value = dependent_variable.expected_value
+        cases = [ParameterCase(
+            id="base",
+            input=independent_variable.value,
+            expected=expected_value.value if expected_value is not None else None
+        )]
+    return CaseExpansion(cases, controls, mode, strength)
@@ -0,0 +1,415 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Spec composition from shared fragment files.
+
+Within test_file_parameters, a spec can take shared parts from other files:
+    - "extends": "base.json" starts from the test_file_parameters of another
+      spec. Sections the spec sets itself replace the base's. A base can
+      extend another spec in turn.
+    - {"$ref": "shared/background.json"} in place of any value is replaced by
+      the contents of the file, or by part of it with a JSON pointer:
+      {"$ref": "shared/lab.json#/materials"}.
+    - In control_variables, test_materials, material and imports, a {"$ref": ...}
+      item is replaced by the items of the fragment when it holds a list.
+
+Paths are relative to the file the reference is in, and may point into a
+spec bundle. Fragments may refer to other fragments; a reference cycle is
+an error.
+
+A FragmentResolver lives for a whole run. It parses each fragment file once,
+keyed by its modification time and size, and validates each section taken
+from a fragment once, keyed by the fragment's content hash: every spec that
+includes the fragment then shares the validated objects. A composed spec
+records the content hash of every file it includes, so caches keyed on it
+are invalidated by a change to any of them, and only for specs that include
+the changed file.
+"""
+from __future__ import annotations
+
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Annotated, Any, Dict, Iterator, List, Optional, Tuple
+
+
+from pydantic import TypeAdapter, ValidationError
+
+
+from schemas.test_spec import TestSpec
+from spec_bundle import bundle_entry, forget_bundle, read_spec, spec_file
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.fragments")
+
+
+# Key of a reference to a fragment
+REF_KEY = "$ref"
+
+# Key of test_file_parameters naming the spec they extend
+EXTENDS_KEY = "extends"
+
+# Sections whose {"$ref": ...} items are replaced by the items of a list fragment
+LIST_SECTIONS = ("control_variables", "test_materials", "material", "imports")
+
+# Sections validated once per fragment and shared by the specs that include it
+VALIDATED_SECTIONS = ("independent_variable", "dependent_variable", "test_procedure") + LIST_SECTIONS
+
+
+def uses_composition(data: bytes) -> bool:
+    """
+    Cheaply tell whether raw spec JSON may refer to fragments, without parsing it.
+
+    Args:
+        data: Raw JSON of a spec
+
+    Returns:
+        bool: False if the spec certainly has no "$ref" or "extends"
+    """
+    return b'"$ref"' in data or b'"extends"' in data
+
+
+@dataclass(frozen=True)
+class FragmentFile:
+    """
+    A parsed fragment file.
+
+    Attributes:
+        path: Resolved path of the file
+        stamp: Modification time and size the file was parsed at
+        digest: SHA-256 of the file's bytes
+        value: The parsed JSON, with no references resolved
+    """
+    path: Path
+    stamp: Tuple[int, int]
+    digest: str
+    value: Any
+
+
+@dataclass(frozen=True)
+class ComposedSpec:
+    """
+    A spec with its fragments resolved.
+
+    Attributes:
+        document: The whole spec, {"test_file_parameters": {...}}. Sections taken from
+            fragments may already be validated model objects.
+        dependencies: Content hash of every file the spec includes, by resolved path
+    """
+    document: Dict[str, Any]
+    dependencies: Dict[Path, str]
+
+    @property
+    def digest(self) -> str:
+        """Hash covering the content of every included file."""
+        parts = (f"{path}\0{digest}" for path, digest in sorted(self.dependencies.items()))
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+class _Resolution:
+    """Files read, and the chain of references followed, while composing one spec."""
+
+    def __init__(self) -> None:
+        self.dependencies: Dict[Path, str] = {}
+        self.stack: List[str] = []
+        self._collectors: List[List[str]] = []
+
+    def include(self, fragment: FragmentFile) -> None:
+        """Record a file the spec includes."""
+        self.dependencies[fragment.path] = fragment.digest
+        for collected in self._collectors:
+            collected.append(fragment.digest)
+
+    @contextmanager
+    def collecting(self) -> Iterator[List[str]]:
+        """Collect the content hashes of the files included inside the block."""
+        collected: List[str] = []
+        self._collectors.append(collected)
+        try:
+            yield collected
+        finally:
+            self._collectors.pop()
+
+
+class FragmentResolver:
+    """
+    Resolve fragment references, parsing each file and validating each section once per run.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty resolver."""
+        self._files: Dict[Path, FragmentFile] = {}
+        self._validated: Dict[Tuple[str, str], Any] = {}
+        self._adapters: Dict[str, TypeAdapter] = {}
+
+    def load(self, path: Path) -> FragmentFile:
+        """
+        Load a fragment file, parsing it only if it changed since it was last loaded.
+
+        Args:
+            path: Path of the file, or of an entry of a spec bundle
+
+        Returns:
+            FragmentFile: The parsed file
+
+        Raises:
+            ValueError: If the file cannot be read or is not valid JSON
+        """
+        path = path.resolve()
+        try:
+            stat = os.stat(spec_file(path))
+        except OSError as e:
+            raise ValueError(f"Cannot read fragment {path}: {e}") from e
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._files.get(path)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+        if cached is not None and bundle_entry(path) is not None:
+            # The bundle holding the fragment was rewritten
+            forget_bundle(bundle_entry(path)[0])
+
+        try:
+            data = read_spec(path)
+        except OSError as e:
+            raise ValueError(f"Cannot read fragment {path}: {e}") from e
+        try:
+            value = json.loads(data)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON in fragment {path}: {e}") from e
+        fragment = FragmentFile(path=path, stamp=stamp, digest=hashlib.sha256(data).hexdigest(), value=value)
+        self._files[path] = fragment
+        logger.debug(f"Parsed fragment {path}")
+        return fragment
+
+    def compose_json(self, data: bytes, spec_path: Optional[Path] = None, validate: bool = True) -> Optional[ComposedSpec]:
+        """
+        Resolve every fragment raw spec JSON refers to.
+
+        Args:
+            data: Raw JSON of a whole spec file
+            spec_path: Path of the spec file, which relative references start from
+            validate: Whether to substitute validated model objects for the sections taken from fragments
+
+        Returns:
+            Optional[ComposedSpec]: The composed spec, or None if the spec refers to no fragment
+                or is not valid JSON (left for validation to report)
+        """
+        if not uses_composition(data):
+            return None
+        try:
+            document = json.loads(data)
+        except ValueError:
+            return None
+        composed = self.compose(document, spec_path, validate)
+        return composed if composed.dependencies else None
+
+    def compose(self, document: Any, spec_path: Optional[Path] = None, validate: bool = True) -> ComposedSpec:
+        """
+        Resolve every fragment a spec refers to.
+
+        Args:
+            document: The parsed spec, {"test_file_parameters": {...}}
+            spec_path: Path of the spec file, which relative references start from.
+                If None, they start from the working directory.
+            validate: Whether to substitute validated model objects for the sections
+                taken from fragments. Without it, the document is plain JSON data.
+
+        Returns:
+            ComposedSpec: The spec with its fragments resolved, and the files it includes
+
+        Raises:
+            ValueError: If a fragment cannot be loaded, a pointer does not resolve, or references form a cycle
+        """
+        if not isinstance(document, dict) or not isinstance(document.get("test_file_parameters"), dict):
+            return ComposedSpec(document=document, dependencies={})
+
+        resolution = _Resolution()
+        base_dir = spec_path.resolve().parent if spec_path is not None else Path.cwd()
+        if spec_path is not None:
+            resolution.stack.append(f"{spec_path.resolve()}#")
+
+        params: Dict[str, Any] = {}
+        for name, (origin, value) in self._compose_params(document["test_file_parameters"], base_dir, resolution).items():
+            if origin is None:
+                # Written in the spec itself
+                value = self._resolve_section(name, value, base_dir, resolution, validate)
+            elif validate and name in VALIDATED_SECTIONS:
+                value = self._validate_section(name, origin, value)
+            params[name] = value
+
+        return ComposedSpec(document={**document, "test_file_parameters": params}, dependencies=resolution.dependencies)
+
+    def _compose_params(
+        self,
+        params: Dict[str, Any],
+        base_dir: Path,
+        resolution: _Resolution
+    ) -> Dict[str, Tuple[Optional[str], Any]]:
+        """
+        Merge test_file_parameters with the spec they extend, section by section.
+
+        Returns:
+            Dict[str, Tuple[Optional[str], Any]]: Each section with its origin and value. A section
+                taken from a file other than the spec itself is resolved, and its origin is a key
+                covering the content of every file it was built from. A section written in the
+                spec itself has no origin and is left for the caller to resolve.
+        """
+        sections: Dict[str, Tuple[Optional[str], Any]] = {}
+        if EXTENDS_KEY in params:
+            base_path = params[EXTENDS_KEY]
+            if not isinstance(base_path, str):
+                raise ValueError(f"'{EXTENDS_KEY}' must be the path of a spec file, got {base_path!r}")
+            base, base_params, pointer = self._follow(base_path, base_dir, resolution)
+            if isinstance(base_params, dict) and isinstance(base_params.get("test_file_parameters"), dict):
+                base_params, pointer = base_params["test_file_parameters"], f"{pointer}/test_file_parameters"
+            if not isinstance(base_params, dict):
+                raise ValueError(f"Extended spec {base.path} has no test file parameters")
+
+            for name, (origin, value) in self._compose_params(base_params, base.path.parent, resolution).items():
+                if origin is None:
+                    # Written in the base spec itself
+                    with resolution.collecting() as collected:
+                        value = self._resolve_section(name, value, base.path.parent, resolution, validate=False)
+                    origin = _origin_key([base.digest] + collected, f"{pointer}/{name}")
+                sections[name] = (origin, value)
+            resolution.stack.pop()
+
+        for name, value in params.items():
+            if name == EXTENDS_KEY:
+                continue
+            if isinstance(value, dict) and REF_KEY in value:
+                with resolution.collecting() as collected:
+                    fragment, target, pointer = self._follow(self._reference(value), base_dir, resolution)
+                    value = self._resolve_section(name, target, fragment.path.parent, resolution, validate=False)
+                    resolution.stack.pop()
+                sections[name] = (_origin_key(collected, pointer), value)
+            else:
+                sections[name] = (None, value)
+        return sections
+
+    def _reference(self, value: Dict[str, Any]) -> str:
+        """The target of a {"$ref": ...} object."""
+        target = value[REF_KEY]
+        if not isinstance(target, str) or len(value) != 1:
+            raise ValueError(f"A reference must be {{\"{REF_KEY}\": \"path[#/pointer]\"}} with no other keys, got {value!r}")
+        return target
+
+    def _follow(self, target: str, base_dir: Path, resolution: _Resolution) -> Tuple[FragmentFile, Any, str]:
+        """
+        Load the file a reference points to and find the value at its pointer.
+
+        The reference is pushed on the resolution stack; the caller pops it once
+        everything below it is resolved.
+
+        Returns:
+            Tuple[FragmentFile, Any, str]: The file, the value, and the JSON pointer of the value
+        """
+        file_part, _, pointer = target.partition("#")
+        fragment = self.load(base_dir / file_part)
+        key = f"{fragment.path}#{pointer}"
+        if key in resolution.stack:
+            cycle = resolution.stack[resolution.stack.index(key):] + [key]
+            raise ValueError(f"Fragment reference cycle: {' -> '.join(cycle)}")
+        resolution.stack.append(key)
+        resolution.include(fragment)
+        return fragment, _pointer_target(fragment.value, pointer, target), pointer
+
+    def _resolve(self, value: Any, base_dir: Path, resolution: _Resolution) -> Any:
+        """Replace every reference below a value, sharing the parts that have none."""
+        if isinstance(value, dict):
+            if REF_KEY in value:
+                fragment, target, _ = self._follow(self._reference(value), base_dir, resolution)
+                resolved = self._resolve(target, fragment.path.parent, resolution)
+                resolution.stack.pop()
+                return resolved
+            items = {key: self._resolve(item, base_dir, resolution) for key, item in value.items()}
+            return value if all(items[key] is value[key] for key in value) else items
+        if isinstance(value, list):
+            resolved_items = [self._resolve(item, base_dir, resolution) for item in value]
+            return value if all(new is old for new, old in zip(resolved_items, value)) else resolved_items
+        return value
+
+    def _resolve_section(self, name: str, value: Any, base_dir: Path, resolution: _Resolution, validate: bool) -> Any:
+        """
+        Resolve the references in a section.
+
+        The {"$ref": ...} items of a list section are replaced by the items of
+        their fragments and, if validate is set, validated once per fragment.
+        """
+        if name not in LIST_SECTIONS or not isinstance(value, list):
+            return self._resolve(value, base_dir, resolution)
+
+        spliced: List[Any] = []
+        for item in value:
+            if not (isinstance(item, dict) and REF_KEY in item):
+                spliced.append(self._resolve(item, base_dir, resolution))
+                continue
+            with resolution.collecting() as collected:
+                fragment, target, pointer = self._follow(self._reference(item), base_dir, resolution)
+                items = self._resolve(target, fragment.path.parent, resolution)
+                resolution.stack.pop()
+            items = items if isinstance(items, list) else [items]
+            if validate:
+                items = self._validate_section(name, _origin_key(collected, pointer), items)
+            spliced.extend(items)
+        return spliced
+
+    def _validate_section(self, section: str, origin: str, value: Any) -> Any:
+        """
+        Validate a section taken from fragments, once per content of those fragments.
+
+        A section that does not validate on its own is left as it is, so that
+        validating the whole spec reports the error as usual.
+        """
+        key = (origin, section)
+        if key in self._validated:
+            return self._validated[key]
+
+        if section == "material" and isinstance(value, dict):
+            value = [value]
+        if section not in self._adapters:
+            field = TestSpec.model_fields[section]
+            self._adapters[section] = TypeAdapter(Annotated[field.annotation, field])
+        try:
+            validated = self._adapters[section].validate_python(value)
+        except ValidationError:
+            validated = value
+        self._validated[key] = validated
+        return validated
+
+
+def _origin_key(digests: List[str], pointer: str) -> str:
+    """Key of a value built from files with the given content hashes, found at a pointer of the first."""
+    return f"{'|'.join(digests)}#{pointer}"
+
+
+def _pointer_target(value: Any, pointer: str, reference: str) -> Any:
+    """
+    Find the value a JSON pointer points to.
+
+    Args:
+        value: The document
+        pointer: RFC 6901 JSON pointer, e.g. "/materials/0"; empty for the whole document
+        reference: The reference, for errors
+
+    Returns:
+        Any: The value at the pointer
+    """
+    if not pointer:
+        return value
+    if not pointer.startswith("/"):
+        raise ValueError(f"Invalid JSON pointer in reference {reference}")
+    for token in pointer[1:].split("/"):
+        token = token.replace("~1", "/").replace("~0", "~")
+        try:
+            value = value[int(token)] if isinstance(value, list) else value[token]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ValueError(f"Reference {reference} points to nothing") from None
+    return value
@@ -6,27 +6,43 @@ Core test generation logic for Test Generator.
 from __future__ import annotations
 
 
+from dataclasses import dataclass
 import datetime
+from functools import cached_property
 import json
 import logging
+import os
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape, Template
+from jinja2 import Environment, Template
 from pydantic import ValidationError
 
 
+from conditions import ConditionIndex
 from configs import Configs
+from expansion import CaseCount, CaseExpansion, ControlSweep, control_sweeps, expand_cases
+from fragments import ComposedSpec, FragmentResolver
+from parameter_table import ParameterCase, build_parameter_cases, write_parameter_table
 from schemas.method import Method
 from schemas.material import Material
 from schemas.imports import Imports
+from schemas.test_spec import TestSpec, TestSpecDocument
 from schemas.test_title import TestTitle
+from schemas.validation_procedure import ValidationProcedure
 from schemas.variable import Variable
+from spec_bundle import bundle_entry, read_spec
+from spec_cache import SpecCache
+from spec_ir import SpecIR
+from stage_timing import NO_TIMINGS, StageTimings
+from template_bundle import create_environment
 from utils.common.convert_to_snake_case import convert_to_snake_case
 from utils.common.convert_to_pascal_case import convert_to_pascal_case
 from utils.common.load_json_file import load_json_file
 from utils.common.sanitize_variable_name import sanitize_variable_name
+from values_stream import read_streamed_spec, should_stream
+from variants import get_variant_output_path
 
 
 # Set up logger
@@ -62,6 +78,54 @@ class TestFileParameters:
         self.test_method = self._parse_test_method()
         self.imports = self._parse_imports()
 
+        # Everything is in the validated models now; drop the raw JSON
+        self.raw_data = {}
+
+    @classmethod
+    def from_spec(cls, spec: TestSpec, raw_data: Optional[Dict[str, Any]] = None) -> TestFileParameters:
+        """
+        Build test file parameters from an already validated spec.
+
+        Args:
+            spec: The validated test_file_parameters section
+            raw_data: The unvalidated section, if it is at hand
+
+        Returns:
+            TestFileParameters: The same parameters the dictionary path would produce
+        """
+        params = cls.__new__(cls)
+        params.raw_data = raw_data if raw_data is not None else {}
+        params.test_title = spec.test_title
+        params.background = spec.background
+        params.independent_variable = spec.independent_variable
+        params.dependent_variable = spec.dependent_variable
+        params.control_variables = spec.control_variables
+        params.materials = spec.materials
+        params.test_method = spec.test_procedure
+        params.imports = spec.imports
+        return params
+
+    @classmethod
+    def from_json(cls, data: Union[bytes, str], source: str = "spec") -> TestFileParameters:
+        """
+        Parse and validate raw spec JSON in a single pass through pydantic-core.
+
+        No intermediate dictionaries are built in Python, and the items of each
+        list are validated without a Python loop. Invalid control variables,
+        materials and imports are still skipped with a warning.
+
+        Args:
+            data: Raw JSON of a whole spec file
+            source: Name of the spec for error messages
+
+        Returns:
+            TestFileParameters: Validated parameters
+
+        Raises:
+            ValueError: If the JSON is malformed or the spec is invalid
+        """
+        return cls.from_spec(validate_spec_json(data, source))
+
     def _parse_test_title(self) -> str:
         """Parse and validate the test title."""
         title_data = self.raw_data.get("test_title", "")
@@ -103,9 +167,6 @@ class TestFileParameters:
         """
         var_data = self.raw_data.get(var_type, {})
         try:
-            # Handle case insensitivity for statistical_type
-            if "statistical_type" in var_data and isinstance(var_data["statistical_type"], str):
-                var_data["statistical_type"] = var_data["statistical_type"].lower()
             return Variable(**var_data)
         except ValidationError as e:
             logger.error(f"Error parsing {var_type}: {e}")
@@ -118,9 +179,6 @@ class TestFileParameters:
 
         for var_data in control_vars_data:
             try:
-                # Handle case insensitivity for statistical_type
-                if "statistical_type" in var_data and isinstance(var_data["statistical_type"], str):
-                    var_data["statistical_type"] = var_data["statistical_type"].lower()
                 control_vars.append(Variable(**var_data))
             except ValidationError as e:
                 logger.warning(f"Skipping invalid control variable: {e}")
@@ -168,6 +226,192 @@ class TestFileParameters:
 
         return imports
 
+    @cached_property
+    def parameter_cases(self) -> Sequence[ParameterCase]:
+        """
+        The cases of a parametrized test, joined once on first use.
+
+        Raises:
+            ValueError: If the case ids of the values and expected values do not match up
+        """
+        try:
+            return build_parameter_cases(self.independent_variable, self.dependent_variable)
+        except ValueError as e:
+            logger.error(f"Error joining parameter cases: {e}")
+            raise
+
+    @cached_property
+    def ir(self) -> SpecIR:
+        """The compact, immutable representation the templates render from, built once on first use."""
+        return SpecIR.from_params(self)
+
+    @cached_property
+    def condition_index(self) -> ConditionIndex:
+        """
+        The validation procedures of the dependent variable, indexed by the test parameters their conditions use.
+
+        Raises:
+            ValueError: If a condition is invalid
+        """
+        expected_value = self.dependent_variable.expected_value
+        procedures = expected_value.validation_procedures if expected_value is not None else None
+        try:
+            return ConditionIndex(procedures or [])
+        except ValueError as e:
+            logger.error(f"Error compiling validation procedure conditions: {e}")
+            raise
+
+    def compile(self) -> RenderSpec:
+        """
+        Reduce the parameters to what rendering reads.
+
+        Raises:
+            ValueError: If the parameter cases do not join or a condition is invalid
+        """
+        return RenderSpec(
+            ir=self.ir,
+            parameter_cases=self.parameter_cases,
+            control_sweeps=tuple(control_sweeps(self.control_variables, self.ir.control_variables)),
+            condition_index=self.condition_index
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class RenderSpec:
+    """
+    What a generator keeps of a parsed spec to render it: the IR and the sources of its cases.
+
+    The validated models are dropped once this is built; only the values of
+    the cases, which the IR leaves out, and the validation procedures stay.
+
+    Attributes:
+        ir: The compact representation the templates render from
+        parameter_cases: The cases of a parametrized test, empty if it is not parametrized
+        control_sweeps: The swept control variables, holding their IR, with their values
+        condition_index: The validation procedures, indexed by the test parameters their conditions use
+    """
+    ir: SpecIR
+    parameter_cases: Sequence[ParameterCase]
+    control_sweeps: Tuple[ControlSweep, ...]
+    condition_index: ConditionIndex
+
+
+def validate_spec_json(data: Union[bytes, str], source: str = "spec") -> TestSpec:
+    """
+    Validate raw spec JSON in a single pass through pydantic-core.
+
+    Args:
+        data: Raw JSON of a whole spec file
+        source: Name of the spec for error messages
+
+    Returns:
+        TestSpec: The validated test_file_parameters section
+
+    Raises:
+        ValueError: If the JSON is malformed or the spec is invalid
+    """
+    try:
+        document = TestSpecDocument.model_validate_json(data)
+    except ValidationError as e:
+        raise ValueError(_describe_spec_error(e, source)) from e
+    return document.test_file_parameters
+
+
+def validate_spec_document(document: Dict[str, Any], source: str = "spec") -> TestSpec:
+    """
+    Validate a parsed spec, such as one composed from fragments.
+
+    Sections that are already validated model objects are not validated again.
+
+    Args:
+        document: The whole spec, {"test_file_parameters": {...}}
+        source: Name of the spec for error messages
+
+    Returns:
+        TestSpec: The validated test_file_parameters section
+
+    Raises:
+        ValueError: If the spec is invalid
+    """
+    try:
+        spec_document = TestSpecDocument.model_validate(document)
+    except ValidationError as e:
+        raise ValueError(_describe_spec_error(e, source)) from e
+    return spec_document.test_file_parameters
+
+
+def _describe_spec_error(error: ValidationError, source: str) -> str:
+    """
+    Turn a spec validation error into the message the dictionary path raises.
+
+    Args:
+        error: Error from validating a whole spec document
+        source: Name of the spec
+
+    Returns:
+        str: Error message
+    """
+    first = error.errors()[0]
+    loc = first["loc"]
+    if first["type"] == "json_invalid":
+        return f"Invalid JSON in {source}: {first['msg']}"
+    if first["type"] == "model_type" and not loc:
+        return f"JSON file {source} must contain a JSON object at the root level"
+    if loc == ("test_file_parameters",):
+        return "No test file parameters found in JSON data"
+
+    section = loc[1] if len(loc) > 1 else None
+    if section in ("independent_variable", "dependent_variable"):
+        logger.error(f"Error parsing {section}: {error}")
+        return f"Invalid {section} data"
+    if section == "test_procedure":
+        logger.error(f"Error parsing test procedure: {error}")
+        return "Invalid test procedure data"
+    return f"Invalid test file parameters in {source}: {error}"
+
+
+def create_template_engine() -> Optional[Environment]:
+    """
+    Create the Jinja2 template engine used to render test files.
+
+    The precompiled template bundle is used when it is up to date, so no
+    template source has to be lexed or parsed at startup.
+
+    Returns:
+        Optional[Environment]: Configured Jinja2 environment or None if no templates found
+    """
+    return create_environment()
+
+
+def create_spec_cache(cache_dir: Optional[Union[str, Path]], size_mb: int) -> Optional[SpecCache]:
+    """
+    Create the validated spec cache, if a cache directory is configured.
+
+    Args:
+        cache_dir: Directory of the cache, or None to disable it
+        size_mb: Size cap of the cache in MB
+
+    Returns:
+        Optional[SpecCache]: The cache, or None if no cache directory is configured
+    """
+    if cache_dir is None:
+        return None
+    return SpecCache(Path(cache_dir), size_mb * 1024 * 1024)
+
+
+def get_output_path(config: Configs) -> Path:
+    """
+    Get the path a test file is written to.
+
+    Args:
+        config: Configuration object
+
+    Returns:
+        Path: Output file path inside the configured output directory
+    """
+    test_name = convert_to_snake_case(config.name)
+    return config.output_dir / f"test_{test_name}.py"
+
 
 class TestGenerator:
     """
@@ -177,16 +421,39 @@ class TestGenerator:
     and managing the generation process.
     """
 
-    def __init__(self, config: Configs):
+    def __init__(
+        self,
+        config: Configs,
+        template_engine: Optional[Environment] = None,
+        fragment_resolver: Optional[FragmentResolver] = None,
+        timings: Optional[StageTimings] = None,
+        spec_cache: Optional[SpecCache] = None
+    ):
         """
         Initialize the test generator.
 
         Args:
             config: Configuration object
+            template_engine: Pre-built Jinja2 environment to reuse. When generating many
+                test files in one process, sharing an environment means each template
+                is only compiled once. If None, a new environment is created.
+            fragment_resolver: Resolver of the fragments specs refer to. Sharing one across
+                a run means each fragment is parsed and validated once. If None, a new one is created.
+            timings: Timings to record the time spent in each stage of generation into.
+                If None, the stages are not timed.
+            spec_cache: Validated spec cache to reuse. Sharing one across a run means the cache
+                directory is only scanned when it may be over its cap. If None, one is created
+                from the configuration, if it configures a cache directory.
         """
         self.config = config
-        self.template_engine = self._initialize_template_engine()
-        self.test_file_params: Optional[TestFileParameters] = None
+        self.template_engine = template_engine if template_engine is not None else self._initialize_template_engine()
+        self.fragment_resolver = fragment_resolver if fragment_resolver is not None else FragmentResolver()
+        self.timings = timings if timings is not None else NO_TIMINGS
+        self.spec_cache = (
+            spec_cache if spec_cache is not None else create_spec_cache(config.spec_cache_dir, config.spec_cache_size)
+        )
+        # The parsed spec, reduced to what rendering reads
+        self.test_file_params: Optional[RenderSpec] = None
 
         # Set debug logging if enabled
         if self.config.debug:
@@ -204,26 +471,7 @@ class TestGenerator:
         Returns:
             Optional[Environment]: Configured Jinja2 environment or None if no templates found
         """
-        # First try package templates, then fall back to inline templates
-        template_paths = [
-            Path(__file__).parent / "templates",
-            Path(__file__).parent / "test_templates"
-        ]
-
-        # Create a list of paths that exist
-        existing_paths = [p for p in template_paths if p.exists()]
-
-        if not existing_paths:
-            logger.warning("No template directories found, using inline templates")
-            # We'll use string templates later
-            return None
-
-        return Environment(
-            loader=FileSystemLoader(existing_paths),
-            autoescape=select_autoescape(["html", "xml"]),
-            trim_blocks=True,
-            lstrip_blocks=True
-        )
+        return create_template_engine()
 
     def _load_json_file(self) -> Dict[str, Any]:
         """
@@ -232,8 +480,16 @@ class TestGenerator:
         Returns:
             Dict[str, Any]: Parsed JSON data
         """
+        if self.config.json_file_path is None:
+            raise ValueError("No test parameters JSON file configured and no test parameters were passed in")
+
         logger.info(f"Loading test parameters from {self.config.json_file_path}")
-        json_data = load_json_file(self.config.json_file_path)
+        if bundle_entry(self.config.json_file_path) is None:
+            json_data = load_json_file(self.config.json_file_path)
+        else:
+            json_data = json.loads(read_spec(self.config.json_file_path))
+            if not isinstance(json_data, dict):
+                raise ValueError(f"JSON file {self.config.json_file_path} must contain a JSON object at the root level")
 
         # Provide more detailed debug information if enabled
         if self.config.debug:
@@ -256,6 +512,71 @@ class TestGenerator:
 
         return json_data
 
+    def _load_json_bytes(self) -> bytes:
+        """
+        Read the raw bytes of the JSON file with test parameters, or of its spec bundle entry.
+
+        Returns:
+            bytes: Contents of the JSON file
+        """
+        if self.config.json_file_path is None:
+            raise ValueError("No test parameters JSON file configured and no test parameters were passed in")
+
+        logger.info(f"Loading test parameters from {self.config.json_file_path}")
+        return read_spec(self.config.json_file_path)
+
+    def _parse_test_parameters_json(self, data: bytes) -> TestFileParameters:
+        """
+        Parse and validate test parameters straight from raw JSON.
+
+        Args:
+            data: Raw JSON of the spec file
+
+        Returns:
+            TestFileParameters: Validated parameters
+        """
+        logger.info("Parsing test parameters")
+        source = str(self.config.json_file_path or "spec")
+        composed = self.fragment_resolver.compose_json(data, self.config.json_file_path)
+        if self.spec_cache is None:
+            if composed is None:
+                return TestFileParameters.from_json(data, source=source)
+            return TestFileParameters.from_spec(validate_spec_document(composed.document, source))
+
+        # A composed spec is cached under its own bytes and the content of every fragment it includes
+        cache_data = data if composed is None else data + composed.digest.encode("utf-8")
+        spec = self.spec_cache.get(cache_data)
+        if spec is None:
+            spec = self._validate_spec(data, composed, source)
+            self.spec_cache.put(cache_data, spec)
+        return TestFileParameters.from_spec(spec)
+
+    @staticmethod
+    def _validate_spec(data: bytes, composed: Optional[ComposedSpec], source: str) -> TestSpec:
+        """Validate raw spec JSON, or the spec composed from it if it refers to fragments."""
+        if composed is None:
+            return validate_spec_json(data, source)
+        return validate_spec_document(composed.document, source)
+
+    def _parse_streamed_test_parameters(self) -> TestFileParameters:
+        """
+        Parse and validate test parameters from a large spec file, streaming its value tables.
+
+        The spec cache is bypassed: a cached spec would hold the tables in memory.
+
+        Returns:
+            TestFileParameters: Validated parameters, whose value tables are read from the file as they are used
+        """
+        path = self.config.json_file_path
+        logger.info(f"Streaming test parameters from {path}")
+        with self.timings.stage("load"):
+            streamed = read_streamed_spec(path)
+        with self.timings.stage("parse"):
+            composed = self.fragment_resolver.compose(streamed.document, path)
+            spec = validate_spec_document(composed.document, str(path))
+            streamed.attach(spec)
+            return TestFileParameters.from_spec(spec)
+
     def _parse_test_parameters(self, json_data: Dict[str, Any]) -> TestFileParameters:
         """
         Parse and validate test parameters from JSON data.
@@ -267,52 +588,76 @@ class TestGenerator:
             TestFileParameters: Validated parameters
         """
         logger.info("Parsing test parameters")
-        return TestFileParameters(json_data)
+        composed = self.fragment_resolver.compose(json_data, self.config.json_file_path, validate=False)
+        return TestFileParameters(composed.document)
 
-    def _get_template(self) -> Union[Template, str]:
+    def _get_template(self) -> Template:
         """
         Get the appropriate template for the test framework.
 
         Returns:
-            Union[Template, str]: Template object or string template if engine not available
+            Template: Compiled template for the configured harness
         """
         harness = self.config.harness.lower()
 
-        if self.template_engine:
-            try:
-                return self.template_engine.get_template(f"{harness}_test.py.j2")
-            except Exception as e:
-                logger.warning(f"Error loading template for {harness}: {e}")
-
-        # Fall back to inline templates
-        if harness == "unittest":
-            return UNITTEST_TEMPLATE
-        elif harness == "pytest":
-            return PYTEST_TEMPLATE
-        else:
-            logger.error(f"Unsupported test harness: {harness}")
-            raise ValueError(f"Unsupported test harness: {harness}")
+        if self.template_engine is None:
+            raise ValueError("No templates available: neither templates/ nor the compiled template bundle was found")
 
-    def _render_template(self, template: Union[Template, str]) -> str:
+        try:
+            return self.template_engine.get_template(f"{harness}_test.py.j2")
+        except Exception as e:
+            logger.error(f"Unsupported test harness: {harness} ({e})")
+            raise ValueError(f"Unsupported test harness: {harness}") from e
+
+    def _build_context(self) -> Dict[str, Any]:
         """
-        Render the template with test parameters.
+        Build the context the template is rendered with.
+
+        Returns:
+            Dict[str, Any]: Template variables
+        """
+        context = self._build_shared_context()
+        context.update(self._variant_context(self.config.test_params))
+        return context
+
+    def _variant_context(
+        self,
+        test_params: Optional[Dict[str, Any]],
+        validation_procedures: Optional[List[ValidationProcedure]] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the part of the context that depends on the test parameters.
 
         Args:
-            template: Template object or string template
+            test_params: Test parameters of the variant
+            validation_procedures: Procedures already selected for these test parameters.
+                If None, they are selected here.
 
         Returns:
-            str: Rendered test file
+            Dict[str, Any]: Template variables
         """
-        logger.info("Rendering test file template")
+        if validation_procedures is None:
+            validation_procedures = self.test_file_params.condition_index.select(test_params)
+        return {"validation_procedures": validation_procedures, "test_params": test_params}
+
+    def _build_shared_context(self) -> Dict[str, Any]:
+        """
+        Build the part of the context that is the same for every set of test parameters.
 
+        Returns:
+            Dict[str, Any]: Template variables
+        """
         # Check if test_file_params is initialized
         if self.test_file_params is None:
             raise ValueError("Test file parameters not initialized. Call generate_test_file() first.")
 
+        # Templates render from the compact IR of the spec
+        spec_ir = self.test_file_params.ir
+
         # Check if the expected value is an exception class
         is_exception_test = False
         expected_value = None
-        dependent_variable = self.test_file_params.dependent_variable
+        dependent_variable = spec_ir.dependent_variable
         if hasattr(dependent_variable, 'expected_value') and dependent_variable.expected_value is not None:
             ev = dependent_variable.expected_value
             expected_value = ev.value if ev else None
@@ -320,32 +665,43 @@ class TestGenerator:
                 is_exception_test = True
 
         # Sanitize variable names for Python
-        independent_variable = self.test_file_params.independent_variable
+        independent_variable = spec_ir.independent_variable
         independent_var_name = sanitize_variable_name(independent_variable.name)
 
+        # Cases of a parametrized test, inlined or loaded from a sidecar table
+        parameter_cases = self._expand_parameter_cases()
+        if self.config.max_cases is not None and len(parameter_cases) > self.config.max_cases:
+            raise ValueError(f"Test expands to {len(parameter_cases)} cases, more than the cap of {self.config.max_cases}")
+        parameter_table = self._write_parameter_table(parameter_cases)
+
         # Generate timestamp for the template
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+        swept_controls = parameter_cases.controls if isinstance(parameter_cases, CaseExpansion) else []
+
         # Prepare context for template rendering
         context = {
             "config": self.config,
-            "test_title": self.test_file_params.test_title,
+            "test_title": spec_ir.test_title,
             "test_class_name": convert_to_pascal_case(self.config.name),
             "test_func_name": convert_to_snake_case(self.config.name),
-            "background": self.test_file_params.background,
-            "independent_variable": independent_variable,
-            "dependent_variable": dependent_variable,
-            "control_variables": self.test_file_params.control_variables,
-            "materials": self.test_file_params.materials,
-            "test_procedure": self.test_file_params.test_method,  # Pass as test_procedure to templates
-            "imports": self.test_file_params.imports,
+            "background": spec_ir.background,
+            "independent_variable": spec_ir.independent_variable,
+            "dependent_variable": spec_ir.dependent_variable,
+            "control_variables": spec_ir.control_variables,
+            "materials": spec_ir.materials,
+            "test_procedure": spec_ir.test_method,  # Pass as test_procedure to templates
+            "imports": spec_ir.imports,
             "independent_var_name": independent_var_name,
+            "dependent_var_name": sanitize_variable_name(dependent_variable.name),
             "is_exception_test": is_exception_test,
             "expected_value": expected_value,
             "timestamp": timestamp,
-            "parametrized": self.config.parametrized,
-            "debug": self.config.debug,
-            "test_params": self.config.test_params
+            "parametrized": self.config.parametrized or bool(parameter_cases),
+            "parameter_cases": parameter_cases,
+            "parameter_table": parameter_table,
+            "swept_controls": [control.variable for control in swept_controls],
+            "debug": self.config.debug
         }
 
         # Add debug information if enabled
@@ -353,37 +709,173 @@ class TestGenerator:
             logger.debug(f"Template context keys: {list(context.keys())}")
 
             # Check if this is a parametrized test
-            if hasattr(independent_variable, 'values'):
-                values = getattr(independent_variable, 'values', None)
-                if values and isinstance(values, list):
-                    logger.debug(f"Parametrized test with {len(values)} parameter sets")
+            if parameter_cases:
+                logger.debug(f"Parametrized test with {len(parameter_cases)} parameter sets")
 
-                    # Set parametrized flag automatically if values are found
-                    if not self.config.parametrized:
-                        logger.debug("Auto-enabling parametrized testing based on data structure")
-                        self.config.parametrized = True
-                        context["parametrized"] = True
+                # Set parametrized flag automatically if values are found
+                if not self.config.parametrized:
+                    logger.debug("Auto-enabling parametrized testing based on data structure")
+                    self.config.parametrized = True
+                    context["parametrized"] = True
 
-        # Render template
-        result_content: str = ""
-        if hasattr(template, "render"):
-            # Jinja2 template
-            result_content = template.render(**context)
-        else:
-            # String template (basic formatting)
-            result_content = template.format(**context)
+        return context
 
-        # Replace the timestamp placeholder with the actual timestamp
-        result_content = result_content.replace("{{timestamp}}", timestamp)
+    def _expand_parameter_cases(self, expansion: Optional[str] = None) -> Sequence[ParameterCase]:
+        """
+        Get the cases of the test, expanded over its swept control variables.
 
-        return result_content
+        Args:
+            expansion: Expansion mode. Defaults to config.expansion.
 
-    def generate_test_file(self) -> str:
+        Returns:
+            Sequence[ParameterCase]: The cases. An expansion is produced lazily.
         """
-        Generate a test file based on JSON input.
+        params = self.test_file_params
+        return expand_cases(
+            params.parameter_cases,
+            params.ir.independent_variable,
+            params.ir.dependent_variable,
+            list(params.control_sweeps),
+            expansion or self.config.expansion,
+            self.config.expansion_strength
+        )
+
+    def count_cases(self, json_data: Optional[Union[Dict[str, Any], bytes]] = None) -> CaseCount:
+        """
+        Count the cases the test expands to, without rendering anything.
+
+        Args:
+            json_data: Already-loaded test parameters, as a dictionary or raw JSON bytes.
+                If None, they are loaded from the configured JSON file.
 
         Returns:
-            str: Generated test file content
+            CaseCount: Number of cases in the configured mode and in the full cartesian product
+        """
+        self._load_test_parameters(json_data)
+        return CaseCount(
+            name=self.config.name,
+            mode=self.config.expansion,
+            cases=len(self._expand_parameter_cases()),
+            cartesian=len(self._expand_parameter_cases("cartesian")),
+            max_cases=self.config.max_cases
+        )
+
+    def _write_parameter_table(self, cases: Sequence[ParameterCase]) -> Optional[Dict[str, str]]:
+        """
+        Write the cases of a parametrized test to a sidecar table, if configured.
+
+        Args:
+            cases: The cases of the test
+
+        Returns:
+            Optional[Dict[str, str]]: File name and format of the table for the template,
+                or None if the cases are inlined
+        """
+        if not cases or self.config.parameter_table == "inline":
+            return None
+
+        self.config.output_dir.mkdir(parents=True, exist_ok=True)
+        table_path = write_parameter_table(
+            cases,
+            self.output_path,
+            self.config.parameter_table,
+            self.test_file_params.ir.independent_variable,
+            self.test_file_params.ir.dependent_variable
+        )
+        if table_path is None:
+            return None
+        return {"file": table_path.name, "format": table_path.suffix.lstrip(".")}
+
+    def _render_template(self, template: Template) -> str:
+        """
+        Render the template with test parameters.
+
+        Args:
+            template: Template object
+
+        Returns:
+            str: Rendered test file
+        """
+        logger.info("Rendering test file template")
+        with self.timings.stage("render"):
+            return template.render(**self._build_context())
+
+    def _render_template_to_file(
+        self,
+        template: Template,
+        file_path: Path,
+        context: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Render the template with test parameters, streaming it straight to disk.
+
+        The rendered file is never held in memory as a whole: each chunk from
+        Template.generate() is written as soon as it is produced. The output is
+        written to a temporary file first, so a failed render never leaves a
+        truncated test file behind.
+
+        Args:
+            template: Template object
+            file_path: Path to write the rendered test file to
+            context: Template variables. If None, they are built from the configuration.
+        """
+        logger.info("Rendering test file template")
+        if context is None:
+            with self.timings.stage("render"):
+                context = self._build_context()
+
+        temp_path = file_path.with_name(f".{file_path.name}.tmp")
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                for chunk in self.timings.split(template.generate(**context), "render", "write"):
+                    file.write(chunk)
+            with self.timings.stage("write"):
+                os.replace(temp_path, file_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+    def _load_test_parameters(self, json_data: Optional[Union[Dict[str, Any], bytes]] = None) -> None:
+        """
+        Load and parse the test parameters into self.test_file_params, keeping only what rendering reads.
+
+        Args:
+            json_data: Already-loaded test parameters, as a dictionary or raw JSON bytes.
+                If None, they are loaded from the configured JSON file.
+        """
+        # Load JSON data; the value tables of a large spec file are left in the file
+        if json_data is None and not self.config.debug and should_stream(self.config.json_file_path):
+            params = self._parse_streamed_test_parameters()
+            with self.timings.stage("parse"):
+                self.test_file_params = params.compile()
+            return
+        if json_data is None:
+            with self.timings.stage("load"):
+                json_data = self._load_json_file() if self.config.debug else self._load_json_bytes()
+
+        # Parse test parameters, then drop the validated models
+        with self.timings.stage("parse"):
+            if isinstance(json_data, bytes):
+                params = self._parse_test_parameters_json(json_data)
+            else:
+                params = self._parse_test_parameters(json_data)
+            if params is None:
+                raise ValueError("Failed to parse test parameters")
+            self.test_file_params = params.compile()
+
+    def _prepare_template(self, json_data: Optional[Union[Dict[str, Any], bytes]] = None) -> Template:
+        """
+        Load and parse the test parameters, then get the template to render them with.
+
+        Raw JSON bytes take the single-pass path, TestFileParameters.from_json().
+        Debug mode loads the file as a dictionary instead so it can log its structure.
+
+        Args:
+            json_data: Already-loaded test parameters, as a dictionary or raw JSON bytes.
+                If None, they are loaded from the configured JSON file.
+
+        Returns:
+            Template: Template for the configured harness
         """
         if self.config.debug:
             logger.debug(f"Starting test file generation with config: {self.config}")
@@ -398,22 +890,32 @@ class TestGenerator:
             ]
             logger.debug("\n".join(debug_settings))
 
-        # Load JSON data
-        json_data = self._load_json_file()
-
-        # Parse test parameters
-        self.test_file_params = self._parse_test_parameters(json_data)
-        if self.test_file_params is None:
-            raise ValueError("Failed to parse test parameters")
+        self._load_test_parameters(json_data)
 
         # Get template
-        template = self._get_template()
+        with self.timings.stage("template"):
+            template = self._get_template()
         if template is None:
             raise ValueError("Failed to get template")
 
         if self.config.debug:
             logger.debug(f"Using template for {self.config.harness}")
 
+        return template
+
+    def generate_test_file(self, json_data: Optional[Union[Dict[str, Any], bytes]] = None) -> str:
+        """
+        Generate a test file based on JSON input.
+
+        Args:
+            json_data: Already-loaded test parameters, as a dictionary or raw JSON bytes.
+                If None, they are loaded from the configured JSON file.
+
+        Returns:
+            str: Generated test file content
+        """
+        template = self._prepare_template(json_data)
+
         # Render template
         content = self._render_template(template)
 
@@ -435,315 +937,97 @@ class TestGenerator:
 
         return content
 
-    def write_test_file(self, content: str) -> Path:
+    def generate_to_file(self, json_data: Optional[Union[Dict[str, Any], bytes]] = None) -> Path:
         """
-        Write the generated test file to disk.
+        Generate a test file based on JSON input and stream it straight to disk.
+
+        Unlike generate_test_file() followed by write_test_file(), the rendered
+        file is never held in memory, so peak memory does not grow with the
+        size of the output.
 
         Args:
-            content: Test file content
+            json_data: Already-loaded test parameters, as a dictionary or raw JSON bytes.
+                If None, they are loaded from the configured JSON file.
 
         Returns:
             Path: Path to the output file
         """
-        # Create output directory if it doesn't exist
-        output_dir = self.config.output_dir
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        # Create file path
-        test_name = convert_to_snake_case(self.config.name)
-        file_path = output_dir / f"test_{test_name}.py"
+        template = self._prepare_template(json_data)
 
-        # Write file
-        file_path.write_text(content)
+        self.config.output_dir.mkdir(parents=True, exist_ok=True)
+        file_path = self.output_path
+        self._render_template_to_file(template, file_path)
         logger.info(f"Test file written to {file_path}")
 
         return file_path
 
-
-# Inline templates (used as fallback if template files are not available)
-UNITTEST_TEMPLATE = '''#!/usr/bin/env python
-# -*- coding: utf-8 -*-
-"""
-{config.description}
-
-Generated on: {{timestamp}}
-"""
-import unittest
-import json
-import datetime
-{% for imp in imports %}
-{{ imp.import_string }}
-{% endfor %}
-
-class Test{test_class_name}(unittest.TestCase):
-    """Test case for {test_title}."""
-
-    def setUp(self):
-        """Set up test fixtures."""
-        pass
-
-    def tearDown(self):
-        """Tear down test fixtures."""
-        pass
-
-    def test_{test_func_name}(self):
+    def generate_variants(
+        self,
+        param_sets: Sequence[Dict[str, Any]],
+        json_data: Optional[Union[Dict[str, Any], bytes]] = None
+    ) -> List[Path]:
         """
-        Background: {background.orientation}
-        Test Purpose: {background.purpose}
-        Hypothesis: {background.hypothesis}
+        Generate one test file per set of test parameters from a single parse of the spec.
+
+        The spec is loaded and validated once, the part of the template context
+        that does not depend on the test parameters (including a sidecar
+        parameter table) is built once, and the conditions of the validation
+        procedures are evaluated for all variants in one batch.
 
         Args:
-            Independent Variable:
-                {independent_variable.name}: {independent_variable.description}
-            Dependent Variable:
-                {dependent_variable.name}: {dependent_variable.description}
-            Control Variables:
-            {% for var in control_variables %}
-                {var.name}: {var.description}
-            {% endfor %}
-        """
-        # Define independent variable
-        {{ independent_var_name }} = {{ independent_variable.value }}
-
-        # Define dependent variable
-        {{ dependent_variable.name | lower | replace(' ', '_') }} = {{ expected_value }}
-
-        # Define control variable(s)
-        {% for var in control_variables %}
-        {{ var.name | lower | replace(' ', '_') }} = {{ var.value }}
-        {% endfor %}
-
-        {% if is_exception_test %}
-        # This is an exception test that expects {{ expected_value }}
-        {% for step in test_procedure.steps %}
-        # {{ step }}
-        {% endfor %}
-        # TODO: Implement code that does the above steps
-        raise NotImplementedError(f"Implementation for test 'test_{test_func_name}' cannnot be created programmatically. Follow the steps in the docstring and function body to build a working test.")
-        {% else %}
-        # Test steps
-        {% for step in test_procedure.steps %}
-        # {{ step }}
-        {% endfor %}
-
-        # TODO: Implement code that does the above steps
-        raise NotImplementedError(f"Implementation for test 'test_{test_func_name}' cannnot be created programmatically. Follow the steps in the docstring and function body to build a working test.")
-        {% endif %}
-
-    def dump_test_to_json(self):
-        """Dump test information to JSON file for record keeping."""
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        test_data = {
-            "test_title": "{test_title}",
-            "test_class": "{test_class_name}",
-            "test_function": "test_{test_func_name}",
-            "hypothesis": "{background.hypothesis}",
-            "independent_variable": {
-                "name": "{independent_variable.name}",
-                "value": "{independent_variable.value}"
-            },
-            "dependent_variable": {
-                "name": "{dependent_variable.name}",
-                "expected": "{dependent_variable.expected_value.value}",
-                "actual": "N/A" # TODO This needs to be updated with the actual result at runtime.
-            },
-            "timestamp": timestamp,
-            "generated_on": timestamp
-        }
+            param_sets: Test parameters of each variant
+            json_data: Already-loaded test parameters, as a dictionary or raw JSON bytes.
+                If None, they are loaded from the configured JSON file.
 
-        filename = f"test_{test_func_name}_results_{timestamp}.json"
-        with open(filename, "w") as f:
-            json.dump(test_data, f, indent=2)
-        return filename
+        Returns:
+            List[Path]: Paths to the output files, one per variant in order
 
+        Raises:
+            ValueError: If two variants would be written to the same file
+        """
+        paths = [get_variant_output_path(self.config, test_params) for test_params in param_sets]
+        duplicates = sorted({path.name for path in paths if paths.count(path) > 1})
+        if duplicates:
+            raise ValueError(f"Variants would overwrite each other: {', '.join(duplicates)}")
 
-if __name__ == "__main__":
-    # Initialize the test suite
-    test_suite = unittest.TestSuite()
+        template = self._prepare_template(json_data)
+        self.config.output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Add the test to the suite
-    test_case = Test{test_class_name}("test_{test_func_name}")
-    test_suite.addTest(test_case)
+        with self.timings.stage("render"):
+            shared_context = self._build_shared_context()
+            selections = self.test_file_params.condition_index.select_batch(param_sets)
+        for test_params, validation_procedures, file_path in zip(param_sets, selections, paths):
+            context = dict(shared_context, **self._variant_context(test_params, validation_procedures))
+            self._render_template_to_file(template, file_path, context)
+            logger.info(f"Test file written to {file_path}")
 
-    # Create test runner
-    runner = unittest.TextTestRunner()
+        return paths
 
-    # Run the test and dump results
-    result = runner.run(test_suite)
+    @property
+    def output_path(self) -> Path:
+        """Path the generated test file is written to."""
+        return get_output_path(self.config)
 
-    # Save test results to JSON
-    filename = test_case.dump_test_to_json()
-    print(f"Test results saved to {filename}")
-'''
+    def write_test_file(self, content: str) -> Path:
+        """
+        Write the generated test file to disk.
 
-PYTEST_TEMPLATE = '''#!/usr/bin/env python
-# -*- coding: utf-8 -*-
-"""
-{config.description}
+        Args:
+            content: Test file content
 
-Generated on: {{timestamp}}
-"""
-import pytest
-import json
-import datetime
-import sys
-import traceback
-from typing import Dict, Any, Optional
-{% for imp in imports %}
-{{ imp.import_string }}
-{% endfor %}
-
-# Global variables to store test results
-test_results = {
-    "test_title": "{test_title}",
-    "test_function": "test_{test_func_name}",
-    "hypothesis": "{background.hypothesis}",
-    "independent_variable": {
-        "name": "{independent_variable.name}",
-        "value": "{independent_variable.value}"
-    },
-    "dependent_variable": {
-        "name": "{dependent_variable.name}",
-        "expected": "{dependent_variable.expected_value.value}",
-        "actual": "N/A"  # Will be updated by test
-    },
-    "timestamp": datetime.datetime.now().strftime("%Y%m%d_%H%M%S"),
-    "generated_on": datetime.datetime.now().strftime("%Y%m%d_%H%M%S"),
-    "outcome": "not_run"
-}
-
-# No global hooks - we'll use a plugin instead
-
-# Test fixtures
-@pytest.fixture
-def setup_test():
-    """Set up test fixtures."""
-    # Setup code here
-    yield
-    # Teardown code here
-
-@pytest.fixture
-def result_logger():
-    """Fixture to capture and log test results."""
-    class ResultLogger:
-        def log_result(self, actual_value: Any) -> None:
-            """Log the actual test result."""
-            global test_results
-            test_results["dependent_variable"]["actual"] = str(actual_value)
-
-    return ResultLogger()
-
-def test_{test_func_name}(setup_test, result_logger):
-    """
-    Background: {background.orientation}
-    Test Purpose: {background.purpose}
-    Hypothesis: {background.hypothesis}
+        Returns:
+            Path: Path to the output file
+        """
+        # Create output directory if it doesn't exist
+        self.config.output_dir.mkdir(parents=True, exist_ok=True)
 
-    Args:
-        Independent Variable:
-            {independent_variable.name}: {independent_variable.description}
-        Dependent Variable:
-            {dependent_variable.name}: {dependent_variable.description}
-        Control Variables:
-        {% for var in control_variables %}
-            {var.name}: {var.description}
-        {% endfor %}
-    """
-    # Define independent variable
-    {{ independent_var_name }} = {{ independent_variable.value }}
+        # Create file path
+        file_path = self.output_path
 
-    # Define dependent variable
-    {{ dependent_variable.name | lower | replace(' ', '_') }} = {{ expected_value }}
+        # Write file
+        with self.timings.stage("write"):
+            file_path.write_text(content)
+        logger.info(f"Test file written to {file_path}")
 
-    # Define control variable(s)
-    {% for var in control_variables %}
-    {{ var.name | lower | replace(' ', '_') }} = {{ var.value }}
-    {% endfor %}
+        return file_path
 
-    try:
-        {% if is_exception_test %}
-        # This is an exception test that expects {{ expected_value }}
-        {% for step in test_procedure.steps %}
-        # {{ step }}
-        {% endfor %}
-        # TODO: Implement code that does the above steps
-
-        # Log the expected exception
-        result_logger.log_result("Expected {{ expected_value }} but none raised")
-
-        # Raise NotImplementedError for now
-        raise NotImplementedError(f"Implementation for test 'test_{test_func_name}' cannnot be created programmatically. Follow the steps in the docstring and function body to build a working test.")
-        {% else %}
-        # Test steps
-        {% for step in test_procedure.steps %}
-        # {{ step }}
-        {% endfor %}
-
-        # Log the actual result (to be filled in by implementation)
-        actual_value = "Not implemented yet"
-        result_logger.log_result(actual_value)
-
-        # TODO: Implement code that does the above steps
-        raise NotImplementedError(f"Implementation for test 'test_{test_func_name}' cannnot be created programmatically. Follow the steps in the docstring and function body to build a working test.")
-        {% endif %}
-    except Exception as e:
-        # Capture any exceptions that occur during the test
-        if isinstance(e, {{ expected_value }}):
-            # If this is the expected exception, log it as success
-            result_logger.log_result(f"Raised expected {e.__class__.__name__}")
-            raise  # Re-raise for pytest to handle
-        else:
-            # If this is an unexpected exception, log it
-            result_logger.log_result(f"Unexpected {e.__class__.__name__}: {str(e)}")
-            raise  # Re-raise for pytest to handle
-
-
-def dump_test_to_json() -> str:
-    """Dump test information to JSON file for record keeping."""
-    global test_results
-
-    filename = f"test_{test_func_name}_results_{test_results['timestamp']}.json"
-    with open(filename, "w") as f:
-        json.dump(test_results, f, indent=2)
-    return filename
-
-
-# Create a proper pytest plugin to handle our hooks
-class ResultCollectorPlugin:
-    """Pytest plugin to collect and save test results."""
-
-    @pytest.hookimpl(tryfirst=True, hookwrapper=True)
-    def pytest_runtest_makereport(self, item, call):
-        """Capture test results."""
-        outcome = yield
-        report = outcome.get_result()
-
-        if report.when == "call":
-            global test_results
-            if report.outcome == "passed":
-                test_results["outcome"] = "passed"
-            elif report.outcome == "failed":
-                test_results["outcome"] = "failed"
-                if hasattr(report, "longrepr"):
-                    test_results["error"] = str(report.longrepr)
-            elif report.outcome == "skipped":
-                test_results["outcome"] = "skipped"
-                if hasattr(report, "longrepr"):
-                    test_results["skip_reason"] = str(report.longrepr)
-
-    def pytest_sessionfinish(self, session):
-        """Save results after all tests complete."""
-        print("\\nSaving test results to JSON...")
-        filename = dump_test_to_json()
-        print(f"Test results saved to {filename}")
-
-
-if __name__ == "__main__":
-    # Create our plugin
-    result_collector = ResultCollectorPlugin()
-
-    # Run the test with our plugin registered
-    exit_code = pytest.main(["-v", __file__], plugins=[result_collector])
-
-    sys.exit(exit_code)
-'''
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Incremental test generation from a JSONL stream of specs.
+"""
+from __future__ import annotations
+
+
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+
+from pydantic import BaseModel, Field
+
+
+from bulk import BulkGenerator, BulkJob, BulkResult
+from stage_timing import TimingReport
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.jsonl_stream")
+
+
+# Path that selects stdin instead of a file
+STDIN_PATH = "-"
+
+# Line-level keys that configure the job rather than describe the test
+JOB_KEYS = tuple(key for key in BulkJob.model_fields if key != "test_parameter_json")
+
+# Failures kept in the summary; later ones are counted but not stored
+MAX_RECORDED_FAILURES = 1000
+
+
+class StreamSummary(BaseModel):
+    """
+    Summary of a JSONL stream run.
+
+    Only failures are kept, and only up to MAX_RECORDED_FAILURES of them,
+    so the summary stays small however long the stream is.
+
+    Attributes:
+        succeeded: Number of lines that generated a test file
+        failed: Number of lines that failed
+        failures: The first failures, with their line numbers
+        elapsed: Wall-clock seconds for the whole run
+    """
+    succeeded: int = 0
+    failed: int = 0
+    failures: List[BulkResult] = Field(default_factory=list)
+    elapsed: float = 0.0
+
+    def add(self, result: BulkResult) -> None:
+        """Count a line's result, keeping it only if it failed."""
+        if result.succeeded:
+            self.succeeded += 1
+            return
+        self.failed += 1
+        if len(self.failures) < MAX_RECORDED_FAILURES:
+            self.failures.append(result)
+
+    def log(self) -> None:
+        """Log the summary, listing the recorded failures."""
+        for result in self.failures:
+            logger.error(f"FAILED {result.name} ({result.source}): {result.error}")
+        if self.failed > len(self.failures):
+            logger.error(f"... and {self.failed - len(self.failures)} more failures")
+        logger.info(
+            f"Stream generation complete: {self.succeeded} succeeded, {self.failed} failed, "
+            f"{self.succeeded + self.failed} total in {self.elapsed:.2f}s"
+        )
+
+
+def iter_jsonl(stream: TextIO) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Read a JSONL stream one line at a time.
+
+    Lines are yielded as soon as they arrive, so this works on a pipe that is
+    still being written. Blank lines are skipped.
+
+    Args:
+        stream: Text stream of JSON objects, one per line
+
+    Yields:
+        Tuple[int, Optional[Dict[str, Any]], Optional[str]]: Line number, the parsed
+            object (None if the line is invalid), and an error message for invalid lines
+    """
+    for line_number, line in enumerate(iter(stream.readline, ""), start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(data, dict):
+            yield line_number, None, "Line must contain a JSON object"
+            continue
+        yield line_number, data, None
+
+
+def split_line(data: Dict[str, Any], line_number: int) -> Tuple[BulkJob, Dict[str, Any]]:
+    """
+    Split a JSONL line into its job settings and its test parameters.
+
+    A line is either {"test_file_parameters": {...}} or the test parameters
+    object itself. Either form may also carry job keys such as "name",
+    "description" and "harness" at the top level.
+
+    Args:
+        data: The parsed line
+        line_number: Line number, used for the default test name
+
+    Returns:
+        Tuple[BulkJob, Dict[str, Any]]: The job and the JSON data for TestGenerator
+    """
+    job_data = {key: data[key] for key in JOB_KEYS if key in data}
+    if "test_file_parameters" in data:
+        params = data["test_file_parameters"]
+    else:
+        params = {key: value for key, value in data.items() if key not in JOB_KEYS}
+
+    if "name" not in job_data:
+        title = params.get("test_title") if isinstance(params, dict) else None
+        job_data["name"] = title if isinstance(title, str) and title else f"line_{line_number}"
+
+    return BulkJob.model_validate(job_data), {"test_file_parameters": params}
+
+
+def generate_from_stream(
+    stream: TextIO,
+    bulk_generator: BulkGenerator,
+    source: Path,
+    timing_report: Optional[TimingReport] = None
+) -> StreamSummary:
+    """
+    Generate a test file for every line of a JSONL stream as the lines arrive.
+
+    Each line is parsed, rendered and written before the next is read, so
+    memory use does not grow with the length of the stream. A bad line is
+    reported with its line number and the stream carries on.
+
+    Args:
+        stream: Text stream of specs, one per line
+        bulk_generator: Generator holding the shared template environment and defaults
+        source: Name of the stream, used in error reports
+        timing_report: Report to add the stage timings of each generated line to,
+            if the bulk generator is timed
+
+    Returns:
+        StreamSummary: Counts and failures of the run
+    """
+    start = time.perf_counter()
+    summary = StreamSummary()
+
+    for line_number, data, error in iter_jsonl(stream):
+        line_start = time.perf_counter()
+        name = f"line_{line_number}"
+        if data is not None:
+            try:
+                job, json_data = split_line(data, line_number)
+                name = job.display_name
+                timings = bulk_generator.job_timings()
+                output_path = bulk_generator.write_job(job, json_data, timings)
+                result = BulkResult(
+                    name=name,
+                    spec_path=source,
+                    line_number=line_number,
+                    output_path=output_path,
+                    elapsed=time.perf_counter() - line_start,
+                    timings=timings.seconds if timings is not None else {}
+                )
+                summary.add(result)
+                if timing_report is not None:
+                    timing_report.add_results([result])
+                continue
+            except Exception as e:
+                logger.debug(f"Error generating line {line_number} of {source}", exc_info=True)
+                error = f"{type(e).__name__}: {e}"
+
+        summary.add(BulkResult(
+            name=name,
+            spec_path=source,
+            line_number=line_number,
+            error=error,
+            elapsed=time.perf_counter() - line_start
+        ))
+
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+def generate_from_jsonl(
+    path: str,
+    bulk_generator: BulkGenerator,
+    timing_report: Optional[TimingReport] = None
+) -> StreamSummary:
+    """
+    Generate tests from a JSONL file, or from stdin when the path is "-".
+
+    Args:
+        path: Path to the JSONL file, or "-" for stdin
+        bulk_generator: Generator holding the shared template environment and defaults
+        timing_report: Report to add the stage timings of each generated line to,
+            if the bulk generator is timed
+
+    Returns:
+        StreamSummary: Counts and failures of the run
+    """
+    if path == STDIN_PATH:
+        return generate_from_stream(sys.stdin, bulk_generator, Path("<stdin>"), timing_report)
+
+    with open(path, 'r', encoding='utf-8') as stream:
+        return generate_from_stream(stream, bulk_generator, Path(path), timing_report)
@@ -0,0 +1,556 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Parameter tables for parametrized tests.
+
+The cases of a parametrized test are either inlined into the generated module
+or written to a sidecar data file next to it, which the generated test loads
+when it is collected. A sidecar keeps a module with tens of thousands of cases
+small and fast to import: Python no longer has to parse and compile one giant
+literal.
+
+Sidecar formats:
+    - jsonl: one {"id": ..., "input": ..., "expected": ...} object per line
+    - npy: a NumPy structured array with id, input and expected fields.
+        Only used for numeric continuous/discrete variables, and only when NumPy is installed.
+"""
+from __future__ import annotations
+
+
+import ast
+import itertools
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+
+from schemas.expected_value import ParameterExpectedValue
+from schemas.statistical_type import StatisticalType
+from schemas.variable import ParameterValue, ValueColumns, Variable
+from values_stream import StreamedValues
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.parameter_table")
+
+
+# Choices for Configs.parameter_table
+PARAMETER_TABLE_FORMATS = ("inline", "jsonl", "npy")
+
+# Statistical types whose values can be stored in a .npy table
+NUMERIC_TYPES = (StatisticalType.CONTINUOUS, StatisticalType.DISCRETE)
+
+
+class ParameterCase(NamedTuple):
+    """
+    One case of a parametrized test.
+
+    Spec values are Python source, e.g. '"hello"' or 'ValueError'. Non-string
+    values, such as numbers, are used as they are. The values have already been
+    validated as part of the spec, so a case is a plain tuple rather than a
+    model: a table may hold hundreds of thousands of them.
+
+    Attributes:
+        id: Identifier of the case, used as the pytest id and the subTest message
+        input: Value of the independent variable
+        expected: Expected value of the dependent variable
+        controls: Values of the swept control variables, if the cases are expanded over them
+    """
+    id: str
+    input: Any
+    expected: Any
+    controls: Tuple[Any, ...] = ()
+
+    @property
+    def input_source(self) -> str:
+        """The input as Python source, for inlining into the generated test."""
+        return _to_source(self.input)
+
+    @property
+    def expected_source(self) -> str:
+        """The expected value as Python source, for inlining into the generated test."""
+        return _to_source(self.expected)
+
+    @property
+    def sources(self) -> List[str]:
+        """The input, expected value and control values as Python source, in argument order."""
+        return [_to_source(value) for value in (self.input, self.expected, *self.controls)]
+
+    def to_data(self) -> dict[str, Any]:
+        """
+        The case as plain data, for a sidecar table.
+
+        Returns:
+            dict[str, Any]: The id, input and expected value
+
+        Raises:
+            ValueError: If the input or expected value is not a Python literal
+        """
+        data = {"id": self.id, "input": _to_data(self.input), "expected": _to_data(self.expected)}
+        if self.controls:
+            data["controls"] = [_to_data(value) for value in self.controls]
+        return data
+
+
+def _to_source(value: Any) -> str:
+    """Python source for a spec value."""
+    return value if isinstance(value, str) else repr(value)
+
+
+def _to_data(value: Any) -> Any:
+    """Evaluate a spec value to data, without running any code."""
+    if not isinstance(value, str):
+        return value
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError) as e:
+        raise ValueError(f"{value!r} is not a Python literal") from e
+
+
+class RangeCases(Sequence):
+    """
+    The cases of a test sweeping a range, built as they are used.
+
+    Every case expects the same value, and is identified by its input value.
+    """
+
+    def __init__(self, values: Sequence[Any], expected: Any):
+        """
+        Initialize the cases.
+
+        Args:
+            values: Values of the range, e.g. a RangeValues sequence
+            expected: The expected value of every case
+        """
+        self.values = values
+        self.expected = expected
+
+    def _case(self, value: Any) -> ParameterCase:
+        return ParameterCase(id=str(value), input=value, expected=self.expected)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self._case(value) for value in self.values[index]]
+        return self._case(self.values[index])
+
+    def __iter__(self) -> Iterator[ParameterCase]:
+        return map(self._case, self.values)
+
+
+class ColumnCases(Sequence):
+    """
+    The cases of a test whose values are stored as columns, built as they are used.
+
+    Every case expects the same value, and is identified by the id of its
+    value, or its index if the value has none.
+    """
+
+    def __init__(self, columns: ValueColumns, expected: Any):
+        """
+        Initialize the cases.
+
+        Args:
+            columns: Values of the independent variable
+            expected: The expected value of every case
+        """
+        self.columns = columns
+        self.expected = expected
+
+    def _case(self, index: int) -> ParameterCase:
+        ids = self.columns.ids
+        return ParameterCase(
+            id=(ids[index] if ids is not None else None) or str(index),
+            input=self.columns.values[index],
+            expected=self.expected
+        )
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self._case(position) for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("case index out of range")
+        return self._case(index)
+
+    def __iter__(self) -> Iterator[ParameterCase]:
+        return map(self._case, range(len(self)))
+
+
+class StreamedCases(Sequence):
+    """
+    The cases of a test whose value tables are streamed from its spec file.
+
+    Values are paired with expected values by position, and each case is built
+    as the tables are read, so the cases are never all in memory. Values with
+    ids must have the same ids as their expected values, in the same order;
+    this is checked when the spec is read.
+    """
+
+    def __init__(
+        self,
+        values: Sequence[Any],
+        expected_values: Optional[Sequence[ParameterExpectedValue]],
+        expected: Any
+    ):
+        """
+        Initialize the cases.
+
+        Args:
+            values: Values of the independent variable, e.g. a StreamedValues table
+            expected_values: Expected values of the dependent variable, or None if every case expects the same value
+            expected: The expected value of every case, if there are no expected values
+        """
+        self.values = values
+        self.expected_values = expected_values
+        self.expected = expected
+
+    def _case(self, index: int, value: Any, expected_value: Optional[ParameterExpectedValue]) -> ParameterCase:
+        case_id = value.id if isinstance(value, ParameterValue) else None
+        if expected_value is not None and case_id is not None and expected_value.id != case_id:
+            raise ValueError(
+                f"Parameter cases do not join by id: value {case_id!r} is paired with expected value {expected_value.id!r}"
+            )
+        return ParameterCase(
+            id=case_id if case_id is not None else str(index),
+            input=value.value if isinstance(value, ParameterValue) else value,
+            expected=expected_value.expected if expected_value is not None else self.expected
+        )
+
+    def __len__(self) -> int:
+        if self.expected_values is None:
+            return len(self.values)
+        return min(len(self.values), len(self.expected_values))
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return list(itertools.islice(self, *index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("case index out of range")
+        expected_value = self.expected_values[index] if self.expected_values is not None else None
+        return self._case(index, self.values[index], expected_value)
+
+    def __iter__(self) -> Iterator[ParameterCase]:
+        expected_values = self.expected_values if self.expected_values is not None else itertools.repeat(None)
+        for index, (value, expected_value) in enumerate(zip(self.values, expected_values)):
+            yield self._case(index, value, expected_value)
+
+
+def _format_ids(ids: List[str], limit: int = 10) -> str:
+    """A short, readable list of case ids."""
+    shown = ", ".join(repr(case_id) for case_id in ids[:limit])
+    return shown if len(ids) <= limit else f"{shown} and {len(ids) - limit} more"
+
+
+def _join_by_id(
+    ids: Sequence[str],
+    inputs: Sequence[Any],
+    expected_values: List[ParameterExpectedValue]
+) -> List[ParameterCase]:
+    """
+    Hash join values to expected values on their ids.
+
+    Args:
+        ids: Ids of the values of the independent variable, all given
+        inputs: The values themselves, in the same order
+        expected_values: Expected values of the dependent variable, all with ids
+
+    Returns:
+        List[ParameterCase]: One case per value, in the order of the values
+
+    Raises:
+        ValueError: If an id is duplicated or has no match on the other side
+    """
+    expected_by_id: Dict[str, ParameterExpectedValue] = {}
+    duplicate_expected_ids = []
+    for expected_value in expected_values:
+        if expected_value.id in expected_by_id:
+            duplicate_expected_ids.append(expected_value.id)
+        else:
+            expected_by_id[expected_value.id] = expected_value
+
+    cases = []
+    seen_ids = set()
+    duplicate_ids = []
+    missing_expected_ids = []
+    for case_id, value in zip(ids, inputs):
+        if case_id in seen_ids:
+            duplicate_ids.append(case_id)
+            continue
+        seen_ids.add(case_id)
+        expected_value = expected_by_id.get(case_id)
+        if expected_value is None:
+            missing_expected_ids.append(case_id)
+            continue
+        cases.append(ParameterCase(id=case_id, input=value, expected=expected_value.expected))
+    unmatched_expected_ids = [case_id for case_id in expected_by_id if case_id not in seen_ids]
+
+    problems = [
+        (duplicate_ids, "duplicate value ids"),
+        (duplicate_expected_ids, "duplicate expected value ids"),
+        (missing_expected_ids, "values without an expected value"),
+        (unmatched_expected_ids, "expected values without a value"),
+    ]
+    report = [f"{len(ids)} {label} ({_format_ids(ids)})" for ids, label in problems if ids]
+    if report:
+        raise ValueError(f"Parameter cases do not join by id: {'; '.join(report)}")
+    return cases
+
+
+def build_parameter_cases(independent_variable: Variable, dependent_variable: Variable) -> Sequence[ParameterCase]:
+    """
+    Join the values of the independent variable to their expected values.
+
+    When the values and expected values have ids, they are joined on them in
+    linear time, and every id must appear exactly once on each side. Without
+    ids they are paired by position; ids on only one side are an error. A dependent variable without a values
+    list expects its single expected value for every case.
+
+    The values of a range have their value as their id, e.g. "1024". A range
+    with a single expected value gives a RangeCases sequence, so its cases are
+    only built as they are used. Value tables streamed from a large spec file
+    give a StreamedCases sequence, which reads them as the cases are used.
+    Values stored as columns are read from the columns directly, and with a
+    single expected value give a ColumnCases sequence.
+
+    Args:
+        independent_variable: Variable whose values parametrize the test
+        dependent_variable: Variable whose expected values the cases check
+
+    Returns:
+        Sequence[ParameterCase]: The cases, empty if the test is not parametrized
+
+    Raises:
+        ValueError: If ids are missing, duplicated or unmatched
+    """
+    values = independent_variable.sweep_values() or []
+    if not values:
+        return []
+
+    expected_value = dependent_variable.expected_value
+    expected_values = expected_value.values if expected_value is not None and expected_value.values else None
+
+    if isinstance(values, StreamedValues):
+        if expected_values is not None and len(expected_values) != len(values):
+            logger.warning(
+                f"{len(values)} values but {len(expected_values)} expected values; "
+                f"using the first {min(len(values), len(expected_values))}"
+            )
+        return StreamedCases(values, expected_values, expected_value.value if expected_value is not None else None)
+
+    if independent_variable.range is not None:
+        if expected_values is None:
+            return RangeCases(values, expected_value.value if expected_value is not None else None)
+        # Expected values for a range are matched on the values themselves, or by position
+        if any(item.id is not None for item in expected_values):
+            values = [ParameterValue(id=str(value), value=value) for value in values]
+        else:
+            values = list(values)
+
+    value_ids: Sequence[Optional[str]]
+    if isinstance(values, ValueColumns):
+        value_ids, inputs = values.ids or (), values.values
+    else:
+        value_ids = [value.id if isinstance(value, ParameterValue) else None for value in values]
+        inputs = [value.value if isinstance(value, ParameterValue) else value for value in values]
+    if any(case_id is not None for case_id in value_ids):
+        if None in value_ids:
+            missing = [str(index) for index, case_id in enumerate(value_ids) if case_id is None]
+            raise ValueError(f"Parameter values without an id at index {_format_ids(missing)}")
+        if expected_values is not None:
+            missing = [str(index) for index, item in enumerate(expected_values) if item.id is None]
+            if missing:
+                raise ValueError(f"Expected values without an id at index {_format_ids(missing)}")
+            return _join_by_id(value_ids, inputs, expected_values)
+    elif expected_values is not None and any(item.id is not None for item in expected_values):
+        raise ValueError("Expected values have ids but parameter values do not, so they cannot be joined on them")
+
+    if expected_values is None and isinstance(values, ValueColumns):
+        return ColumnCases(values, expected_value.value if expected_value is not None else None)
+
+    count = len(inputs)
+    if expected_values is not None and len(expected_values) != count:
+        logger.warning(
+            f"{count} values but {len(expected_values)} expected values; "
+            f"using the first {min(count, len(expected_values))}"
+        )
+        count = min(count, len(expected_values))
+
+    cases = []
+    for index in range(count):
+        if expected_values is not None:
+            expected = expected_values[index].expected
+        else:
+            expected = expected_value.value if expected_value is not None else None
+        cases.append(ParameterCase(
+            id=(value_ids[index] if value_ids else None) or str(index),
+            input=inputs[index],
+            expected=expected
+        ))
+    return cases
+
+
+def sidecar_path(output_path: Path, table_format: str) -> Path:
+    """
+    Path of the sidecar table for a generated test file.
+
+    Args:
+        output_path: Path of the generated test file
+        table_format: "jsonl" or "npy"
+
+    Returns:
+        Path: e.g. tests/test_name.cases.jsonl for tests/test_name.py
+    """
+    return output_path.with_name(f"{output_path.stem}.cases.{table_format}")
+
+
+def _numpy() -> Optional[Any]:
+    """NumPy, or None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def resolve_table_format(
+    requested: str,
+    rows: List[dict[str, Any]],
+    independent_variable: Variable,
+    dependent_variable: Variable
+) -> str:
+    """
+    Pick the sidecar format a table can actually be written in.
+
+    A .npy table needs NumPy, numeric continuous/discrete variables and numeric
+    values; otherwise JSON lines are written instead.
+
+    Args:
+        requested: "jsonl" or "npy"
+        rows: The cases as data, from ParameterCase.to_data()
+        independent_variable: Variable whose values parametrize the test
+        dependent_variable: Variable whose expected values the cases check
+
+    Returns:
+        str: "jsonl" or "npy"
+    """
+    if requested != "npy":
+        return requested
+    if _numpy() is None:
+        logger.info("NumPy is not installed; writing the parameter table as JSON lines")
+        return "jsonl"
+    if (independent_variable.statistical_type not in NUMERIC_TYPES
+            or dependent_variable.statistical_type not in NUMERIC_TYPES):
+        logger.info("Variables are not continuous or discrete; writing the parameter table as JSON lines")
+        return "jsonl"
+    if not all(_is_number(row["input"]) and _is_number(row["expected"]) for row in rows):
+        logger.info("Parameter values are not all numbers; writing the parameter table as JSON lines")
+        return "jsonl"
+    return "npy"
+
+
+def _write_jsonl(rows: Iterable[dict[str, Any]], file: Any) -> int:
+    count = 0
+    with open(file, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def _write_npy(rows: List[dict[str, Any]], file: Any) -> int:
+    numpy = _numpy()
+
+    def number_type(key: str) -> str:
+        return "<i8" if all(isinstance(row[key], int) for row in rows) else "<f8"
+
+    id_length = max((len(row["id"]) for row in rows), default=1)
+    dtype = [("id", f"<U{id_length}"), ("input", number_type("input")), ("expected", number_type("expected"))]
+    table = numpy.array([(row["id"], row["input"], row["expected"]) for row in rows], dtype=dtype)
+    with open(file, "wb") as f:
+        numpy.save(f, table)
+    return len(rows)
+
+
+def write_parameter_table(
+    cases: Iterable[ParameterCase],
+    output_path: Path,
+    requested: str,
+    independent_variable: Variable,
+    dependent_variable: Variable
+) -> Optional[Path]:
+    """
+    Write the cases of a parametrized test to a sidecar file next to its test file.
+
+    JSON lines are streamed as the cases are produced, so a lazily expanded set
+    of cases, or cases streamed from a large spec file, is never held in memory.
+    The table is written to a temporary file first, so a failure never leaves a
+    truncated table behind. Tables in the other format, left over from an
+    earlier run, are removed.
+
+    Args:
+        cases: The cases of the test
+        output_path: Path of the generated test file
+        requested: "jsonl" or "npy"
+        independent_variable: Variable whose values parametrize the test
+        dependent_variable: Variable whose expected values the cases check
+
+    Returns:
+        Optional[Path]: Path of the table, or None if a value is not a Python
+            literal that JSON can hold, and the cases have to be inlined instead
+    """
+    rows: Optional[List[dict[str, Any]]] = None
+    table_format = requested
+    # Streamed cases, also when expanded over control variables, are never loaded whole
+    if requested == "npy" and isinstance(getattr(cases, "cases", cases), StreamedCases):
+        logger.info("Parameter values are streamed from the spec file; writing the parameter table as JSON lines")
+        table_format = "jsonl"
+    elif requested == "npy":
+        try:
+            rows = [case.to_data() for case in cases]
+        except ValueError as e:
+            logger.warning(f"Cannot write a parameter table, inlining the cases instead: {e}")
+            return None
+        if any("controls" in row for row in rows):
+            logger.info("Cases sweep control variables; writing the parameter table as JSON lines")
+            table_format = "jsonl"
+        else:
+            table_format = resolve_table_format(requested, rows, independent_variable, dependent_variable)
+
+    table_path = sidecar_path(output_path, table_format)
+    temp_path = table_path.with_name(f".{table_path.name}.tmp")
+    try:
+        if table_format == "npy":
+            count = _write_npy(rows, temp_path)
+        else:
+            count = _write_jsonl(rows if rows is not None else (case.to_data() for case in cases), temp_path)
+        os.replace(temp_path, table_path)
+    except (TypeError, ValueError) as e:
+        temp_path.unlink(missing_ok=True)
+        logger.warning(f"Cannot write a parameter table, inlining the cases instead: {e}")
+        return None
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    for other_format in ("jsonl", "npy"):
+        if other_format != table_format:
+            sidecar_path(output_path, other_format).unlink(missing_ok=True)
+
+    logger.info(f"Parameter table with {count} cases written to {table_path}")
+    return table_path
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Staged generation pipeline with bounded queues between stages.
+"""
+from __future__ import annotations
+
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import queue
+import threading
+from pathlib import Path
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+
+from bulk import BulkJob, BulkResult, BulkSummary, _init_worker, _render_worker_job
+from profiling import profiled
+from spec_bundle import read_spec
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.pipeline")
+
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class GenerationPipeline:
+    """
+    Run Input -> Validation -> Transformation -> Generation -> Output as overlapping stages.
+
+    Stages:
+        1. Load (threads): read each spec's bytes from disk
+        2. Validate and render (processes): parse JSON, build the pydantic models, render the template
+        3. Write (threads): write each rendered test file to disk
+
+    Every hand-off between stages is bounded, so at most `queue_size` specs are
+    held in memory between loading and writing no matter how many specs the run has.
+    Disk latency in the load and write stages overlaps with rendering in the workers.
+    """
+
+    def __init__(
+        self,
+        defaults: Dict[str, Any],
+        workers: int,
+        queue_size: int = 64,
+        io_threads: int = 4,
+        timed: bool = False,
+        profile_dir: Optional[Path] = None
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            defaults: Configuration values shared by every job (usually the CLI arguments)
+            workers: Number of processes for the validate and render stage
+            queue_size: Maximum number of specs held between the load and write stages
+            io_threads: Number of threads in each of the load and write stages
+            timed: Whether to time the stages of every job, into BulkResult.timings
+            profile_dir: Worker directory of the RunProfile of the run, which the worker
+                processes and the load and write threads dump their profiles into.
+                If None, they are not profiled.
+        """
+        self.defaults = defaults
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.io_threads = max(1, io_threads)
+        self.timed = timed
+        self.profile_dir = profile_dir
+
+    def run(self, jobs: Iterable[BulkJob]) -> BulkSummary:
+        """
+        Run every job through the pipeline.
+
+        Args:
+            jobs: Jobs to run
+
+        Returns:
+            BulkSummary: Results of the run, in job order
+        """
+        start = time.perf_counter()
+        job_list = list(jobs)
+        results: List[Optional[BulkResult]] = [None] * len(job_list)
+        starts: List[float] = [0.0] * len(job_list)
+        load_times: List[float] = [0.0] * len(job_list)
+
+        # Bounded hand-off between the load threads and the render processes
+        to_load: queue.Queue = queue.Queue()
+        loaded: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        # Rendered output waits here for the write threads; the slot semaphore bounds it
+        rendered: queue.Queue = queue.Queue()
+        slots = threading.BoundedSemaphore(self.queue_size)
+
+        for index in range(len(job_list)):
+            to_load.put(index)
+        for _ in range(self.io_threads):
+            to_load.put(_DONE)
+
+        def record_failure(index: int, error: str) -> None:
+            job = job_list[index]
+            results[index] = BulkResult(
+                name=job.display_name,
+                spec_path=job.test_parameter_json,
+                error=error,
+                elapsed=time.perf_counter() - starts[index]
+            )
+
+        def load_stage() -> None:
+            try:
+                with profiled(self.profile_dir):
+                    load_specs()
+            finally:
+                # Always tell the dispatcher this loader is done, or it waits forever
+                loaded.put(_DONE)
+
+        def load_specs() -> None:
+            while (item := to_load.get()) is not _DONE:
+                index = item
+                starts[index] = time.perf_counter()
+                try:
+                    data = read_spec(job_list[index].test_parameter_json)
+                    load_times[index] = time.perf_counter() - starts[index]
+                except Exception as e:
+                    record_failure(index, f"{type(e).__name__}: {e}")
+                    continue
+                loaded.put((index, data))
+
+        def write_stage() -> None:
+            with profiled(self.profile_dir):
+                write_tests()
+
+        def write_tests() -> None:
+            while (item := rendered.get()) is not _DONE:
+                index, future = item
+                try:
+                    output_path, content, timings = future.result()
+                    write_start = time.perf_counter()
+                    output_path.write_text(content)
+                    if self.timed:
+                        timings = {"load": load_times[index], **timings, "write": time.perf_counter() - write_start}
+                    job = job_list[index]
+                    results[index] = BulkResult(
+                        name=job.display_name,
+                        spec_path=job.test_parameter_json,
+                        output_path=output_path,
+                        elapsed=time.perf_counter() - starts[index],
+                        timings=timings
+                    )
+                except BrokenProcessPool:
+                    record_failure(index, "Worker process crashed while generating this spec")
+                except Exception as e:
+                    record_failure(index, f"{type(e).__name__}: {e}")
+                finally:
+                    slots.release()
+
+        loaders = [threading.Thread(target=load_stage, daemon=True) for _ in range(self.io_threads)]
+        writers = [threading.Thread(target=write_stage, daemon=True) for _ in range(self.io_threads)]
+        for thread in loaders + writers:
+            thread.start()
+
+        executor = self._create_executor()
+        try:
+            finished_loaders = 0
+            while finished_loaders < len(loaders):
+                item = loaded.get()
+                if item is _DONE:
+                    finished_loaders += 1
+                    continue
+                index, data = item
+                slots.acquire()
+                future = self._submit(executor, job_list[index], data)
+                if future is None:
+                    # The pool broke; start a fresh one so later specs still run
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = self._create_executor()
+                    future = self._submit(executor, job_list[index], data)
+                if future is None:
+                    record_failure(index, "Worker process pool could not be started")
+                    slots.release()
+                    continue
+                future.add_done_callback(lambda f, i=index: rendered.put((i, f)))
+        finally:
+            for thread in loaders:
+                thread.join()
+            # Wait for every in-flight render to reach the writers before stopping them
+            for _ in range(self.queue_size):
+                slots.acquire()
+            for _ in writers:
+                rendered.put(_DONE)
+            for thread in writers:
+                thread.join()
+            executor.shutdown(wait=True)
+
+        # Jobs whose load or write thread died before finishing them still get a result, so results line up with jobs
+        for index, result in enumerate(results):
+            if result is None:
+                job = job_list[index]
+                results[index] = BulkResult(
+                    name=job.display_name,
+                    spec_path=job.test_parameter_json,
+                    error="Pipeline stopped before finishing this spec"
+                )
+
+        return BulkSummary(results=results, elapsed=time.perf_counter() - start)
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """Create the process pool for the validate and render stage."""
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.defaults, None, self.timed, self.profile_dir)
+        )
+
+    @staticmethod
+    def _submit(executor: ProcessPoolExecutor, job: BulkJob, data: bytes) -> Optional[Future]:
+        """
+        Submit a render to the pool.
+
+        Returns:
+            Optional[Future]: The pending render, or None if the pool is broken
+        """
+        try:
+            return executor.submit(_render_worker_job, job, data)
+        except BrokenProcessPool:
+            return None
+
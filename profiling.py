@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+cProfile profiles of generation runs, merged across threads and processes.
+
+A RunProfile profiles the generation part of a run: the thread that starts it,
+and through its worker directory every pool worker process and pipeline I/O
+thread. Each of those profiles itself and dumps its stats into the directory
+when it finishes, and the RunProfile merges them all into one .pstats file,
+plus a collapsed-stack file ("frame;frame;frame weight" per line) that
+flame-graph tools such as flamegraph.pl, inferno and speedscope read.
+
+cProfile records calls between pairs of functions, not whole stacks, so the
+collapsed stacks are rebuilt from the call graph: the time of a function is
+split between its callers in proportion to the time each call took.
+"""
+from __future__ import annotations
+
+
+from collections import defaultdict
+import contextlib
+import cProfile
+import logging
+from multiprocessing import util
+import os
+from pathlib import Path
+import pstats
+import shutil
+import sys
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.profiling")
+
+
+# Suffix of the collapsed-stack file written next to the .pstats file
+COLLAPSED_SUFFIX = ".collapsed"
+
+# Stacks with less time than this are left out of the collapsed stacks
+MIN_STACK_SECONDS = 1e-6
+
+
+# Key of a function in pstats: (file name, line number, function name)
+Function = Tuple[str, int, str]
+
+
+def _dump(profiler: cProfile.Profile, profile_dir: Path) -> None:
+    """Dump a profile into a file of its own in the profile directory."""
+    fd, path = tempfile.mkstemp(prefix=f"profile-{os.getpid()}-", suffix=".pstats", dir=profile_dir)
+    os.close(fd)
+    profiler.dump_stats(path)
+
+
+@contextlib.contextmanager
+def profiled(profile_dir: Optional[Path]) -> Iterator[None]:
+    """
+    Profile the calling thread for a block and dump the profile into a directory.
+
+    Used for the threads of a run other than the one its RunProfile was
+    entered in. On Pythons where a profiler already sees every thread, and so
+    a second one cannot be enabled, the block runs unprofiled here.
+
+    Args:
+        profile_dir: Directory of the RunProfile of the run. If None, nothing is profiled.
+    """
+    if profile_dir is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _dump(profiler, profile_dir)
+
+
+def start_worker_profile(profile_dir: Path) -> Optional[cProfile.Profile]:
+    """
+    Create the profiler of a worker process, dumped into a directory when the process exits.
+
+    The profiler is not enabled; the worker enters it around each job, so
+    starting up and waiting for jobs are left out of the profile.
+
+    Args:
+        profile_dir: Directory of the RunProfile of the run
+
+    Returns:
+        Optional[cProfile.Profile]: The profiler of the worker, or None if no
+            profiler can be enabled in it
+    """
+    # A forked worker inherits the profiler of the thread that started it
+    sys.setprofile(None)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        logger.warning(f"Cannot profile worker process {os.getpid()}; its jobs are left out of the profile")
+        return None
+    profiler.disable()
+    # Pool workers exit without running atexit hooks, but they do run multiprocessing finalizers
+    util.Finalize(None, _dump, args=(profiler, profile_dir), exitpriority=10)
+    return profiler
+
+
+def _label(function: Function) -> str:
+    """A frame of a collapsed stack for a function."""
+    file_name, line, name = function
+    if file_name == "~" and line == 0:
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(file_name)}:{line})"
+    # ";" separates the frames of a collapsed stack
+    return label.replace(";", ",")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Dict[str, float]:
+    """
+    Rebuild the call stacks of a profile with the time spent in each.
+
+    The stacks start at the functions with no profiled caller. Calls back into
+    a function already on the stack are folded into it.
+
+    Args:
+        stats: The profile
+
+    Returns:
+        Dict[str, float]: Seconds spent in each stack, with its frames joined by ";"
+    """
+    entries = stats.stats  # type: ignore[attr-defined]
+    callees: Dict[Function, List[Function]] = defaultdict(list)
+    for function, (_, _, _, _, callers) in entries.items():
+        for caller in callers:
+            if caller in entries:
+                callees[caller].append(function)
+
+    weights: Dict[str, float] = defaultdict(float)
+    roots = [function for function, entry in entries.items() if not any(caller in entries for caller in entry[4])]
+    # Each item: the function, the stack it is on, the functions on that stack,
+    # and the share of its time spent on that stack
+    pending: List[Tuple[Function, str, frozenset, float]] = [
+        (root, _label(root), frozenset((root,)), 1.0) for root in sorted(roots, reverse=True)
+    ]
+    while pending:
+        function, stack, on_stack, share = pending.pop()
+        _, _, own_seconds, _, _ = entries[function]
+        if own_seconds * share >= MIN_STACK_SECONDS:
+            weights[stack] += own_seconds * share
+        for callee in sorted(callees[function], reverse=True):
+            if callee in on_stack:
+                continue
+            callee_seconds = entries[callee][3]
+            call_seconds = entries[callee][4][function][3]
+            if callee_seconds <= 0 or call_seconds * share < MIN_STACK_SECONDS:
+                continue
+            pending.append(
+                (callee, f"{stack};{_label(callee)}", on_stack | {callee}, share * call_seconds / callee_seconds)
+            )
+    return dict(weights)
+
+
+def write_collapsed(stats: pstats.Stats, path: Path) -> None:
+    """
+    Write the collapsed stacks of a profile, weighted in microseconds.
+
+    Args:
+        stats: The profile
+        path: File to write
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        for stack, seconds in sorted(collapsed_stacks(stats).items()):
+            microseconds = round(seconds * 1_000_000)
+            if microseconds > 0:
+                file.write(f"{stack} {microseconds}\n")
+
+
+class RunProfile:
+    """
+    Profile of the generation part of a run, merged across threads and processes.
+
+    Entering the profile profiles the calling thread. Threads and worker
+    processes of the run dump their own profiles into worker_dir, with
+    profiled() and start_worker_profile(), and write() merges them all.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initialize the profile.
+
+        Args:
+            path: The .pstats file to write; the collapsed stacks go next to it,
+                with the suffix .collapsed
+        """
+        self.path = Path(path)
+        self.worker_dir = Path(tempfile.mkdtemp(prefix="test_generator_profile_"))
+        self._profiler = cProfile.Profile()
+
+    @property
+    def collapsed_path(self) -> Path:
+        """The collapsed-stack file written next to the .pstats file."""
+        return self.path.with_suffix(COLLAPSED_SUFFIX)
+
+    def __enter__(self) -> RunProfile:
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._profiler.disable()
+
+    def stats(self) -> pstats.Stats:
+        """
+        Merge the profile of this thread with those dumped by the other threads and processes.
+
+        Returns:
+            pstats.Stats: The merged profile
+        """
+        stats = pstats.Stats()
+        dumps = sorted(self.worker_dir.glob("*.pstats"))
+        for source in [self._profiler, *map(str, dumps)]:
+            try:
+                stats.add(source)
+            except TypeError:
+                # A thread or worker that ran no jobs leaves an empty profile
+                continue
+            except (OSError, EOFError, ValueError) as e:
+                logger.warning(f"Skipping unreadable worker profile {source}: {e}")
+        logger.debug(f"Merged the profiles of {len(dumps)} worker threads and processes")
+        return stats
+
+    def write(self) -> Tuple[Path, Path]:
+        """
+        Write the merged profile and its collapsed stacks, and remove the worker profiles.
+
+        Returns:
+            Tuple[Path, Path]: The .pstats file and the collapsed-stack file
+        """
+        try:
+            stats = self.stats()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(str(self.path))
+            write_collapsed(stats, self.collapsed_path)
+        finally:
+            shutil.rmtree(self.worker_dir, ignore_errors=True)
+        return self.path, self.collapsed_path
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Content-hash render cache for incremental regeneration.
+"""
+from __future__ import annotations
+
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+from jinja2 import Environment
+
+
+from bulk import BulkJob, BulkResult, BulkSummary
+from configs import Configs
+from fragments import FragmentResolver
+from generator import get_output_path
+from parameter_table import sidecar_path
+from spec_bundle import read_spec
+from template_bundle import template_source_hash
+from utils.common.get_cid import get_cid
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.render_cache")
+
+
+# Default manifest file name, placed in the output directory
+MANIFEST_FILE_NAME = ".test_generator_manifest.json"
+
+# Sidecar formats a generated test file may read its cases from
+TABLE_FORMATS = ("jsonl", "npy")
+
+# Configs fields that change the rendered output. Paths and logging flags do not.
+RENDER_CONFIG_FIELDS = (
+    "version", "name", "description", "harness", "has_fixtures", "parametrized",
+    "parameter_table", "expansion", "expansion_strength", "debug", "docstring_style", "test_params",
+)
+
+
+def _file_sha256(path: Path) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Manifest of previously generated test files and the inputs they were rendered from.
+
+    Each output file is recorded under a render key made of:
+        - the content hash (CID) of the spec file, and of every fragment it includes
+        - a hash of the harness template it was rendered with
+        - the Configs fields that affect rendering
+
+    An output that reads its cases from a sidecar parameter table also has the
+    size and SHA-256 of that table recorded. A job whose key matches the manifest,
+    and whose output file and table are still on disk unchanged, is skipped without
+    being parsed, validated or rendered. Editing a template or a shared fragment
+    changes the key of exactly the outputs rendered with it.
+    """
+
+    def __init__(
+        self,
+        manifest_path: Path,
+        template_engine: Optional[Environment],
+        fragment_resolver: Optional[FragmentResolver] = None
+    ):
+        """
+        Initialize the render cache.
+
+        Args:
+            manifest_path: Path of the JSON manifest file
+            template_engine: Jinja2 environment whose template sources are hashed
+            fragment_resolver: Resolver of the fragments specs include. If None, a new one is created.
+        """
+        self.manifest_path = manifest_path
+        self.template_engine = template_engine
+        self.fragment_resolver = fragment_resolver if fragment_resolver is not None else FragmentResolver()
+        manifest = self._load()
+        self.entries: Dict[str, str] = manifest.get("entries", {})
+        # Sidecar table of each output that has one: its path, size and SHA-256
+        self.tables: Dict[str, Dict[str, Any]] = manifest.get("tables", {})
+        self._template_hashes: Dict[str, str] = {}
+
+    def _load(self) -> Dict[str, Any]:
+        """Load the manifest, starting empty if it is missing or unreadable."""
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable render cache manifest {self.manifest_path}: {e}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self) -> None:
+        """Write the manifest atomically, so an interrupted run never leaves it half-written."""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.manifest_path.parent, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump({"entries": self.entries, "tables": self.tables}, file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
+
+    def template_hash(self, harness: str) -> str:
+        """
+        Hash the source of a harness template.
+
+        Args:
+            harness: Test harness name
+
+        Returns:
+            str: SHA-256 of the template source, or an empty string if the template is unknown
+        """
+        if harness not in self._template_hashes:
+            name = f"{harness}_test.py.j2"
+            source_hash = None
+            if self.template_engine is not None and self.template_engine.loader is not None:
+                try:
+                    source, _, _ = self.template_engine.loader.get_source(self.template_engine, name)
+                    source_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()
+                except Exception as e:
+                    # Compiled bundles carry no source; their manifest records its hash
+                    logger.debug(f"Could not load template source for {harness}: {e}")
+            if source_hash is None:
+                source_hash = template_source_hash(name)
+            self._template_hashes[harness] = source_hash
+        return self._template_hashes[harness]
+
+    def render_key(self, config: Configs, spec_bytes: bytes, spec_path: Optional[Path] = None) -> str:
+        """
+        Compute the render key of a spec.
+
+        Args:
+            config: Configuration the spec would be rendered with
+            spec_bytes: Raw bytes of the spec file
+            spec_path: Path of the spec file, which the fragments it includes are found from
+
+        Returns:
+            str: Key that changes whenever the rendered output could change
+        """
+        config_fields = config.model_dump(include=set(RENDER_CONFIG_FIELDS), mode="json")
+        parts = [
+            get_cid(spec_bytes, for_string=True),
+            self.template_hash(config.harness),
+            json.dumps(config_fields, sort_keys=True),
+        ]
+        composed = self.fragment_resolver.compose_json(spec_bytes, spec_path, validate=False)
+        if composed is not None:
+            parts.append(composed.digest)
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def is_fresh(self, output_path: Path, key: str) -> bool:
+        """Whether an output was rendered with this key and is still on disk, with its sidecar table unchanged."""
+        resolved = str(output_path.resolve())
+        if self.entries.get(resolved) != key or not output_path.exists():
+            return False
+        table = self.tables.get(resolved)
+        if table is None:
+            return True
+        table_path = Path(table["path"])
+        try:
+            # The size is checked first, so a table that is gone or truncated is not hashed
+            return table_path.stat().st_size == table["size"] and _file_sha256(table_path) == table["sha256"]
+        except OSError:
+            return False
+
+    def record(self, output_path: Path, key: str) -> None:
+        """Remember the key an output was rendered with, and the sidecar table it reads its cases from."""
+        resolved = str(output_path.resolve())
+        self.entries[resolved] = key
+        self.tables.pop(resolved, None)
+        for table_format in TABLE_FORMATS:
+            table_path = sidecar_path(output_path, table_format)
+            try:
+                table = {"path": str(table_path.resolve()), "size": table_path.stat().st_size,
+                         "sha256": _file_sha256(table_path)}
+            except FileNotFoundError:
+                continue
+            self.tables[resolved] = table
+            break
+
+    def partition(
+        self,
+        jobs: Iterable[BulkJob],
+        build_config: Callable[[BulkJob], Configs]
+    ) -> Tuple[List[BulkJob], List[Optional[BulkResult]], Dict[str, str]]:
+        """
+        Split jobs into those that need rendering and those whose output is up to date.
+
+        Args:
+            jobs: Jobs in the run
+            build_config: Callable turning a job into its Configs
+
+        Returns:
+            Tuple[List[BulkJob], List[Optional[BulkResult]], Dict[str, str]]:
+                Jobs to run; a result slot per job in the original order, filled in for
+                skipped jobs and None for jobs to run; and the render key of each
+                output path to run, to record once the run succeeds
+        """
+        to_run: List[BulkJob] = []
+        slots: List[Optional[BulkResult]] = []
+        pending_keys: Dict[str, str] = {}
+
+        for job in jobs:
+            try:
+                config = build_config(job)
+                output_path = get_output_path(config)
+                spec_path = Path(job.test_parameter_json)
+                key = self.render_key(config, read_spec(spec_path), spec_path)
+            except Exception as e:
+                # Let the real run report the error
+                logger.debug(f"Could not compute render key for {job.test_parameter_json}: {e}")
+                to_run.append(job)
+                slots.append(None)
+                continue
+
+            if self.is_fresh(output_path, key):
+                slots.append(BulkResult(
+                    name=job.display_name,
+                    spec_path=job.test_parameter_json,
+                    output_path=output_path,
+                    skipped=True
+                ))
+            else:
+                to_run.append(job)
+                slots.append(None)
+                pending_keys[str(output_path.resolve())] = key
+
+        return to_run, slots, pending_keys
+
+    def merge(
+        self,
+        slots: List[Optional[BulkResult]],
+        summary: BulkSummary,
+        pending_keys: Dict[str, str]
+    ) -> BulkSummary:
+        """
+        Record the keys of newly written outputs and merge skipped results back in job order.
+
+        Args:
+            slots: Result slots from partition()
+            summary: Summary of running the jobs that needed rendering
+            pending_keys: Render keys from partition()
+
+        Returns:
+            BulkSummary: Summary covering every job in the original order
+        """
+        for result in summary.results:
+            if result.succeeded and result.output_path is not None:
+                key = pending_keys.get(str(result.output_path.resolve()))
+                if key is not None:
+                    self.record(result.output_path, key)
+
+        ran = iter(summary.results)
+        results = [slot if slot is not None else next(ran) for slot in slots]
+        return BulkSummary(results=results, elapsed=summary.elapsed)
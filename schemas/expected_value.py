@@ -3,7 +3,7 @@
 from typing import Any, List, Optional
 
 
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 
 
 from .validation_procedure import ValidationProcedure
@@ -13,13 +13,20 @@ class ParameterExpectedValue(BaseModel):
     """
     Defines an expected value for a specific parameter input.
 
+    Expected values are matched to the independent variable's values by id
+    when they have one, and by position otherwise.
+
     Attributes:
+        id: Case id, matching the id of a value of the independent variable.
         input: The input value this expected value corresponds to.
-        expected: The expected result for this input.
+        expected: The expected result for this input. May also be given as "value".
         description: Optional description of the expected behavior.
     """
-    input: Any = Field(..., description="The input value this expected output corresponds to.")
-    expected: Any = Field(..., description="The expected output value.")
+    id: Optional[str] = Field(None, description="Case id, matching the id of an independent variable value.")
+    input: Any = Field(None, description="The input value this expected output corresponds to.")
+    expected: Any = Field(
+        ..., validation_alias=AliasChoices("expected", "value"), description="The expected output value."
+    )
     description: Optional[str] = Field(None, description="Description of this expected behavior.")
 
 class ExpectedValue(BaseModel):
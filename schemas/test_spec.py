@@ -0,0 +1,128 @@
+import logging
+from typing import Annotated, Any, Dict, List, Optional, Type, Union
+
+
+from pydantic import AfterValidator, BaseModel, Field, ValidationError, field_validator
+
+
+from .imports import Imports
+from .material import Material
+from .method import Method
+from .test_title import TestTitle
+from .variable import Variable
+
+
+logger = logging.getLogger("test_generator.schemas.test_spec")
+
+
+def lenient_list(item_type: Type[BaseModel], label: str) -> Any:
+    """
+    Build a list type that drops invalid items instead of failing.
+
+    Each item is validated as item_type or, failing that, kept as raw data, so
+    the whole list is validated inside pydantic-core without a Python loop and
+    without first converting the JSON to Python objects. The raw leftovers are
+    then logged and dropped.
+
+    Args:
+        item_type: Model type of the list items
+        label: Name of an item for the warning, e.g. "control variable"
+
+    Returns:
+        Any: Annotated list type
+    """
+    def drop_invalid_items(items: Optional[List[Any]]) -> List[Any]:
+        if not items:
+            return []
+        valid = [item for item in items if isinstance(item, item_type)]
+        if len(valid) < len(items):
+            for index, item in enumerate(items):
+                if isinstance(item, item_type):
+                    continue
+                try:
+                    item_type.model_validate(item)
+                except ValidationError as e:
+                    logger.warning(f"Skipping invalid {label} at index {index}: {e}")
+        return valid
+
+    item = Annotated[Union[item_type, Any], Field(union_mode="left_to_right")]
+    return Annotated[Optional[List[item]], AfterValidator(drop_invalid_items)]
+
+
+class TestSpec(BaseModel):
+    """
+    The test_file_parameters section of a spec, validated in one pass.
+
+    Matches what TestFileParameters accepts: invalid control variables,
+    materials and imports are skipped with a warning, while invalid variables
+    or an invalid test procedure fail the whole spec.
+
+    Validators here run after pydantic-core has validated their field: a before
+    or wrap validator would make it convert that part of the JSON to Python
+    objects first. The one exception is the rarely used material field.
+
+    Attributes:
+        test_title: Title of the test. A {"test_title": ...} object is converted to PascalCase.
+        background: Orientation, purpose, hypothesis and citation of the test
+        independent_variable: The variable the test changes
+        dependent_variable: The variable the test measures
+        control_variables: Variables held fixed
+        test_materials: Materials used by the test
+        material: Older name for test_materials; a single material may be given as an object
+        test_procedure: Steps, data collection and analysis of the test
+        imports: Imports the test needs
+    """
+    test_title: Any = ""
+    background: Dict[str, Any] = Field(default_factory=dict)
+    independent_variable: Variable
+    dependent_variable: Variable
+    control_variables: lenient_list(Variable, "control variable") = Field(default_factory=list)
+    test_materials: lenient_list(Material, "material") = Field(default_factory=list)
+    material: lenient_list(Material, "material") = Field(default_factory=list)
+    test_procedure: Method
+    imports: lenient_list(Imports, "import") = Field(default_factory=list)
+
+    @field_validator("test_title", mode="after")
+    @classmethod
+    def _parse_test_title(cls, value: Any) -> str:
+        """Accept a plain title or a TestTitle object."""
+        if isinstance(value, str):
+            return value
+        if isinstance(value, dict):
+            try:
+                return TestTitle(**value).test_title
+            except ValidationError as e:
+                logger.warning(f"Error parsing test title: {e}")
+                return "DefaultTestTitle"
+        logger.warning(f"Unknown test title format: {value}")
+        return "DefaultTestTitle"
+
+    @field_validator("background", mode="after")
+    @classmethod
+    def _fill_background(cls, value: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep the known background fields, defaulting each to an empty string."""
+        return {
+            key: value.get(key, "")
+            for key in ("orientation", "purpose", "hypothesis", "citation_path", "citation")
+        }
+
+    @field_validator("material", mode="wrap")
+    @classmethod
+    def _wrap_single_material(cls, value: Any, handler: Any) -> Any:
+        """Accept a single material object in place of a list."""
+        return handler([value] if isinstance(value, dict) else value)
+
+    @property
+    def materials(self) -> List[Material]:
+        """The test materials, from test_materials or else material."""
+        return self.test_materials or self.material
+
+
+class TestSpecDocument(BaseModel):
+    """
+    A whole spec file: {"test_file_parameters": {...}}.
+
+    Attributes:
+        test_file_parameters: The test parameters
+    """
+    test_file_parameters: TestSpec
@@ -0,0 +1,218 @@
+import math
+from typing import Any, Iterator, List, Literal, Optional, Sequence, Union
+
+
+from pydantic import BaseModel, Field, model_validator
+
+
+def _numpy() -> Optional[Any]:
+    """NumPy, or None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class ValueRange(BaseModel):
+    """
+    A range of values to sweep, declared instead of listing every value.
+
+    Exactly one of step, count and factor must be given:
+        - step: min, min + step, min + 2 * step, ... up to max
+        - count: count evenly spaced values from min to max, or, with "log"
+            spacing, evenly spaced on a log scale (e.g. 1, 10, 100, 1000)
+        - factor: min, min * factor, min * factor ** 2, ... up to max (e.g. 1, 2, 4 ... 1024)
+
+    The spec only holds these few numbers: values are computed when the sweep
+    is expanded, see RangeValues.
+
+    Attributes:
+        min: First value of the range
+        max: Last possible value of the range
+        step: Distance between consecutive values
+        count: Number of values from min to max, both included
+        spacing: Whether count values are spaced on a "linear" or "log" scale
+        factor: Ratio between consecutive values
+    """
+    min: float = Field(..., description="First value of the range")
+    max: float = Field(..., description="Last possible value of the range")
+    step: Optional[float] = Field(None, gt=0, description="Distance between consecutive values")
+    count: Optional[int] = Field(None, ge=1, description="Number of values from min to max")
+    spacing: Literal["linear", "log"] = Field("linear", description="Scale the count values are evenly spaced on")
+    factor: Optional[float] = Field(None, gt=1, description="Ratio between consecutive values")
+
+    @model_validator(mode="after")
+    def _check_range(self) -> "ValueRange":
+        """Check that the range is well defined."""
+        given = [name for name in ("step", "count", "factor") if getattr(self, name) is not None]
+        if len(given) != 1:
+            raise ValueError("A range needs exactly one of step, count and factor")
+        if self.max < self.min:
+            raise ValueError("A range's max must not be less than its min")
+        if (self.factor is not None or self.spacing == "log") and self.min <= 0:
+            raise ValueError("A geometric or log-spaced range needs a positive min")
+        if self.spacing == "log" and self.count is None:
+            raise ValueError("Log spacing needs a count")
+        return self
+
+    @property
+    def size(self) -> int:
+        """Number of values before integer rounding."""
+        if self.step is not None:
+            return math.floor((self.max - self.min) / self.step + 1e-9) + 1
+        if self.count is not None:
+            return self.count
+        return math.floor(math.log(self.max / self.min) / math.log(self.factor) + 1e-9) + 1
+
+    def expand(self, integer: bool = False) -> "RangeValues":
+        """
+        Get the values of the range.
+
+        Args:
+            integer: Round the values to integers, dropping duplicates, for discrete variables
+
+        Returns:
+            RangeValues: The values, computed as they are used
+        """
+        return RangeValues(self, integer)
+
+
+# Number of values computed per NumPy call when iterating over a range
+CHUNK_SIZE = 1 << 16
+
+
+class RangeValues(Sequence):
+    """
+    The values of a ValueRange, computed as they are used.
+
+    Each value is computed from its index, so the length of a range, and any
+    one value, are known without computing the others; a sweep of a trillion
+    values costs no more to count than one of ten. Iterating over a stepped or
+    linearly spaced range computes its values in chunks with NumPy when it is
+    installed.
+
+    Integer values of a discrete variable are rounded and deduplicated. For
+    evenly spaced values this has a closed form: spaced less than 1 apart they
+    cover every integer between the first and the last, spaced more than 1
+    apart they stay distinct. Only geometric and log-spaced ranges are
+    deduplicated by search, one step per distinct value, when first used.
+    """
+
+    def __init__(self, value_range: ValueRange, integer: bool = False):
+        """
+        Initialize the values.
+
+        Args:
+            value_range: The range to expand
+            integer: Round the values to integers, dropping duplicates
+        """
+        self.value_range = value_range
+        self.integer = integer
+        self.size = value_range.size
+        self._distinct: Optional[List[int]] = None
+
+    @property
+    def delta(self) -> Optional[float]:
+        """Distance between consecutive values, or None if the range is not evenly spaced."""
+        value_range = self.value_range
+        if value_range.step is not None:
+            return value_range.step
+        if value_range.count is not None and value_range.spacing == "linear":
+            return (value_range.max - value_range.min) / (self.size - 1) if self.size > 1 else 0.0
+        return None
+
+    def _value(self, index: int) -> float:
+        """The value at an index, before integer rounding."""
+        value_range = self.value_range
+        if value_range.step is not None:
+            return value_range.min + value_range.step * index
+        if value_range.factor is not None:
+            return value_range.min * value_range.factor ** index
+        if index == 0:
+            return value_range.min
+        if index == self.size - 1:
+            return value_range.max
+        if value_range.spacing == "log":
+            low, high = math.log10(value_range.min), math.log10(value_range.max)
+            return 10 ** (low + (high - low) * index / (self.size - 1))
+        return value_range.min + self.delta * index
+
+    def _ties(self) -> bool:
+        """Whether values 1 apart all fall halfway between integers, and round onto every other one."""
+        return self.delta == 1 and self.value_range.min % 1 == 0.5
+
+    def _distinct_values(self) -> List[int]:
+        """The rounded values of an unevenly spaced range, without duplicates."""
+        if self._distinct is None:
+            distinct = []
+            index = 0
+            while index < self.size:
+                value = round(self._value(index))
+                distinct.append(value)
+                # Rounded values never decrease, so search for the first index past this one
+                low, high = index + 1, self.size
+                while low < high:
+                    middle = (low + high) // 2
+                    if round(self._value(middle)) > value:
+                        high = middle
+                    else:
+                        low = middle + 1
+                index = low
+            self._distinct = distinct
+        return self._distinct
+
+    def _integer(self, index: int) -> int:
+        """The integer value at an index, counting duplicates once."""
+        delta = self.delta
+        if delta is None:
+            return self._distinct_values()[index]
+        if delta < 1:
+            return round(self._value(0)) + index
+        if self._ties():
+            return round(self._value(0)) + 2 * index
+        return round(self._value(index))
+
+    def __len__(self) -> int:
+        if not self.integer:
+            return self.size
+        delta = self.delta
+        if delta is None:
+            return len(self._distinct_values())
+        first, last = round(self._value(0)), round(self._value(self.size - 1))
+        if delta < 1:
+            return last - first + 1
+        if self._ties():
+            return (last - first) // 2 + 1
+        return self.size
+
+    def _get(self, index: int) -> Union[int, float]:
+        return self._integer(index) if self.integer else self._value(index)
+
+    def __getitem__(self, index: Any) -> Union[int, float, List[Union[int, float]]]:
+        if isinstance(index, slice):
+            return [self._get(position) for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("range index out of range")
+        return self._get(index)
+
+    def __iter__(self) -> Iterator[Union[int, float]]:
+        numpy = _numpy()
+        if self.integer or self.delta is None or numpy is None:
+            return map(self._get, range(len(self)))
+        return self._chunks(numpy)
+
+    def _chunks(self, numpy: Any) -> Iterator[float]:
+        """Compute the values of an evenly spaced range with NumPy, a chunk at a time."""
+        value_range = self.value_range
+        for start in range(0, self.size, CHUNK_SIZE):
+            stop = min(start + CHUNK_SIZE, self.size)
+            values = (value_range.min + self.delta * numpy.arange(start, stop)).tolist()
+            if stop == self.size and value_range.step is None:
+                values[-1] = value_range.max
+            yield from values
+
+    def __repr__(self) -> str:
+        return f"RangeValues({self.value_range!r}, integer={self.integer})"
@@ -1,11 +1,14 @@
-from typing import Any, List, Optional, Type, Union
+from array import array
+import sys
+from typing import Any, Iterator, List, Optional, Sequence, Type, Union
 
 
-from pydantic import BaseModel, computed_field, Field
+from pydantic import BaseModel, computed_field, Field, field_serializer, field_validator, model_validator, TypeAdapter, ValidationInfo
 
 
 from .statistical_type import StatisticalType
 from .expected_value import ExpectedValue
+from .value_range import ValueRange
 from utils.common import convert_to_snake_case
 
 
@@ -14,13 +17,163 @@ class ParameterValue(BaseModel):
     Represents a single parameter value for parametrized tests.
 
     Attributes:
+        id: Case id, matching the id of an expected value of the dependent variable
         value: The actual value of the parameter
         description: Optional description of what this parameter value represents
     """
+    id: Optional[str] = None
     value: Any
     description: Optional[str] = None
 
 
+# An item of a values list: a ParameterValue given as an object, or a plain value
+ValueItem = Union[ParameterValue, Any]
+
+_VALUE_ITEMS = TypeAdapter(List[ValueItem])
+
+
+def _column(values: List[Any], statistical_type: Optional[StatisticalType]) -> Optional[Sequence[Any]]:
+    """
+    A typed column for values that fit the statistical type of their variable, or None if they do not.
+
+    The values of a continuous variable are stored as floats, so a list mixing
+    ints and floats, e.g. [1, 1.5, 2], is still a column.
+    """
+    kinds = set(map(type, values))
+    try:
+        if statistical_type == StatisticalType.CONTINUOUS and kinds <= {int, float}:
+            return array("d", values)
+        if statistical_type == StatisticalType.DISCRETE and kinds == {int}:
+            return array("q", values)
+    except OverflowError:
+        return None
+    if statistical_type in (StatisticalType.NOMINAL, StatisticalType.ORDINAL) and kinds == {str}:
+        return list(map(sys.intern, values))
+    return None
+
+
+def _optional_strings(values: List[Any]) -> bool:
+    """Whether every value is a string or None."""
+    return set(map(type, values)) <= {str, type(None)}
+
+
+class ValueColumns(Sequence):
+    """
+    The values list of a variable, stored as parallel columns.
+
+    The column is picked by the statistical type of the variable: the values
+    of a continuous variable are kept as floats and those of a discrete one as
+    ints, in a typed array of 8 bytes each, and those of a nominal or ordinal
+    variable as interned strings, so repeated categories are stored once. Ids and descriptions are
+    separate columns, left out when no value has one. A column is validated in
+    one pass when it is built, instead of a model being validated per value.
+
+    Items read back as the spec gave them: a ParameterValue for a value given
+    as an object, the plain value otherwise.
+
+    Attributes:
+        values: The values, as array("q"), array("d") or a list of strings
+        ids: Case id of each value, or None if no value has an id
+        descriptions: Description of each value, or None if no value has one
+        boxed: Whether the values were given as objects
+    """
+    __slots__ = ("values", "ids", "descriptions", "boxed")
+
+    def __init__(
+        self,
+        values: Sequence[Any],
+        ids: Optional[List[Optional[str]]] = None,
+        descriptions: Optional[List[Optional[str]]] = None,
+        boxed: bool = False
+    ):
+        """
+        Initialize the columns.
+
+        Args:
+            values: The values column
+            ids: The ids column, if any value has an id
+            descriptions: The descriptions column, if any value has a description
+            boxed: Whether the values were given as objects, and read back as ParameterValue
+        """
+        self.values = values
+        self.ids = ids
+        self.descriptions = descriptions
+        self.boxed = boxed or ids is not None or descriptions is not None
+
+    @classmethod
+    def from_items(cls, items: Any, statistical_type: Optional[StatisticalType]) -> Optional["ValueColumns"]:
+        """
+        Build the columns from the values list of a spec.
+
+        Args:
+            items: The values list, parsed from JSON
+            statistical_type: Statistical type of the variable, or None if it is invalid
+
+        Returns:
+            Optional[ValueColumns]: The columns, or None if the items are not all
+                values that fit the statistical type, or all objects holding such
+                values, and have to be validated one by one
+        """
+        if not isinstance(items, list) or not items:
+            return None
+        if all(type(item) is dict for item in items):
+            if not all("value" in item for item in items):
+                return None
+            values = _column([item["value"] for item in items], statistical_type)
+            ids = [item.get("id") for item in items]
+            descriptions = [item.get("description") for item in items]
+            if values is None or not _optional_strings(ids) or not _optional_strings(descriptions):
+                return None
+            return cls(
+                values,
+                ids if any(case_id is not None for case_id in ids) else None,
+                [sys.intern(text) if text is not None else None for text in descriptions] if any(descriptions) else None,
+                boxed=True
+            )
+        values = _column(items, statistical_type)
+        return cls(values) if values is not None else None
+
+    def case_ids(self) -> List[str]:
+        """The id of each value, or its index if it has none."""
+        if self.ids is None:
+            return [str(index) for index in range(len(self.values))]
+        return [case_id or str(index) for index, case_id in enumerate(self.ids)]
+
+    def _item(self, index: int) -> Any:
+        if not self.boxed:
+            return self.values[index]
+        return ParameterValue.model_construct(
+            id=self.ids[index] if self.ids is not None else None,
+            value=self.values[index],
+            description=self.descriptions[index] if self.descriptions is not None else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self._item(position) for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("value index out of range")
+        return self._item(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        if not self.boxed:
+            return iter(self.values)
+        return map(self._item, range(len(self)))
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (ValueColumns, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ValueColumns({len(self)} values)"
+
+
 def _get_python_type_from_statistical_type(statistical_type: StatisticalType) -> Type:
     """
     Returns the python type of the variable based on the statistical type.
@@ -60,6 +213,9 @@ class Variable(BaseModel):
             For independent variables, it is pre-assigned for each test but is not fixed overall.
             For dependent variables, it is not pre-assigned or fixed.
         - values : For parametrized tests, a list of values to use for the variable.
+            Values of one type are stored as columns, see ValueColumns.
+        - range : For parametrized tests of continuous or discrete variables, a range of values
+            to sweep instead of a values list. See ValueRange.
         - expected_value : The value a variable is expected to have pre-experiment.
             This is only used by dependent variables. This can be a pydantic validation type.
     """
@@ -68,9 +224,60 @@ class Variable(BaseModel):
     statistical_type: StatisticalType
     unit: str
     value: Optional[Any] = None
-    values: Optional[List[Union[ParameterValue, Any]]] = Field(default=None, description="For parametrized tests, a list of values to use")
+    # Validated as plain JSON values, which stay in pydantic-core, then stored by _columnar_values
+    values: Optional[List[Any]] = Field(default=None, description="For parametrized tests, a list of values to use")
+    range: Optional[ValueRange] = Field(default=None, description="For parametrized tests, a range of values to sweep")
     expected_value: Optional[ExpectedValue] = None
 
+    @field_validator("statistical_type", mode="before")
+    @classmethod
+    def _lowercase_statistical_type(cls, value: Any) -> Any:
+        """
+        Accept statistical types in any case, e.g. "DISCRETE".
+        """
+        return value.lower() if isinstance(value, str) else value
+
+    @field_validator("values")
+    @classmethod
+    def _columnar_values(cls, value: Optional[List[Any]], info: ValidationInfo) -> Any:
+        """
+        Store a values list whose values fit the statistical type of the variable as columns.
+
+        The items of other lists are validated one by one as ValueItem, so objects become ParameterValue.
+        """
+        if value is None:
+            return None
+        columns = ValueColumns.from_items(value, info.data.get("statistical_type"))
+        return columns if columns is not None else _VALUE_ITEMS.validate_python(value)
+
+    @field_serializer("values", mode="wrap")
+    def _serialize_values(self, value: Any, handler: Any) -> Any:
+        """Serialize columns as the list they stand for."""
+        return handler(list(value) if isinstance(value, ValueColumns) else value)
+
+    @model_validator(mode="after")
+    def _check_range(self) -> "Variable":
+        """
+        Only continuous and discrete variables can sweep a range, and not together with a values list.
+        """
+        if self.range is not None:
+            if self.statistical_type not in (StatisticalType.CONTINUOUS, StatisticalType.DISCRETE):
+                raise ValueError(f"Only continuous and discrete variables can have a range, not {self.statistical_type}")
+            if self.values:
+                raise ValueError("A variable can have values or a range, but not both")
+        return self
+
+    def sweep_values(self) -> Optional[Sequence[Any]]:
+        """
+        Returns the values a parametrized test sweeps this variable over.
+
+        A range is expanded to integers for discrete variables and floats for
+        continuous ones, only when the values are used.
+        """
+        if self.range is not None:
+            return self.range.expand(integer=self.statistical_type == StatisticalType.DISCRETE)
+        return self.values or None
+
     @computed_field # type: ignore[prop-decorator]
     @property
     def type_in_python(self) -> Type:
@@ -0,0 +1,563 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Spec bundles: many spec files in one file, with a random-access index.
+
+A bundle holds the bytes of every spec it was packed from, the SHA-256 of
+each, and two open-addressing hash tables that map an entry's name or
+content hash to its offset. Bundles are read through mmap, so fetching one
+spec touches only the pages of its index slots and its own bytes, whatever
+the size of the bundle.
+
+A bundle stands in for the directory it was packed from: the spec packed
+from specs/login.json is specs.specbundle/login.json, and
+specs.specbundle/<sha256> fetches an entry by its content hash. Such paths
+are accepted wherever a spec path is, and references from bundled specs to
+fragments resolve as they did from the directory.
+
+    python spec_bundle.py pack specs/ -o specs.specbundle
+    python spec_bundle.py unpack specs.specbundle -o specs/
+    python spec_bundle.py list specs.specbundle
+"""
+from __future__ import annotations
+
+
+import argparse
+from dataclasses import dataclass
+import errno
+import hashlib
+import logging
+import mmap
+import os
+from pathlib import Path
+import struct
+import sys
+import tempfile
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.spec_bundle")
+
+
+# File suffix that marks a bundle, wherever a spec path may point into one
+BUNDLE_SUFFIX = ".specbundle"
+
+# First bytes of every bundle
+MAGIC = b"TGSPECB\0"
+
+# Version of the layout below
+FORMAT_VERSION = 1
+
+# magic, version, entry count, slots per index, offsets of the entry table, name index and hash index
+HEADER = struct.Struct("<8sIIIQQQ")
+
+# data offset, data length, name offset, name length, SHA-256 of the data
+ENTRY = struct.Struct("<QQQI32s")
+
+# 64-bit fingerprint of the key, entry number + 1 (0 marks an empty slot)
+SLOT = struct.Struct("<QI")
+
+
+@dataclass(frozen=True)
+class BundleEntry:
+    """
+    A spec held in a bundle.
+
+    Attributes:
+        name: File name the spec was packed from
+        digest: Hex SHA-256 of the spec's bytes
+        size: Size of the spec in bytes
+    """
+    name: str
+    digest: str
+    size: int
+
+
+def _name_fingerprint(name: bytes) -> int:
+    """Fingerprint of an entry name in the name index."""
+    return int.from_bytes(hashlib.blake2b(name, digest_size=8).digest(), "little")
+
+
+def _digest_fingerprint(digest: bytes) -> int:
+    """Fingerprint of a content hash in the hash index; the hash is already uniform."""
+    return int.from_bytes(digest[:8], "little")
+
+
+def _index_slots(count: int) -> int:
+    """Slots per index: a power of two keeping the tables at most half full."""
+    slots = 8
+    while slots < 2 * count:
+        slots *= 2
+    return slots
+
+
+def _build_index(fingerprints: List[int], slots: int) -> bytearray:
+    """Lay out an open-addressing table with linear probing."""
+    table = bytearray(SLOT.size * slots)
+    mask = slots - 1
+    for number, fingerprint in enumerate(fingerprints):
+        slot = fingerprint & mask
+        while SLOT.unpack_from(table, slot * SLOT.size)[1]:
+            slot = (slot + 1) & mask
+        SLOT.pack_into(table, slot * SLOT.size, fingerprint, number + 1)
+    return table
+
+
+def pack_bundle(paths: Iterable[Path], output: Path) -> int:
+    """
+    Pack spec files into a bundle.
+
+    Directories contribute their *.json files, as with --spec-dir. Entries are
+    stored in name order, and the bundle is written to a temporary file that is
+    then moved into place.
+
+    Args:
+        paths: Spec files and directories of spec files
+        output: Path of the bundle to write
+
+    Returns:
+        int: Number of specs packed
+
+    Raises:
+        ValueError: If two specs have the same file name
+    """
+    files: Dict[str, Path] = {}
+    for path in paths:
+        path = Path(path)
+        for spec_path in sorted(path.glob("*.json")) if path.is_dir() else [path]:
+            if spec_path.name in files:
+                raise ValueError(f"Specs {files[spec_path.name]} and {spec_path} have the same name")
+            files[spec_path.name] = spec_path
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    names = sorted(files)
+    entries = []
+    file_descriptor, temp_name = tempfile.mkstemp(dir=output.parent, prefix=f".{output.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(bytes(HEADER.size))
+            for name in names:
+                data = files[name].read_bytes()
+                entries.append((file.tell(), len(data), hashlib.sha256(data).digest()))
+                file.write(data)
+
+            name_offsets = []
+            for name in names:
+                name_offsets.append(file.tell())
+                file.write(name.encode("utf-8"))
+
+            slots = _index_slots(len(names))
+            entries_offset = file.tell()
+            for (offset, length, digest), name, name_offset in zip(entries, names, name_offsets):
+                file.write(ENTRY.pack(offset, length, name_offset, len(name.encode("utf-8")), digest))
+            name_index_offset = file.tell()
+            file.write(_build_index([_name_fingerprint(name.encode("utf-8")) for name in names], slots))
+            digest_index_offset = file.tell()
+            file.write(_build_index([_digest_fingerprint(digest) for _, _, digest in entries], slots))
+
+            file.seek(0)
+            file.write(HEADER.pack(
+                MAGIC, FORMAT_VERSION, len(names), slots, entries_offset, name_index_offset, digest_index_offset
+            ))
+        os.replace(temp_name, output)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+    logger.info(f"Packed {len(names)} specs into {output}")
+    return len(names)
+
+
+class SpecBundle:
+    """
+    Read-only view of a bundle through mmap.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Open a bundle.
+
+        Args:
+            path: Path of the bundle
+
+        Raises:
+            OSError: If the bundle cannot be read
+            ValueError: If the file is not a bundle of a supported version
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            try:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise ValueError(f"{self.path} is not a spec bundle: {e}") from e
+        if len(self._map) < HEADER.size or self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{self.path} is not a spec bundle")
+
+        (_, version, self._count, self._slots, self._entries_offset,
+         self._name_index_offset, self._digest_index_offset) = HEADER.unpack_from(self._map, 0)
+        if version != FORMAT_VERSION:
+            self._map.close()
+            raise ValueError(f"Spec bundle {self.path} has format version {version}, expected {FORMAT_VERSION}")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: str) -> bool:
+        return self.find(key) is not None
+
+    def __iter__(self) -> Iterator[BundleEntry]:
+        for number in range(self._count):
+            yield self.entry(number)
+
+    def __enter__(self) -> SpecBundle:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the bundle."""
+        self._map.close()
+
+    def _entry(self, number: int) -> Tuple[int, int, int, int, bytes]:
+        """Raw fields of an entry."""
+        return ENTRY.unpack_from(self._map, self._entries_offset + number * ENTRY.size)
+
+    def _probe(self, index_offset: int, fingerprint: int) -> Iterator[int]:
+        """Entry numbers whose fingerprint matches, in probe order."""
+        mask = self._slots - 1
+        slot = fingerprint & mask
+        while True:
+            slot_fingerprint, number = SLOT.unpack_from(self._map, index_offset + slot * SLOT.size)
+            if not number:
+                return
+            if slot_fingerprint == fingerprint:
+                yield number - 1
+            slot = (slot + 1) & mask
+
+    def find(self, key: str) -> Optional[int]:
+        """
+        Look up an entry by name, or by hex content hash.
+
+        Args:
+            key: File name the spec was packed from, or the hex SHA-256 of its bytes
+
+        Returns:
+            Optional[int]: Number of the entry, or None if the bundle has no such entry
+        """
+        name = key.encode("utf-8")
+        for number in self._probe(self._name_index_offset, _name_fingerprint(name)):
+            _, _, name_offset, name_length, _ = self._entry(number)
+            if self._map[name_offset:name_offset + name_length] == name:
+                return number
+
+        if len(key) == 64:
+            try:
+                digest = bytes.fromhex(key)
+            except ValueError:
+                return None
+            for number in self._probe(self._digest_index_offset, _digest_fingerprint(digest)):
+                if self._entry(number)[4] == digest:
+                    return number
+        return None
+
+    def entry(self, number: int) -> BundleEntry:
+        """
+        Describe an entry.
+
+        Args:
+            number: Number of the entry
+
+        Returns:
+            BundleEntry: Name, content hash and size of the entry
+        """
+        _, length, name_offset, name_length, digest = self._entry(number)
+        name = self._map[name_offset:name_offset + name_length].decode("utf-8")
+        return BundleEntry(name=name, digest=digest.hex(), size=length)
+
+    def get(self, key: str) -> bytes:
+        """
+        Fetch the bytes of a spec.
+
+        Args:
+            key: File name the spec was packed from, or the hex SHA-256 of its bytes
+
+        Returns:
+            bytes: The spec
+
+        Raises:
+            KeyError: If the bundle has no such entry
+        """
+        number = self.find(key)
+        if number is None:
+            raise KeyError(key)
+        offset, length, _, _, _ = self._entry(number)
+        return self._map[offset:offset + length]
+
+    def names(self) -> List[str]:
+        """Names of every entry, in name order."""
+        return [entry.name for entry in self]
+
+    def verify(self) -> List[str]:
+        """
+        Check every entry against its content hash.
+
+        Returns:
+            List[str]: Names of the entries whose bytes do not match their hash
+        """
+        corrupt = []
+        for number in range(self._count):
+            offset, length, _, _, digest = self._entry(number)
+            if hashlib.sha256(self._map[offset:offset + length]).digest() != digest:
+                corrupt.append(self.entry(number).name)
+        return corrupt
+
+
+def unpack_bundle(path: Path, output_dir: Path) -> List[Path]:
+    """
+    Write every spec of a bundle back out as a file.
+
+    Args:
+        path: Path of the bundle
+        output_dir: Directory to write the specs to
+
+    Returns:
+        List[Path]: Paths of the written specs
+
+    Raises:
+        ValueError: If an entry does not match its content hash
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    with SpecBundle(path) as bundle:
+        corrupt = bundle.verify()
+        if corrupt:
+            raise ValueError(f"Spec bundle {path} has corrupt entries: {', '.join(corrupt)}")
+        for entry in bundle:
+            spec_path = output_dir / entry.name
+            spec_path.write_bytes(bundle.get(entry.name))
+            written.append(spec_path)
+    logger.info(f"Unpacked {len(written)} specs into {output_dir}")
+    return written
+
+
+# Bundles opened by this process, by absolute path and by the paths they were opened with
+_open_bundles: Dict[str, SpecBundle] = {}
+_open_bundles_lock = threading.Lock()
+
+
+def open_bundle(path: Path) -> SpecBundle:
+    """
+    Open a bundle, reusing the mapping if this process already opened it.
+
+    A bundle stays mapped until forget_bundle() or close_bundles(), so later
+    specs fetched from it cost no open() or stat() call.
+
+    Args:
+        path: Path of the bundle
+
+    Returns:
+        SpecBundle: The open bundle
+    """
+    bundle = _open_bundles.get(os.fspath(path))
+    if bundle is None:
+        with _open_bundles_lock:
+            key = os.path.abspath(path)
+            bundle = _open_bundles.get(key)
+            if bundle is None:
+                bundle = _open_bundles[key] = SpecBundle(Path(path))
+            _open_bundles[os.fspath(path)] = bundle
+    return bundle
+
+
+def forget_bundle(path: Path) -> Optional[SpecBundle]:
+    """
+    Drop a bundle from the open bundles, so the next fetch maps it again.
+
+    Args:
+        path: Path of the bundle
+
+    Returns:
+        Optional[SpecBundle]: The bundle as it was mapped, if it was open. It stays
+            readable until closed, and mapped the bundle as it was when opened.
+    """
+    with _open_bundles_lock:
+        bundle = _open_bundles.pop(os.path.abspath(path), None)
+        for key in [key for key, value in _open_bundles.items() if value is bundle]:
+            del _open_bundles[key]
+        return bundle
+
+
+def close_bundles() -> None:
+    """Close every bundle this process has open."""
+    with _open_bundles_lock:
+        for bundle in set(_open_bundles.values()):
+            bundle.close()
+        _open_bundles.clear()
+
+
+def reload_bundle(path: Path) -> Optional[Set[str]]:
+    """
+    Map a bundle again after it changed on disk.
+
+    Args:
+        path: Path of the bundle
+
+    Returns:
+        Optional[Set[str]]: Names of the entries added, removed or changed since the bundle was
+            last opened, or None if it was not open or can no longer be read
+    """
+    previous = forget_bundle(path)
+    if previous is None:
+        return None
+    try:
+        before = {entry.name: entry.digest for entry in previous}
+    finally:
+        previous.close()
+    try:
+        after = {entry.name: entry.digest for entry in open_bundle(path)}
+    except (OSError, ValueError):
+        return None
+    return {name for name in before.keys() | after.keys() if before.get(name) != after.get(name)}
+
+
+def bundle_entry(path: Path) -> Optional[Tuple[Path, str]]:
+    """
+    Split a spec path that points into a bundle.
+
+    Args:
+        path: A spec path
+
+    Returns:
+        Optional[Tuple[Path, str]]: The bundle and the entry's name or content hash,
+            or None if the path is an ordinary file
+    """
+    # String operations, as this runs for every spec read
+    bundle_path, key = os.path.split(os.fspath(path))
+    if bundle_path.endswith(BUNDLE_SUFFIX):
+        return Path(bundle_path), key
+    return None
+
+
+def is_bundle(path: Path) -> bool:
+    """Whether a path is a bundle file."""
+    path = Path(path)
+    return path.suffix == BUNDLE_SUFFIX and path.is_file()
+
+
+def bundle_specs(path: Path) -> List[Path]:
+    """
+    Spec paths of every entry of a bundle.
+
+    Args:
+        path: Path of the bundle
+
+    Returns:
+        List[Path]: A path into the bundle for each entry, in name order
+    """
+    return [Path(path) / name for name in open_bundle(path).names()]
+
+
+def spec_file(path: Path) -> Path:
+    """
+    The file on disk that holds a spec: its bundle, or the spec file itself.
+
+    Args:
+        path: A spec path
+
+    Returns:
+        Path: The file holding the spec
+    """
+    location = bundle_entry(path)
+    return location[0] if location is not None else Path(path)
+
+
+def spec_exists(path: Path) -> bool:
+    """
+    Whether a spec path points to a spec file or to an entry of a bundle.
+
+    Args:
+        path: A spec path
+
+    Returns:
+        bool: Whether the spec exists
+    """
+    location = bundle_entry(path)
+    if location is None:
+        return Path(path).is_file()
+    try:
+        return location[1] in open_bundle(location[0])
+    except (OSError, ValueError):
+        return False
+
+
+def read_spec(path: Path) -> bytes:
+    """
+    Read the bytes of a spec, from its file or from its bundle.
+
+    Args:
+        path: A spec path
+
+    Returns:
+        bytes: The spec
+
+    Raises:
+        OSError: If the spec does not exist
+        ValueError: If the bundle it points into is not a valid bundle
+    """
+    bundle_path, key = os.path.split(os.fspath(path))
+    if not bundle_path.endswith(BUNDLE_SUFFIX):
+        return Path(path).read_bytes()
+    try:
+        return open_bundle(bundle_path).get(key)
+    except KeyError:
+        raise FileNotFoundError(errno.ENOENT, f"No spec {key!r} in bundle", str(bundle_path)) from None
+
+
+def main(args: Optional[list[str]] = None) -> int:
+    """
+    Pack, unpack or list spec bundles.
+
+    Args:
+        args: Command-line arguments (uses sys.argv if None)
+
+    Returns:
+        int: Exit code
+    """
+    parser = argparse.ArgumentParser(description="Pack spec files into a bundle, or unpack one")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack_parser = subparsers.add_parser("pack", help="Pack spec files and directories of specs into a bundle")
+    pack_parser.add_argument("paths", type=Path, nargs="+", help="Spec files, or directories whose *.json files are specs")
+    pack_parser.add_argument("-o", "--output", type=Path, required=True, help=f"Bundle to write (*{BUNDLE_SUFFIX})")
+    unpack_parser = subparsers.add_parser("unpack", help="Write the specs of a bundle back out as files")
+    unpack_parser.add_argument("bundle", type=Path, help="Bundle to unpack")
+    unpack_parser.add_argument("-o", "--output", type=Path, required=True, help="Directory to write the specs to")
+    list_parser = subparsers.add_parser("list", help="List the specs in a bundle with their content hashes")
+    list_parser.add_argument("bundle", type=Path, help="Bundle to list")
+    parsed = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    try:
+        if parsed.command == "pack":
+            if parsed.output.suffix != BUNDLE_SUFFIX:
+                parser.error(f"The bundle must be named *{BUNDLE_SUFFIX}")
+            pack_bundle(parsed.paths, parsed.output)
+        elif parsed.command == "unpack":
+            unpack_bundle(parsed.bundle, parsed.output)
+        else:
+            with SpecBundle(parsed.bundle) as bundle:
+                for entry in bundle:
+                    print(f"{entry.digest}  {entry.size:>8}  {entry.name}")
+    except (OSError, ValueError) as e:
+        logger.error(str(e))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Persistent cache of validated specs.
+
+Validated test_file_parameters sections (TestSpec objects) are stored on disk,
+content-addressed by a hash of the raw spec bytes and of the schema version, so
+a rerun on an unchanged spec skips validation. A change to any schema module
+or to pydantic changes the schema version, which makes every older entry
+unreachable; those entries then age out.
+
+Entries are pickled and zlib-compressed, one file per entry. The cache is
+capped in size and evicts the least recently used entries first; a hit marks
+an entry as used by touching its modification time. Several generator
+processes can share one cache directory:
+    - entries are written to a temporary file and renamed into place, so a
+      reader never sees a partial entry
+    - only one process evicts at a time, under an exclusive lock file
+    - each process keeps a running estimate of the cache size and only scans
+      the directory when the estimate passes the cap, or every RESCAN_INTERVAL
+      writes to account for the other processes
+    - an entry that disappears or cannot be read is a miss, never an error
+
+Only point the cache at a directory you trust: entries are unpickled.
+"""
+from __future__ import annotations
+
+
+from functools import lru_cache
+import hashlib
+import logging
+import os
+from pathlib import Path
+import pickle
+import tempfile
+from typing import Optional
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+import pydantic
+
+
+from schemas.test_spec import TestSpec
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.spec_cache")
+
+
+SCHEMAS_DIR = Path(__file__).parent / "schemas"
+
+# File name suffix of cache entries
+ENTRY_SUFFIX = ".spec"
+
+# Name of the lock file taken while evicting
+LOCK_FILE_NAME = ".evict.lock"
+
+# Default size cap of the cache in bytes
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Share of the size cap an eviction brings the cache down to, so the next one is many writes away
+EVICT_TARGET = 0.9
+
+# The cache directory is rescanned at least once every this many writes, to see what other processes wrote
+RESCAN_INTERVAL = 1024
+
+
+@lru_cache(maxsize=1)
+def schema_version() -> str:
+    """
+    Hash the schema modules and the pydantic version that validated specs depend on.
+
+    Returns:
+        str: SHA-256 that changes whenever a cached spec could validate differently
+    """
+    digest = hashlib.sha256(pydantic.VERSION.encode("utf-8"))
+    for path in sorted(SCHEMAS_DIR.glob("*.py")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class SpecCache:
+    """
+    Size-capped, least recently used on-disk cache of validated specs.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache. The directory is created when the first entry is written.
+
+        Args:
+            cache_dir: Directory holding the cache entries
+            max_bytes: Size cap of all entries together
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        # Estimated size of all entries, from the last scan plus the writes since; None until the first scan
+        self._estimated_bytes: Optional[int] = None
+        self._puts = 0
+
+    def key(self, data: bytes) -> str:
+        """
+        Compute the key of a spec.
+
+        Args:
+            data: Raw bytes of the spec file
+
+        Returns:
+            str: SHA-256 of the schema version and the spec bytes
+        """
+        digest = hashlib.sha256(schema_version().encode("utf-8"))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        """Path of the entry for a key."""
+        return self.cache_dir / f"{key}{ENTRY_SUFFIX}"
+
+    def get(self, data: bytes) -> Optional[TestSpec]:
+        """
+        Look up the validated spec for the given spec bytes.
+
+        Args:
+            data: Raw bytes of the spec file
+
+        Returns:
+            Optional[TestSpec]: The validated spec, or None on a miss
+        """
+        path = self._entry_path(self.key(data))
+        try:
+            with open(path, 'rb') as file:
+                payload = file.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Could not read spec cache entry {path.name}: {e}")
+            return None
+
+        try:
+            spec = pickle.loads(zlib.decompress(payload))
+        except Exception as e:
+            logger.warning(f"Discarding unreadable spec cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        if not isinstance(spec, TestSpec):
+            logger.warning(f"Discarding spec cache entry {path.name} holding a {type(spec).__name__}")
+            path.unlink(missing_ok=True)
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        logger.debug(f"Spec cache hit: {path.name}")
+        return spec
+
+    def put(self, data: bytes, spec: TestSpec) -> None:
+        """
+        Store the validated spec for the given spec bytes, evicting if the cache may be over its size cap.
+
+        A spec that cannot be stored is logged and skipped: the cache never fails a run.
+
+        Args:
+            data: Raw bytes of the spec file
+            spec: The validated spec
+        """
+        path = self._entry_path(self.key(data))
+        temp_path = None
+        try:
+            payload = zlib.compress(pickle.dumps(spec, protocol=pickle.HIGHEST_PROTOCOL), 1)
+            if len(payload) > self.max_bytes:
+                logger.debug(f"Not caching a spec of {len(payload)} bytes, more than the cap of {self.max_bytes}")
+                return
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as file:
+                file.write(payload)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write spec cache entry {path.name}: {e}")
+            if temp_path is not None:
+                Path(temp_path).unlink(missing_ok=True)
+            return
+
+        self._puts += 1
+        if self._estimated_bytes is None or self._puts % RESCAN_INTERVAL == 0:
+            self.evict()
+            return
+        self._estimated_bytes += len(payload)
+        if self._estimated_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Scan the cache and, if it is over its size cap, delete the least recently used
+        entries until it fits EVICT_TARGET of the cap.
+
+        If another process is already evicting, this returns without waiting.
+
+        Returns:
+            int: Number of entries deleted
+        """
+        if not self.cache_dir.exists():
+            return 0
+        with open(self.cache_dir / LOCK_FILE_NAME, 'a') as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return 0
+
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if not entry.name.endswith(ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            deleted = 0
+            if total > self.max_bytes:
+                for _, size, path in sorted(entries):
+                    if total <= self.max_bytes * EVICT_TARGET:
+                        break
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    deleted += 1
+            self._estimated_bytes = total
+
+        if deleted:
+            logger.debug(f"Evicted {deleted} spec cache entries")
+        return deleted
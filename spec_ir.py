@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compact, immutable intermediate representation of a validated spec.
+
+The pydantic models a spec is validated into carry validators, computed
+fields and per-instance bookkeeping that rendering does not need, and
+computed fields such as Variable.name_in_python are recomputed on every
+template access. SpecIR is produced once after validation: frozen, slotted
+dataclasses holding only what the templates read, with names, types and
+import statements precomputed. Every harness template renders from it.
+
+The values and expected values of a parametrized test are not part of the IR;
+they reach the templates as parameter cases.
+"""
+from __future__ import annotations
+
+
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Tuple, Type
+
+
+from schemas.statistical_type import StatisticalType
+
+
+# Fields of a test's background, each defaulting to an empty string
+BACKGROUND_FIELDS = ("orientation", "purpose", "hypothesis", "citation_path", "citation")
+
+
+@dataclass(frozen=True, slots=True)
+class ExpectedValueIR:
+    """
+    The expected value of a dependent variable.
+
+    Attributes:
+        value: Python source of the expected value, or a literal
+    """
+    value: Any
+
+
+@dataclass(frozen=True, slots=True)
+class VariableIR:
+    """
+    A variable, with its Python name and type precomputed.
+
+    Attributes:
+        name: Name of the variable
+        description: Description of the variable
+        statistical_type: Statistical type of the variable
+        unit: Unit of the variable
+        value: Value of the variable, if any
+        name_in_python: Snake case name of the variable in generated code
+        type_in_python: Python type of the variable's values
+        expected_value: Expected value of a dependent variable
+    """
+    name: str
+    description: str
+    statistical_type: StatisticalType
+    unit: str
+    value: Any
+    name_in_python: str
+    type_in_python: Type
+    expected_value: Optional[ExpectedValueIR] = None
+
+    @classmethod
+    def from_variable(cls, variable: Any) -> VariableIR:
+        """
+        Build the IR of a validated Variable.
+
+        Args:
+            variable: The validated variable
+
+        Returns:
+            VariableIR: Its intermediate representation
+        """
+        expected_value = variable.expected_value
+        return cls(
+            name=variable.name,
+            description=variable.description,
+            statistical_type=variable.statistical_type,
+            unit=variable.unit,
+            value=variable.value,
+            name_in_python=variable.name_in_python,
+            type_in_python=variable.type_in_python,
+            expected_value=ExpectedValueIR(expected_value.value) if expected_value is not None else None
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class MaterialIR:
+    """
+    A material used by the test.
+
+    Attributes:
+        name: Name of the material
+        description: Description of the material
+        type: Type of material
+        version: Version or model
+        configuration: Configuration details
+        source: Where the material was obtained
+    """
+    name: str
+    description: str
+    type: str
+    version: Optional[str] = None
+    configuration: Optional[Dict[str, Any]] = None
+    source: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class MethodIR:
+    """
+    The test procedure.
+
+    Attributes:
+        steps: Ordered steps of the procedure
+        data_collection: How data is collected and recorded
+        analysis_technique: Statistical methods applied to the data
+    """
+    steps: Tuple[str, ...]
+    data_collection: str
+    analysis_technique: str
+
+
+@dataclass(frozen=True, slots=True)
+class ImportIR:
+    """
+    An import of the test.
+
+    Attributes:
+        name: Name of the library
+        import_string: The import statement
+    """
+    name: str
+    import_string: str
+
+
+@dataclass(frozen=True, slots=True)
+class BackgroundIR:
+    """
+    Background of the test.
+
+    Attributes:
+        orientation: Orientation of the test
+        purpose: Purpose of the test
+        hypothesis: Hypothesis the test checks
+        citation_path: Path to the cited source
+        citation: Citation of the source
+    """
+    orientation: str = ""
+    purpose: str = ""
+    hypothesis: str = ""
+    citation_path: str = ""
+    citation: str = ""
+
+    @classmethod
+    def from_mapping(cls, background: Mapping[str, Any]) -> BackgroundIR:
+        """Build the background from its parsed dictionary."""
+        return cls(**{field: background.get(field, "") for field in BACKGROUND_FIELDS})
+
+
+@dataclass(frozen=True, slots=True)
+class SpecIR:
+    """
+    Everything a template renders from a validated spec.
+
+    Attributes:
+        test_title: Title of the test
+        background: Background of the test
+        independent_variable: Variable the test changes
+        dependent_variable: Variable the test measures
+        control_variables: Variables held fixed or swept
+        materials: Materials the test uses
+        test_method: The test procedure
+        imports: Imports the test needs
+    """
+    test_title: str
+    background: BackgroundIR
+    independent_variable: VariableIR
+    dependent_variable: VariableIR
+    control_variables: Tuple[VariableIR, ...]
+    materials: Tuple[MaterialIR, ...]
+    test_method: MethodIR
+    imports: Tuple[ImportIR, ...]
+
+    @classmethod
+    def from_params(cls, params: Any) -> SpecIR:
+        """
+        Build the IR of validated test file parameters.
+
+        Args:
+            params: Validated TestFileParameters
+
+        Returns:
+            SpecIR: Its intermediate representation
+        """
+        method = params.test_method
+        return cls(
+            test_title=params.test_title,
+            background=BackgroundIR.from_mapping(params.background),
+            independent_variable=VariableIR.from_variable(params.independent_variable),
+            dependent_variable=VariableIR.from_variable(params.dependent_variable),
+            control_variables=tuple(VariableIR.from_variable(variable) for variable in params.control_variables),
+            materials=tuple(
+                MaterialIR(
+                    name=material.name,
+                    description=material.description,
+                    type=material.type,
+                    version=material.version,
+                    configuration=material.configuration,
+                    source=material.source
+                )
+                for material in params.materials
+            ),
+            test_method=MethodIR(
+                steps=tuple(method.steps),
+                data_collection=method.data_collection,
+                analysis_technique=method.analysis_technique
+            ),
+            imports=tuple(ImportIR(name=imp.name, import_string=imp.import_string) for imp in params.imports)
+        )
@@ -0,0 +1,539 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+JSON Schema of specs, and a compiled pre-validator that checks specs against it.
+
+spec_json_schema() exports a JSON Schema from the pydantic models in schemas/,
+loosened where the models accept more than their generated schema says:
+    - statistical types are accepted in any case
+    - fields with several validation aliases accept any of them (e.g. "expected" or "value")
+    - the old "material" field also accepts a single material object
+Write it to a file with `python spec_schema.py [PATH]`.
+
+compile_schema() turns the schema into nested Python checks once, so checking
+a spec is one walk over its parsed JSON without building any model. The checks
+follow pydantic's lax validation of JSON, e.g. a number may be given as a
+numeric string, so the pre-validator only rejects specs that full validation
+would reject too. What the schema cannot express, such as a range together
+with a values list, is still left to full validation.
+
+prevalidate_jobs() checks every spec of a bulk run up front and collects the
+errors of all the rejected specs into one PrevalidationReport.
+"""
+from __future__ import annotations
+
+
+from functools import lru_cache
+import json
+import logging
+import math
+from pathlib import Path
+import re
+import sys
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union, get_args
+
+
+from pydantic import AliasChoices, BaseModel, Field, TypeAdapter
+
+
+from bulk import BulkJob, BulkResult, BulkSummary
+from fragments import FragmentResolver, uses_composition
+from schemas.statistical_type import StatisticalType
+from schemas.test_spec import TestSpecDocument
+from schemas.variable import ValueItem, Variable
+from spec_bundle import read_spec
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.spec_schema")
+
+
+# Where `python spec_schema.py` writes the schema by default
+DEFAULT_SCHEMA_PATH = Path(__file__).parent / "spec.schema.json"
+
+# Strings pydantic accepts as booleans
+BOOLEAN_STRINGS = frozenset({"0", "1", "false", "true", "f", "t", "n", "y", "no", "yes", "off", "on"})
+
+# Errors kept per spec; a spec with more is still rejected, with a note of how many were left out
+MAX_ERRORS_PER_SPEC = 20
+
+
+# Location of a value: () for the root, else (location of its parent, key or index)
+Location = Tuple[Any, ...]
+
+# A compiled check: (value, location of the value, errors to append (location, reason) to)
+Check = Callable[[Any, Location, List[Tuple[Location, str]]], None]
+
+
+def _case_insensitive_pattern(words: Iterable[str]) -> str:
+    """Build a regular expression matching any of the words in any case, e.g. '^([dD][oO][gG])$'."""
+    alternatives = ("".join(f"[{char.lower()}{char.upper()}]" if char.isalpha() else re.escape(char) for char in word) for word in words)
+    return f"^({'|'.join(alternatives)})$"
+
+
+def _models(model: type[BaseModel], seen: Optional[Dict[str, type[BaseModel]]] = None) -> Dict[str, type[BaseModel]]:
+    """Collect a model and every model nested in its fields, by title."""
+    seen = {} if seen is None else seen
+    if model.__name__ in seen:
+        return seen
+    seen[model.__name__] = model
+    pending = [field.annotation for field in model.model_fields.values()]
+    while pending:
+        annotation = pending.pop()
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            _models(annotation, seen)
+        pending.extend(get_args(annotation))
+    return seen
+
+
+@lru_cache(maxsize=1)
+def spec_json_schema() -> Dict[str, Any]:
+    """
+    Export the JSON Schema of a whole spec file from the pydantic models.
+
+    Returns:
+        Dict[str, Any]: JSON Schema (draft 2020-12) of {"test_file_parameters": {...}}
+    """
+    schema = TestSpecDocument.model_json_schema()
+    definitions = schema["$defs"]
+
+    # Variable lower-cases the statistical type before validating it
+    statistical_type = definitions[StatisticalType.__name__]
+    statistical_type.pop("enum")
+    statistical_type["pattern"] = _case_insensitive_pattern(member.value for member in StatisticalType)
+
+    # A field with several validation aliases is present under any of them
+    for title, model in _models(TestSpecDocument).items():
+        definition = definitions.get(title, schema if model is TestSpecDocument else None)
+        if definition is None:
+            continue
+        for name, field in model.model_fields.items():
+            if not isinstance(field.validation_alias, AliasChoices):
+                continue
+            aliases = [choice for choice in field.validation_alias.choices if isinstance(choice, str)]
+            for alias in aliases:
+                definition["properties"].setdefault(alias, definition["properties"].get(name, {}))
+            if name in definition.get("required", []):
+                definition["required"].remove(name)
+                definition.setdefault("anyOf", []).extend({"required": [alias]} for alias in aliases)
+
+    # TestSpec wraps a single material object in a list
+    material = definitions["TestSpec"]["properties"]["material"]
+    material["anyOf"].append({"$ref": "#/$defs/Material"})
+
+    # Variable.values is validated as plain JSON; the items of a list not stored as columns are ValueItems
+    value_item = TypeAdapter(ValueItem).json_schema(ref_template="#/$defs/{model}")
+    definitions.update(value_item.pop("$defs"))
+    definitions[Variable.__name__]["properties"]["values"]["anyOf"][0]["items"] = value_item
+    schema["$defs"] = dict(sorted(definitions.items()))
+
+    schema["$schema"] = "https://json-schema.org/draft/2020-12/schema"
+    return schema
+
+
+def _pointer(location: Location) -> str:
+    """Turn a location into a JSON pointer, escaping keys as RFC 6901 requires."""
+    keys = []
+    while location:
+        location, key = location
+        keys.append(str(key).replace('~', '~0').replace('/', '~1'))
+    return "".join(f"/{key}" for key in reversed(keys))
+
+
+def _as_number(value: Any) -> Optional[float]:
+    """The number pydantic would read a value as in lax mode, or None."""
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _is_integer(value: Any) -> bool:
+    """Whether pydantic would read a value as an integer in lax mode."""
+    number = _as_number(value)
+    return number is not None and math.isfinite(number) and number.is_integer()
+
+
+# Type checks of the "type" keyword, in pydantic's lax mode
+TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    "number": lambda value: _as_number(value) is not None,
+    "integer": _is_integer,
+    "boolean": lambda value: (
+        isinstance(value, bool) or value in (0, 1) or (isinstance(value, str) and value.lower() in BOOLEAN_STRINGS)
+    ),
+    "null": lambda value: value is None,
+    "array": lambda value: isinstance(value, list),
+    "object": lambda value: isinstance(value, dict),
+}
+
+
+class _SchemaCompiler:
+    """
+    Compile a JSON Schema into nested checks.
+
+    Supports the keywords the exported spec schema uses: $ref to $defs, type,
+    enum, const, pattern, minimum, maximum, exclusiveMinimum, exclusiveMaximum,
+    required, properties, additionalProperties (as a schema or false), items
+    and anyOf. Other keywords, such as title, description and default, are
+    annotations and are ignored.
+
+    A schema that accepts everything compiles to None rather than to a check,
+    so e.g. the items of a lenient list are not visited at all.
+    """
+
+    def __init__(self, schema: Dict[str, Any]):
+        """
+        Initialize the compiler.
+
+        Args:
+            schema: The root schema, holding the $defs that references point to
+        """
+        self.definitions = schema.get("$defs", {})
+        self.compiled: Dict[str, Optional[Check]] = {}
+
+    def reference(self, ref: str) -> Optional[Check]:
+        """Compile a reference; each definition is compiled once, and may refer to itself."""
+        prefix = "#/$defs/"
+        if not ref.startswith(prefix) or ref[len(prefix):] not in self.definitions:
+            raise ValueError(f"Unsupported schema reference: {ref}")
+        name = ref[len(prefix):]
+        if name not in self.compiled:
+            # Stand-in for recursive references, resolved once the definition is compiled
+            def check_reference(value: Any, location: Location, errors: List[Tuple[Location, str]]) -> None:
+                check = self.compiled[name]
+                if check is not None:
+                    check(value, location, errors)
+            self.compiled[name] = check_reference
+            self.compiled[name] = self.compile(self.definitions[name])
+        return self.compiled[name]
+
+    def compile(self, schema: Union[Dict[str, Any], bool]) -> Optional[Check]:
+        """
+        Compile a schema into a check.
+
+        Args:
+            schema: The schema, or True/False for a schema that accepts/rejects everything
+
+        Returns:
+            Optional[Check]: Function appending an error for every way a value breaks
+                the schema, or None if the schema accepts every value
+        """
+        if schema is True:
+            return None
+        if schema is False:
+            return lambda value, location, errors: errors.append((location, "No value is allowed here"))
+
+        checks: List[Optional[Check]] = []
+        if "$ref" in schema:
+            checks.append(self.reference(schema["$ref"]))
+        if "type" in schema:
+            checks.append(self._type(schema["type"]))
+        if "enum" in schema or "const" in schema:
+            checks.append(self._enum(schema["enum"] if "enum" in schema else [schema["const"]]))
+        if "pattern" in schema:
+            checks.append(self._pattern(schema["pattern"]))
+        bounds = {key: schema[key] for key in ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum") if key in schema}
+        if bounds:
+            checks.append(self._bounds(bounds))
+        if "required" in schema or "properties" in schema or "additionalProperties" in schema:
+            checks.append(self._object(schema))
+        if "items" in schema:
+            checks.append(self._items(schema["items"]))
+        if "anyOf" in schema:
+            checks.append(self._any_of(schema["anyOf"]))
+
+        active = [check for check in checks if check is not None]
+        if len(active) <= 1:
+            return active[0] if active else None
+
+        def check_all(value: Any, location: Location, errors: List[Tuple[Location, str]]) -> None:
+            for check in active:
+                check(value, location, errors)
+        return check_all
+
+    @staticmethod
+    def _type(types: Union[str, List[str]]) -> Check:
+        """Check the type of a value."""
+        names = [types] if isinstance(types, str) else list(types)
+        type_checks = [TYPE_CHECKS[name] for name in names]
+        expected = " or ".join(names)
+
+        def check_type(value: Any, location: Location, errors: List[Tuple[Location, str]]) -> None:
+            for type_check in type_checks:
+                if type_check(value):
+                    return
+            errors.append((location, f"Expected {expected}, got {type(value).__name__}"))
+        return check_type
+
+    @staticmethod
+    def _enum(allowed: List[Any]) -> Check:
+        """Check that a value is one of the allowed values."""
+        def check_enum(value: Any, location: Location, errors: List[Tuple[Location, str]]) -> None:
+            if value not in allowed:
+                errors.append((location, f"Expected one of {allowed}, got {value!r}"))
+        return check_enum
+
+    @staticmethod
+    def _pattern(pattern: str) -> Check:
+        """Check that a string matches a regular expression."""
+        search = re.compile(pattern).search
+
+        def check_pattern(value: Any, location: Location, errors: List[Tuple[Location, str]]) -> None:
+            if isinstance(value, str) and search(value) is None:
+                errors.append((location, f"{value!r} does not match {pattern}"))
+        return check_pattern
+
+    @staticmethod
+    def _bounds(bounds: Dict[str, float]) -> Check:
+        """Check the bounds of a number."""
+        tests = {
+            "minimum": (lambda number, bound: number >= bound, ">="),
+            "maximum": (lambda number, bound: number <= bound, "<="),
+            "exclusiveMinimum": (lambda number, bound: number > bound, ">"),
+            "exclusiveMaximum": (lambda number, bound: number < bound, "<"),
+        }
+
+        def check_bounds(value: Any, location: Location, errors: List[Tuple[Location, str]]) -> None:
+            number = _as_number(value)
+            if number is None:
+                return
+            for keyword, bound in bounds.items():
+                test, symbol = tests[keyword]
+                if not test(number, bound):
+                    errors.append((location, f"Expected a number {symbol} {bound}, got {value!r}"))
+        return check_bounds
+
+    def _object(self, schema: Dict[str, Any]) -> Check:
+        """Check the required keys and the properties of an object."""
+        required = tuple(schema.get("required", ()))
+        properties = [
+            (name, check) for name, check in (
+                (name, self.compile(subschema)) for name, subschema in schema.get("properties", {}).items()
+            )
+            if check is not None
+        ]
+        known = frozenset(schema.get("properties", {}))
+        additional = self.compile(schema.get("additionalProperties", True))
+
+        def check_object(value: Any, location: Location, errors: List[Tuple[Location, str]]) -> None:
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(((location, name), "Field required"))
+            for name, check in properties:
+                if name in value:
+                    check(value[name], (location, name), errors)
+            if additional is not None:
+                for name in value.keys() - known:
+                    additional(value[name], (location, name), errors)
+        return check_object
+
+    def _items(self, schema: Union[Dict[str, Any], bool]) -> Optional[Check]:
+        """Check every item of an array."""
+        item_check = self.compile(schema)
+        if item_check is None:
+            return None
+
+        def check_items(value: Any, location: Location, errors: List[Tuple[Location, str]]) -> None:
+            if not isinstance(value, list):
+                return
+            for index, item in enumerate(value):
+                item_check(item, (location, index), errors)
+        return check_items
+
+    def _any_of(self, schemas: List[Union[Dict[str, Any], bool]]) -> Optional[Check]:
+        """Check that a value matches at least one of several schemas."""
+        branches = [self.compile(schema) for schema in schemas]
+        if any(branch is None for branch in branches):
+            return None
+
+        def check_any_of(value: Any, location: Location, errors: List[Tuple[Location, str]]) -> None:
+            closest: List[Tuple[Location, str]] = []
+            for branch in branches:
+                branch_errors: List[Tuple[Location, str]] = []
+                branch(value, location, branch_errors)
+                if not branch_errors:
+                    return
+                if not closest or len(branch_errors) < len(closest):
+                    closest = branch_errors
+            # Report the errors of the branch the value came closest to matching
+            errors.extend(closest)
+        return check_any_of
+
+
+def compile_schema(schema: Dict[str, Any]) -> Callable[[Any], List[Tuple[str, str]]]:
+    """
+    Compile a JSON Schema into a validator.
+
+    Args:
+        schema: The JSON Schema
+
+    Returns:
+        Callable[[Any], List[Tuple[str, str]]]: Function returning the (JSON pointer, reason)
+            of every error in a parsed JSON value, or an empty list if it is valid
+    """
+    check = _SchemaCompiler(schema).compile(schema)
+
+    def validate(instance: Any) -> List[Tuple[str, str]]:
+        if check is None:
+            return []
+        errors: List[Tuple[Location, str]] = []
+        check(instance, (), errors)
+        return [(_pointer(location), reason) for location, reason in errors]
+    return validate
+
+
+@lru_cache(maxsize=1)
+def spec_validator() -> Callable[[Any], List[Tuple[str, str]]]:
+    """The compiled validator of the spec schema, built once per process."""
+    return compile_schema(spec_json_schema())
+
+
+class SpecError(BaseModel):
+    """
+    A reason a spec was rejected.
+
+    Attributes:
+        spec_path: The spec file
+        pointer: JSON pointer to the invalid value; empty for the whole document
+        reason: What is wrong with it
+    """
+    spec_path: Optional[Path] = None
+    pointer: str = ""
+    reason: str
+
+
+class PrevalidationReport(BaseModel):
+    """
+    Errors of every spec rejected by pre-validation in a run.
+
+    Attributes:
+        checked: Number of specs checked
+        rejected: Number of specs rejected
+        errors: Errors of the rejected specs, in job order
+    """
+    checked: int = 0
+    rejected: int = 0
+    errors: List[SpecError] = Field(default_factory=list)
+
+    def log(self) -> None:
+        """Log every error, then the totals."""
+        for error in self.errors:
+            logger.error(f"INVALID {error.spec_path}#{error.pointer}: {error.reason}")
+        logger.info(f"Pre-validation: {self.rejected} of {self.checked} specs rejected")
+
+    def write(self, path: Path) -> None:
+        """
+        Write the report as JSON.
+
+        Args:
+            path: File to write the report to
+        """
+        Path(path).write_text(self.model_dump_json(indent=2), encoding="utf-8")
+
+
+def prevalidate_spec(
+    data: Union[bytes, str],
+    spec_path: Optional[Path] = None,
+    fragment_resolver: Optional[FragmentResolver] = None
+) -> List[SpecError]:
+    """
+    Check raw spec JSON against the spec schema without building any model.
+
+    A spec that refers to fragments is checked as composed from them.
+
+    Args:
+        data: Raw JSON of a whole spec file
+        spec_path: The spec file, for the errors and for finding the fragments it refers to
+        fragment_resolver: Resolver of the fragments. If None, a new one is created.
+
+    Returns:
+        List[SpecError]: The errors found, at most MAX_ERRORS_PER_SPEC, or an empty list if the spec may be valid
+    """
+    try:
+        document = json.loads(data)
+    except ValueError as e:
+        return [SpecError(spec_path=spec_path, reason=f"Invalid JSON: {e}")]
+    if uses_composition(data if isinstance(data, bytes) else data.encode("utf-8")):
+        try:
+            document = (fragment_resolver or FragmentResolver()).compose(document, spec_path, validate=False).document
+        except ValueError as e:
+            return [SpecError(spec_path=spec_path, reason=str(e))]
+
+    found = spec_validator()(document)
+    errors = [SpecError(spec_path=spec_path, pointer=pointer, reason=reason) for pointer, reason in found[:MAX_ERRORS_PER_SPEC]]
+    if len(found) > MAX_ERRORS_PER_SPEC:
+        errors.append(SpecError(spec_path=spec_path, reason=f"... and {len(found) - MAX_ERRORS_PER_SPEC} more errors"))
+    return errors
+
+
+def prevalidate_jobs(
+    jobs: List[BulkJob],
+    fragment_resolver: Optional[FragmentResolver] = None
+) -> Tuple[List[BulkJob], List[Optional[BulkResult]], PrevalidationReport]:
+    """
+    Check the spec of every job and set aside the jobs whose specs are rejected.
+
+    Args:
+        jobs: Jobs of a bulk run
+        fragment_resolver: Resolver of the fragments specs refer to. If None, a new one is created.
+
+    Returns:
+        Tuple[List[BulkJob], List[Optional[BulkResult]], PrevalidationReport]: Jobs to run,
+            a result slot per job (filled in for rejected jobs, None for jobs to run), and the report
+    """
+    to_run: List[BulkJob] = []
+    slots: List[Optional[BulkResult]] = []
+    report = PrevalidationReport()
+    fragment_resolver = fragment_resolver if fragment_resolver is not None else FragmentResolver()
+
+    for job in jobs:
+        report.checked += 1
+        try:
+            errors = prevalidate_spec(read_spec(job.test_parameter_json), job.test_parameter_json, fragment_resolver)
+        except (OSError, ValueError) as e:
+            errors = [SpecError(spec_path=job.test_parameter_json, reason=f"Could not read spec: {e}")]
+
+        if not errors:
+            to_run.append(job)
+            slots.append(None)
+            continue
+        report.rejected += 1
+        report.errors.extend(errors)
+        slots.append(BulkResult(
+            name=job.display_name,
+            spec_path=job.test_parameter_json,
+            error=f"Rejected by pre-validation: {errors[0].pointer or '/'}: {errors[0].reason}"
+        ))
+
+    return to_run, slots, report
+
+
+def merge_prevalidated(slots: List[Optional[BulkResult]], summary: BulkSummary) -> BulkSummary:
+    """
+    Merge the results of rejected jobs back in job order.
+
+    Args:
+        slots: Result slots from prevalidate_jobs()
+        summary: Summary of running the jobs that passed pre-validation
+
+    Returns:
+        BulkSummary: Summary covering every job in the original order
+    """
+    ran = iter(summary.results)
+    results = [slot if slot is not None else next(ran) for slot in slots]
+    return BulkSummary(results=results, elapsed=summary.elapsed)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    output_path = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SCHEMA_PATH
+    output_path.write_text(json.dumps(spec_json_schema(), indent=2) + "\n", encoding="utf-8")
+    logger.info(f"Wrote the spec JSON Schema to {output_path}")
+    sys.exit(0)
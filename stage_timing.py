@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Per-spec timing of the stages of test generation.
+
+Generating a spec goes through five stages:
+    - load: reading the spec file
+    - parse: validating the spec into TestFileParameters
+    - template: fetching the template for the harness
+    - render: building the template context and rendering the template
+    - write: writing the test file
+
+A TestGenerator times its stages into the StageTimings it is given. Without
+one it uses NO_TIMINGS, whose stages are a shared no-op context manager, so
+timing costs nothing measurable when it is off. A TimingReport collects the
+timings of every spec in a run, prints the slowest specs and the percentiles
+of each stage, and exports the per-spec timings as JSON or CSV.
+"""
+from __future__ import annotations
+
+
+from array import array
+from contextlib import nullcontext
+import csv
+from dataclasses import dataclass, field
+import heapq
+import json
+import logging
+import math
+from pathlib import Path
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.stage_timing")
+
+
+# Stages of generating a spec, in order
+STAGES = ("load", "parse", "template", "render", "write")
+
+# Percentiles reported for each stage
+PERCENTILES = (50, 90, 99)
+
+# Default number of specs listed in the slowest specs table
+DEFAULT_TOP = 10
+
+
+class _Stage:
+    """Context manager adding the time spent inside it to a stage."""
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings: StageTimings, name: str):
+        self.timings = timings
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.timings.add(self.name, time.perf_counter() - self.start)
+
+
+class StageTimings:
+    """
+    Seconds spent in each stage of generating one spec.
+
+    A stage entered more than once, e.g. the render stage of each variant of a
+    test, adds up.
+
+    Attributes:
+        seconds: Seconds spent in each stage that was entered
+    """
+    enabled = True
+
+    def __init__(self) -> None:
+        """Initialize the timings with no stage entered yet."""
+        self.seconds: Dict[str, float] = {}
+
+    def stage(self, name: str) -> _Stage:
+        """
+        Time a block of code as a stage.
+
+        Args:
+            name: Name of the stage, one of STAGES
+
+        Returns:
+            _Stage: Context manager timing its block
+        """
+        return _Stage(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        """
+        Add time to a stage.
+
+        Args:
+            name: Name of the stage
+            seconds: Seconds to add
+        """
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def split(self, items: Iterable[Any], producer: str, consumer: str) -> Iterator[Any]:
+        """
+        Yield items, timing the producing of each as one stage and its consuming as another.
+
+        Used for streamed rendering, where each chunk is written as soon as it
+        is rendered.
+
+        Args:
+            items: Items whose producing is timed, e.g. chunks from Template.generate()
+            producer: Stage the producing of the items is added to
+            consumer: Stage the work done with each item between yields is added to
+
+        Returns:
+            Iterator[Any]: The items
+        """
+        clock = time.perf_counter
+        produced = consumed = 0.0
+        start = clock()
+        try:
+            for item in items:
+                ready = clock()
+                produced += ready - start
+                yield item
+                start = clock()
+                consumed += start - ready
+        finally:
+            self.add(producer, produced)
+            self.add(consumer, consumed)
+
+
+class _NoTimings:
+    """Stage timings that record nothing, used when timing is off."""
+    enabled = False
+    seconds: Dict[str, float] = {}
+
+    _stage = nullcontext()
+
+    def stage(self, name: str) -> nullcontext:
+        return self._stage
+
+    def add(self, name: str, seconds: float) -> None:
+        pass
+
+    def split(self, items: Iterable[Any], producer: str, consumer: str) -> Iterable[Any]:
+        return items
+
+
+# Shared timings of every generator that is not timed
+NO_TIMINGS = _NoTimings()
+
+
+@dataclass(frozen=True)
+class SpecTiming:
+    """
+    Stage timings of one spec of a run.
+
+    Attributes:
+        name: Name of the test
+        source: Where the spec came from, e.g. its path
+        seconds: Seconds spent in each stage
+    """
+    name: str
+    source: str
+    seconds: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total(self) -> float:
+        """Seconds spent in all the stages."""
+        return sum(self.seconds.values())
+
+    def to_row(self) -> Dict[str, Any]:
+        """The timings as one row of an export, with seconds rounded to microseconds."""
+        row: Dict[str, Any] = {"name": self.name, "source": self.source}
+        for stage in STAGES:
+            row[stage] = round(self.seconds[stage], 6) if stage in self.seconds else None
+        row["total"] = round(self.total, 6)
+        return row
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Nearest-rank percentile of sorted values.
+
+    Args:
+        values: The values, sorted in ascending order
+        percent: Percentile to take, from 0 to 100
+
+    Returns:
+        float: The smallest value at least percent % of the values are less than or equal to
+    """
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+class TimingReport:
+    """
+    Stage timings of the specs of a run.
+
+    Specs are added as they finish. Only the slowest specs and one float per
+    spec and stage are kept, while the per-spec rows go straight to the export
+    file, so the report stays small over a long JSONL stream.
+    """
+
+    def __init__(self, top: int = DEFAULT_TOP, export_path: Optional[Path] = None):
+        """
+        Initialize the report.
+
+        Args:
+            top: Number of specs listed in the slowest specs table
+            export_path: File to export the per-spec timings to, as CSV if it ends in
+                .csv and as JSON otherwise. If None, they are not exported.
+        """
+        self.top = top
+        self.export_path = Path(export_path) if export_path is not None else None
+        self.count = 0
+        self.samples: Dict[str, array] = {stage: array("d") for stage in STAGES + ("total",)}
+        self._slowest: List[Tuple[float, int, SpecTiming]] = []
+        self._export: Optional[TextIO] = None
+        self._csv: Optional[Any] = None
+
+    def _open_export(self) -> None:
+        """Open the export file and write its header."""
+        self._export = open(self.export_path, "w", encoding="utf-8", newline="")
+        if self.export_path.suffix.lower() == ".csv":
+            self._csv = csv.DictWriter(self._export, fieldnames=["name", "source", *STAGES, "total"])
+            self._csv.writeheader()
+        else:
+            self._export.write('{"specs": [')
+
+    def add(self, name: str, source: str, seconds: Dict[str, float]) -> None:
+        """
+        Add the timings of a spec.
+
+        Args:
+            name: Name of the test
+            source: Where the spec came from
+            seconds: Seconds spent in each stage; a spec without any is left out
+        """
+        if not seconds:
+            return
+        timing = SpecTiming(name=name, source=source, seconds=dict(seconds))
+        for stage, value in timing.seconds.items():
+            if stage in self.samples:
+                self.samples[stage].append(value)
+        self.samples["total"].append(timing.total)
+
+        entry = (timing.total, self.count, timing)
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, entry)
+        elif self.top > 0:
+            heapq.heappushpop(self._slowest, entry)
+
+        if self.export_path is not None:
+            if self._export is None:
+                self._open_export()
+            if self._csv is not None:
+                self._csv.writerow(timing.to_row())
+            else:
+                self._export.write(("," if self.count else "") + "\n  " + json.dumps(timing.to_row()))
+        self.count += 1
+
+    def add_results(self, results: Iterable[Any]) -> None:
+        """
+        Add the timings of bulk results.
+
+        Args:
+            results: BulkResult objects, or anything with name, source and timings
+        """
+        for result in results:
+            self.add(result.name, result.source, result.timings)
+
+    def slowest(self) -> List[SpecTiming]:
+        """The slowest specs, slowest first."""
+        return [timing for _, _, timing in sorted(self._slowest, key=lambda entry: (-entry[0], entry[1]))]
+
+    def percentiles(self) -> Dict[str, Dict[str, float]]:
+        """
+        Percentiles of the seconds spent in each stage, and in all of them.
+
+        Returns:
+            Dict[str, Dict[str, float]]: For each stage any spec went through, its
+                p50, p90 and p99, its max and the sum over all specs
+        """
+        stats = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            values = sorted(samples)
+            stats[stage] = {f"p{percent}": percentile(values, percent) for percent in PERCENTILES}
+            stats[stage]["max"] = values[-1]
+            stats[stage]["sum"] = math.fsum(values)
+        return stats
+
+    def format(self) -> str:
+        """
+        The slowest specs table and the stage percentiles table, in milliseconds.
+
+        Returns:
+            str: The report, ready to print
+        """
+        if not self.count:
+            return "No stage timings were recorded"
+
+        def ms(seconds: Optional[float]) -> str:
+            return "-" if seconds is None else f"{seconds * 1000:.2f}"
+
+        slowest = self.slowest()
+        name_width = max([len("spec")] + [len(timing.name) for timing in slowest])
+        columns = [*STAGES, "total"]
+        lines = [f"Slowest {len(slowest)} of {self.count} specs (ms):"]
+        lines.append("  " + "spec".ljust(name_width) + "".join(column.rjust(11) for column in columns))
+        for timing in slowest:
+            cells = [ms(timing.seconds.get(stage)) for stage in STAGES] + [ms(timing.total)]
+            lines.append("  " + timing.name.ljust(name_width) + "".join(cell.rjust(11) for cell in cells))
+
+        stat_names = [f"p{percent}" for percent in PERCENTILES] + ["max", "sum"]
+        lines.append(f"Stage percentiles over {self.count} specs (ms):")
+        lines.append("  " + "stage".ljust(9) + "".join(name.rjust(11) for name in stat_names))
+        for stage, stats in self.percentiles().items():
+            lines.append("  " + stage.ljust(9) + "".join(ms(stats[name]).rjust(11) for name in stat_names))
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        """Finish the export file, if one is being written."""
+        if self.export_path is None:
+            return
+        if self._export is None:
+            self._open_export()
+        if self._csv is None:
+            self._export.write(f'\n], "percentiles": {json.dumps(self.percentiles())}}}\n')
+        self._export.close()
+        self._export = self._csv = None
+        logger.info(f"Stage timings of {self.count} specs written to {self.export_path}")
+
+    def __enter__(self) -> TimingReport:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Ahead-of-time compiled template bundle.
+
+The Jinja2 templates in templates/ are compiled to Python modules in
+compiled_templates/, so a run can load them without lexing or parsing any
+template source. Rebuild the bundle after editing a template:
+
+    python template_bundle.py
+"""
+from __future__ import annotations
+
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+import shutil
+import sys
+from typing import Any, Dict, Optional
+
+
+import jinja2
+from jinja2 import Environment, FileSystemLoader, ModuleLoader, select_autoescape
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.template_bundle")
+
+
+ROOT_DIR = Path(__file__).parent
+
+# Template source directories, in lookup order
+TEMPLATE_DIRS = [
+    ROOT_DIR / "templates",
+    ROOT_DIR / "test_templates"
+]
+
+# Directory holding the compiled template modules
+COMPILED_DIR = ROOT_DIR / "compiled_templates"
+
+# Records which sources and Jinja2 version the bundle was compiled from
+BUNDLE_MANIFEST_NAME = "bundle_manifest.json"
+
+# Options every template environment is created with. Compiled code bakes in
+# the lexer options, so the bundle and the source environment must agree.
+ENVIRONMENT_OPTIONS: Dict[str, Any] = {
+    "autoescape": select_autoescape(["html", "xml"]),
+    "trim_blocks": True,
+    "lstrip_blocks": True,
+}
+
+
+def _existing_template_dirs() -> list[Path]:
+    """Template source directories that exist."""
+    return [path for path in TEMPLATE_DIRS if path.exists()]
+
+
+def _hash_sources(template_dirs: list[Path]) -> Dict[str, str]:
+    """
+    Hash every template source, keyed by template name.
+
+    Earlier directories win, matching FileSystemLoader's lookup order.
+
+    Args:
+        template_dirs: Template source directories
+
+    Returns:
+        Dict[str, str]: SHA-256 of each template's source
+    """
+    hashes: Dict[str, str] = {}
+    for template_dir in template_dirs:
+        for path in sorted(template_dir.glob("*.j2")):
+            hashes.setdefault(path.name, hashlib.sha256(path.read_bytes()).hexdigest())
+    return hashes
+
+
+def read_bundle_manifest(compiled_dir: Path = COMPILED_DIR) -> Optional[Dict[str, Any]]:
+    """
+    Read the manifest of a compiled bundle.
+
+    Args:
+        compiled_dir: Directory holding the compiled bundle
+
+    Returns:
+        Optional[Dict[str, Any]]: The manifest, or None if there is no usable bundle
+    """
+    manifest_path = compiled_dir / BUNDLE_MANIFEST_NAME
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+
+def is_bundle_current(compiled_dir: Path = COMPILED_DIR, template_dirs: Optional[list[Path]] = None) -> bool:
+    """
+    Check whether a compiled bundle matches the template sources and the installed Jinja2.
+
+    Args:
+        compiled_dir: Directory holding the compiled bundle
+        template_dirs: Template source directories. Defaults to the existing TEMPLATE_DIRS.
+
+    Returns:
+        bool: True if the bundle can be used in place of the sources
+    """
+    manifest = read_bundle_manifest(compiled_dir)
+    if manifest is None or manifest.get("jinja2_version") != jinja2.__version__:
+        return False
+
+    template_dirs = _existing_template_dirs() if template_dirs is None else template_dirs
+    if not template_dirs:
+        # No sources to compare against; the bundle is all there is
+        return True
+    return manifest.get("templates") == _hash_sources(template_dirs)
+
+
+def compile_template_bundle(
+    compiled_dir: Path = COMPILED_DIR,
+    template_dirs: Optional[list[Path]] = None
+) -> Dict[str, str]:
+    """
+    Compile every template to a Python module and record what it was compiled from.
+
+    Args:
+        compiled_dir: Directory to write the compiled bundle to. Replaced if it exists.
+        template_dirs: Template source directories. Defaults to the existing TEMPLATE_DIRS.
+
+    Returns:
+        Dict[str, str]: SHA-256 of each compiled template's source
+    """
+    template_dirs = _existing_template_dirs() if template_dirs is None else template_dirs
+    if not template_dirs:
+        raise ValueError("No template directories found to compile")
+
+    environment = Environment(loader=FileSystemLoader(template_dirs), **ENVIRONMENT_OPTIONS)
+
+    if compiled_dir.exists():
+        shutil.rmtree(compiled_dir)
+    compiled_dir.mkdir(parents=True)
+
+    environment.compile_templates(
+        str(compiled_dir),
+        extensions=["j2"],
+        zip=None,
+        ignore_errors=False
+    )
+
+    hashes = _hash_sources(template_dirs)
+    manifest = {"jinja2_version": jinja2.__version__, "templates": hashes}
+    with open(compiled_dir / BUNDLE_MANIFEST_NAME, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+    logger.info(f"Compiled {len(hashes)} templates to {compiled_dir}")
+    return hashes
+
+
+def template_source_hash(name: str, compiled_dir: Path = COMPILED_DIR) -> str:
+    """
+    Get the SHA-256 of a template's source, from the sources or from the bundle manifest.
+
+    Args:
+        name: Template name, e.g. "pytest_test.py.j2"
+        compiled_dir: Directory holding the compiled bundle
+
+    Returns:
+        str: Hash of the template source, or an empty string if the template is unknown
+    """
+    hashes = _hash_sources(_existing_template_dirs())
+    if name in hashes:
+        return hashes[name]
+    manifest = read_bundle_manifest(compiled_dir) or {}
+    return manifest.get("templates", {}).get(name, "")
+
+
+def create_environment() -> Optional[Environment]:
+    """
+    Create the template environment, preferring the precompiled bundle.
+
+    The bundle is used when it matches the template sources, or when there are
+    no template sources at all. Otherwise the sources are compiled on load.
+
+    Returns:
+        Optional[Environment]: Configured Jinja2 environment or None if no templates are available
+    """
+    template_dirs = _existing_template_dirs()
+
+    if COMPILED_DIR.exists():
+        if is_bundle_current(COMPILED_DIR, template_dirs):
+            return Environment(loader=ModuleLoader(str(COMPILED_DIR)), **ENVIRONMENT_OPTIONS)
+        if not template_dirs:
+            logger.warning("Compiled template bundle was built with a different Jinja2 version; using it anyway")
+            return Environment(loader=ModuleLoader(str(COMPILED_DIR)), **ENVIRONMENT_OPTIONS)
+        logger.debug("Compiled template bundle is stale, compiling templates from source")
+
+    if not template_dirs:
+        logger.error("No template directories or compiled template bundle found")
+        return None
+
+    return Environment(loader=FileSystemLoader(template_dirs), **ENVIRONMENT_OPTIONS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    compile_template_bundle()
+    sys.exit(0)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Spec factories shared by the test modules.
+"""
+
+
+def sample_spec(title: str) -> dict:
+    """Build a minimal valid spec with the given title."""
+    return {
+        "test_file_parameters": {
+            "test_title": title,
+            "background": {
+                "orientation": "Test orientation",
+                "purpose": "Test purpose",
+                "hypothesis": "Test hypothesis"
+            },
+            "independent_variable": {
+                "name": "Independent Var",
+                "description": "Test independent var",
+                "statistical_type": "discrete",
+                "unit": "units",
+                "value": 10
+            },
+            "dependent_variable": {
+                "name": "Dependent Var",
+                "description": "Test dependent var",
+                "statistical_type": "continuous",
+                "unit": "milliseconds",
+                "expected_value": {"value": 100.0}
+            },
+            "test_procedure": {
+                "steps": ["Step 1", "Step 2"],
+                "data_collection": "Test data collection",
+                "analysis_technique": "Test analysis"
+            },
+            "imports": [{"name": "json"}]
+        }
+    }
+
+
+def parametrized_spec(count: int, statistical_type: str = "discrete") -> dict:
+    """A sample spec whose cases double their input."""
+    spec = sample_spec("Doubling")
+    params = spec["test_file_parameters"]
+    params["independent_variable"] = {
+        "name": "Number", "description": "A number", "statistical_type": statistical_type, "unit": "units",
+        "values": [{"value": number} for number in range(count)]
+    }
+    params["dependent_variable"] = {
+        "name": "Doubled Number", "description": "The number doubled", "statistical_type": statistical_type,
+        "unit": "units",
+        "expected_value": {"values": [{"input": number, "expected": number * 2} for number in range(count)]}
+    }
+    return spec
+
+
+def spec_with_ids(ids: list, expected_ids: list) -> dict:
+    """A sample spec whose values and expected values carry case ids."""
+    spec = parametrized_spec(0)
+    params = spec["test_file_parameters"]
+    params["independent_variable"]["values"] = [{"id": case_id, "value": f'"{case_id}"'} for case_id in ids]
+    params["dependent_variable"]["expected_value"]["values"] = [
+        {"id": case_id, "value": f'"{case_id.upper()}"'} for case_id in expected_ids
+    ]
+    return spec
+
+
+def sweep_spec(cases: int, knobs: int, values: int) -> dict:
+    """A parametrized spec with control variables that each sweep the given number of values."""
+    spec = parametrized_spec(cases)
+    spec["test_file_parameters"]["control_variables"] = [
+        {
+            "name": f"Knob {knob}", "description": "A knob", "statistical_type": "nominal", "unit": "setting",
+            "values": [{"id": f"k{knob}v{value}", "value": f"'v{value}'"} for value in range(values)]
+        }
+        for knob in range(knobs)
+    ]
+    return spec
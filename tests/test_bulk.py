@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for bulk generation mode.
+"""
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Adjust the import path to properly import the bulk module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from bulk import BulkGenerator, BulkJob, BulkResult, discover_jobs, resolve_worker_count
+from cli import CLI
+from tests.helpers import sample_spec
+
+
+_original_run_job = BulkGenerator.run_job
+
+
+def _crashing_run_job(self: BulkGenerator, job: BulkJob) -> BulkResult:
+    """Kill the worker process for the spec named 'beta', otherwise run normally."""
+    if job.display_name == "beta":
+        os._exit(1)
+    return _original_run_job(self, job)
+
+
+def _exiting_init_worker(*args: object) -> None:
+    """Kill the worker process before it can take any job."""
+    os._exit(1)
+
+
+class TestBulkGeneration(unittest.TestCase):
+    """Test case for bulk generation."""
+
+    def setUp(self) -> None:
+        """Create a directory of specs and an output directory."""
+        self.spec_dir = tempfile.TemporaryDirectory()
+        self.output_dir = tempfile.TemporaryDirectory()
+        for name in ("alpha", "beta", "gamma"):
+            spec_path = Path(self.spec_dir.name) / f"{name}.json"
+            spec_path.write_text(json.dumps(sample_spec(name.title())))
+        # An invalid spec that must fail without stopping the run
+        (Path(self.spec_dir.name) / "broken.json").write_text(json.dumps({"test_file_parameters": {}}))
+
+    def tearDown(self) -> None:
+        """Clean up temporary directories."""
+        self.spec_dir.cleanup()
+        self.output_dir.cleanup()
+
+    def test_discover_jobs_from_directory(self) -> None:
+        """Test that every JSON file in a directory becomes a job, in sorted order."""
+        jobs = discover_jobs(spec_dir=self.spec_dir.name)
+        self.assertEqual([job.display_name for job in jobs], ["alpha", "beta", "broken", "gamma"])
+
+    def test_discover_jobs_from_glob(self) -> None:
+        """Test collecting jobs from a glob pattern."""
+        jobs = discover_jobs(spec_glob=str(Path(self.spec_dir.name) / "[ab]*.json"))
+        self.assertEqual([job.display_name for job in jobs], ["alpha", "beta", "broken"])
+
+    def test_discover_jobs_from_manifest(self) -> None:
+        """Test that manifest jobs keep their fields and resolve relative paths."""
+        manifest_path = Path(self.spec_dir.name) / "manifest.json"
+        manifest_path.write_text(json.dumps({"jobs": [
+            {"test_parameter_json": "alpha.json", "name": "Alpha Test", "harness": "pytest"}
+        ]}))
+
+        jobs = discover_jobs(manifest=str(manifest_path))
+
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(jobs[0].name, "Alpha Test")
+        self.assertEqual(jobs[0].harness, "pytest")
+        self.assertEqual(jobs[0].test_parameter_json, Path(self.spec_dir.name) / "alpha.json")
+
+    def test_run_collects_successes_and_failures(self) -> None:
+        """Test that a bulk run reports every spec and shares one template environment."""
+        bulk_generator = BulkGenerator({"output_dir": self.output_dir.name, "harness": "unittest"})
+        summary = bulk_generator.run(discover_jobs(spec_dir=self.spec_dir.name))
+
+        self.assertEqual(len(summary.results), 4)
+        self.assertEqual([r.name for r in summary.succeeded], ["alpha", "beta", "gamma"])
+        self.assertEqual([r.name for r in summary.failed], ["broken"])
+        self.assertTrue((Path(self.output_dir.name) / "test_alpha.py").exists())
+        self.assertGreaterEqual(summary.elapsed, 0.0)
+
+    def test_run_parallel_matches_sequential_order(self) -> None:
+        """Test that parallel results come back in job order with errors collected."""
+        bulk_generator = BulkGenerator({"output_dir": self.output_dir.name, "harness": "unittest"})
+        summary = bulk_generator.run_parallel(discover_jobs(spec_dir=self.spec_dir.name), workers=2)
+
+        self.assertEqual([r.name for r in summary.results], ["alpha", "beta", "broken", "gamma"])
+        self.assertEqual([r.name for r in summary.failed], ["broken"])
+        self.assertTrue((Path(self.output_dir.name) / "test_gamma.py").exists())
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == "fork", "needs fork to patch workers")
+    def test_run_parallel_survives_worker_crash(self) -> None:
+        """Test that a spec which kills its worker fails alone without stopping the run."""
+        bulk_generator = BulkGenerator({"output_dir": self.output_dir.name, "harness": "unittest"})
+        with patch.object(BulkGenerator, "run_job", _crashing_run_job):
+            summary = bulk_generator.run_parallel(discover_jobs(spec_dir=self.spec_dir.name), workers=2)
+
+        self.assertEqual([r.name for r in summary.results], ["alpha", "beta", "broken", "gamma"])
+        self.assertEqual([r.name for r in summary.failed], ["beta", "broken"])
+        self.assertIn("crashed", summary.results[1].error)
+        self.assertTrue((Path(self.output_dir.name) / "test_gamma.py").exists())
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == "fork", "needs fork to patch workers")
+    def test_run_parallel_gives_up_when_workers_cannot_start(self) -> None:
+        """Test that jobs no worker ever starts are reported as failed instead of retried forever."""
+        bulk_generator = BulkGenerator({"output_dir": self.output_dir.name, "harness": "unittest"})
+        with patch("bulk._init_worker", _exiting_init_worker):
+            summary = bulk_generator.run_parallel(discover_jobs(spec_dir=self.spec_dir.name), workers=2)
+
+        self.assertEqual([r.name for r in summary.results], ["alpha", "beta", "broken", "gamma"])
+        self.assertEqual(len(summary.failed), 4)
+        self.assertTrue(all("Worker process" in r.error for r in summary.results))
+
+    def test_resolve_worker_count(self) -> None:
+        """Test that zero workers means one per CPU core."""
+        self.assertEqual(resolve_worker_count(4), 4)
+        self.assertGreaterEqual(resolve_worker_count(0), 1)
+
+    def test_job_overrides_defaults(self) -> None:
+        """Test that job fields take precedence over the shared defaults."""
+        bulk_generator = BulkGenerator({"output_dir": self.output_dir.name, "harness": "unittest"})
+        job = BulkJob(
+            test_parameter_json=Path(self.spec_dir.name) / "alpha.json",
+            name="Custom Name",
+            harness="pytest"
+        )
+
+        config = bulk_generator.build_config(job)
+
+        self.assertEqual(config.name, "Custom Name")
+        self.assertEqual(config.harness, "pytest")
+        self.assertEqual(config.description, "Tests for Custom Name")
+
+    def test_cli_bulk_mode(self) -> None:
+        """Test running bulk mode end to end through the CLI."""
+        cli = CLI()
+        args_dict = cli.parse_args([
+            "--spec-dir", self.spec_dir.name,
+            "--output_dir", self.output_dir.name,
+            "--harness", "pytest"
+        ])
+
+        self.assertTrue(cli.validate_config(args_dict))
+        # The broken spec makes the run report failure
+        self.assertEqual(cli.run(), 1)
+        self.assertTrue((Path(self.output_dir.name) / "test_gamma.py").exists())
+
+    def test_cli_single_mode_requires_name(self) -> None:
+        """Test that single-file mode still requires --name and --test_parameter_json."""
+        cli = CLI()
+        with self.assertRaises(SystemExit):
+            cli.parse_args(["--output_dir", self.output_dir.name])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for compiled validation procedure conditions.
+"""
+import json
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Adjust the import path to properly import the conditions module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from conditions import ConditionIndex, compile_condition
+from configs import Configs
+from generator import TestGenerator
+from schemas.validation_procedure import ValidationProcedure
+from tests.helpers import sample_spec
+
+
+def _procedures(*conditions) -> list:
+    """Validation procedures with the given conditions, named after their position."""
+    return [
+        ValidationProcedure(name=f"procedure_{index}", description=f"Procedure {index}", condition=condition)
+        for index, condition in enumerate(conditions)
+    ]
+
+
+class TestCompileCondition(unittest.TestCase):
+    """Test case for compile_condition()."""
+
+    def test_evaluate(self) -> None:
+        """Test that conditions are evaluated against test parameters."""
+        self.assertTrue(compile_condition("input_type == 'string'")({"input_type": "string"}))
+        self.assertFalse(compile_condition("value > 10")({"value": 3}))
+        self.assertTrue(compile_condition("size % 2 == 0 and mode in ['fast', 'safe']")({"size": 4, "mode": "safe"}))
+        self.assertTrue(compile_condition("not is_numeric")({"is_numeric": False}))
+        self.assertEqual(compile_condition("a < b or c is None").names, frozenset({"a", "b", "c"}))
+
+    def test_compiled_once(self) -> None:
+        """Test that each distinct condition is compiled once."""
+        self.assertIs(compile_condition("value > 11"), compile_condition("value > 11"))
+
+    def test_unsafe_conditions_rejected(self) -> None:
+        """Test that calls, attribute access, subscripts and invalid syntax are rejected."""
+        for expression in ("__import__('os')", "value.__class__", "values[0]", "(lambda: 1)()", "value >"):
+            with self.assertRaisesRegex(ValueError, "Invalid condition"):
+                compile_condition(expression)
+
+    def test_sequence_arithmetic_rejected(self) -> None:
+        """Test that str, bytes, list and tuple literals cannot be repeated or joined, while numbers still can."""
+        for expression in ("'a' * 1000000000 == value", "value == 1000000000 * [0]", "value + (1,) == t", "b'x' * n"):
+            with self.assertRaisesRegex(ValueError, "of a str, bytes, list or tuple is not allowed"):
+                compile_condition(expression)
+        self.assertTrue(compile_condition("value * 2 + 1 == 7")({"value": 3}))
+        self.assertTrue(compile_condition("value in ['a', 'b'] and -value2 < 0")({"value": "a", "value2": 1}))
+
+    def test_evaluation_error_does_not_hold(self) -> None:
+        """Test that a condition that fails to evaluate does not hold."""
+        with self.assertLogs("test_generator.conditions", level="WARNING"):
+            self.assertFalse(compile_condition("value > 10")({"value": "eleven"}))
+
+
+class TestConditionIndex(unittest.TestCase):
+    """Test case for selecting procedures with a ConditionIndex."""
+
+    def test_select(self) -> None:
+        """Test that unconditional and holding procedures are selected, in order."""
+        index = ConditionIndex(_procedures(None, "input_type == 'string'", "value > 10", "True", "False"))
+        selected = index.select({"input_type": "string", "value": 5})
+        self.assertEqual([procedure.name for procedure in selected], ["procedure_0", "procedure_1", "procedure_3"])
+        self.assertEqual([procedure.name for procedure in index.select(None)], ["procedure_0", "procedure_3"])
+
+    def test_absent_inputs_are_not_evaluated(self) -> None:
+        """Test that a condition missing one of its inputs is skipped without evaluation."""
+        index = ConditionIndex(_procedures("a == 1 and b == 2", "a == 1"))
+        with patch("conditions.Condition.__call__", return_value=True) as evaluate:
+            selected = index.select({"a": 1, "c": 3})
+        self.assertEqual([procedure.name for procedure in selected], ["procedure_1"])
+        self.assertEqual(evaluate.call_count, 1)
+
+    def test_select_batch(self) -> None:
+        """Test a batch of parameter sets, evaluating each distinct input combination once."""
+        index = ConditionIndex(_procedures("input_type == 'string'", "input_type == 'numeric'", "value > 10"))
+        param_sets = [{"input_type": "string", "run": run} for run in range(100)] + [{"input_type": "numeric", "value": 11}]
+
+        with patch("conditions.Condition.__call__", autospec=True, side_effect=lambda condition, params: True) as evaluate:
+            selections = index.select_batch(param_sets)
+        # Two conditions over the 100 string sets, three over the numeric set
+        self.assertEqual(evaluate.call_count, 2 + 3)
+
+        selections = index.select_batch(param_sets + [{"input_type": ["unhashable"]}])
+        self.assertEqual([procedure.name for procedure in selections[0]], ["procedure_0"])
+        self.assertEqual([procedure.name for procedure in selections[100]], ["procedure_1", "procedure_2"])
+        self.assertEqual(selections[101], [])
+        self.assertEqual(len(selections), 102)
+
+
+class TestConditionalProcedures(unittest.TestCase):
+    """Test case for rendering the validation procedures whose conditions hold."""
+
+    def test_render_selected_procedures(self) -> None:
+        """Test that only the procedures selected by the test parameters are listed in the test."""
+        spec = sample_spec("Conditional")
+        spec["test_file_parameters"]["dependent_variable"]["expected_value"]["validation_procedures"] = [
+            {"name": "validate_string_handling", "description": "Strings", "condition": "input_type == 'string'"},
+            {"name": "validate_numeric_handling", "description": "Numbers", "condition": "input_type == 'numeric'"}
+        ]
+        with tempfile.TemporaryDirectory() as output_dir:
+            spec_path = Path(output_dir) / "conditional.json"
+            spec_path.write_text(json.dumps(spec))
+            for harness in ("pytest", "unittest"):
+                config = Configs.model_validate({
+                    "name": "conditional", "description": "Conditional", "json_file_path": spec_path,
+                    "output_dir": output_dir, "harness": harness, "test_params": {"input_type": "numeric"}
+                })
+                content = TestGenerator(config).generate_test_file()
+                self.assertIn("validate_numeric_handling: Numbers", content)
+                self.assertNotIn("validate_string_handling", content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the generator daemon and its client.
+"""
+import contextlib
+import io
+import json
+from pathlib import Path
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+# Adjust the import path to properly import the daemon module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+import daemon
+from daemon import GeneratorDaemon, generate, ping, send_request, unix_sockets_supported
+from tests.helpers import sample_spec
+
+
+@unittest.skipUnless(unix_sockets_supported(), "Unix domain sockets are not supported")
+class TestGeneratorDaemon(unittest.TestCase):
+    """Test case for the GeneratorDaemon class and its client."""
+
+    def setUp(self) -> None:
+        """Create a spec, an output directory and a socket path."""
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.work_path = Path(self.work_dir.name)
+        self.spec_path = self.work_path / "spec.json"
+        self.spec_path.write_text(json.dumps(sample_spec("Daemon Test")))
+        self.output_dir = self.work_path / "out"
+        self.socket_path = self.work_path / "daemon.sock"
+        self.argv = [
+            "--name", "daemon_test",
+            "--description", "Daemon test",
+            "--test_parameter_json", str(self.spec_path),
+            "--output_dir", str(self.output_dir)
+        ]
+
+    def tearDown(self) -> None:
+        """Clean up the working directory."""
+        self.work_dir.cleanup()
+
+    def _start_daemon(self) -> GeneratorDaemon:
+        """Start a daemon on a background thread and wait until it answers."""
+        generator_daemon = GeneratorDaemon(self.socket_path)
+        thread = threading.Thread(target=generator_daemon.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(generator_daemon.shutdown)
+
+        deadline = time.monotonic() + 5
+        while ping(self.socket_path) is None:
+            if time.monotonic() > deadline:
+                self.fail("Daemon did not start")
+            time.sleep(0.01)
+        return generator_daemon
+
+    def test_generate_through_daemon(self) -> None:
+        """Test that the client's request is generated by the daemon."""
+        generator_daemon = self._start_daemon()
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            exit_code = generate(self.argv, self.socket_path)
+
+        self.assertEqual(exit_code, 0)
+        self.assertTrue((self.output_dir / "test_daemon_test.py").exists())
+        self.assertIn("Test file generated successfully", output.getvalue())
+        self.assertEqual(generator_daemon.requests_served, 1)
+
+    def test_relative_paths_use_client_directory(self) -> None:
+        """Test that relative paths resolve against the client's working directory."""
+        self._start_daemon()
+        response = send_request({
+            "command": "generate",
+            "argv": [
+                "--name", "relative", "--description", "Relative paths",
+                "--test_parameter_json", "spec.json", "--output_dir", "out"
+            ],
+            "cwd": str(self.work_path)
+        }, self.socket_path)
+
+        self.assertEqual(response["exit_code"], 0, response["output"])
+        self.assertTrue((self.output_dir / "test_relative.py").exists())
+
+    def test_failed_request_reports_exit_code(self) -> None:
+        """Test that errors, including argparse exits, come back as exit codes."""
+        self._start_daemon()
+
+        response = send_request({"command": "generate", "argv": ["--harness", "nose"]}, self.socket_path)
+        self.assertEqual(response["exit_code"], 2)
+        self.assertIn("invalid choice", response["output"])
+
+        response = send_request({"command": "unknown"}, self.socket_path)
+        self.assertIn("error", response)
+
+        # The daemon keeps serving after a failed request
+        self.assertIsNotNone(ping(self.socket_path))
+
+    def test_fallback_without_daemon(self) -> None:
+        """Test that the client generates in-process when no daemon is running."""
+        self.assertIsNone(send_request({"command": "ping"}, self.socket_path))
+
+        exit_code = generate(self.argv, self.socket_path)
+        self.assertEqual(exit_code, 0)
+        self.assertTrue((self.output_dir / "test_daemon_test.py").exists())
+
+    def _serve_once(self, delay: float, answer: bool) -> None:
+        """Serve one request on the socket from a background thread, answering after a delay or not at all."""
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.socket_path))
+        server.listen(1)
+        self.addCleanup(server.close)
+
+        def serve() -> None:
+            connection, _ = server.accept()
+            with connection, connection.makefile("rb") as stream:
+                daemon._read_message(stream)
+                time.sleep(delay)
+                if answer:
+                    daemon._send_message(connection, {"exit_code": 0, "output": ""})
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+
+    def test_slow_daemon_is_waited_for(self) -> None:
+        """Test that a generation running past the connect timeout is waited for, not repeated in-process."""
+        self._serve_once(delay=0.5, answer=True)
+        self.assertEqual(generate(self.argv, self.socket_path, timeout=0.1), 0)
+        self.assertFalse((self.output_dir / "test_daemon_test.py").exists())
+
+    def test_no_fallback_after_request_is_sent(self) -> None:
+        """Test that a daemon failing mid-request is reported instead of generating in-process."""
+        self._serve_once(delay=0.0, answer=False)
+        self.assertEqual(generate(self.argv, self.socket_path), 1)
+        self.assertFalse((self.output_dir / "test_daemon_test.py").exists())
+
+    def test_shutdown_removes_socket(self) -> None:
+        """Test that the stop command shuts the daemon down and removes its socket."""
+        self._start_daemon()
+        self.assertEqual(daemon.main(["--socket", str(self.socket_path), "stop"]), 0)
+
+        deadline = time.monotonic() + 5
+        while self.socket_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(self.socket_path.exists())
+        self.assertIsNone(ping(self.socket_path))
+
+    def test_stale_socket_is_replaced(self) -> None:
+        """Test that a socket file left by a dead daemon does not block a new one."""
+        self.socket_path.touch()
+        self._start_daemon()
+        self.assertIsNotNone(ping(self.socket_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for combinatorial expansion of parametrized cases.
+"""
+import contextlib
+import io
+import itertools
+import json
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+
+# Adjust the import path to properly import the expansion module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from cli import CLI
+from configs import Configs
+from expansion import CaseExpansion, control_sweeps, covering_array, expand_cases
+from generator import TestFileParameters, TestGenerator
+from tests.helpers import sweep_spec
+
+
+def _uncovered(rows: list, sizes: list, strength: int) -> list:
+    """Every combination of values of strength parameters that no row contains."""
+    missing = []
+    for columns in itertools.combinations(range(len(sizes)), strength):
+        seen = {tuple(row[column] for column in columns) for row in rows}
+        for values in itertools.product(*(range(sizes[column]) for column in columns)):
+            if values not in seen:
+                missing.append((columns, values))
+    return missing
+
+
+class TestCoveringArray(unittest.TestCase):
+    """Test case for covering_array()."""
+
+    def test_pairwise_covers_every_pair(self) -> None:
+        """Test that a pairwise array covers every pair of values and is much smaller than the product."""
+        for sizes in ([2, 2, 2], [3, 4, 2, 5], [5, 4, 4, 4, 4, 4, 4], [2] * 12):
+            rows = covering_array(sizes, 2)
+            self.assertEqual(_uncovered(rows, sizes, 2), [], sizes)
+            self.assertTrue(all(0 <= row[i] < size for row in rows for i, size in enumerate(sizes)))
+
+        rows = covering_array([5, 4, 4, 4, 4, 4, 4], 2)
+        self.assertLessEqual(len(rows), 40)
+
+    def test_t_wise(self) -> None:
+        """Test strength 3, and that a strength of at least the parameter count gives the product."""
+        sizes = [3, 2, 3, 2, 2]
+        rows = covering_array(sizes, 3)
+        self.assertEqual(_uncovered(rows, sizes, 3), [])
+        self.assertLess(len(rows), 72)
+
+        self.assertEqual(sorted(covering_array([2, 3], 2)), list(itertools.product(range(2), range(3))))
+        self.assertEqual(covering_array([3, 0, 2], 2), [])
+
+
+class TestCaseExpansion(unittest.TestCase):
+    """Test case for expanding cases over swept control variables."""
+
+    def _params(self, spec: dict) -> TestFileParameters:
+        """Parse a spec."""
+        return TestFileParameters(spec)
+
+    def test_cartesian_is_lazy(self) -> None:
+        """Test that the cartesian product is counted without being built, and iterated on demand."""
+        params = self._params(sweep_spec(10, 6, 10))
+        cases = expand_cases(
+            params.parameter_cases, params.independent_variable, params.dependent_variable,
+            control_sweeps(params.control_variables), "cartesian"
+        )
+        self.assertIsInstance(cases, CaseExpansion)
+        self.assertEqual(len(cases), 10_000_000)
+
+        first = list(itertools.islice(cases, 3))
+        self.assertEqual([case.id for case in first], ["0-k0v0-k1v0-k2v0-k3v0-k4v0-k5v0", "0-k0v0-k1v0-k2v0-k3v0-k4v0-k5v1",
+                                                       "0-k0v0-k1v0-k2v0-k3v0-k4v0-k5v2"])
+        self.assertEqual(first[2].controls, ("'v0'",) * 5 + ("'v2'",))
+        self.assertEqual(first[2].sources, ["0", "0"] + ["'v0'"] * 5 + ["'v2'"])
+
+    def test_covering_mode(self) -> None:
+        """Test that covering mode hits every pair and can be iterated more than once."""
+        params = self._params(sweep_spec(4, 5, 3))
+        cases = expand_cases(
+            params.parameter_cases, params.independent_variable, params.dependent_variable,
+            control_sweeps(params.control_variables), "covering"
+        )
+        self.assertEqual(cases.cartesian_count, 4 * 3 ** 5)
+        self.assertLess(len(cases), 30)
+        self.assertEqual(len(list(cases)), len(list(cases)))
+        self.assertEqual(_uncovered(cases.rows, cases.sizes, 2), [])
+
+    def test_no_expansion(self) -> None:
+        """Test that cases are unchanged without a mode or swept control variables, and a base case otherwise."""
+        params = self._params(sweep_spec(3, 2, 2))
+        args = (params.parameter_cases, params.independent_variable, params.dependent_variable)
+        self.assertIs(expand_cases(*args, control_sweeps(params.control_variables), "none"), params.parameter_cases)
+        self.assertIs(expand_cases(*args, [], "cartesian"), params.parameter_cases)
+
+        spec = sweep_spec(0, 2, 2)
+        spec["test_file_parameters"]["independent_variable"]["value"] = 7
+        params = self._params(spec)
+        cases = list(expand_cases(
+            params.parameter_cases, params.independent_variable, params.dependent_variable,
+            control_sweeps(params.control_variables), "cartesian"
+        ))
+        self.assertEqual(len(cases), 4)
+        self.assertEqual((cases[0].id, cases[0].input), ("base-k0v0-k1v0", 7))
+
+
+class TestExpansionGeneration(unittest.TestCase):
+    """Test case for generating, counting and capping expanded tests."""
+
+    def setUp(self) -> None:
+        """Create a spec and an output directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.work_path = Path(self.temp_dir.name)
+        self.spec_path = self.work_path / "sweep.json"
+        self.spec_path.write_text(json.dumps(sweep_spec(3, 4, 3)))
+
+    def tearDown(self) -> None:
+        """Clean up the working directory."""
+        self.temp_dir.cleanup()
+
+    def _config(self, **overrides) -> Configs:
+        """Build the configuration for the spec."""
+        config = {
+            "name": "sweep", "description": "Sweep", "json_file_path": self.spec_path,
+            "output_dir": self.work_path, "harness": "pytest"
+        }
+        config.update(overrides)
+        return Configs.model_validate(config)
+
+    def test_render_swept_controls(self) -> None:
+        """Test that swept control variables become test arguments for both harnesses and in a table."""
+        content = TestGenerator(self._config(expansion="cartesian")).generate_test_file()
+        self.assertIn('"number, doubled_number, knob_0, knob_1, knob_2, knob_3"', content)
+        self.assertEqual(content.count("pytest.param("), 3 * 3 ** 4)
+        self.assertNotIn("knob_0 = None", content)
+
+        content = TestGenerator(self._config(expansion="covering", harness="unittest")).generate_test_file()
+        self.assertIn("for case_id, number, doubled_number, knob_0, knob_1, knob_2, knob_3 in test_cases:", content)
+
+        output = TestGenerator(self._config(expansion="covering", parameter_table="jsonl")).generate_to_file()
+        rows = [json.loads(line) for line in output.with_name("test_sweep.cases.jsonl").read_text().splitlines()]
+        self.assertEqual(len(rows[0]["controls"]), 4)
+        self.assertIn('*case["controls"]', output.read_text())
+
+    def test_cap_and_count(self) -> None:
+        """Test that the cap fails generation and that counting reports both modes."""
+        with self.assertRaisesRegex(ValueError, "243 cases, more than the cap of 100"):
+            TestGenerator(self._config(expansion="cartesian", max_cases=100)).generate_test_file()
+
+        count = TestGenerator(self._config(expansion="covering", max_cases=100)).count_cases()
+        self.assertEqual(count.cartesian, 243)
+        self.assertLess(count.cases, 100)
+        self.assertFalse(count.over_cap)
+
+    def test_cli_dry_run(self) -> None:
+        """Test that --dry-run reports the case counts and writes nothing."""
+        cli = CLI()
+        args = cli.parse_args([
+            "--name", "sweep", "--description", "Sweep", "--test_parameter_json", str(self.spec_path),
+            "--output_dir", str(self.work_path / "out"), "--expand", "cartesian", "--max-cases", "100", "--dry-run"
+        ])
+        self.assertTrue(cli.validate_config(args))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), self.assertLogs("test_generator", level="ERROR"):
+            exit_code = cli.run()
+        self.assertEqual(exit_code, 1)
+        self.assertIn("sweep: 243 cases (cartesian) - exceeds the cap of 100", output.getvalue())
+        self.assertEqual(list((self.work_path / "out").iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for composing specs from shared fragment files.
+"""
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Adjust the import path to properly import the fragments module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from bulk import BulkGenerator, discover_jobs
+from configs import Configs
+from fragments import FragmentResolver
+from generator import TestFileParameters, TestGenerator
+from render_cache import MANIFEST_FILE_NAME, RenderCache
+from spec_schema import prevalidate_spec
+from tests.helpers import sample_spec
+from watch import WatchSession
+
+
+def _control_variable(name: str) -> dict:
+    """A control variable with the given name."""
+    return {"name": name, "description": f"{name} setting", "statistical_type": "discrete", "unit": "count", "value": 4}
+
+
+class _FragmentTree(unittest.TestCase):
+    """Base test case writing a spec tree whose specs share fragments."""
+
+    def setUp(self) -> None:
+        """Write a base spec, shared fragments and specs composed from them."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.specs = self.root / "specs"
+        self.shared = self.root / "shared"
+        self.specs.mkdir()
+        self.shared.mkdir()
+
+        base = sample_spec("Base")
+        base["test_file_parameters"]["imports"] = [{"$ref": "imports.json"}]
+        self._write(self.shared / "base.json", base)
+        self._write(self.shared / "imports.json", [{"name": "os"}, {"name": "json", "import_funcs": ["loads"]}])
+        self._write(self.shared / "controls.json", {"pool": [_control_variable("Pool Size")]})
+        self._write(self.shared / "background.json", {"orientation": "Shared", "purpose": "Shared purpose"})
+
+        for name in ("alpha", "beta"):
+            self._write(self.specs / f"{name}.json", {"test_file_parameters": {
+                "extends": "../shared/base.json",
+                "test_title": name.title(),
+                "background": {"$ref": "../shared/background.json"},
+                "control_variables": [{"$ref": "../shared/controls.json#/pool"}, _control_variable(f"{name} Only")],
+            }})
+        self._write(self.specs / "plain.json", sample_spec("Plain"))
+
+    def tearDown(self) -> None:
+        """Clean up the spec tree."""
+        self.temp_dir.cleanup()
+
+    @staticmethod
+    def _write(path: Path, data) -> None:
+        """Write JSON to a file."""
+        path.write_text(json.dumps(data))
+
+    def _touch_later(self, path: Path, data) -> None:
+        """Rewrite a file so that its modification time is certain to change."""
+        stat = path.stat()
+        self._write(path, data)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def _generate(self, name: str, resolver: FragmentResolver) -> TestGenerator:
+        """Generate the test for one spec."""
+        config = Configs.model_validate({
+            "name": name, "description": name, "json_file_path": self.specs / f"{name}.json", "output_dir": self.root
+        })
+        generator = TestGenerator(config, fragment_resolver=resolver)
+        generator.generate_test_file()
+        return generator
+
+    def _parse(self, name: str, resolver: FragmentResolver) -> TestFileParameters:
+        """Parse one spec into its validated models, which generators do not keep."""
+        config = Configs.model_validate({
+            "name": name, "description": name, "json_file_path": self.specs / f"{name}.json", "output_dir": self.root
+        })
+        generator = TestGenerator(config, fragment_resolver=resolver)
+        return generator._parse_test_parameters_json(generator._load_json_bytes())
+
+
+class TestFragments(_FragmentTree):
+    """Test case for resolving and caching fragments."""
+
+    def test_composed_spec_matches_written_out_spec(self) -> None:
+        """Test that a composed spec renders the same as the same spec written out in full."""
+        resolver = FragmentResolver()
+        composed = self._generate("alpha", resolver).test_file_params
+
+        written = sample_spec("Alpha")
+        params = written["test_file_parameters"]
+        params["background"] = {"orientation": "Shared", "purpose": "Shared purpose"}
+        params["imports"] = [{"name": "os"}, {"name": "json", "import_funcs": ["loads"]}]
+        params["control_variables"] = [_control_variable("Pool Size"), _control_variable("alpha Only")]
+        self._write(self.specs / "written.json", written)
+        self.assertEqual(self._generate("written", resolver).test_file_params.ir, composed.ir)
+
+        for debug_path in (True, False):
+            config = Configs.model_validate({
+                "name": "alpha", "description": "alpha", "json_file_path": self.specs / "alpha.json",
+                "output_dir": self.root, "debug": debug_path
+            })
+            generator = TestGenerator(config, fragment_resolver=FragmentResolver())
+            generator.generate_test_file()
+            self.assertEqual(generator.test_file_params.ir, composed.ir)
+
+    def test_fragments_parsed_and_validated_once(self) -> None:
+        """Test that specs sharing fragments share one parse and one validation of them."""
+        resolver = FragmentResolver()
+        with patch("fragments.json.loads", wraps=json.loads) as parse:
+            alpha = self._parse("alpha", resolver)
+            beta = self._parse("beta", resolver)
+        # alpha.json, beta.json (checked for fragments) and four fragment files
+        parsed = [call.args[0] for call in parse.call_args_list if isinstance(call.args[0], bytes)]
+        self.assertEqual(len(parsed), 6)
+        self.assertIs(alpha.control_variables[0], beta.control_variables[0])
+        self.assertIs(alpha.independent_variable, beta.independent_variable)
+        self.assertIs(alpha.imports[0], beta.imports[0])
+        self.assertEqual([variable.name for variable in beta.control_variables], ["Pool Size", "beta Only"])
+
+        # A changed fragment is parsed and validated again
+        self._touch_later(self.shared / "controls.json", {"pool": [_control_variable("Thread Count")]})
+        gamma = self._parse("alpha", resolver)
+        self.assertEqual(gamma.control_variables[0].name, "Thread Count")
+        self.assertIs(gamma.independent_variable, alpha.independent_variable)
+
+    def test_dependencies(self) -> None:
+        """Test that a composed spec records every file it includes, and plain specs none."""
+        resolver = FragmentResolver()
+        composed = resolver.compose_json((self.specs / "alpha.json").read_bytes(), self.specs / "alpha.json")
+        self.assertEqual(
+            sorted(path.name for path in composed.dependencies),
+            ["background.json", "base.json", "controls.json", "imports.json"]
+        )
+        self.assertIsNone(resolver.compose_json((self.specs / "plain.json").read_bytes(), self.specs / "plain.json"))
+
+        before = composed.digest
+        self._touch_later(self.shared / "imports.json", [{"name": "sys"}])
+        self.assertNotEqual(resolver.compose_json((self.specs / "alpha.json").read_bytes(), self.specs / "alpha.json").digest, before)
+
+    def test_reference_errors(self) -> None:
+        """Test that cycles, missing files, bad pointers and malformed references are reported."""
+        resolver = FragmentResolver()
+        self._write(self.shared / "loop_a.json", {"$ref": "loop_b.json"})
+        self._write(self.shared / "loop_b.json", {"$ref": "loop_a.json"})
+        cases = {
+            "cycle": ({"$ref": "../shared/loop_a.json"}, "reference cycle"),
+            "missing": ({"$ref": "../shared/missing.json"}, "Cannot read fragment"),
+            "pointer": ({"$ref": "../shared/controls.json#/nothing"}, "points to nothing"),
+            "extra_keys": ({"$ref": "../shared/background.json", "purpose": "Other"}, "no other keys"),
+        }
+        for name, (background, message) in cases.items():
+            with self.subTest(name=name):
+                document = {"test_file_parameters": {"extends": "../shared/base.json", "background": background}}
+                with self.assertRaisesRegex(ValueError, message):
+                    resolver.compose(document, self.specs / f"{name}.json")
+
+    def test_prevalidation_sees_composed_spec(self) -> None:
+        """Test that pre-validation checks the spec as composed from its fragments."""
+        self.assertEqual(prevalidate_spec((self.specs / "alpha.json").read_bytes(), self.specs / "alpha.json"), [])
+        self._touch_later(self.shared / "controls.json", {"pool": {"not": "a list"}})
+        self.assertEqual(prevalidate_spec((self.specs / "alpha.json").read_bytes(), self.specs / "alpha.json"), [])
+        self._touch_later(self.shared / "base.json", {"test_file_parameters": {"test_title": "No Variables"}})
+        errors = prevalidate_spec((self.specs / "alpha.json").read_bytes(), self.specs / "alpha.json")
+        self.assertIn("/test_file_parameters/independent_variable", [error.pointer for error in errors])
+
+
+class TestFragmentInvalidation(_FragmentTree):
+    """Test case for regenerating exactly the specs that include a changed fragment."""
+
+    def _incremental_run(self) -> list:
+        """Run an incremental bulk generation and return which jobs were skipped."""
+        bulk_generator = BulkGenerator({"output_dir": str(self.root / "out")})
+        render_cache = RenderCache(self.root / "out" / MANIFEST_FILE_NAME, bulk_generator.template_engine, bulk_generator.fragment_resolver)
+        jobs = discover_jobs(spec_dir=str(self.specs))
+        to_run, slots, pending_keys = render_cache.partition(jobs, bulk_generator.build_config)
+        summary = render_cache.merge(slots, bulk_generator.run(to_run), pending_keys)
+        render_cache.save()
+        self.assertFalse(summary.failed)
+        return [(result.name, result.skipped) for result in summary.results]
+
+    def test_incremental_run(self) -> None:
+        """Test that editing a fragment regenerates only the specs that include it."""
+        self._incremental_run()
+        self._touch_later(self.shared / "background.json", {"orientation": "Changed"})
+        self.assertEqual(self._incremental_run(), [("alpha", False), ("beta", False), ("plain", True)])
+        self.assertEqual(self._incremental_run(), [("alpha", True), ("beta", True), ("plain", True)])
+
+    def test_watch_affects_including_specs(self) -> None:
+        """Test that watch mode maps a fragment change to the jobs whose specs include it."""
+        bulk_generator = BulkGenerator({"output_dir": str(self.root / "out")})
+        session = WatchSession(
+            bulk_generator, lambda: discover_jobs(spec_dir=str(self.specs)), [(self.specs, False)],
+            template_dirs=[], poll_interval=0.01
+        )
+        try:
+            self.assertEqual(
+                [job.display_name for job in session.affected_jobs({(self.shared / "imports.json").resolve()})],
+                ["alpha", "beta"]
+            )
+
+            # beta stops including the shared controls
+            self._write(self.specs / "beta.json", {"test_file_parameters": {"extends": "../shared/base.json"}})
+            session.affected_jobs({(self.specs / "beta.json").resolve()})
+            self.assertEqual(
+                [job.display_name for job in session.affected_jobs({(self.shared / "controls.json").resolve()})],
+                ["alpha"]
+            )
+        finally:
+            session.watcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,6 +21,7 @@ from configs import Configs
 from generator import TestGenerator, TestFileParameters
 from schemas.statistical_type import StatisticalType
 from schemas.variable import Variable
+from tests.helpers import sample_spec
 
 
 
@@ -261,14 +262,14 @@ class TestTestGenerator(unittest.TestCase):
         self.assertEqual(result, "Rendered template")
         mock_template.render.assert_called_once()
 
-    @patch('generator.TestGenerator._load_json_file')
-    @patch('generator.TestGenerator._parse_test_parameters')
+    @patch('generator.TestGenerator._load_json_bytes')
+    @patch('generator.TestGenerator._parse_test_parameters_json')
     @patch('generator.TestGenerator._get_template')
     @patch('generator.TestGenerator._render_template')
     def test_generate_test_file(self, mock_render, mock_get_template, mock_parse, mock_load) -> None:
         """Test generating test file."""
         # Set up mocks
-        mock_load.return_value = {"test_file_parameters": {}}
+        mock_load.return_value = b'{"test_file_parameters": {}}'
         mock_params = MagicMock()
         mock_parse.return_value = mock_params
         mock_template = MagicMock()
@@ -306,6 +307,40 @@ class TestTestGenerator(unittest.TestCase):
             read_content = f.read()
             self.assertEqual(read_content, content)
 
+    def test_generate_to_file(self) -> None:
+        """Test streaming the rendered template straight to the output file."""
+        file_path = self.generator.generate_to_file(sample_spec("Test Title"))
+
+        self.assertEqual(file_path, self.generator.output_path)
+        content = file_path.read_text()
+        self.assertIn("class TestTestName(unittest.TestCase):", content)
+        self.assertNotIn("{{timestamp}}", content)
+
+        # Only the finished file is left behind, no temporary file
+        self.assertEqual(os.listdir(self.temp_dir.name), [file_path.name])
+
+    @patch('generator.datetime')
+    def test_generate_to_file_matches_generate_test_file(self, mock_datetime) -> None:
+        """Test that the streamed output is identical to the in-memory render."""
+        mock_datetime.now.return_value.strftime.return_value = "2025-01-01 00:00:00"
+        expected = self.generator.generate_test_file(sample_spec("Test Title"))
+        file_path = self.generator.generate_to_file(sample_spec("Test Title"))
+        self.assertEqual(file_path.read_text(), expected)
+
+    def test_generate_to_file_failure_keeps_existing_output(self) -> None:
+        """Test that a failed render leaves an existing output file untouched."""
+        output_path = self.generator.output_path
+        output_path.write_text("previous content")
+
+        template = MagicMock()
+        template.generate.side_effect = RuntimeError("render failed")
+        with patch.object(self.generator, "_get_template", return_value=template):
+            with self.assertRaises(RuntimeError):
+                self.generator.generate_to_file(sample_spec("Test Title"))
+
+        self.assertEqual(output_path.read_text(), "previous content")
+        self.assertEqual(os.listdir(self.temp_dir.name), [output_path.name])
+
 
 if __name__ == "__main__":
     unittest.main()
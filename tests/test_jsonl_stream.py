@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for generating tests from a JSONL stream.
+"""
+import io
+import json
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Adjust the import path to properly import the jsonl_stream module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from bulk import BulkGenerator
+from cli import CLI
+from jsonl_stream import generate_from_stream, iter_jsonl, split_line
+from tests.helpers import sample_spec
+
+
+class TestJsonlStream(unittest.TestCase):
+    """Test case for JSONL stream generation."""
+
+    def setUp(self) -> None:
+        """Create an output directory and a small stream of specs."""
+        self.output_dir = tempfile.TemporaryDirectory()
+        lines = [
+            json.dumps(sample_spec("First Spec")),
+            "",
+            "{not json",
+            json.dumps({"name": "Named Spec", "harness": "pytest", **sample_spec("Ignored Title")}),
+            json.dumps({"test_file_parameters": {"test_title": "Missing Fields"}}),
+            json.dumps(sample_spec("Last Spec")["test_file_parameters"]),
+        ]
+        self.stream_text = "\n".join(lines) + "\n"
+
+    def tearDown(self) -> None:
+        """Clean up the output directory."""
+        self.output_dir.cleanup()
+
+    def test_iter_jsonl_reports_line_numbers(self) -> None:
+        """Test that invalid lines are reported with their line numbers and blank lines skipped."""
+        lines = list(iter_jsonl(io.StringIO(self.stream_text)))
+
+        self.assertEqual([line_number for line_number, _, _ in lines], [1, 3, 4, 5, 6])
+        self.assertIsNone(lines[1][1])
+        self.assertIn("Invalid JSON", lines[1][2])
+
+    def test_split_line_separates_job_keys(self) -> None:
+        """Test that job keys are pulled out and bare parameter objects are wrapped."""
+        job, json_data = split_line({"name": "Named", "harness": "pytest", "test_title": "Title"}, 7)
+
+        self.assertEqual(job.name, "Named")
+        self.assertEqual(job.harness, "pytest")
+        self.assertEqual(json_data, {"test_file_parameters": {"test_title": "Title"}})
+
+    def test_split_line_default_name(self) -> None:
+        """Test that the test title, or else the line number, names the test."""
+        job, _ = split_line({"test_file_parameters": {"test_title": "From Title"}}, 3)
+        self.assertEqual(job.name, "From Title")
+
+        job, _ = split_line({"test_file_parameters": {"test_title": {"test_title": "x"}}}, 3)
+        self.assertEqual(job.name, "line_3")
+
+    def test_generate_from_stream(self) -> None:
+        """Test that good lines generate files and bad lines are counted without aborting."""
+        bulk_generator = BulkGenerator({"output_dir": self.output_dir.name, "harness": "unittest"})
+        summary = generate_from_stream(io.StringIO(self.stream_text), bulk_generator, Path("specs.jsonl"))
+
+        self.assertEqual(summary.succeeded, 3)
+        self.assertEqual(summary.failed, 2)
+        self.assertEqual([failure.line_number for failure in summary.failures], [3, 5])
+        self.assertEqual(summary.failures[0].source, "specs.jsonl:3")
+
+        output_dir = Path(self.output_dir.name)
+        self.assertTrue((output_dir / "test_first_spec.py").exists())
+        self.assertIn("import pytest", (output_dir / "test_named_spec.py").read_text())
+        self.assertTrue((output_dir / "test_last_spec.py").exists())
+
+    def test_cli_reads_stdin(self) -> None:
+        """Test that --jsonl - reads specs from stdin."""
+        cli = CLI()
+        args_dict = cli.parse_args(["--jsonl", "-", "--output_dir", self.output_dir.name])
+        self.assertTrue(cli.validate_config(args_dict))
+
+        with patch("sys.stdin", io.StringIO(json.dumps(sample_spec("Stdin Spec")) + "\n")):
+            self.assertEqual(cli.run(), 0)
+
+        self.assertTrue((Path(self.output_dir.name) / "test_stdin_spec.py").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
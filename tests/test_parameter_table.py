@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for parameter tables of parametrized tests.
+"""
+import importlib.util
+import json
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Adjust the import path to properly import the parameter_table module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from configs import Configs
+from generator import TestFileParameters, TestGenerator
+from parameter_table import build_parameter_cases
+from schemas.variable import Variable
+from tests.helpers import parametrized_spec, spec_with_ids
+
+
+def _import_module(path: Path):
+    """Import a generated test file."""
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestParameterJoin(unittest.TestCase):
+    """Test case for joining values to expected values by case id."""
+
+    def test_join_by_id(self) -> None:
+        """Test that expected values are matched by id, whatever their order."""
+        params = TestFileParameters(spec_with_ids(["a", "b", "c"], ["c", "a", "b"]))
+        self.assertEqual(
+            [(case.id, case.input, case.expected) for case in params.parameter_cases],
+            [("a", '"a"', '"A"'), ("b", '"b"', '"B"'), ("c", '"c"', '"C"')]
+        )
+
+    def test_join_reports_missing_and_duplicate_ids(self) -> None:
+        """Test that every id problem is reported, by both parsing paths."""
+        spec = spec_with_ids(["a", "b", "b", "c"], ["a", "a", "b", "d"])
+        for parse in (TestFileParameters, lambda data: TestFileParameters.from_json(json.dumps(data))):
+            params = parse(spec)
+            with self.assertRaises(ValueError) as context, self.assertLogs("test_generator", level="ERROR"):
+                params.parameter_cases
+            message = str(context.exception)
+            self.assertIn("1 duplicate value ids ('b')", message)
+            self.assertIn("1 duplicate expected value ids ('a')", message)
+            self.assertIn("1 values without an expected value ('c')", message)
+            self.assertIn("1 expected values without a value ('d')", message)
+
+    def test_values_without_ids(self) -> None:
+        """Test that ids must be given for every value once any has one."""
+        spec = spec_with_ids(["a", "b"], ["a", "b"])
+        del spec["test_file_parameters"]["independent_variable"]["values"][1]["id"]
+        with self.assertRaisesRegex(ValueError, "without an id at index '1'"), self.assertLogs("test_generator"):
+            TestFileParameters(spec).parameter_cases
+
+        spec = spec_with_ids(["a", "b"], ["a", "b"])
+        del spec["test_file_parameters"]["dependent_variable"]["expected_value"]["values"][0]["id"]
+        with self.assertRaisesRegex(ValueError, "Expected values without an id at index '0'"), self.assertLogs("test_generator"):
+            TestFileParameters(spec).parameter_cases
+
+    def test_ids_on_one_side(self) -> None:
+        """Test that expected values with ids are not paired by position with values that have none."""
+        spec = spec_with_ids(["a", "b"], ["b", "a"])
+        for value in spec["test_file_parameters"]["independent_variable"]["values"]:
+            del value["id"]
+        with self.assertRaisesRegex(ValueError, "Expected values have ids but parameter values do not"), \
+                self.assertLogs("test_generator"):
+            TestFileParameters(spec).parameter_cases
+
+    def test_generation_fails_on_unmatched_ids(self) -> None:
+        """Test that a spec whose ids do not join fails to generate."""
+        with tempfile.TemporaryDirectory() as output_dir:
+            config = Configs.model_validate({"name": "unmatched", "description": "Unmatched ids", "output_dir": output_dir})
+            with self.assertRaisesRegex(ValueError, "do not join by id"), self.assertLogs("test_generator"):
+                TestGenerator(config).generate_to_file(spec_with_ids(["a"], ["b"]))
+            self.assertEqual(list(Path(output_dir).iterdir()), [])
+
+    def test_example_spec(self) -> None:
+        """Test the shipped example, which joins by id and gives expected values as "value"."""
+        example = Path(__file__).parent.parent / "example_templates" / "parametrized_test.json"
+        params = TestFileParameters.from_json(example.read_bytes())
+        self.assertEqual(len(params.parameter_cases), 7)
+        self.assertEqual(params.parameter_cases[3].id, "mixed_case")
+        self.assertEqual(params.parameter_cases[3].expected, '"Hello world"')
+
+
+class TestParameterTable(unittest.TestCase):
+    """Test case for inlined and sidecar parameter tables."""
+
+    def setUp(self) -> None:
+        """Create an output directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.temp_dir.name)
+
+    def tearDown(self) -> None:
+        """Clean up the output directory."""
+        self.temp_dir.cleanup()
+
+    def _generate(self, spec: dict, harness: str, parameter_table: str) -> Path:
+        """Generate a test file from a spec."""
+        config = Configs.model_validate({
+            "name": f"doubling {harness} {parameter_table}",
+            "description": "Doubling test",
+            "output_dir": self.output_dir,
+            "harness": harness,
+            "parameter_table": parameter_table
+        })
+        return TestGenerator(config).generate_to_file(spec)
+
+    def test_build_parameter_cases(self) -> None:
+        """Test pairing values with expected values, and a single expected value for all."""
+        params = parametrized_spec(3)["test_file_parameters"]
+        independent = Variable.model_validate(params["independent_variable"])
+        dependent = Variable.model_validate(params["dependent_variable"])
+
+        cases = build_parameter_cases(independent, dependent)
+        self.assertEqual([(case.id, case.input, case.expected) for case in cases], [("0", 0, 0), ("1", 1, 2), ("2", 2, 4)])
+
+        dependent.expected_value.values = None
+        dependent.expected_value.value = "ValueError"
+        self.assertEqual({case.expected_source for case in build_parameter_cases(independent, dependent)}, {"ValueError"})
+
+    def test_inline_cases(self) -> None:
+        """Test that inlined cases are rendered into the test file for both harnesses."""
+        pytest_file = self._generate(parametrized_spec(3), "pytest", "inline")
+        content = pytest_file.read_text()
+        self.assertIn('@pytest.mark.parametrize("number, doubled_number", [', content)
+        self.assertIn('pytest.param(2, 4, id="2"),', content)
+
+        unittest_file = self._generate(parametrized_spec(3), "unittest", "inline")
+        content = unittest_file.read_text()
+        self.assertIn('("2", 2, 4),', content)
+        self.assertIn("with self.subTest(case_id, number=number, doubled_number=doubled_number):", content)
+        self.assertEqual(list(self.output_dir.glob("*.cases.*")), [])
+
+    def test_jsonl_sidecar(self) -> None:
+        """Test that a JSON lines table is written and loaded by the generated test."""
+        test_file = self._generate(parametrized_spec(1000), "pytest", "jsonl")
+        table = test_file.with_name(f"{test_file.stem}.cases.jsonl")
+
+        self.assertTrue(table.exists())
+        self.assertNotIn("pytest.param(999", test_file.read_text())
+        self.assertEqual(json.loads(table.read_text().splitlines()[999]), {"id": "999", "input": 999, "expected": 1998})
+
+        cases = _import_module(test_file).load_parameter_cases()
+        self.assertEqual(len(cases), 1000)
+        self.assertEqual((cases[5].id, cases[5].values), ("5", (5, 10)))
+
+    def test_unittest_sidecar(self) -> None:
+        """Test that the unittest template loads the table when the test runs."""
+        test_file = self._generate(parametrized_spec(3), "unittest", "jsonl")
+        self.assertIn("test_cases = load_parameter_cases()", test_file.read_text())
+        self.assertEqual(_import_module(test_file).load_parameter_cases()[2], ("2", 2, 4))
+
+    def test_npy_sidecar(self) -> None:
+        """Test a .npy table for numeric variables, and JSON lines when it cannot be used."""
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            numpy = None
+
+        if numpy is not None:
+            test_file = self._generate(parametrized_spec(3, "continuous"), "pytest", "npy")
+            self.assertTrue(test_file.with_name(f"{test_file.stem}.cases.npy").exists())
+            cases = _import_module(test_file).load_parameter_cases()
+            self.assertEqual((cases[2].id, cases[2].values), ("2", (2, 4)))
+
+        # Nominal variables never go in a .npy table
+        test_file = self._generate(parametrized_spec(3, "nominal"), "pytest", "npy")
+        self.assertTrue(test_file.with_name(f"{test_file.stem}.cases.jsonl").exists())
+
+        with patch("parameter_table._numpy", return_value=None):
+            test_file = self._generate(parametrized_spec(3, "continuous"), "unittest", "npy")
+        self.assertTrue(test_file.with_name(f"{test_file.stem}.cases.jsonl").exists())
+        self.assertFalse(test_file.with_name(f"{test_file.stem}.cases.npy").exists())
+
+    def test_non_literal_values_are_inlined(self) -> None:
+        """Test that cases which are not Python literals fall back to inlining."""
+        spec = parametrized_spec(2)
+        spec["test_file_parameters"]["dependent_variable"]["expected_value"]["values"][1]["expected"] = "ValueError"
+
+        with self.assertLogs("test_generator", level="WARNING"):
+            test_file = self._generate(spec, "pytest", "jsonl")
+        self.assertIn("pytest.param(1, ValueError, id=\"1\"),", test_file.read_text())
+        self.assertEqual(list(self.output_dir.glob("*.cases.*")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
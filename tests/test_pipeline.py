@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the staged generation pipeline.
+"""
+import json
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Adjust the import path to properly import the pipeline module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from bulk import BulkJob, discover_jobs
+from cli import CLI
+from pipeline import GenerationPipeline
+from tests.helpers import sample_spec
+
+
+class TestGenerationPipeline(unittest.TestCase):
+    """Test case for the GenerationPipeline class."""
+
+    def setUp(self) -> None:
+        """Create a directory of specs and an output directory."""
+        self.spec_dir = tempfile.TemporaryDirectory()
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.names = [f"spec_{i:02d}" for i in range(12)]
+        for name in self.names:
+            spec_path = Path(self.spec_dir.name) / f"{name}.json"
+            spec_path.write_text(json.dumps(sample_spec(name)))
+        (Path(self.spec_dir.name) / "spec_zz_broken.json").write_text("{not json")
+
+    def tearDown(self) -> None:
+        """Clean up temporary directories."""
+        self.spec_dir.cleanup()
+        self.output_dir.cleanup()
+
+    def test_pipeline_generates_every_spec_in_order(self) -> None:
+        """Test that a small queue still carries every spec through, in job order."""
+        pipeline = GenerationPipeline(
+            {"output_dir": self.output_dir.name, "harness": "pytest"},
+            workers=2,
+            queue_size=2,
+            io_threads=2
+        )
+        summary = pipeline.run(discover_jobs(spec_dir=self.spec_dir.name))
+
+        self.assertEqual([r.name for r in summary.results], self.names + ["spec_zz_broken"])
+        self.assertEqual([r.name for r in summary.failed], ["spec_zz_broken"])
+        for name in self.names:
+            content = (Path(self.output_dir.name) / f"test_{name}.py").read_text()
+            self.assertIn(f"def test_{name}", content)
+
+    def test_pipeline_reports_unreadable_spec(self) -> None:
+        """Test that a load-stage error is reported for that spec only."""
+        pipeline = GenerationPipeline({"output_dir": self.output_dir.name}, workers=1, queue_size=1)
+        jobs = [
+            BulkJob(test_parameter_json=Path(self.spec_dir.name) / "missing.json"),
+            BulkJob(test_parameter_json=Path(self.spec_dir.name) / "spec_00.json")
+        ]
+
+        summary = pipeline.run(jobs)
+
+        self.assertEqual([r.name for r in summary.failed], ["missing"])
+        self.assertIn("FileNotFoundError", summary.failed[0].error)
+        self.assertEqual([r.name for r in summary.succeeded], ["spec_00"])
+
+    def test_pipeline_reports_bad_spec_bundle(self) -> None:
+        """Test that a path into a file that is not a spec bundle fails that spec without stalling the run."""
+        bundle = Path(self.spec_dir.name) / "bad.specbundle"
+        bundle.write_bytes(b"not a bundle")
+        pipeline = GenerationPipeline({"output_dir": self.output_dir.name}, workers=1, queue_size=1, io_threads=1)
+        jobs = [
+            BulkJob(test_parameter_json=bundle / "a.json"),
+            BulkJob(test_parameter_json=Path(self.spec_dir.name) / "spec_00.json")
+        ]
+
+        summary = pipeline.run(jobs)
+
+        self.assertEqual(len(summary.failed), 1)
+        self.assertIn("ValueError", summary.failed[0].error)
+        self.assertEqual([r.name for r in summary.succeeded], ["spec_00"])
+
+    def test_pipeline_reports_unfinished_specs(self) -> None:
+        """Test that specs left behind by a dead load thread still get a failed result, in job order."""
+        pipeline = GenerationPipeline({"output_dir": self.output_dir.name}, workers=1, queue_size=1, io_threads=1)
+        jobs = [BulkJob(test_parameter_json=Path(self.spec_dir.name) / f"{name}.json") for name in self.names[:3]]
+
+        # SystemExit is not an Exception, so it ends the only load thread after the first spec
+        with patch("pipeline.read_spec", side_effect=[jobs[0].test_parameter_json.read_bytes(), SystemExit]), \
+                patch("threading.excepthook") as excepthook:
+            summary = pipeline.run(jobs)
+        excepthook.assert_called_once()
+
+        self.assertEqual([r.name for r in summary.results], self.names[:3])
+        self.assertEqual([r.name for r in summary.succeeded], ["spec_00"])
+        self.assertTrue(all("Pipeline stopped" in r.error for r in summary.failed))
+
+    def test_cli_pipeline_mode(self) -> None:
+        """Test running the pipeline end to end through the CLI."""
+        cli = CLI()
+        args_dict = cli.parse_args([
+            "--spec-glob", str(Path(self.spec_dir.name) / "spec_0*.json"),
+            "--output_dir", self.output_dir.name,
+            "--pipeline",
+            "--jobs", "2",
+            "--queue-size", "4"
+        ])
+
+        self.assertTrue(cli.validate_config(args_dict))
+        self.assertEqual(cli.run(), 0)
+        self.assertTrue((Path(self.output_dir.name) / "test_spec_09.py").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
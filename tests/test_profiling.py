@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for profiling generation runs.
+"""
+import contextlib
+import cProfile
+import io
+import json
+from pathlib import Path
+import pstats
+import re
+import sys
+import tempfile
+import threading
+import unittest
+
+# Adjust the import path to properly import the profiling module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from cli import CLI
+from profiling import RunProfile, collapsed_stacks, profiled
+from tests.helpers import sample_spec
+
+
+def _inner() -> int:
+    return sum(range(20_000))
+
+
+def _outer() -> int:
+    return _inner() + _inner()
+
+
+def _functions(path: Path) -> dict:
+    """Number of calls of each function in a .pstats file, by function name."""
+    return {function[2]: entry[1] for function, entry in pstats.Stats(str(path)).stats.items()}
+
+
+class TestCollapsedStacks(unittest.TestCase):
+    """Test case for rebuilding call stacks from a profile."""
+
+    def test_stacks_follow_the_call_graph(self) -> None:
+        """Test that callees are nested under their callers and the stacks add up to the profiled time."""
+        profiler = cProfile.Profile()
+        with profiler:
+            for _ in range(20):
+                _outer()
+        stats = pstats.Stats(profiler)
+        stacks = collapsed_stacks(stats)
+
+        inner = [stack for stack in stacks if stack.endswith(f"_inner (test_profiling.py:{_inner.__code__.co_firstlineno})")]
+        self.assertEqual(len(inner), 1)
+        self.assertIn("_outer (test_profiling.py:", inner[0].split(";")[-2])
+        self.assertAlmostEqual(sum(stacks.values()), stats.total_tt, delta=stats.total_tt * 0.05)
+
+
+class TestRunProfile(unittest.TestCase):
+    """Test case for profiling runs across threads and processes."""
+
+    def setUp(self) -> None:
+        """Write a directory of specs."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.specs = self.root / "specs"
+        self.specs.mkdir()
+        for index in range(5):
+            (self.specs / f"spec_{index}.json").write_text(json.dumps(sample_spec(f"Spec {index}")))
+
+    def tearDown(self) -> None:
+        """Clean up."""
+        self.temp_dir.cleanup()
+
+    def _run(self, *args: str) -> str:
+        """Run the CLI and return what it printed."""
+        cli = CLI()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertTrue(cli.validate_config(cli.parse_args(list(args))))
+            self.assertEqual(cli.run(), 0)
+        return output.getvalue()
+
+    def test_merges_threads(self) -> None:
+        """Test that the profiles of other threads are merged in and their dumps removed."""
+        run_profile = RunProfile(self.root / "run.pstats")
+
+        def work() -> None:
+            with profiled(run_profile.worker_dir):
+                _outer()
+
+        with run_profile:
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        pstats_path, collapsed_path = run_profile.write()
+        self.assertEqual(_functions(pstats_path)["_inner"], 2)
+        self.assertTrue(collapsed_path.exists())
+        self.assertFalse(run_profile.worker_dir.exists())
+
+    def test_parallel_run(self) -> None:
+        """Test that a parallel bulk run merges the profiles of its worker processes."""
+        profile_path = self.root / "run.pstats"
+        printed = self._run(
+            "--spec-dir", str(self.specs), "--output_dir", str(self.root / "out"), "--jobs", "2",
+            "--profile", str(profile_path)
+        )
+        self.assertIn(f"Profile written to {profile_path}", printed)
+        functions = _functions(profile_path)
+        self.assertEqual(functions["run_job"], 5)
+        self.assertNotIn("parse_args", functions)
+
+        lines = profile_path.with_suffix(".collapsed").read_text().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(all(re.fullmatch(r"[^;]+(;[^;]+)* \d+", line) for line in lines))
+        self.assertTrue(any("run_job (bulk.py:" in line for line in lines))
+
+    def test_pipeline_run(self) -> None:
+        """Test that a pipeline run merges the profiles of its worker processes and I/O threads."""
+        profile_path = self.root / "run.pstats"
+        self._run(
+            "--spec-dir", str(self.specs), "--output_dir", str(self.root / "out"), "--pipeline", "--jobs", "2",
+            "--profile", str(profile_path)
+        )
+        functions = _functions(profile_path)
+        self.assertEqual(functions["render_job"], 5)
+        self.assertEqual(functions["read_spec"], 5)
+
+    def test_single_run(self) -> None:
+        """Test that a single spec run profiles generation but not argument parsing."""
+        profile_path = self.root / "profiles" / "single.pstats"
+        self._run(
+            "--name", "single", "--description", "Single", "--test_parameter_json", str(self.specs / "spec_0.json"),
+            "--output_dir", str(self.root / "out"), "--profile", str(profile_path)
+        )
+        functions = _functions(profile_path)
+        self.assertEqual(functions["generate_to_file"], 1)
+        self.assertNotIn("parse_args", functions)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the incremental render cache.
+"""
+import json
+from pathlib import Path
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Adjust the import path to properly import the render_cache module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from jinja2 import Environment, FileSystemLoader
+
+from bulk import BulkGenerator, discover_jobs
+from cli import CLI
+from render_cache import MANIFEST_FILE_NAME, RenderCache
+from tests.helpers import parametrized_spec, sample_spec
+
+
+class TestRenderCache(unittest.TestCase):
+    """Test case for the RenderCache class."""
+
+    def setUp(self) -> None:
+        """Create specs, an output directory and a private copy of the templates."""
+        self.spec_dir = tempfile.TemporaryDirectory()
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.template_dir = tempfile.TemporaryDirectory()
+        for name in ("alpha", "beta"):
+            (Path(self.spec_dir.name) / f"{name}.json").write_text(json.dumps(sample_spec(name)))
+        for template in (Path(__file__).parent.parent / "templates").glob("*.j2"):
+            shutil.copy(template, self.template_dir.name)
+        self.manifest_path = Path(self.output_dir.name) / MANIFEST_FILE_NAME
+
+    def tearDown(self) -> None:
+        """Clean up temporary directories."""
+        self.spec_dir.cleanup()
+        self.output_dir.cleanup()
+        self.template_dir.cleanup()
+
+    def _run(self, harness: str = "unittest", **defaults: str) -> list:
+        """Run an incremental bulk generation and return which jobs were skipped."""
+        engine = Environment(loader=FileSystemLoader(self.template_dir.name), trim_blocks=True, lstrip_blocks=True)
+        bulk_generator = BulkGenerator({"output_dir": self.output_dir.name, "harness": harness, **defaults}, engine)
+        render_cache = RenderCache(self.manifest_path, engine)
+
+        jobs = discover_jobs(spec_dir=self.spec_dir.name)
+        to_run, slots, pending_keys = render_cache.partition(jobs, bulk_generator.build_config)
+        summary = render_cache.merge(slots, bulk_generator.run(to_run), pending_keys)
+        render_cache.save()
+
+        self.assertFalse(summary.failed)
+        return [result.skipped for result in summary.results]
+
+    def test_unchanged_specs_are_skipped(self) -> None:
+        """Test that a second run with nothing changed skips every spec."""
+        self.assertEqual(self._run(), [False, False])
+        self.assertEqual(self._run(), [True, True])
+
+    def test_changed_spec_is_regenerated(self) -> None:
+        """Test that editing one spec regenerates only that spec."""
+        self._run()
+        (Path(self.spec_dir.name) / "beta.json").write_text(json.dumps(sample_spec("beta changed")))
+        self.assertEqual(self._run(), [True, False])
+
+    def test_template_change_invalidates_dependent_outputs(self) -> None:
+        """Test that editing a template invalidates exactly the outputs rendered with it."""
+        self._run()
+        pytest_template = Path(self.template_dir.name) / "pytest_test.py.j2"
+        pytest_template.write_text(pytest_template.read_text() + "\n# edited\n")
+        # The unittest outputs do not depend on the pytest template
+        self.assertEqual(self._run(), [True, True])
+
+        unittest_template = Path(self.template_dir.name) / "unittest_test.py.j2"
+        unittest_template.write_text(unittest_template.read_text() + "\n# edited\n")
+        self.assertEqual(self._run(), [False, False])
+
+    def test_config_change_and_missing_output_regenerate(self) -> None:
+        """Test that a different harness or a deleted output forces regeneration."""
+        self._run()
+        self.assertEqual(self._run(harness="pytest"), [False, False])
+
+        (Path(self.output_dir.name) / "test_alpha.py").unlink()
+        self.assertEqual(self._run(harness="pytest"), [False, True])
+
+    def test_changed_parameter_table_regenerates(self) -> None:
+        """Test that a sidecar table that is deleted or edited forces regeneration of its test file."""
+        (Path(self.spec_dir.name) / "alpha.json").write_text(json.dumps(parametrized_spec(5)))
+        self.assertEqual(self._run(parameter_table="jsonl"), [False, False])
+        self.assertEqual(self._run(parameter_table="jsonl"), [True, True])
+
+        table_path = Path(self.output_dir.name) / "test_alpha.cases.jsonl"
+        rows = table_path.read_text()
+        table_path.write_text(rows.replace('"input": 4', '"input": 5'))
+        self.assertEqual(self._run(parameter_table="jsonl"), [False, True])
+        self.assertEqual(table_path.read_text(), rows)
+
+        table_path.unlink()
+        self.assertEqual(self._run(parameter_table="jsonl"), [False, True])
+        self.assertTrue(table_path.exists())
+
+    def test_cli_incremental(self) -> None:
+        """Test --incremental end to end through the CLI."""
+        args = ["--spec-dir", self.spec_dir.name, "--output_dir", self.output_dir.name, "--incremental"]
+        for _ in range(2):
+            cli = CLI()
+            self.assertTrue(cli.validate_config(cli.parse_args(args)))
+            self.assertEqual(cli.run(), 0)
+
+        manifest = json.loads(self.manifest_path.read_text())
+        self.assertEqual(len(manifest["entries"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
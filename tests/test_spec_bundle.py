@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for spec bundles.
+"""
+import hashlib
+import json
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+
+# Adjust the import path to properly import the spec_bundle module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from pydantic import ValidationError
+
+
+from bulk import BulkGenerator, discover_jobs
+from cli import CLI
+from configs import Configs
+from generator import TestGenerator
+from spec_bundle import SpecBundle, close_bundles, main, pack_bundle, read_spec, unpack_bundle
+from tests.helpers import sample_spec
+from watch import WatchSession
+
+
+class _BundleTree(unittest.TestCase):
+    """Base test case with a directory of specs packed into a bundle."""
+
+    def setUp(self) -> None:
+        """Write a directory of specs and pack it."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.specs = self.root / "specs"
+        self.specs.mkdir()
+        for index in range(300):
+            (self.specs / f"spec_{index:03}.json").write_text(json.dumps(sample_spec(f"Spec {index}")))
+        self.bundle_path = self.root / "specs.specbundle"
+        pack_bundle([self.specs], self.bundle_path)
+
+    def tearDown(self) -> None:
+        """Close the bundles and clean up."""
+        close_bundles()
+        self.temp_dir.cleanup()
+
+
+class TestSpecBundle(_BundleTree):
+    """Test case for packing, reading and unpacking bundles."""
+
+    def test_lookup_by_name_and_hash(self) -> None:
+        """Test that every entry is found by its name and by its content hash."""
+        with SpecBundle(self.bundle_path) as bundle:
+            self.assertEqual(len(bundle), 300)
+            self.assertEqual(bundle.names(), sorted(path.name for path in self.specs.glob("*.json")))
+            for path in self.specs.glob("*.json"):
+                data = path.read_bytes()
+                self.assertEqual(bundle.get(path.name), data)
+                self.assertEqual(bundle.get(hashlib.sha256(data).hexdigest()), data)
+            self.assertNotIn("missing.json", bundle)
+            self.assertNotIn("0" * 64, bundle)
+            self.assertEqual(bundle.verify(), [])
+
+    def test_unpack_round_trip(self) -> None:
+        """Test that unpacking writes back the exact files that were packed."""
+        written = unpack_bundle(self.bundle_path, self.root / "unpacked")
+        self.assertEqual(len(written), 300)
+        for path in written:
+            self.assertEqual(path.read_bytes(), (self.specs / path.name).read_bytes())
+
+    def test_invalid_bundles(self) -> None:
+        """Test that files that are not bundles, and corrupt entries, are reported."""
+        not_bundle = self.root / "not.specbundle"
+        not_bundle.write_text("{}")
+        with self.assertRaisesRegex(ValueError, "not a spec bundle"):
+            SpecBundle(not_bundle)
+
+        data = bytearray(self.bundle_path.read_bytes())
+        first = (self.specs / "spec_000.json").read_bytes()
+        offset = data.index(first)
+        data[offset + 10] ^= 0xFF
+        corrupt = self.root / "corrupt.specbundle"
+        corrupt.write_bytes(bytes(data))
+        with self.assertRaisesRegex(ValueError, "spec_000.json"):
+            unpack_bundle(corrupt, self.root / "unpacked")
+
+        with self.assertRaisesRegex(ValueError, "same name"):
+            pack_bundle([self.specs, self.specs / "spec_000.json"], self.root / "twice.specbundle")
+
+    def test_read_spec(self) -> None:
+        """Test that spec paths into a bundle read like spec files, and missing entries like missing files."""
+        self.assertEqual(read_spec(self.bundle_path / "spec_007.json"), (self.specs / "spec_007.json").read_bytes())
+        self.assertEqual(read_spec(self.specs / "spec_007.json"), (self.specs / "spec_007.json").read_bytes())
+        with self.assertRaises(FileNotFoundError):
+            read_spec(self.bundle_path / "missing.json")
+
+    def test_command_line(self) -> None:
+        """Test the pack, list and unpack commands."""
+        bundle_path = self.root / "cli.specbundle"
+        with self.assertLogs("test_generator", level="INFO"):
+            self.assertEqual(main(["pack", str(self.specs), "-o", str(bundle_path)]), 0)
+            self.assertEqual(main(["unpack", str(bundle_path), "-o", str(self.root / "unpacked")]), 0)
+        self.assertEqual(len(list((self.root / "unpacked").glob("*.json"))), 300)
+        with self.assertLogs("test_generator", level="ERROR"):
+            self.assertEqual(main(["unpack", str(self.root / "missing.specbundle"), "-o", str(self.root)]), 1)
+
+
+class TestGenerateFromBundle(_BundleTree):
+    """Test case for generating from specs in a bundle."""
+
+    def _generate(self, spec_path: Path) -> str:
+        """Generate a test from a spec path and return its content."""
+        config = Configs.model_validate({
+            "name": "bundled", "description": "Bundled", "json_file_path": spec_path, "output_dir": self.root
+        })
+        return TestGenerator(config).generate_test_file()
+
+    def test_single_spec(self) -> None:
+        """Test that a spec in a bundle generates the same test as the file it was packed from."""
+        expected = self._generate(self.specs / "spec_042.json")
+        self.assertEqual(self._generate(self.bundle_path / "spec_042.json"), expected)
+        digest = hashlib.sha256((self.specs / "spec_042.json").read_bytes()).hexdigest()
+        self.assertEqual(self._generate(self.bundle_path / digest), expected)
+        with self.assertRaises(ValidationError):
+            self._generate(self.bundle_path / "missing.json")
+
+    def test_bulk_run(self) -> None:
+        """Test that a bundle given as the spec directory generates every entry."""
+        self.assertEqual(len(discover_jobs(spec_glob=str(self.root / "*.specbundle"))), 300)
+
+        output_dir = self.root / "out"
+        cli = CLI()
+        args = cli.parse_args(["--spec-dir", str(self.bundle_path), "--output_dir", str(output_dir), "--incremental"])
+        self.assertTrue(cli.validate_config(args))
+        self.assertEqual(cli.run(), 0)
+        self.assertEqual(len(list(output_dir.glob("test_spec_*.py"))), 300)
+
+    def test_bundled_spec_with_fragments(self) -> None:
+        """Test that references from a bundled spec resolve as they did from its directory."""
+        shared = self.root / "shared"
+        shared.mkdir()
+        (shared / "background.json").write_text(json.dumps({"orientation": "Shared", "purpose": "Shared purpose"}))
+        spec = sample_spec("Composed")
+        spec["test_file_parameters"]["background"] = {"$ref": "../shared/background.json"}
+        (self.specs / "composed.json").write_text(json.dumps(spec))
+        pack_bundle([self.specs], self.bundle_path)
+        close_bundles()
+
+        self.assertEqual(self._generate(self.bundle_path / "composed.json"), self._generate(self.specs / "composed.json"))
+
+    def test_watch_rebuilds_changed_entries(self) -> None:
+        """Test that repacking a bundle affects only the jobs of the entries that changed."""
+        session = WatchSession(
+            BulkGenerator({"output_dir": str(self.root)}), lambda: discover_jobs(spec_dir=str(self.bundle_path)),
+            [(self.root, False)], template_dirs=[], poll_interval=0.01
+        )
+        try:
+            self.assertEqual(len(session.jobs), 300)
+            (self.specs / "spec_010.json").write_text(json.dumps(sample_spec("Changed")))
+            pack_bundle([self.specs], self.bundle_path)
+            affected = session.affected_jobs({self.bundle_path.resolve()})
+            self.assertEqual([job.display_name for job in affected], ["spec_010"])
+
+            # A new entry is picked up by rediscovering the jobs
+            (self.specs / "spec_new.json").write_text(json.dumps(sample_spec("New")))
+            pack_bundle([self.specs], self.bundle_path)
+            affected = session.affected_jobs({self.bundle_path.resolve()})
+            self.assertEqual([job.display_name for job in affected], ["spec_new"])
+            self.assertEqual(len(session.jobs), 301)
+        finally:
+            session.watcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
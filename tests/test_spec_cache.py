@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the persistent cache of validated specs.
+"""
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Adjust the import path to properly import the spec_cache module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from bulk import BulkGenerator, BulkJob
+from cli import CLI
+from configs import Configs
+from generator import TestGenerator, validate_spec_json
+from spec_cache import ENTRY_SUFFIX, SpecCache, schema_version
+from tests.helpers import sample_spec
+
+
+def _spec_bytes(name: str, steps: int = 1) -> bytes:
+    """Raw bytes of a sample spec with the given number of steps."""
+    spec = sample_spec(name)
+    spec["test_file_parameters"]["test_procedure"]["steps"] = [f"Step {index} of {name}" for index in range(steps)]
+    return json.dumps(spec).encode("utf-8")
+
+
+def _fill_cache(cache_dir: str, start: int) -> None:
+    """Store a range of specs in a shared cache, from another process."""
+    cache = SpecCache(Path(cache_dir), 1024 * 1024)
+    for index in range(start, start + 20):
+        data = _spec_bytes(f"Spec {index}")
+        cache.put(data, validate_spec_json(data))
+
+
+class TestSpecCache(unittest.TestCase):
+    """Test case for storing, loading and evicting validated specs."""
+
+    def setUp(self) -> None:
+        """Create a cache directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.temp_dir.name) / "cache"
+        # Hash the schema modules up front so their glob is not counted as a scan of the cache
+        schema_version()
+
+    def tearDown(self) -> None:
+        """Clean up the cache directory."""
+        self.temp_dir.cleanup()
+
+    def _entries(self) -> list:
+        """Names of the cache entries."""
+        return sorted(path.name for path in self.cache_dir.glob(f"*{ENTRY_SUFFIX}"))
+
+    def test_round_trip(self) -> None:
+        """Test that a stored spec is returned equal, and only for the same bytes and schema version."""
+        cache = SpecCache(self.cache_dir)
+        data = _spec_bytes("Round Trip", steps=100)
+        spec = validate_spec_json(data)
+
+        self.assertIsNone(cache.get(data))
+        cache.put(data, spec)
+        self.assertEqual(cache.get(data), spec)
+        self.assertIsNone(cache.get(data + b" "))
+        # Compressed entries are smaller than the spec itself
+        self.assertLess(sum(path.stat().st_size for path in self.cache_dir.iterdir()), len(data))
+
+        with patch("spec_cache.schema_version", return_value="a newer schema"):
+            self.assertIsNone(cache.get(data))
+
+    def test_corrupt_entry_is_a_miss(self) -> None:
+        """Test that an unreadable entry is discarded."""
+        cache = SpecCache(self.cache_dir)
+        data = _spec_bytes("Corrupt")
+        cache.put(data, validate_spec_json(data))
+        (self.cache_dir / self._entries()[0]).write_bytes(b"not a cache entry")
+
+        with self.assertLogs("test_generator.spec_cache", level="WARNING"):
+            self.assertIsNone(cache.get(data))
+        self.assertEqual(self._entries(), [])
+
+    def test_lru_eviction(self) -> None:
+        """Test that the least recently used entries are evicted to stay under the cap."""
+        specs = [_spec_bytes(f"Spec {index}", steps=50) for index in range(4)]
+        cache = SpecCache(self.cache_dir)
+        cache.put(specs[0], validate_spec_json(specs[0]))
+        entry_size = sum(path.stat().st_size for path in self.cache_dir.glob(f"*{ENTRY_SUFFIX}"))
+
+        # Room for three entries
+        cache = SpecCache(self.cache_dir, max_bytes=entry_size * 3 + entry_size // 2)
+        for data in specs[1:3]:
+            cache.put(data, validate_spec_json(data))
+        for index, path in enumerate(sorted(self.cache_dir.glob(f"*{ENTRY_SUFFIX}"), key=lambda path: path.stat().st_mtime)):
+            os.utime(path, (1000 + index, 1000 + index))
+        os.utime(cache._entry_path(cache.key(specs[0])), (900, 900))
+
+        # A hit makes the oldest entry the most recently used
+        self.assertIsNotNone(cache.get(specs[0]))
+        cache.put(specs[3], validate_spec_json(specs[3]))
+
+        self.assertIsNotNone(cache.get(specs[0]))
+        self.assertIsNone(cache.get(specs[1]))
+        self.assertIsNotNone(cache.get(specs[3]))
+        self.assertEqual(len(self._entries()), 3)
+
+    def test_writes_scan_the_cache_only_when_needed(self) -> None:
+        """Test that a cold run scans the cache directory once, not once per entry written."""
+        specs = [_spec_bytes(f"Spec {index}") for index in range(30)]
+        cache = SpecCache(self.cache_dir)
+        with patch("spec_cache.os.scandir", wraps=os.scandir) as scandir:
+            for data in specs:
+                cache.put(data, validate_spec_json(data))
+        self.assertEqual(scandir.call_count, 1)
+
+        # Passing the cap triggers an eviction down to below it
+        entry_size = max(path.stat().st_size for path in self.cache_dir.glob(f"*{ENTRY_SUFFIX}"))
+        cache = SpecCache(self.cache_dir, max_bytes=entry_size * 40)
+        more = [_spec_bytes(f"More {index}") for index in range(20)]
+        with patch("spec_cache.os.scandir", wraps=os.scandir) as scandir:
+            for data in more:
+                cache.put(data, validate_spec_json(data))
+        # One scan to start the estimate, then one per crossing of the cap: the first needs 10 more entries
+        # and each eviction frees 10% of the cap, so at least 4 more entries pass between crossings
+        self.assertLessEqual(scandir.call_count, 4)
+        self.assertLessEqual(sum(path.stat().st_size for path in self.cache_dir.glob(f"*{ENTRY_SUFFIX}")), entry_size * 40)
+
+    def test_concurrent_processes(self) -> None:
+        """Test that several processes can fill and evict one cache at the same time."""
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=_fill_cache, args=(str(self.cache_dir), start)) for start in (0, 10, 20)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+            self.assertEqual(process.exitcode, 0)
+
+        self.assertEqual([path.name for path in self.cache_dir.glob("*.tmp")], [])
+        cache = SpecCache(self.cache_dir, 1024 * 1024)
+        hits = [cache.get(_spec_bytes(f"Spec {index}")) for index in range(40)]
+        self.assertEqual(sum(spec is not None for spec in hits), len(self._entries()))
+        for index, spec in enumerate(hits):
+            if spec is not None:
+                self.assertEqual(spec, validate_spec_json(_spec_bytes(f"Spec {index}")))
+
+
+class TestSpecCacheGeneration(unittest.TestCase):
+    """Test case for generating with the spec cache."""
+
+    def test_rerun_skips_validation(self) -> None:
+        """Test that a rerun on an unchanged spec loads it from the cache, with the same output."""
+        with tempfile.TemporaryDirectory() as work_dir:
+            work_path = Path(work_dir)
+            spec_path = work_path / "cached.json"
+            spec_path.write_bytes(_spec_bytes("Cached"))
+            args = [
+                "--name", "cached", "--description", "Cached", "--test_parameter_json", str(spec_path),
+                "--output_dir", str(work_path / "out"), "--spec-cache", str(work_path / "cache"), "--spec-cache-size", "8"
+            ]
+
+            cli = CLI()
+            self.assertTrue(cli.validate_config(cli.parse_args(args)))
+            self.assertEqual(cli.configs.spec_cache_size, 8)
+            self.assertEqual(cli.run(), 0)
+            first = (work_path / "out" / "test_cached.py").read_text()
+
+            with patch("generator.validate_spec_json") as validate:
+                cli = CLI()
+                self.assertTrue(cli.validate_config(cli.parse_args(args)))
+                self.assertEqual(cli.run(), 0)
+            validate.assert_not_called()
+            self.assertEqual(self._without_timestamp(first), self._without_timestamp((work_path / "out" / "test_cached.py").read_text()))
+
+    def test_bulk_run_scans_the_cache_once(self) -> None:
+        """Test that a cold bulk run shares one cache across its jobs, scanning its directory once."""
+        with tempfile.TemporaryDirectory() as work_dir:
+            work_path = Path(work_dir)
+            jobs = []
+            for index in range(40):
+                spec_path = work_path / f"spec_{index}.json"
+                spec_path.write_bytes(_spec_bytes(f"Spec {index}"))
+                jobs.append(BulkJob(test_parameter_json=spec_path))
+            bulk_generator = BulkGenerator({"output_dir": work_path / "out", "spec_cache_dir": work_path / "cache"})
+
+            with patch("spec_cache.os.scandir", wraps=os.scandir) as scandir:
+                summary = bulk_generator.run(jobs)
+            self.assertEqual(len(summary.succeeded), 40)
+            self.assertEqual(len(list((work_path / "cache").glob(f"*{ENTRY_SUFFIX}"))), 40)
+            self.assertEqual(scandir.call_count, 1)
+
+    def test_no_cache_by_default(self) -> None:
+        """Test that nothing is cached unless a cache directory is configured."""
+        config = Configs.model_validate({"name": "plain", "description": "Plain", "output_dir": tempfile.gettempdir()})
+        self.assertIsNone(TestGenerator(config).spec_cache)
+
+    @staticmethod
+    def _without_timestamp(content: str) -> str:
+        """Drop the lines that hold the generation time."""
+        return "\n".join(line for line in content.splitlines() if "timestamp" not in line.lower() and "generated" not in line.lower())
+
+
+if __name__ == "__main__":
+    unittest.main()
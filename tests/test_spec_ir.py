@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the intermediate representation templates render from.
+"""
+import dataclasses
+import gc
+import json
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+
+# Adjust the import path to properly import the spec_ir module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from configs import Configs
+from pydantic import BaseModel
+
+
+from generator import RenderSpec, TestFileParameters, TestGenerator
+from spec_ir import SpecIR, VariableIR
+from tests.helpers import sample_spec, sweep_spec
+
+
+class TestSpecIR(unittest.TestCase):
+    """Test case for building the IR of a spec."""
+
+    def setUp(self) -> None:
+        """Parse a sample spec."""
+        spec = sample_spec("Intermediate")
+        params = spec["test_file_parameters"]
+        params["control_variables"] = [{
+            "name": "Pool Size", "description": "Connections in the pool", "statistical_type": "discrete",
+            "unit": "connections", "value": 10
+        }]
+        params["imports"] = [{"name": "os"}, {"name": "json", "import_funcs": ["dumps", "loads"]}]
+        self.spec = spec
+
+    def test_from_params(self) -> None:
+        """Test that both parsing paths give the same IR, with names and imports precomputed."""
+        ir = SpecIR.from_params(TestFileParameters(self.spec))
+        self.assertEqual(ir, SpecIR.from_params(TestFileParameters.from_json(json.dumps(self.spec))))
+
+        control = ir.control_variables[0]
+        self.assertEqual((control.name_in_python, control.type_in_python, control.value), ("pool_size", int, 10))
+        self.assertEqual([imp.import_string for imp in ir.imports], ["import os", "from json import dumps, loads"])
+        self.assertEqual(ir.dependent_variable.expected_value.value, 100.0)
+        self.assertIsInstance(ir.test_method.steps, tuple)
+
+    def test_frozen_and_slotted(self) -> None:
+        """Test that the IR cannot be modified and carries no per-instance dictionaries."""
+        ir = SpecIR.from_params(TestFileParameters(self.spec))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            ir.independent_variable.name = "Changed"
+        for value in (ir, ir.background, ir.independent_variable, ir.test_method, ir.imports[0]):
+            self.assertFalse(hasattr(value, "__dict__"), type(value).__name__)
+
+    def test_raw_data_dropped(self) -> None:
+        """Test that parsed parameters no longer hold the raw JSON."""
+        self.assertEqual(TestFileParameters(self.spec).raw_data, {})
+
+
+class TestRenderFromIR(unittest.TestCase):
+    """Test case for rendering templates from the IR."""
+
+    def test_context_holds_ir(self) -> None:
+        """Test that the template context holds the IR, including swept control variables."""
+        with tempfile.TemporaryDirectory() as output_dir:
+            config = Configs.model_validate({
+                "name": "sweep", "description": "Sweep", "output_dir": output_dir, "expansion": "cartesian"
+            })
+            spec = sweep_spec(2, 2, 2)
+            spec["test_file_parameters"]["control_variables"].append({
+                "name": "Fixed Knob", "description": "Not swept", "statistical_type": "nominal", "unit": "setting",
+                "value": "'fixed'"
+            })
+            generator = TestGenerator(config)
+            generator.generate_test_file(spec)
+            context = generator._build_context()
+
+        self.assertIs(context["independent_variable"], generator.test_file_params.ir.independent_variable)
+        self.assertTrue(all(isinstance(variable, VariableIR) for variable in context["control_variables"]))
+        self.assertEqual([variable.name for variable in context["swept_controls"]], ["Knob 0", "Knob 1"])
+
+    def test_generator_keeps_only_render_spec(self) -> None:
+        """Test that a generator drops the validated models of a spec and keeps the IR and the case sources."""
+        with tempfile.TemporaryDirectory() as output_dir:
+            config = Configs.model_validate({"name": "kept", "description": "Kept", "output_dir": output_dir})
+            generator = TestGenerator(config)
+            generator.generate_test_file(sample_spec("Kept"))
+
+        self.assertIsInstance(generator.test_file_params, RenderSpec)
+        # Only the validation procedures, which the templates render, are still models
+        models = {type(value).__name__ for value in _reachable(generator.test_file_params) if isinstance(value, BaseModel)}
+        self.assertLessEqual(models, {"ValidationProcedure"})
+
+
+def _reachable(root: object) -> list:
+    """Every object reachable from an object, except classes and modules."""
+    seen = {id(root)}
+    pending = [root]
+    found = []
+    while pending:
+        value = pending.pop()
+        found.append(value)
+        for referent in gc.get_referents(value):
+            if id(referent) not in seen and not isinstance(referent, (type, type(sys))):
+                seen.add(id(referent))
+                pending.append(referent)
+    return found
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the spec JSON Schema and the pre-validation gate of bulk runs.
+"""
+import copy
+import json
+from pathlib import Path
+import random
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Adjust the import path to properly import the spec_schema module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from cli import CLI
+from generator import TestFileParameters, validate_spec_json
+from spec_schema import DEFAULT_SCHEMA_PATH, compile_schema, prevalidate_spec, spec_json_schema, spec_validator
+from tests.helpers import sample_spec
+
+
+EXAMPLES_DIR = Path(__file__).parent.parent / "example_templates"
+
+
+def _errors(spec: dict) -> list:
+    """Errors of a spec as (pointer, reason) pairs."""
+    return spec_validator()(spec)
+
+
+def _mutations(spec: dict, rng: random.Random) -> dict:
+    """Replace or delete a random value somewhere in a copy of the spec."""
+    spec = copy.deepcopy(spec)
+    locations = []
+    pending = [spec]
+    while pending:
+        parent = pending.pop()
+        keys = list(parent) if isinstance(parent, dict) else range(len(parent))
+        for key in keys:
+            locations.append((parent, key))
+            if isinstance(parent[key], (dict, list)):
+                pending.append(parent[key])
+    parent, key = rng.choice(locations)
+    if isinstance(parent, dict) and rng.random() < 0.3:
+        del parent[key]
+    else:
+        parent[key] = rng.choice([None, 0, 1.5, "x", "3", True, [], {}, [1], {"a": 1}, "DISCRETE"])
+    return spec
+
+
+class TestSpecSchema(unittest.TestCase):
+    """Test case for the exported schema and its compiled validator."""
+
+    def test_examples_are_valid(self) -> None:
+        """Test that every example spec passes."""
+        for path in EXAMPLES_DIR.glob("*.json"):
+            with self.subTest(path=path.name):
+                self.assertEqual(prevalidate_spec(path.read_bytes(), path), [])
+
+    def test_errors_have_pointers(self) -> None:
+        """Test that errors point at the invalid values."""
+        spec = sample_spec("Invalid")
+        params = spec["test_file_parameters"]
+        del params["test_procedure"]
+        params["independent_variable"]["statistical_type"] = "interval"
+        params["dependent_variable"]["name"] = 42
+        params["independent_variable"]["range"] = {"min": 1, "max": 10, "count": 0}
+
+        self.assertEqual(sorted(pointer for pointer, _ in _errors(spec)), [
+            "/test_file_parameters/dependent_variable/name",
+            "/test_file_parameters/independent_variable/range/count",
+            "/test_file_parameters/independent_variable/statistical_type",
+            "/test_file_parameters/test_procedure",
+        ])
+        self.assertIn(("/test_file_parameters/test_procedure", "Field required"), _errors(spec))
+
+    def test_lax_like_the_models(self) -> None:
+        """Test that values the models accept after coercion or aliasing pass."""
+        spec = sample_spec("Lax")
+        params = spec["test_file_parameters"]
+        params["independent_variable"].update(statistical_type="DISCRETE", range={"min": "1", "max": 10.0, "step": "2"})
+        params["dependent_variable"]["expected_value"] = {"values": [{"value": 1}, {"expected": 2}]}
+        params["material"] = {"name": "db", "description": "Database", "type": "fixture"}
+        params["control_variables"] = ["not a variable"]
+
+        validate_spec_json(json.dumps(spec))
+        self.assertEqual(_errors(spec), [])
+
+    def test_never_stricter_than_the_models(self) -> None:
+        """Test that the pre-validator rejects exactly the mutated specs the models reject."""
+        rng = random.Random(19)
+        specs = [json.loads(path.read_text()) for path in sorted(EXAMPLES_DIR.glob("*.json"))]
+        with self.assertLogs("test_generator", level="WARNING"):
+            for _ in range(300):
+                spec = _mutations(rng.choice(specs), rng)
+                data = json.dumps(spec)
+                try:
+                    validate_spec_json(data)
+                    valid = True
+                except ValueError:
+                    valid = False
+                self.assertEqual(not prevalidate_spec(data), valid, data)
+
+    def test_invalid_json(self) -> None:
+        """Test that unparseable JSON is reported against the whole document."""
+        errors = prevalidate_spec(b"{not json", Path("broken.json"))
+        self.assertEqual((errors[0].pointer, errors[0].spec_path), ("", Path("broken.json")))
+        self.assertTrue(errors[0].reason.startswith("Invalid JSON"))
+
+    def test_compile_schema(self) -> None:
+        """Test the keywords the compiler supports, and that pointers are escaped."""
+        validate = compile_schema({
+            "type": "object",
+            "properties": {"a/b": {"type": "integer", "maximum": 3}, "c": {"enum": ["x", "y"]}},
+            "additionalProperties": False,
+        })
+        self.assertEqual(validate({"a/b": "3", "c": "y"}), [])
+        self.assertEqual(validate({"a/b": 4.0, "c": "z", "d": 1}), [
+            ("/a~1b", "Expected a number <= 3, got 4.0"),
+            ("/c", "Expected one of ['x', 'y'], got 'z'"),
+            ("/d", "No value is allowed here"),
+        ])
+
+    def test_exported_schema_is_current(self) -> None:
+        """Test that the checked-in schema matches the models; rerun `python spec_schema.py` if not."""
+        self.assertEqual(json.loads(DEFAULT_SCHEMA_PATH.read_text()), spec_json_schema())
+
+
+class TestPrevalidatedBulkRun(unittest.TestCase):
+    """Test case for rejecting invalid specs before a bulk run builds any model."""
+
+    def test_cli_prevalidate(self) -> None:
+        """Test that rejected specs skip generation and are listed in one report."""
+        with tempfile.TemporaryDirectory() as work_dir:
+            work_path = Path(work_dir)
+            spec_dir = work_path / "specs"
+            spec_dir.mkdir()
+            (spec_dir / "alpha.json").write_text(json.dumps(sample_spec("Alpha")))
+            (spec_dir / "broken.json").write_text("{not json")
+            invalid = sample_spec("Invalid")
+            invalid["test_file_parameters"]["test_procedure"]["steps"] = "one step"
+            (spec_dir / "invalid.json").write_text(json.dumps(invalid))
+            report_path = work_path / "report.json"
+
+            cli = CLI()
+            args = cli.parse_args([
+                "--spec-dir", str(spec_dir), "--output_dir", str(work_path / "out"),
+                "--prevalidation-report", str(report_path)
+            ])
+            self.assertTrue(cli.validate_config(args))
+            with patch("generator.TestFileParameters.from_json", wraps=TestFileParameters.from_json) as parse:
+                self.assertEqual(cli.run(), 1)
+            self.assertEqual(parse.call_count, 1)
+            self.assertTrue((work_path / "out" / "test_alpha.py").exists())
+
+            report = json.loads(report_path.read_text())
+            self.assertEqual((report["checked"], report["rejected"]), (3, 2))
+            self.assertEqual(
+                [(Path(error["spec_path"]).name, error["pointer"]) for error in report["errors"]],
+                [("broken.json", ""), ("invalid.json", "/test_file_parameters/test_procedure/steps")]
+            )
+
+    def test_prevalidate_needs_spec_files(self) -> None:
+        """Test that --prevalidate is refused outside bulk runs over spec files."""
+        cli = CLI()
+        args = cli.parse_args(["--jsonl", "-", "--prevalidate"])
+        with self.assertLogs("test_generator", level="ERROR"):
+            self.assertFalse(cli.validate_config(args))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for stage timing of generation.
+"""
+import contextlib
+import csv
+import io
+import json
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+
+# Adjust the import path to properly import the stage_timing module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from bulk import BulkGenerator, discover_jobs
+from cli import CLI
+from configs import Configs
+from generator import TestGenerator
+from pipeline import GenerationPipeline
+from stage_timing import NO_TIMINGS, STAGES, StageTimings, TimingReport, percentile
+from tests.helpers import sample_spec
+
+
+class TestStageTimings(unittest.TestCase):
+    """Test case for timing the stages of generating a spec."""
+
+    def setUp(self) -> None:
+        """Write a spec."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.spec_path = self.root / "spec.json"
+        self.spec_path.write_text(json.dumps(sample_spec("Timed")))
+        self.config = Configs.model_validate({
+            "name": "timed", "description": "Timed", "json_file_path": self.spec_path, "output_dir": self.root
+        })
+
+    def tearDown(self) -> None:
+        """Clean up."""
+        self.temp_dir.cleanup()
+
+    def test_every_stage_is_timed(self) -> None:
+        """Test that both generation paths time all five stages."""
+        timings = StageTimings()
+        TestGenerator(self.config, timings=timings).generate_to_file()
+        self.assertEqual(set(timings.seconds), set(STAGES))
+        self.assertTrue(all(seconds >= 0 for seconds in timings.seconds.values()))
+
+        timings = StageTimings()
+        generator = TestGenerator(self.config, timings=timings)
+        generator.write_test_file(generator.generate_test_file())
+        self.assertEqual(set(timings.seconds), set(STAGES))
+
+    def test_untimed_by_default(self) -> None:
+        """Test that a generator records nothing unless it is given timings."""
+        generator = TestGenerator(self.config)
+        generator.generate_to_file()
+        self.assertIs(generator.timings, NO_TIMINGS)
+        self.assertEqual(NO_TIMINGS.seconds, {})
+        self.assertEqual(BulkGenerator({"output_dir": str(self.root)}).run(discover_jobs(spec_dir=str(self.root))).results[0].timings, {})
+
+    def test_split_times_producer_and_consumer(self) -> None:
+        """Test that a split iteration adds up the time on each side of every item."""
+        timings = StageTimings()
+        self.assertEqual([item for item in timings.split(iter(range(3)), "render", "write")], [0, 1, 2])
+        self.assertEqual(set(timings.seconds), {"render", "write"})
+
+
+class TestTimingReport(unittest.TestCase):
+    """Test case for the report of the stage timings of a run."""
+
+    def setUp(self) -> None:
+        """Create a working directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+
+    def tearDown(self) -> None:
+        """Clean up."""
+        self.temp_dir.cleanup()
+
+    def _fill(self, report: TimingReport) -> None:
+        """Add 100 specs whose render takes 1 to 100 ms."""
+        for index in range(1, 101):
+            report.add(f"spec_{index}", f"specs/spec_{index}.json", {"parse": 0.001, "render": index / 1000})
+        report.add("skipped", "specs/skipped.json", {})
+
+    def test_slowest_and_percentiles(self) -> None:
+        """Test the slowest specs and the nearest-rank percentiles of each stage."""
+        report = TimingReport(top=3)
+        self._fill(report)
+        self.assertEqual(report.count, 100)
+        self.assertEqual([timing.name for timing in report.slowest()], ["spec_100", "spec_99", "spec_98"])
+        stats = report.percentiles()
+        self.assertEqual(set(stats), {"parse", "render", "total"})
+        self.assertAlmostEqual(stats["render"]["p50"], 0.050)
+        self.assertAlmostEqual(stats["render"]["p90"], 0.090)
+        self.assertAlmostEqual(stats["render"]["p99"], 0.099)
+        self.assertAlmostEqual(stats["render"]["max"], 0.100)
+        self.assertAlmostEqual(stats["parse"]["sum"], 0.1)
+        self.assertEqual(percentile([], 50), 0.0)
+
+        text = report.format()
+        self.assertIn("Slowest 3 of 100 specs (ms):", text)
+        self.assertIn("spec_100", text)
+        self.assertIn("Stage percentiles over 100 specs (ms):", text)
+
+    def test_exports(self) -> None:
+        """Test the CSV and JSON exports of the per-spec timings."""
+        with TimingReport(export_path=self.root / "timings.csv") as report:
+            self._fill(report)
+        rows = list(csv.DictReader((self.root / "timings.csv").open()))
+        self.assertEqual(len(rows), 100)
+        self.assertEqual(rows[0]["name"], "spec_1")
+        self.assertEqual(rows[0]["load"], "")
+        self.assertAlmostEqual(float(rows[0]["total"]), 0.002)
+
+        with TimingReport(export_path=self.root / "timings.json") as report:
+            self._fill(report)
+        data = json.loads((self.root / "timings.json").read_text())
+        self.assertEqual(len(data["specs"]), 100)
+        self.assertIsNone(data["specs"][0]["load"])
+        self.assertAlmostEqual(data["percentiles"]["render"]["max"], 0.1)
+
+        with TimingReport(export_path=self.root / "empty.json"):
+            pass
+        self.assertEqual(json.loads((self.root / "empty.json").read_text())["specs"], [])
+
+
+class TestTimedRuns(unittest.TestCase):
+    """Test case for timing bulk runs from the command line."""
+
+    def setUp(self) -> None:
+        """Write a directory of specs."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.specs = self.root / "specs"
+        self.specs.mkdir()
+        for index in range(5):
+            (self.specs / f"spec_{index}.json").write_text(json.dumps(sample_spec(f"Spec {index}")))
+
+    def tearDown(self) -> None:
+        """Clean up."""
+        self.temp_dir.cleanup()
+
+    def _run(self, *args: str) -> str:
+        """Run the CLI and return what it printed."""
+        cli = CLI()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertTrue(cli.validate_config(cli.parse_args(list(args))))
+            self.assertEqual(cli.run(), 0)
+        return output.getvalue()
+
+    def test_bulk_run(self) -> None:
+        """Test that a timed bulk run prints the report and exports every spec."""
+        timings_path = self.root / "timings.json"
+        printed = self._run(
+            "--spec-dir", str(self.specs), "--output_dir", str(self.root / "out"),
+            "--timings-file", str(timings_path), "--timings-top", "2"
+        )
+        self.assertIn("Slowest 2 of 5 specs (ms):", printed)
+        specs = json.loads(timings_path.read_text())["specs"]
+        self.assertEqual(sorted(spec["name"] for spec in specs), [f"spec_{index}" for index in range(5)])
+        self.assertTrue(all(spec[stage] is not None for spec in specs for stage in STAGES))
+
+    def test_single_run(self) -> None:
+        """Test that a timed single spec run prints its timings."""
+        printed = self._run(
+            "--name", "single", "--description", "Single", "--test_parameter_json", str(self.specs / "spec_0.json"),
+            "--output_dir", str(self.root / "out"), "--timings"
+        )
+        self.assertIn("Slowest 1 of 1 specs (ms):", printed)
+
+    def test_pipeline(self) -> None:
+        """Test that the staged pipeline times its load and write stages and the stages of its workers."""
+        pipeline = GenerationPipeline({"output_dir": str(self.root / "out")}, workers=2, timed=True)
+        summary = pipeline.run(discover_jobs(spec_dir=str(self.specs)))
+        self.assertEqual(len(summary.succeeded), 5)
+        for result in summary.results:
+            self.assertEqual(set(result.timings), set(STAGES))
+
+
+if __name__ == "__main__":
+    unittest.main()
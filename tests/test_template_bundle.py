@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for the precompiled template bundle.
+"""
+from pathlib import Path
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Adjust the import path to properly import the template_bundle module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from jinja2 import Environment, FileSystemLoader, ModuleLoader
+
+import template_bundle
+from template_bundle import (
+    COMPILED_DIR, ENVIRONMENT_OPTIONS, TEMPLATE_DIRS,
+    compile_template_bundle, create_environment, is_bundle_current, template_source_hash
+)
+
+
+# Context with every variable the templates reference
+RENDER_CONTEXT = {
+    "config": {"description": "Bundle test"},
+    "test_title": "BundleTest",
+    "test_class_name": "BundleTest",
+    "test_func_name": "bundle_test",
+    "background": {"orientation": "o", "purpose": "p", "hypothesis": "h"},
+    "independent_variable": {"name": "x", "description": "input", "value": 1},
+    "dependent_variable": {"name": "y", "description": "output", "expected_value": {"value": 2}},
+    "control_variables": [],
+    "imports": [],
+    "test_procedure": {"steps": ["step one"]},
+    "independent_var_name": "x",
+    "is_exception_test": False,
+    "expected_value": 2,
+    "timestamp": "2025-01-01 00:00:00",
+}
+
+
+class TestTemplateBundle(unittest.TestCase):
+    """Test case for the compiled template bundle."""
+
+    def setUp(self) -> None:
+        """Create a scratch copy of the templates and a directory for a bundle."""
+        self.source_dir = tempfile.TemporaryDirectory()
+        self.bundle_dir = tempfile.TemporaryDirectory()
+        for template in TEMPLATE_DIRS[0].glob("*.j2"):
+            shutil.copy(template, self.source_dir.name)
+        self.compiled_dir = Path(self.bundle_dir.name) / "compiled"
+
+    def tearDown(self) -> None:
+        """Clean up temporary directories."""
+        self.source_dir.cleanup()
+        self.bundle_dir.cleanup()
+
+    def test_shipped_bundle_is_current(self) -> None:
+        """Test that compiled_templates/ was rebuilt after the last template edit."""
+        self.assertTrue(
+            is_bundle_current(COMPILED_DIR),
+            "compiled_templates/ is stale; run `python template_bundle.py`"
+        )
+
+    def test_compiled_output_matches_source(self) -> None:
+        """Test that the bundle renders exactly what the sources render."""
+        sources = [Path(self.source_dir.name)]
+        compile_template_bundle(self.compiled_dir, sources)
+
+        from_source = Environment(loader=FileSystemLoader(sources), **ENVIRONMENT_OPTIONS)
+        from_bundle = Environment(loader=ModuleLoader(str(self.compiled_dir)), **ENVIRONMENT_OPTIONS)
+        for name in ("unittest_test.py.j2", "pytest_test.py.j2"):
+            self.assertEqual(
+                from_bundle.get_template(name).render(**RENDER_CONTEXT),
+                from_source.get_template(name).render(**RENDER_CONTEXT)
+            )
+
+    def test_stale_bundle_is_detected(self) -> None:
+        """Test that editing a source makes the bundle stale."""
+        sources = [Path(self.source_dir.name)]
+        compile_template_bundle(self.compiled_dir, sources)
+        self.assertTrue(is_bundle_current(self.compiled_dir, sources))
+
+        (Path(self.source_dir.name) / "pytest_test.py.j2").write_text("edited")
+        self.assertFalse(is_bundle_current(self.compiled_dir, sources))
+
+    def test_environment_prefers_current_bundle(self) -> None:
+        """Test that the default environment loads from the bundle without parsing sources."""
+        environment = create_environment()
+        self.assertIsInstance(environment.loader, ModuleLoader)
+
+    def test_environment_without_template_sources(self) -> None:
+        """Test that the bundle alone is enough when there is no templates/ directory."""
+        sources = [Path(self.source_dir.name)]
+        compile_template_bundle(self.compiled_dir, sources)
+        missing = [Path(self.bundle_dir.name) / "no_templates"]
+
+        with patch.object(template_bundle, "TEMPLATE_DIRS", missing), \
+                patch.object(template_bundle, "COMPILED_DIR", self.compiled_dir):
+            environment = create_environment()
+            self.assertIsInstance(environment.loader, ModuleLoader)
+            content = environment.get_template("unittest_test.py.j2").render(**RENDER_CONTEXT)
+            self.assertIn("class TestBundleTest(unittest.TestCase):", content)
+            self.assertNotEqual(template_source_hash("unittest_test.py.j2", self.compiled_dir), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for single-pass spec validation from raw JSON.
+"""
+import copy
+import json
+from pathlib import Path
+import sys
+import unittest
+
+
+# Add the parent directory to sys.path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from generator import TestFileParameters
+from schemas.statistical_type import StatisticalType
+from tests.helpers import sample_spec
+
+
+def _spec_with_items() -> dict:
+    """A sample spec with control variables, materials and imports, some of them invalid."""
+    spec = sample_spec("Spec Title")
+    params = spec["test_file_parameters"]
+    params["control_variables"] = [
+        {"name": "Seed", "description": "Random seed", "statistical_type": "NOMINAL", "unit": "none", "value": "42"},
+        {"name": "Broken", "statistical_type": "discrete"},
+        {"name": "Threads", "description": "Worker threads", "statistical_type": "discrete", "unit": "threads"},
+    ]
+    params["test_materials"] = [
+        {"name": "fixture", "description": "A fixture", "type": "fixture"},
+        {"name": "missing type", "description": "Invalid"},
+    ]
+    params["imports"] = [{"name": "os"}, {"import_funcs": ["path"]}, {"name": "json", "import_funcs": ["dumps"]}]
+    return spec
+
+
+class TestSinglePassValidation(unittest.TestCase):
+    """Test case for TestFileParameters.from_json()."""
+
+    def test_matches_dictionary_path(self) -> None:
+        """Test that the fast path produces the same parameters as the dictionary path."""
+        spec = _spec_with_items()
+        fast = TestFileParameters.from_json(json.dumps(spec).encode("utf-8"))
+        slow = TestFileParameters(copy.deepcopy(spec))
+
+        self.assertEqual(fast.test_title, slow.test_title)
+        self.assertEqual(fast.background, slow.background)
+        self.assertEqual(fast.independent_variable, slow.independent_variable)
+        self.assertEqual(fast.dependent_variable, slow.dependent_variable)
+        self.assertEqual(fast.control_variables, slow.control_variables)
+        self.assertEqual(fast.materials, slow.materials)
+        self.assertEqual(fast.test_method, slow.test_method)
+        self.assertEqual(fast.imports, slow.imports)
+        self.assertEqual(fast.parameter_cases, slow.parameter_cases)
+
+    def test_invalid_items_are_skipped(self) -> None:
+        """Test that invalid list items are dropped with a warning and the rest kept."""
+        with self.assertLogs("test_generator", level="WARNING") as logs:
+            params = TestFileParameters.from_json(json.dumps(_spec_with_items()))
+
+        self.assertEqual([var.name for var in params.control_variables], ["Seed", "Threads"])
+        self.assertEqual([material.name for material in params.materials], ["fixture"])
+        self.assertEqual([imp.import_string for imp in params.imports], ["import os", "from json import dumps"])
+        self.assertTrue(any("control variable" in message for message in logs.output))
+
+    def test_statistical_type_is_case_insensitive_without_mutation(self) -> None:
+        """Test that upper-case statistical types are accepted and the input left untouched."""
+        spec = _spec_with_items()
+        params = TestFileParameters(spec)
+        self.assertEqual(params.control_variables[0].statistical_type, StatisticalType.NOMINAL)
+        self.assertEqual(spec["test_file_parameters"]["control_variables"][0]["statistical_type"], "NOMINAL")
+
+    def test_title_and_single_material(self) -> None:
+        """Test a TestTitle object and a single material given as an object."""
+        spec = sample_spec("unused")
+        spec["test_file_parameters"]["test_title"] = {"test_title": "title in words"}
+        spec["test_file_parameters"]["material"] = {"name": "db", "description": "A database", "type": "service"}
+        params = TestFileParameters.from_json(json.dumps(spec))
+
+        self.assertEqual(params.test_title, "TitleInWords")
+        self.assertEqual([material.name for material in params.materials], ["db"])
+
+    def test_errors_match_dictionary_path(self) -> None:
+        """Test that invalid specs raise the same errors as the dictionary path."""
+        with self.assertRaisesRegex(ValueError, "Invalid JSON"):
+            TestFileParameters.from_json(b'{"test_file_parameters": ')
+        with self.assertRaisesRegex(ValueError, "JSON object at the root level"):
+            TestFileParameters.from_json(b"[]")
+        with self.assertRaisesRegex(ValueError, "No test file parameters found"):
+            TestFileParameters.from_json(b'{"test_name": "no parameters"}')
+
+        spec = sample_spec("Invalid")
+        del spec["test_file_parameters"]["dependent_variable"]["unit"]
+        with self.assertRaisesRegex(ValueError, "Invalid dependent_variable data"):
+            TestFileParameters.from_json(json.dumps(spec))
+        with self.assertRaisesRegex(ValueError, "Invalid dependent_variable data"):
+            TestFileParameters(spec)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for range-based sweeps of continuous and discrete variables.
+"""
+import itertools
+from pathlib import Path
+import sys
+import unittest
+from unittest.mock import patch
+
+from pydantic import ValidationError
+
+# Adjust the import path to properly import the schemas module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from expansion import control_sweeps, expand_cases
+from generator import TestFileParameters
+from schemas.value_range import ValueRange
+from schemas.variable import Variable
+from tests.helpers import parametrized_spec
+
+
+def _variable(statistical_type: str, **fields) -> Variable:
+    """A variable of the given statistical type."""
+    return Variable.model_validate({
+        "name": "Size", "description": "A size", "statistical_type": statistical_type, "unit": "bytes", **fields
+    })
+
+
+def _range_spec(value_range: dict) -> dict:
+    """A parametrized spec whose independent variable sweeps a range, expecting True for every value."""
+    spec = parametrized_spec(0)
+    params = spec["test_file_parameters"]
+    del params["independent_variable"]["values"]
+    params["independent_variable"]["range"] = value_range
+    params["dependent_variable"]["expected_value"] = {"value": "True"}
+    return spec
+
+
+class TestValueRange(unittest.TestCase):
+    """Test case for expanding ranges, with and without NumPy."""
+
+    def _values(self, statistical_type: str, **value_range) -> list:
+        """Expand a range with and without NumPy, checking that both agree."""
+        variable = _variable(statistical_type, range=value_range)
+        values = list(variable.sweep_values())
+        with patch("schemas.value_range._numpy", return_value=None):
+            fallback = list(variable.sweep_values())
+        self.assertEqual(len(values), len(fallback))
+        for value, other in zip(values, fallback):
+            self.assertAlmostEqual(value, other)
+        return values
+
+    def test_step(self) -> None:
+        """Test a stepped range, which stops at max."""
+        self.assertEqual(self._values("continuous", min=0, max=1, step=0.25), [0.0, 0.25, 0.5, 0.75, 1.0])
+        self.assertEqual(self._values("discrete", min=0, max=10, step=3), [0, 3, 6, 9])
+
+    def test_count(self) -> None:
+        """Test linearly and log spaced counts."""
+        self.assertEqual(self._values("continuous", min=1, max=2, count=3), [1.0, 1.5, 2.0])
+        values = self._values("continuous", min=1, max=1000, count=4, spacing="log")
+        for value, expected in zip(values, [1, 10, 100, 1000]):
+            self.assertAlmostEqual(value, expected)
+
+    def test_factor(self) -> None:
+        """Test a geometric range, e.g. powers of two up to 1024."""
+        values = self._values("discrete", min=1, max=1024, factor=2)
+        self.assertEqual(values, [2 ** power for power in range(11)])
+        self.assertTrue(all(isinstance(value, int) for value in values))
+
+    def test_discrete_rounds_and_drops_duplicates(self) -> None:
+        """Test that discrete values are rounded to integers without duplicates."""
+        self.assertEqual(self._values("discrete", min=1, max=3, count=9), [1, 2, 3])
+        self.assertEqual(self._values("discrete", min=0.5, max=4.5, step=1), [0, 2, 4])
+        self.assertEqual(self._values("discrete", min=1, max=1000, count=7, spacing="log"), [1, 3, 10, 32, 100, 316, 1000])
+        self.assertTrue(all(isinstance(value, float) for value in self._values("continuous", min=1, max=3, count=9)))
+
+    def test_invalid_ranges(self) -> None:
+        """Test that ill-defined ranges and ranges on other variables are rejected."""
+        for value_range, message in (
+            ({"min": 0, "max": 1}, "exactly one of step, count and factor"),
+            ({"min": 0, "max": 1, "step": 0.5, "count": 3}, "exactly one of step, count and factor"),
+            ({"min": 2, "max": 1, "step": 1}, "must not be less than its min"),
+            ({"min": 0, "max": 8, "factor": 2}, "positive min"),
+            ({"min": 1, "max": 8, "step": 1, "spacing": "log"}, "Log spacing needs a count"),
+        ):
+            with self.assertRaisesRegex(ValidationError, message):
+                ValueRange.model_validate(value_range)
+
+        with self.assertRaisesRegex(ValidationError, "Only continuous and discrete variables can have a range"):
+            _variable("nominal", range={"min": 0, "max": 1, "step": 1})
+        with self.assertRaisesRegex(ValidationError, "values or a range, but not both"):
+            _variable("discrete", values=[1], range={"min": 0, "max": 1, "step": 1})
+
+
+class TestRangeSweep(unittest.TestCase):
+    """Test case for parametrizing tests and control variables with ranges."""
+
+    def test_range_cases_are_lazy(self) -> None:
+        """Test that a large range is counted and indexed without building every case."""
+        params = TestFileParameters(_range_spec({"min": 0, "max": 999_999, "step": 1}))
+        cases = params.parameter_cases
+        self.assertEqual(len(cases), 1_000_000)
+        self.assertEqual((cases[123].id, cases[123].input, cases[123].expected), ("123", 123, "True"))
+        self.assertEqual([case.id for case in itertools.islice(cases, 3)], ["0", "1", "2"])
+
+    def test_huge_range_is_counted_without_expanding(self) -> None:
+        """Test that a trillion-value range is counted and indexed without computing its values."""
+        for statistical_type in ("discrete", "continuous"):
+            values = _variable(statistical_type, range={"min": 0, "max": 1e12, "step": 1}).sweep_values()
+            self.assertEqual(len(values), 1_000_000_000_001)
+            self.assertEqual(values[-1], 1e12)
+            self.assertEqual(values[10**9:10**9 + 2], [10**9, 10**9 + 1])
+
+        params = TestFileParameters(_range_spec({"min": 0, "max": 1e12, "step": 0.5}))
+        # Discrete values half a step apart cover every integer once
+        self.assertEqual(len(params.parameter_cases), 1_000_000_000_001)
+
+    def test_range_joined_to_expected_values(self) -> None:
+        """Test that expected values for a range are joined on the values as ids."""
+        spec = _range_spec({"min": 1, "max": 4, "factor": 2})
+        spec["test_file_parameters"]["dependent_variable"]["expected_value"] = {
+            "values": [{"id": str(number), "value": number * 2} for number in (4, 1, 2)]
+        }
+        cases = TestFileParameters(spec).parameter_cases
+        self.assertEqual([(case.id, case.input, case.expected) for case in cases], [("1", 1, 2), ("2", 2, 4), ("4", 4, 8)])
+
+    def test_swept_control_range(self) -> None:
+        """Test that a control variable with a range is swept, with its values as ids."""
+        spec = parametrized_spec(2)
+        spec["test_file_parameters"]["control_variables"] = [{
+            "name": "Temperature", "description": "A temperature", "statistical_type": "continuous", "unit": "K",
+            "range": {"min": 0, "max": 1, "count": 3}
+        }]
+        params = TestFileParameters(spec)
+        cases = list(expand_cases(
+            params.parameter_cases, params.independent_variable, params.dependent_variable,
+            control_sweeps(params.control_variables), "cartesian"
+        ))
+        self.assertEqual([case.id for case in cases], ["0-0.0", "0-0.5", "0-1.0", "1-0.0", "1-0.5", "1-1.0"])
+        self.assertEqual(cases[4].controls, (0.5,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for streaming the value tables of large spec files.
+"""
+import json
+from pathlib import Path
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+# Adjust the import path to properly import the values_stream module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from configs import Configs
+from generator import TestGenerator
+from parameter_table import StreamedCases
+from tests.helpers import parametrized_spec, spec_with_ids
+from values_stream import StreamedValues, read_streamed_spec
+
+
+class TestValuesStream(unittest.TestCase):
+    """Test case for generating from specs whose value tables are streamed."""
+
+    def setUp(self) -> None:
+        """Create a working directory and stream every spec file, whatever its size."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        patcher = patch("values_stream.STREAMING_THRESHOLD", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        """Clean up the working directory."""
+        self.temp_dir.cleanup()
+
+    def _write_spec(self, spec: dict, name: str = "spec.json") -> Path:
+        """Write a spec file."""
+        path = self.root / name
+        path.write_text(json.dumps(spec, indent=2, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def _generator(self, path: Path, parameter_table: str = "inline", name: str = "streamed") -> TestGenerator:
+        """A generator for a spec file."""
+        config = Configs.model_validate({
+            "name": name, "description": "Streamed", "json_file_path": path,
+            "output_dir": self.root, "parameter_table": parameter_table
+        })
+        return TestGenerator(config)
+
+    def test_same_output_as_whole_spec(self) -> None:
+        """Test that a streamed spec generates the same test and table as one loaded whole."""
+        path = self._write_spec(parametrized_spec(50))
+        for parameter_table in ("inline", "jsonl"):
+            with patch("values_stream.STREAMING_THRESHOLD", 1 << 62):
+                expected = self._generator(path, parameter_table, "whole").generate_to_file()
+            generator = self._generator(path, parameter_table)
+            actual = generator.generate_to_file()
+            self.assertIsInstance(generator.test_file_params.parameter_cases, StreamedCases)
+            self.assertEqual(actual.read_text(), expected.read_text().replace("whole", "streamed").replace("Whole", "Streamed"))
+            if parameter_table == "jsonl":
+                self.assertEqual(
+                    actual.with_suffix(".cases.jsonl").read_text(), expected.with_suffix(".cases.jsonl").read_text()
+                )
+
+    def test_ids_pair_in_order(self) -> None:
+        """Test that cases with ids are streamed when the ids pair up, and rejected otherwise."""
+        generator = self._generator(self._write_spec(spec_with_ids(["a", "b", "c"], ["a", "b", "c"])))
+        generator._load_test_parameters()
+        self.assertEqual(
+            [(case.id, case.input, case.expected) for case in generator.test_file_params.parameter_cases],
+            [("a", '"a"', '"A"'), ("b", '"b"', '"B"'), ("c", '"c"', '"C"')]
+        )
+
+        generator = self._generator(self._write_spec(spec_with_ids(["a", "b", "c"], ["c", "a", "b"])))
+        with self.assertRaisesRegex(ValueError, "same ids in the same order"):
+            generator._load_test_parameters()
+
+    def test_invalid_items(self) -> None:
+        """Test that an invalid table item, or malformed JSON, is reported when the spec is read."""
+        spec = parametrized_spec(5)
+        spec["test_file_parameters"]["dependent_variable"]["expected_value"]["values"][3] = {"input": 3}
+        with self.assertRaisesRegex(ValueError, "Invalid item 3 of dependent_variable.expected_value.values"):
+            read_streamed_spec(self._write_spec(spec))
+
+        truncated = self.root / "truncated.json"
+        truncated.write_text(json.dumps(parametrized_spec(5))[:-40])
+        with self.assertRaisesRegex(ValueError, "Invalid JSON"):
+            read_streamed_spec(truncated)
+
+    def test_chunk_boundaries(self) -> None:
+        """Test that values split across chunks, including multi-byte characters, are read intact."""
+        spec = spec_with_ids([f"ü{index}€" for index in range(40)], [f"ü{index}€" for index in range(40)])
+        spec["test_file_parameters"]["independent_variable"]["values"].append({"id": "big", "value": 1234567890123})
+        spec["test_file_parameters"]["dependent_variable"]["expected_value"]["values"].append({"id": "big", "value": 1})
+        generator = self._generator(self._write_spec(spec))
+        with patch("values_stream.CHUNK_SIZE", 7):
+            generator._load_test_parameters()
+            cases = generator.test_file_params.parameter_cases
+            self.assertEqual([case.id for case in cases], [f"ü{index}€" for index in range(40)] + ["big"])
+            self.assertEqual(cases[40].input, 1234567890123)
+            self.assertEqual(cases[2].id, "ü2€")
+        self.assertIsInstance(generator.test_file_params.parameter_cases.values, StreamedValues)
+
+    def test_memory_is_bounded(self) -> None:
+        """Test that writing the table of a large spec holds far less than the file in memory."""
+        path = self._write_spec(parametrized_spec(100_000))
+        generator = self._generator(path, "jsonl")
+        tracemalloc.start()
+        try:
+            output_path = generator.generate_to_file()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(output_path.with_suffix(".cases.jsonl").read_text().splitlines()), 100_000)
+        self.assertLess(peak, path.stat().st_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
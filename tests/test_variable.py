@@ -1,4 +1,7 @@
+from array import array
+import json
 from pathlib import Path
+import pickle
 import sys
 import unittest
 
@@ -10,7 +13,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from schemas.expected_value import ExpectedValue
 from schemas.statistical_type import StatisticalType
-from schemas.variable import Variable, _get_python_type_from_statistical_type
+from parameter_table import ColumnCases, build_parameter_cases
+from schemas.variable import ParameterValue, ValueColumns, Variable, _get_python_type_from_statistical_type
 
 
 class TestGetPythonType(unittest.TestCase):
@@ -97,5 +101,73 @@ class TestVariableProperties(unittest.TestCase):
         self.assertEqual(self.variable_with_expected.type_in_python, float)
 
 
+class TestValueColumns(unittest.TestCase):
+    """Test the columnar storage of values lists."""
+
+    def _variable(self, values: list, statistical_type: str = "discrete") -> Variable:
+        """A variable with a values list."""
+        return Variable.model_validate({
+            "name": "Size", "description": "A size", "statistical_type": statistical_type, "unit": "bytes",
+            "values": values
+        })
+
+    def test_uniform_values_are_columns(self) -> None:
+        """Test that numbers and strings of one type are stored in typed columns and read back unchanged."""
+        integers = self._variable([1, 2, 3]).values
+        self.assertIsInstance(integers, ValueColumns)
+        self.assertEqual(integers.values, array("q", [1, 2, 3]))
+        self.assertEqual(integers, [1, 2, 3])
+
+        floats = self._variable([0.5, 1.5], "continuous").values
+        self.assertEqual(floats.values, array("d", [0.5, 1.5]))
+
+        categories = self._variable(['"red"', '"blue"', '"red"'], "nominal").values
+        self.assertIs(categories.values[0], categories.values[2])
+
+        objects = self._variable([{"id": "small", "value": 1, "description": "Small"}, {"value": 2}]).values
+        self.assertEqual(objects.ids, ["small", None])
+        self.assertEqual(objects[0], ParameterValue(id="small", value=1, description="Small"))
+        self.assertEqual(objects[-1], ParameterValue(value=2))
+        self.assertEqual(pickle.loads(pickle.dumps(objects)), objects)
+        self.assertEqual(self._variable([{"value": 1}]).model_dump()["values"], [{"id": None, "value": 1, "description": None}])
+
+    def test_mixed_values_are_lists(self) -> None:
+        """Test that values of mixed types keep their own types in a plain list."""
+        for values in ([1, 2.5], [1, '"a"'], [True, False], [{"value": 1}, 2], [{"id": 1, "value": 1}], [2 ** 70]):
+            variable = self._variable(values)
+            self.assertIsInstance(variable.values, list)
+        self.assertEqual(self._variable([1, 2.5]).values, [1, 2.5])
+
+    def test_column_follows_statistical_type(self) -> None:
+        """Test that the column is picked by statistical type, with the ints of a continuous variable as floats."""
+        variable = Variable.model_validate_json(json.dumps({
+            "name": "Load", "description": "A load", "statistical_type": "CONTINUOUS", "unit": "kg",
+            "values": [1, 1.5, 2]
+        }))
+        self.assertIsInstance(variable.values, ValueColumns)
+        self.assertEqual(variable.values.values, array("d", [1.0, 1.5, 2.0]))
+        self.assertEqual(self._variable([{"id": "a", "value": 1}, {"id": "b", "value": 0.5}], "continuous").values.ids, ["a", "b"])
+
+        # Values that do not fit the statistical type are validated one by one
+        self.assertEqual(self._variable([1.0, 2.0]).values, [1.0, 2.0])
+        self.assertIsInstance(self._variable([1, 2], "nominal").values, list)
+        self.assertEqual(self._variable(['"a"', {"value": 1}], "nominal").values, ['"a"', ParameterValue(value=1)])
+
+    def test_cases_from_columns(self) -> None:
+        """Test that cases are built from the columns as from a list."""
+        dependent = Variable.model_validate({
+            "name": "Valid", "description": "Validity", "statistical_type": "nominal", "unit": "flag",
+            "expected_value": {"value": "True"}
+        })
+        cases = build_parameter_cases(self._variable([{"id": "a", "value": 4}, {"id": "b", "value": 8}]), dependent)
+        self.assertIsInstance(cases, ColumnCases)
+        self.assertEqual([tuple(case) for case in cases], [("a", 4, "True", ()), ("b", 8, "True", ())])
+        self.assertEqual(cases[-1].id, "b")
+
+        dependent.expected_value = ExpectedValue(values=[{"id": "b", "value": 16}, {"id": "a", "value": 8}])
+        cases = build_parameter_cases(self._variable([{"id": "a", "value": 4}, {"id": "b", "value": 8}]), dependent)
+        self.assertEqual([(case.id, case.input, case.expected) for case in cases], [("a", 4, 8), ("b", 8, 16)])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for generating variants of a test for many sets of test parameters.
+"""
+import json
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Adjust the import path to properly import the variants module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from cli import CLI
+from configs import Configs
+from generator import TestFileParameters, TestGenerator
+from parameter_table import write_parameter_table
+from tests.helpers import parametrized_spec
+from variants import expand_test_params_matrix, variant_name
+
+
+def _conditional_spec() -> dict:
+    """A parametrized spec with a validation procedure for each response type."""
+    spec = parametrized_spec(3)
+    spec["test_file_parameters"]["dependent_variable"]["expected_value"]["validation_procedures"] = [
+        {"name": "validate_json", "description": "JSON responses", "condition": "response_type == 'json'"},
+        {"name": "validate_xml", "description": "XML responses", "condition": "response_type == 'xml'"},
+        {"name": "validate_auth", "description": "Authenticated responses", "condition": "auth_enabled"}
+    ]
+    return spec
+
+
+class TestVariantMatrix(unittest.TestCase):
+    """Test case for expanding and naming variants."""
+
+    def test_expand_matrix(self) -> None:
+        """Test that lists of values are combined and other values are fixed."""
+        variants = expand_test_params_matrix({"response_type": ["json", "xml"], "auth_enabled": [True, False], "retries": 3})
+        self.assertEqual(len(variants), 4)
+        self.assertEqual(variants[1], {"response_type": "json", "auth_enabled": False, "retries": 3})
+        self.assertEqual(expand_test_params_matrix({}), [{}])
+
+    def test_variant_name(self) -> None:
+        """Test that variants are named after their test parameters."""
+        self.assertEqual(variant_name({"response_type": "json", "auth_enabled": True}), "response_type_json_auth_enabled_true")
+        self.assertEqual(variant_name({"path": "a/b c"}), "path_a_b_c")
+        self.assertEqual(variant_name({}), "default")
+
+
+class TestGenerateVariants(unittest.TestCase):
+    """Test case for generating every variant from one parse of the spec."""
+
+    def setUp(self) -> None:
+        """Create a spec and an output directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.work_path = Path(self.temp_dir.name)
+        self.spec_path = self.work_path / "api.json"
+        self.spec_path.write_text(json.dumps(_conditional_spec()))
+        self.config = Configs.model_validate({
+            "name": "api", "description": "API responses", "json_file_path": self.spec_path,
+            "output_dir": self.work_path, "harness": "pytest", "parameter_table": "jsonl"
+        })
+
+    def tearDown(self) -> None:
+        """Clean up the working directory."""
+        self.temp_dir.cleanup()
+
+    def test_one_parse_many_outputs(self) -> None:
+        """Test that the spec is parsed and the table written once, with one file per variant."""
+        param_sets = expand_test_params_matrix({"response_type": ["json", "xml"], "auth_enabled": [True, False]})
+        generator = TestGenerator(self.config)
+        with patch("generator.TestFileParameters.from_json", wraps=TestFileParameters.from_json) as parse, \
+             patch("generator.write_parameter_table", wraps=write_parameter_table) as write:
+            paths = generator.generate_variants(param_sets)
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(write.call_count, 1)
+
+        self.assertEqual([path.name for path in paths], [
+            "test_api_response_type_json_auth_enabled_true.py", "test_api_response_type_json_auth_enabled_false.py",
+            "test_api_response_type_xml_auth_enabled_true.py", "test_api_response_type_xml_auth_enabled_false.py"
+        ])
+        content = paths[2].read_text()
+        self.assertIn("validate_xml: XML responses", content)
+        self.assertIn("validate_auth: Authenticated responses", content)
+        self.assertNotIn("validate_json", content)
+        self.assertNotIn("validate_auth", paths[3].read_text())
+        self.assertIn('with_name("test_api.cases.jsonl")', content)
+        self.assertTrue((self.work_path / "test_api.cases.jsonl").exists())
+
+    def test_colliding_variants(self) -> None:
+        """Test that variants that would share a file are rejected before anything is written."""
+        with self.assertRaisesRegex(ValueError, "overwrite each other: test_api_mode_a_b.py"):
+            TestGenerator(self.config).generate_variants([{"mode": "a b"}, {"mode": "a/b"}])
+        self.assertEqual(list(self.work_path.glob("test_*")), [])
+
+    def test_cli_variants(self) -> None:
+        """Test --test-params-matrix, a list of --test-params, and that both cannot be combined."""
+        base_args = [
+            "--name", "api", "--description", "API", "--test_parameter_json", str(self.spec_path),
+            "--output_dir", str(self.work_path / "cli")
+        ]
+        cli = CLI()
+        args = cli.parse_args(base_args + [
+            "--test-params", '{"auth_enabled": true}', "--test-params-matrix", '{"response_type": ["json", "xml"]}'
+        ])
+        self.assertTrue(cli.validate_config(args))
+        self.assertEqual(cli.run(), 0)
+        self.assertEqual(sorted(path.name for path in (self.work_path / "cli").glob("test_*.py")), [
+            "test_api_auth_enabled_true_response_type_json.py", "test_api_auth_enabled_true_response_type_xml.py"
+        ])
+
+        cli = CLI()
+        args = cli.parse_args(base_args + ["--test-params", '[{"response_type": "json"}, {}]'])
+        self.assertTrue(cli.validate_config(args))
+        self.assertEqual(cli.test_params_variants, [{"response_type": "json"}, {}])
+        self.assertIsNone(cli.configs.test_params)
+
+        cli = CLI()
+        args = cli.parse_args(base_args + ["--test-params", "[{}]", "--test-params-matrix", '{"a": [1]}'])
+        with self.assertLogs("test_generator", level="ERROR"):
+            self.assertFalse(cli.validate_config(args))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Tests for watch mode.
+"""
+import json
+from pathlib import Path
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+# Adjust the import path to properly import the watch module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+from bulk import BulkGenerator, discover_jobs
+from cli import CLI
+from tests.helpers import sample_spec
+from watch import InotifyWatcher, PollingWatcher, WatchSession, glob_root
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    """Poll a condition until it holds or the timeout passes."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestWatchers(unittest.TestCase):
+    """Test case for the file watchers."""
+
+    def setUp(self) -> None:
+        """Create a directory to watch."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = Path(self.temp_dir.name).resolve()
+        (self.directory / "existing.json").write_text("{}")
+
+    def tearDown(self) -> None:
+        """Clean up the watched directory."""
+        self.temp_dir.cleanup()
+
+    def _check_watcher(self, watcher) -> None:
+        """Check that a watcher reports created, modified and deleted files."""
+        watcher.watch(self.directory)
+        self.assertEqual(watcher.read_changes(0.05), set())
+
+        # Polling compares mtimes, so make sure the modification is visible
+        time.sleep(0.01)
+        (self.directory / "existing.json").write_text('{"changed": true}')
+        (self.directory / "new.json").write_text("{}")
+        changed = set()
+        _wait_for(lambda: changed.update(watcher.read_changes(0.1)) or len(changed) >= 2)
+        self.assertEqual(changed, {self.directory / "existing.json", self.directory / "new.json"})
+
+        (self.directory / "new.json").unlink()
+        self.assertEqual(watcher.read_changes(1.0), {self.directory / "new.json"})
+        watcher.close()
+
+    def test_polling_watcher(self) -> None:
+        """Test change detection by polling."""
+        self._check_watcher(PollingWatcher(interval=0.01))
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+    def test_inotify_watcher(self) -> None:
+        """Test change detection with inotify, including new subdirectories of a recursive watch."""
+        self._check_watcher(InotifyWatcher())
+
+        watcher = InotifyWatcher()
+        watcher.watch(self.directory, recursive=True)
+        (self.directory / "nested").mkdir()
+        self.assertTrue(_wait_for(lambda: watcher.read_changes(0.1) is not None))
+        (self.directory / "nested" / "spec.json").write_text("{}")
+        self.assertEqual(watcher.read_changes(1.0), {self.directory / "nested" / "spec.json"})
+        watcher.close()
+
+    def test_glob_root(self) -> None:
+        """Test finding the directory a glob pattern searches."""
+        self.assertEqual(glob_root("specs/*.json"), (Path("specs"), False))
+        self.assertEqual(glob_root("specs/**/*.json"), (Path("specs"), True))
+        self.assertEqual(glob_root("*.json"), (Path("."), False))
+        self.assertEqual(glob_root("specs/one.json"), (Path("specs"), False))
+
+
+class TestWatchSession(unittest.TestCase):
+    """Test case for the WatchSession class."""
+
+    def setUp(self) -> None:
+        """Create specs and an output directory, and start a watch session."""
+        self.spec_dir = tempfile.TemporaryDirectory()
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.spec_path = Path(self.spec_dir.name)
+        self.output_path = Path(self.output_dir.name)
+        for name in ("alpha", "beta", "gamma"):
+            (self.spec_path / f"{name}.json").write_text(json.dumps(sample_spec(name)))
+
+        self.bulk_generator = BulkGenerator({"output_dir": self.output_dir.name})
+        self.bulk_generator.run(discover_jobs(spec_dir=self.spec_dir.name))
+        self.template_dir = tempfile.TemporaryDirectory()
+        for name in ("unittest_test.py.j2", "pytest_test.py.j2", "shared.j2"):
+            (Path(self.template_dir.name) / name).write_text("")
+
+        self.session = WatchSession(
+            self.bulk_generator,
+            lambda: discover_jobs(spec_dir=self.spec_dir.name),
+            [(self.spec_path, False)],
+            template_dirs=[Path(self.template_dir.name)],
+            debounce=0.02
+        )
+
+    def tearDown(self) -> None:
+        """Clean up temporary directories."""
+        self.session.watcher.close()
+        self.spec_dir.cleanup()
+        self.output_dir.cleanup()
+        self.template_dir.cleanup()
+
+    def test_changed_spec_regenerates_only_its_output(self) -> None:
+        """Test that editing one spec rewrites only its own output."""
+        stop = threading.Event()
+        thread = threading.Thread(target=self.session.run, args=(stop, 0.05), daemon=True)
+        thread.start()
+
+        before = {path.name: path.stat().st_mtime_ns for path in self.output_path.glob("*.py")}
+        (self.spec_path / "beta.json").write_text(json.dumps(sample_spec("beta changed")))
+
+        beta_output = self.output_path / "test_beta.py"
+        self.assertTrue(_wait_for(lambda: beta_output.stat().st_mtime_ns != before["test_beta.py"]))
+        self.assertEqual((self.output_path / "test_alpha.py").stat().st_mtime_ns, before["test_alpha.py"])
+        self.assertEqual((self.output_path / "test_gamma.py").stat().st_mtime_ns, before["test_gamma.py"])
+
+        stop.set()
+        thread.join(5)
+
+    def test_new_spec_is_picked_up(self) -> None:
+        """Test that a spec created while watching is generated."""
+        new_spec = self.spec_path / "delta.json"
+        new_spec.write_text(json.dumps(sample_spec("delta")))
+
+        jobs = self.session.affected_jobs({new_spec})
+        self.assertEqual([job.display_name for job in jobs], ["delta"])
+        self.assertEqual(len(self.session.jobs), 4)
+
+    def test_template_change_affects_its_harness(self) -> None:
+        """Test that a harness template change affects that harness's jobs only."""
+        template_dir = Path(self.template_dir.name).resolve()
+        self.assertEqual(self.session.affected_jobs({template_dir / "pytest_test.py.j2"}), [])
+        self.assertEqual(len(self.session.affected_jobs({template_dir / "unittest_test.py.j2"})), 3)
+        # A template that is not a harness template may be included by any of them
+        self.assertEqual(len(self.session.affected_jobs({template_dir / "shared.j2"})), 3)
+
+    def test_unrelated_file_affects_nothing(self) -> None:
+        """Test that files other than specs and templates do not trigger a rebuild."""
+        self.assertIsNone(self.session.rebuild({self.spec_path.resolve() / "notes.txt"}))
+
+    def test_cli_rejects_watch_with_jsonl(self) -> None:
+        """Test that a JSONL stream cannot be watched."""
+        cli = CLI()
+        args = cli.parse_args(["--jsonl", "-", "--watch", "--output_dir", self.output_dir.name])
+        self.assertFalse(cli.validate_config(args))
+
+
+if __name__ == "__main__":
+    unittest.main()
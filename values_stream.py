@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Incremental reading of the value tables of large spec files.
+
+A generated spec may carry a parameter table of hundreds of megabytes in
+independent_variable.values and dependent_variable.expected_value.values.
+Loading such a spec whole holds the file, its parsed JSON and the validated
+models in memory at once. Instead, a spec file at or above
+STREAMING_THRESHOLD is read in chunks: everything but the two tables is
+parsed into a small skeleton and validated as usual, while the tables are
+checked one item at a time and only their position and length are kept.
+Their items are decoded from the file again, one at a time, whenever the
+cases of the test are iterated, so memory stays bounded by the largest
+single item rather than by the table.
+"""
+from __future__ import annotations
+
+
+import codecs
+from dataclasses import dataclass, field
+import hashlib
+import itertools
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+
+from pydantic import TypeAdapter, ValidationError
+
+
+from schemas.expected_value import ParameterExpectedValue
+from schemas.test_spec import TestSpec
+from schemas.variable import ParameterValue, ValueItem
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.values_stream")
+
+
+# Spec files of at least this many bytes have their value tables streamed
+STREAMING_THRESHOLD = 32 * 1024 * 1024
+
+# Bytes read from a spec file at a time
+CHUNK_SIZE = 1024 * 1024
+
+# Locations of the value tables within a spec
+VALUES_PATH = ("test_file_parameters", "independent_variable", "values")
+EXPECTED_VALUES_PATH = ("test_file_parameters", "dependent_variable", "expected_value", "values")
+
+# Validators of a single table item, matching the item types of the models
+_VALUE_ITEM = TypeAdapter(ValueItem)
+_EXPECTED_ITEM = TypeAdapter(ParameterExpectedValue)
+
+_DECODER = json.JSONDecoder()
+_NOT_WHITESPACE = re.compile(r"[^ \t\n\r]")
+
+
+def _encoded_length(text: str) -> int:
+    """Length of text in UTF-8 bytes."""
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+class _Reader:
+    """
+    Cursor over the JSON text of a file, read in chunks.
+
+    Only the text from the current value on is held, so a file of any size
+    can be walked with memory bounded by the largest single value.
+    """
+
+    def __init__(self, file: Any):
+        """
+        Initialize the cursor at the current position of a binary file.
+
+        Args:
+            file: File opened in binary mode
+        """
+        self.file = file
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.offset = file.tell()
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Drop the text already read and append the next chunk; False at the end of the file."""
+        if self.pos:
+            self.offset += _encoded_length(self.text[:self.pos])
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        chunk = self.file.read(CHUNK_SIZE)
+        self.text += self.decoder.decode(chunk, final=not chunk)
+        self.eof = not chunk
+        return bool(chunk)
+
+    def peek(self) -> str:
+        """The next character that is not whitespace, or '' at the end of the file."""
+        while True:
+            match = _NOT_WHITESPACE.search(self.text, self.pos)
+            if match is not None:
+                self.pos = match.start()
+                return self.text[self.pos]
+            self.pos = len(self.text)
+            if not self._fill():
+                return ""
+
+    def take(self, expected: str) -> None:
+        """Consume the next character, which must be one of expected."""
+        char = self.peek()
+        if not char or char not in expected:
+            found = repr(char) if char else "end of file"
+            raise ValueError(f"Invalid JSON at byte {self.tell()}: expected {' or '.join(map(repr, expected))}, found {found}")
+        self.pos += 1
+
+    def tell(self) -> int:
+        """Byte offset of the cursor in the file."""
+        return self.offset + _encoded_length(self.text[:self.pos])
+
+    def value(self) -> Any:
+        """Decode the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+                # A number at the end of the text may continue in the next chunk
+                if end < len(self.text) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"Invalid JSON at byte {self.tell()}: {e.msg}") from e
+            self._fill()
+
+
+def _items(reader: _Reader) -> Iterator[Any]:
+    """Decode the items of the array at the cursor, one at a time."""
+    reader.take("[")
+    if reader.peek() == "]":
+        reader.take("]")
+        return
+    while True:
+        yield reader.value()
+        if reader.peek() == "]":
+            reader.take("]")
+            return
+        reader.take(",")
+
+
+@dataclass
+class _TableScan:
+    """
+    What a first pass over a value table records about it.
+
+    Attributes:
+        offset: Byte offset of the table's opening bracket in the file
+        count: Number of items
+        ids: Number of items with a case id
+        id_digest: Hash of the sequence of case ids, None standing for a missing id
+    """
+    offset: int = 0
+    count: int = 0
+    ids: int = 0
+    id_digest: str = ""
+
+
+class StreamedValues(Sequence):
+    """
+    The items of a value table, decoded from the spec file whenever they are used.
+
+    Iterating opens the file and validates one item at a time. Indexing is
+    meant for in-order access, e.g. by a cartesian expansion, and continues the
+    last iteration where possible rather than rereading from the start.
+    """
+
+    def __init__(self, path: Path, offset: int, count: int, item: TypeAdapter):
+        """
+        Initialize the table.
+
+        Args:
+            path: The spec file
+            offset: Byte offset of the table's opening bracket
+            count: Number of items
+            item: Validator of one item
+        """
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.item = item
+        self._cursor: Optional[Tuple[int, Any, Iterator[Any]]] = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Any]:
+        with open(self.path, "rb") as file:
+            file.seek(self.offset)
+            for item in _items(_Reader(file)):
+                yield self.item.validate_python(item)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return list(itertools.islice(self, *index.indices(self.count)))
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("value table index out of range")
+        if self._cursor is None or index < self._cursor[0]:
+            iterator = iter(self)
+            self._cursor = (0, next(iterator), iterator)
+        position, item, iterator = self._cursor
+        while position < index:
+            position, item = position + 1, next(iterator)
+        self._cursor = (position, item, iterator)
+        return item
+
+
+@dataclass
+class StreamedSpec:
+    """
+    A spec file read with its value tables left in the file.
+
+    Attributes:
+        document: The spec without its value tables, each replaced by an empty list
+        tables: Scan of each value table found, by its location in the spec
+        path: The spec file
+    """
+    document: Dict[str, Any]
+    tables: Dict[Tuple[str, ...], _TableScan] = field(default_factory=dict)
+    path: Path = Path()
+
+    def attach(self, spec: TestSpec) -> None:
+        """
+        Give the validated spec the streamed value tables in place of the empty lists.
+
+        Args:
+            spec: The spec validated from the document
+
+        Raises:
+            ValueError: If the values conflict with a range, or their ids do not pair up
+        """
+        values = self.tables.get(VALUES_PATH)
+        if values is not None and values.count:
+            variable = spec.independent_variable
+            if variable.range is not None:
+                raise ValueError("A variable can have values or a range, but not both")
+            variable.values = StreamedValues(self.path, values.offset, values.count, _VALUE_ITEM)
+
+        expected = self.tables.get(EXPECTED_VALUES_PATH)
+        if expected is not None and expected.count and spec.dependent_variable.expected_value is not None:
+            spec.dependent_variable.expected_value.values = StreamedValues(
+                self.path, expected.offset, expected.count, _EXPECTED_ITEM
+            )
+
+        for location, scan in ((VALUES_PATH, values), (EXPECTED_VALUES_PATH, expected)):
+            if scan is not None and 0 < scan.ids < scan.count:
+                raise ValueError(f"{scan.count - scan.ids} items of {'.'.join(location[1:])} have no id")
+        if values is not None and expected is not None and values.ids and values.id_digest != expected.id_digest:
+            raise ValueError(
+                "Parameter cases do not join by id: the values and expected values of a streamed table "
+                "must list the same ids in the same order"
+            )
+
+
+def _scan_table(reader: _Reader, item: TypeAdapter, location: Tuple[str, ...]) -> _TableScan:
+    """Validate every item of a value table, recording where it is and the sequence of its ids."""
+    scan = _TableScan(offset=reader.tell())
+    digest = hashlib.sha256()
+    for index, raw in enumerate(_items(reader)):
+        try:
+            value = item.validate_python(raw)
+        except ValidationError as e:
+            raise ValueError(f"Invalid item {index} of {'.'.join(location)}: {e}") from e
+        case_id = value.id if isinstance(value, (ParameterValue, ParameterExpectedValue)) else None
+        if case_id is not None:
+            scan.ids += 1
+        digest.update(b"\0" if case_id is None else case_id.encode("utf-8") + b"\1")
+        scan.count += 1
+    scan.id_digest = digest.hexdigest()
+    return scan
+
+
+def _read_object(
+    reader: _Reader,
+    location: Tuple[str, ...],
+    tables: Dict[Tuple[str, ...], _TableScan]
+) -> Dict[str, Any]:
+    """Parse the object at the cursor, scanning the value tables below it instead of loading them."""
+    result: Dict[str, Any] = {}
+    reader.take("{")
+    if reader.peek() == "}":
+        reader.take("}")
+        return result
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError(f"Invalid JSON at byte {reader.tell()}: object keys must be strings")
+        reader.take(":")
+        child = location + (key,)
+        next_char = reader.peek()
+        if child in (VALUES_PATH, EXPECTED_VALUES_PATH) and next_char == "[":
+            item = _VALUE_ITEM if child == VALUES_PATH else _EXPECTED_ITEM
+            tables[child] = _scan_table(reader, item, child[1:])
+            result[key] = []
+        elif next_char == "{" and any(path[:len(child)] == child for path in (VALUES_PATH, EXPECTED_VALUES_PATH)):
+            result[key] = _read_object(reader, child, tables)
+        else:
+            result[key] = reader.value()
+        if reader.peek() == "}":
+            reader.take("}")
+            return result
+        reader.take(",")
+
+
+def read_streamed_spec(path: Path) -> StreamedSpec:
+    """
+    Read a spec file, leaving its value tables in the file.
+
+    Args:
+        path: The spec file
+
+    Returns:
+        StreamedSpec: The rest of the spec, and where its value tables are
+
+    Raises:
+        ValueError: If the file is not valid JSON, or an item of a table is invalid
+    """
+    path = Path(path)
+    tables: Dict[Tuple[str, ...], _TableScan] = {}
+    with open(path, "rb") as file:
+        reader = _Reader(file)
+        if reader.peek() != "{":
+            raise ValueError(f"JSON file {path} must contain a JSON object at the root level")
+        document = _read_object(reader, (), tables)
+        if reader.peek():
+            raise ValueError(f"Invalid JSON at byte {reader.tell()}: extra data after the spec")
+    logger.debug(
+        f"Streamed {', '.join(f'{scan.count} {location[-2]} values' for location, scan in tables.items()) or 'no tables'} "
+        f"from {path}"
+    )
+    return StreamedSpec(document=document, tables=tables, path=path)
+
+
+def should_stream(path: Optional[Path]) -> bool:
+    """
+    Whether a spec file is large enough to have its value tables streamed.
+
+    Args:
+        path: The spec file, or None if the spec is not read from a file
+
+    Returns:
+        bool: Whether to read the spec with read_streamed_spec()
+    """
+    if path is None:
+        return False
+    try:
+        size = os.stat(path).st_size
+    except OSError:
+        # Spec bundle entries, and missing files, are read whole and report their own errors
+        return False
+    return size >= STREAMING_THRESHOLD
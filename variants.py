@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Variants of a test generated for many sets of test parameters.
+
+Instead of running the generator once per set of --test-params, every variant
+is generated from one parsed spec (see TestGenerator.generate_variants). The
+sets are given as a list, or as a matrix whose lists of values are combined
+into every combination, e.g.
+
+    {"response_type": ["json", "xml"], "auth_enabled": [true, false]}
+
+gives four variants. Each variant is written to its own file, named after its
+test parameters: test_api_response_type_json_auth_enabled_true.py.
+"""
+from __future__ import annotations
+
+
+import itertools
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+from configs import Configs
+from utils.common.convert_to_snake_case import convert_to_snake_case
+from utils.common.sanitize_variable_name import sanitize_variable_name
+
+
+def expand_test_params_matrix(matrix: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Expand a matrix of test parameters into every combination of its values.
+
+    Args:
+        matrix: Test parameter names mapped to a list of values to vary over.
+            A value that is not a list is the same in every variant.
+
+    Returns:
+        List[Dict[str, Any]]: One set of test parameters per combination, in order
+    """
+    names = list(matrix)
+    axes = [value if isinstance(value, list) else [value] for value in matrix.values()]
+    return [dict(zip(names, values)) for values in itertools.product(*axes)]
+
+
+def variant_name(test_params: Dict[str, Any]) -> str:
+    """
+    Name a variant after its test parameters.
+
+    Args:
+        test_params: Test parameters of the variant
+
+    Returns:
+        str: Identifier-safe name, e.g. "response_type_json_auth_enabled_true"
+    """
+    if not test_params:
+        return "default"
+    return sanitize_variable_name("_".join(f"{name}_{value}" for name, value in test_params.items()))
+
+
+def get_variant_output_path(config: Configs, test_params: Dict[str, Any]) -> Path:
+    """
+    Get the path the test file of a variant is written to.
+
+    Args:
+        config: Configuration object
+        test_params: Test parameters of the variant
+
+    Returns:
+        Path: Output file path inside the configured output directory
+    """
+    test_name = convert_to_snake_case(config.name)
+    return config.output_dir / f"test_{test_name}_{variant_name(test_params)}.py"
@@ -0,0 +1,533 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Watch mode: regenerate test files when their specs or templates change.
+"""
+from __future__ import annotations
+
+
+import ctypes
+import ctypes.util
+import glob
+import logging
+import os
+from pathlib import Path
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+from bulk import HARNESSES, BulkGenerator, BulkJob, BulkSummary
+from generator import create_template_engine
+from spec_bundle import BUNDLE_SUFFIX, bundle_entry, read_spec, reload_bundle, spec_exists, spec_file
+from template_bundle import TEMPLATE_DIRS
+
+
+# Set up logger
+logger = logging.getLogger("test_generator.watch")
+
+
+# Seconds without further changes before a burst of saves is rebuilt
+DEFAULT_DEBOUNCE = 0.05
+
+# Longest a rebuild is held back by a burst that keeps going
+MAX_DEBOUNCE_WAIT = 1.0
+
+# Seconds between scans when polling
+DEFAULT_POLL_INTERVAL = 0.05
+
+# inotify event masks, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# struct inotify_event header: wd, mask, cookie, len
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """
+    Detect file changes by comparing modification times between scans.
+
+    Works everywhere, at the cost of scanning every watched directory each interval.
+    """
+
+    def __init__(self, interval: float = DEFAULT_POLL_INTERVAL):
+        """
+        Initialize the watcher.
+
+        Args:
+            interval: Seconds between scans
+        """
+        self.interval = interval
+        self.directories: Dict[Path, bool] = {}
+        self._snapshot: Dict[Path, Tuple[int, int]] = {}
+
+    def watch(self, directory: Path, recursive: bool = False) -> None:
+        """
+        Start watching the files in a directory.
+
+        Args:
+            directory: Directory to watch
+            recursive: Whether to watch its subdirectories too
+        """
+        directory = directory.resolve()
+        watched_recursively = self.directories.get(directory)
+        if watched_recursively is None or (recursive and not watched_recursively):
+            self.directories[directory] = recursive
+            self._snapshot.update(self._scan_directory(directory, recursive))
+
+    def _scan_directory(self, directory: Path, recursive: bool) -> Dict[Path, Tuple[int, int]]:
+        """Modification time and size of every file in a directory."""
+        snapshot: Dict[Path, Tuple[int, int]] = {}
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_file():
+                                stat = entry.stat()
+                                snapshot[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+                            elif recursive and entry.is_dir():
+                                pending.append(Path(entry.path))
+                        except FileNotFoundError:
+                            continue
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+        return snapshot
+
+    def read_changes(self, timeout: float) -> Optional[Set[Path]]:
+        """
+        Wait for files to change.
+
+        Args:
+            timeout: Longest to wait, in seconds
+
+        Returns:
+            Optional[Set[Path]]: Paths that were created, modified or deleted (empty on timeout)
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot: Dict[Path, Tuple[int, int]] = {}
+            for directory, recursive in self.directories.items():
+                snapshot.update(self._scan_directory(directory, recursive))
+            changed = {
+                path for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self) -> None:
+        """Stop watching."""
+        self.directories.clear()
+        self._snapshot.clear()
+
+
+class InotifyWatcher:
+    """
+    Detect file changes with Linux inotify.
+
+    The kernel reports each change as it happens, so the cost does not grow with
+    the number of watched files.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the watcher.
+
+        Raises:
+            OSError: If inotify is not available
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self._directories: Dict[int, Path] = {}
+        self._recursive: Set[Path] = set()
+        self._watched: Set[Path] = set()
+
+    def watch(self, directory: Path, recursive: bool = False) -> None:
+        """
+        Start watching the files in a directory.
+
+        Args:
+            directory: Directory to watch
+            recursive: Whether to watch its subdirectories too, including ones created later
+        """
+        directory = directory.resolve()
+        if recursive:
+            self._recursive.add(directory)
+            for root, _, _ in os.walk(directory):
+                self._add_watch(Path(root))
+        else:
+            self._add_watch(directory)
+
+    def _add_watch(self, directory: Path) -> None:
+        """Add an inotify watch for a single directory."""
+        if directory in self._watched:
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            logger.warning(f"Cannot watch {directory}: {os.strerror(errno)}")
+            return
+        self._directories[wd] = directory
+        self._watched.add(directory)
+
+    def _is_under_recursive_root(self, path: Path) -> bool:
+        """Whether a path lies inside a recursively watched directory."""
+        return any(root == path or root in path.parents for root in self._recursive)
+
+    def read_changes(self, timeout: float) -> Optional[Set[Path]]:
+        """
+        Wait for files to change.
+
+        Args:
+            timeout: Longest to wait, in seconds
+
+        Returns:
+            Optional[Set[Path]]: Paths that were created, modified or deleted (empty on timeout),
+                or None if the kernel dropped events and anything may have changed
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed: Set[Path] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b"\0")
+                offset += INOTIFY_EVENT.size + length
+
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                directory = self._directories.get(wd)
+                if directory is None or not name:
+                    continue
+                path = directory / os.fsdecode(name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and self._is_under_recursive_root(path):
+                        # Files may land in the new directory before its watch is added
+                        self.watch(path, recursive=True)
+                        changed.update(p for p in path.rglob("*") if p.is_file())
+                    continue
+                changed.add(path)
+
+    def close(self) -> None:
+        """Stop watching and release the inotify descriptor."""
+        fd, self._fd = self._fd, -1
+        if fd >= 0:
+            os.close(fd)
+
+
+def create_watcher(poll_interval: Optional[float] = None) -> "InotifyWatcher | PollingWatcher":
+    """
+    Create the best available file watcher.
+
+    Args:
+        poll_interval: Force polling with this interval instead of using inotify
+
+    Returns:
+        InotifyWatcher | PollingWatcher: inotify on Linux, polling elsewhere
+    """
+    if poll_interval is None:
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            logger.debug(f"inotify unavailable, polling instead: {e}")
+            poll_interval = DEFAULT_POLL_INTERVAL
+    return PollingWatcher(poll_interval)
+
+
+def glob_root(pattern: str) -> Tuple[Path, bool]:
+    """
+    Find the directory a glob pattern searches, and whether it searches below it.
+
+    Args:
+        pattern: Glob pattern, e.g. "specs/**/*.json"
+
+    Returns:
+        Tuple[Path, bool]: The deepest directory without wildcards, and whether the
+            pattern can match files in its subdirectories
+    """
+    parts = Path(pattern).parts
+    static: List[str] = []
+    for part in parts:
+        if glob.has_magic(part):
+            break
+        static.append(part)
+    root = Path(*static) if static else Path(".")
+    recursive = len(parts) - len(static) > 1
+    if len(static) == len(parts):
+        # No wildcards at all: the pattern names a single file
+        root = root.parent
+    return root, recursive
+
+
+class WatchSession:
+    """
+    Regenerate the outputs affected by each batch of spec or template changes.
+
+    The bulk generator, and with it the template environment, stays loaded
+    between rebuilds. Only a template change replaces the environment.
+    A change to a fragment regenerates the outputs of the specs that include it.
+    """
+
+    def __init__(
+        self,
+        bulk_generator: BulkGenerator,
+        load_jobs: Callable[[], List[BulkJob]],
+        spec_roots: Iterable[Tuple[Path, bool]],
+        template_dirs: Optional[List[Path]] = None,
+        debounce: float = DEFAULT_DEBOUNCE,
+        poll_interval: Optional[float] = None
+    ):
+        """
+        Initialize the watch session.
+
+        Args:
+            bulk_generator: Generator holding the shared template environment and defaults
+            load_jobs: Callable that (re)discovers the jobs to keep up to date
+            spec_roots: Directories to watch for spec changes, with whether to watch recursively
+            template_dirs: Template directories to watch. Defaults to the existing TEMPLATE_DIRS.
+            debounce: Seconds without further changes before a burst is rebuilt
+            poll_interval: Poll with this interval instead of using inotify
+        """
+        self.bulk_generator = bulk_generator
+        self.load_jobs = load_jobs
+        self.spec_roots = [(root.resolve(), recursive) for root, recursive in spec_roots]
+        self.template_dirs = [
+            path.resolve() for path in (TEMPLATE_DIRS if template_dirs is None else template_dirs) if path.exists()
+        ]
+        self.debounce = debounce
+        self.watcher = create_watcher(poll_interval)
+        self.jobs_by_spec: Dict[Path, List[BulkJob]] = {}
+        self.jobs_by_bundle: Dict[Path, List[BulkJob]] = {}
+        self.jobs_by_fragment: Dict[Path, List[BulkJob]] = {}
+        self.fragments_by_job: Dict[int, Set[Path]] = {}
+        self.jobs: List[BulkJob] = []
+
+        self._refresh_jobs()
+        for template_dir in self.template_dirs:
+            self.watcher.watch(template_dir)
+
+    def _refresh_jobs(self) -> None:
+        """Rediscover the jobs and watch every directory that holds one of their specs."""
+        self.jobs = self.load_jobs()
+        self.jobs_by_spec = {}
+        self.jobs_by_bundle = {}
+        # Resolving each directory once rather than each spec keeps this fast for large trees
+        resolved_dirs: Dict[Path, Path] = {}
+        for job in self.jobs:
+            if job.test_parameter_json is None:
+                continue
+            path = spec_file(job.test_parameter_json)
+            if path.parent not in resolved_dirs:
+                resolved_dirs[path.parent] = path.parent.resolve()
+            path = resolved_dirs[path.parent] / path.name
+            jobs = self.jobs_by_spec if path.suffix != BUNDLE_SUFFIX else self.jobs_by_bundle
+            jobs.setdefault(path, []).append(job)
+
+        for root, recursive in self.spec_roots:
+            self.watcher.watch(root, recursive)
+        for directory in set(resolved_dirs.values()):
+            self.watcher.watch(directory)
+        self.fragments_by_job = {}
+        self._track_fragments(self.jobs)
+
+    def _track_fragments(self, jobs: Iterable[BulkJob]) -> None:
+        """Record the fragments the specs of some jobs include, and watch the directories holding them."""
+        resolver = self.bulk_generator.fragment_resolver
+        for job in jobs:
+            if job.test_parameter_json is None:
+                continue
+            try:
+                composed = resolver.compose_json(read_spec(job.test_parameter_json), job.test_parameter_json, validate=False)
+            except (OSError, ValueError) as e:
+                # Generating the spec reports the error
+                logger.debug(f"Could not resolve the fragments of {job.test_parameter_json}: {e}")
+                composed = None
+            # A fragment in a bundle changes with the bundle
+            fragments = {spec_file(path) for path in composed.dependencies} if composed is not None else set()
+            self.fragments_by_job[id(job)] = fragments
+            for directory in {fragment.parent for fragment in fragments}:
+                self.watcher.watch(directory)
+
+        self.jobs_by_fragment = {}
+        for job in self.jobs:
+            for fragment in self.fragments_by_job.get(id(job), ()):
+                self.jobs_by_fragment.setdefault(fragment, []).append(job)
+
+    def _bundle_entries(self, path: Path) -> Set[str]:
+        """Entries of a bundle that jobs are generated from and that it still holds."""
+        return {
+            bundle_entry(job.test_parameter_json)[1] for job in self.jobs_by_bundle.get(path, [])
+            if spec_exists(job.test_parameter_json)
+        }
+
+    def _job_harness(self, job: BulkJob) -> str:
+        """The harness a job renders with."""
+        return job.harness or self.bulk_generator.defaults.get("harness", "unittest")
+
+    def affected_jobs(self, changed: Optional[Set[Path]]) -> List[BulkJob]:
+        """
+        Work out which jobs a batch of changes affects.
+
+        A changed spec affects its own jobs; a changed spec bundle affects the
+        jobs of the entries whose content hash changed; a changed fragment
+        affects the jobs whose specs include it; a changed harness template
+        affects every job using that harness; any other template change affects
+        every job. New, deleted or renamed specs (and manifest edits) are picked
+        up by rediscovering the jobs when a JSON file or bundle appears, a known
+        spec disappears, or a bundle gains or loses entries.
+
+        Args:
+            changed: Changed paths, or None if anything may have changed
+
+        Returns:
+            List[BulkJob]: Jobs to regenerate, in job order
+        """
+        if changed is None:
+            self._reload_templates()
+            self._refresh_jobs()
+            return list(self.jobs)
+
+        template_changes = {path for path in changed if path.parent in self.template_dirs}
+        spec_changes = {path.resolve() for path in changed - template_changes}
+
+        # Names of the entries that changed in each rewritten bundle, or None if it cannot be compared
+        bundle_changes = {path: reload_bundle(path) for path in spec_changes if path in self.jobs_by_bundle}
+
+        if any(
+            not path.exists() if path in self.jobs_by_spec
+            else path.suffix in (".json", BUNDLE_SUFFIX) and path not in self.jobs_by_fragment and path not in bundle_changes
+            for path in spec_changes
+        ) or any(
+            entries is None or not entries <= self._bundle_entries(path)
+            for path, entries in bundle_changes.items()
+        ):
+            # A spec came or went, or a manifest changed
+            self._refresh_jobs()
+
+        harnesses: Set[str] = set()
+        if template_changes:
+            self._reload_templates()
+            names = {path.name for path in template_changes}
+            known = {f"{harness}_test.py.j2": harness for harness in HARNESSES}
+            if names - known.keys():
+                harnesses.update(HARNESSES)
+            harnesses.update(known[name] for name in names if name in known)
+
+        selected = {id(job) for path in spec_changes for job in self.jobs_by_spec.get(path, [])}
+        selected.update(
+            id(job) for path, entries in bundle_changes.items() for job in self.jobs_by_bundle.get(path, [])
+            if entries is None or bundle_entry(job.test_parameter_json)[1] in entries
+        )
+        selected.update(id(job) for path in spec_changes for job in self.jobs_by_fragment.get(path, []))
+        # An edited spec may now include other fragments
+        self._track_fragments(job for path in spec_changes for job in self.jobs_by_spec.get(path, []))
+        if harnesses:
+            selected.update(id(job) for job in self.jobs if self._job_harness(job) in harnesses)
+        return [job for job in self.jobs if id(job) in selected]
+
+    def _reload_templates(self) -> None:
+        """Replace the template environment so edited templates are picked up."""
+        self.bulk_generator.template_engine = create_template_engine()
+        self.bulk_generator.preload_templates()
+
+    def wait_for_changes(self, timeout: float) -> Optional[Set[Path]]:
+        """
+        Wait for a burst of changes to settle.
+
+        Args:
+            timeout: Longest to wait for the first change, in seconds
+
+        Returns:
+            Optional[Set[Path]]: Every path changed in the burst (empty on timeout),
+                or None if anything may have changed
+        """
+        changed = self.watcher.read_changes(timeout)
+        if not changed:
+            return changed
+
+        deadline = time.monotonic() + MAX_DEBOUNCE_WAIT
+        while time.monotonic() < deadline:
+            more = self.watcher.read_changes(self.debounce)
+            if more is None:
+                return None
+            if not more:
+                break
+            changed |= more
+        return changed
+
+    def rebuild(self, changed: Optional[Set[Path]]) -> Optional[BulkSummary]:
+        """
+        Regenerate the outputs affected by a batch of changes.
+
+        Args:
+            changed: Changed paths, or None if anything may have changed
+
+        Returns:
+            Optional[BulkSummary]: Summary of the rebuild, or None if nothing was affected
+        """
+        jobs = self.affected_jobs(changed)
+        if not jobs:
+            return None
+        return self.bulk_generator.run(jobs)
+
+    def run(self, stop_event: Optional[threading.Event] = None, poll_timeout: float = 0.5) -> None:
+        """
+        Watch and rebuild until stopped.
+
+        Args:
+            stop_event: Event that ends the session when set. Without one, runs until interrupted.
+            poll_timeout: Seconds between checks of the stop event
+        """
+        logger.info(f"Watching {len(self.jobs)} specs and {len(self.template_dirs)} template directories for changes")
+        try:
+            while stop_event is None or not stop_event.is_set():
+                try:
+                    changed = self.wait_for_changes(poll_timeout)
+                except OSError as e:
+                    logger.error(f"Error watching for changes: {e}")
+                    break
+                if changed == set():
+                    continue
+                try:
+                    summary = self.rebuild(changed)
+                except Exception as e:
+                    # Keep watching; the next save may fix it
+                    logger.error(f"Error rebuilding after change: {e}")
+                    continue
+                if summary is not None:
+                    summary.log()
+        except KeyboardInterrupt:
+            logger.info("Stopped watching")
+        finally:
+            self.watcher.close()